@@ -14,18 +14,18 @@ if sys.platform == 'win32' and not isinstance(asyncio.get_event_loop_policy(), a
 
 from fastapi import FastAPI, HTTPException, Depends, Request, Query
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
-from typing import Optional, List, Dict, Any
+from pydantic import BaseModel, Field, create_model
+from typing import Optional, List, Dict, Any, Literal
+from contextlib import asynccontextmanager
 from datetime import datetime
 from enum import Enum
 import re
 import json
 import os
-import httpx
 
 # Agregar path del backend
 sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from fastapi.responses import StreamingResponse
+from fastapi.responses import Response, StreamingResponse
 
 from sqlalchemy.orm import Session
 from sqlalchemy import create_engine
@@ -39,12 +39,39 @@ from models import (
 from services.reglas_service import ReglasService
 from services.agente_service import AgenteValuacionService, GeneradorPromptDinamico
 from services.browser_service import BrowserService
+from services.cache_http import respuesta_json, respuesta_versionada
+from services.escritor_auditoria import EscritorAuditoria
+from services.parseo_json import extraer_json, validar_resultado_valuacion, registrar_respuesta_cruda
+from services.servicios_externos import (
+    BUSQUEDA_WEB_URL, GOOGLE_SEARCH_URL, url_gemini_generate, url_groq_chat, url_ollama_generate
+)
+from services.motor import (
+    FuenteHistorica, LoteVehiculos, PipelineValuacion, ahora_configuracion, aplicar_ajustes,
+    cargar_comparables_historicos, cargar_snapshots, compilar_ajustes, nueva_semilla, repetir_lote,
+    repetir_valuacion, simular_reglas
+)
+from services.salida_estructurada import (
+    parametros_ollama, parametros_groq, parametros_gemini, groq_rechazo_json_schema,
+    instrucciones_json_object
+)
+from services.trazas import (
+    al_terminar_span, anotar, instrumentar_sqlalchemy, resumen_tiempos, span, tokens_de_traza
+)
+from services import metricas
+from services.perfilador import PERFILADOR, MiddlewarePerfilador
 
 
 # ============================================
 # CONFIGURACIÓN
 # ============================================
 
+# Con migraciones como paso aparte del despliegue (python migrar.py) se
+# desactiva para que cada réplica arranque sin tocar el esquema
+CREAR_TABLAS_AL_INICIAR = os.getenv("CREAR_TABLAS_AL_INICIAR", "1") == "1"
+# Auditoría de reglas por lotes en un hilo, con diario en disco (services/escritor_auditoria.py);
+# en 0 se escribe en la misma transacción que cada cambio
+AUDITORIA_DIFERIDA = os.getenv("AUDITORIA_DIFERIDA", "1") == "1"
+
 # Configuración para Google Custom Search (100 búsquedas gratis/día)
 GOOGLE_SEARCH_API_KEY = os.getenv("GOOGLE_SEARCH_API_KEY", "")
 GOOGLE_SEARCH_CX = os.getenv("GOOGLE_SEARCH_CX", "") # ID del motor de búsqueda
@@ -58,13 +85,29 @@ db_path = os.path.join(BASE_DIR, "valuacion.db")
 DATABASE_URL = f"sqlite:///{db_path}"
 engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False})
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+escritor_auditoria = EscritorAuditoria(engine, os.getenv("AUDITORIA_DIARIO", os.path.join(BASE_DIR, "auditoria.diario")))
+
+instrumentar_sqlalchemy()
+metricas.instrumentar_db()
+al_terminar_span(metricas.observar_span)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Arranque del servidor: el esquema se crea/actualiza acá y no al importar el módulo"""
+    if CREAR_TABLAS_AL_INICIAR:
+        crear_tablas(engine)
+    if AUDITORIA_DIFERIDA:
+        escritor_auditoria.iniciar()
+    yield
+    escritor_auditoria.cerrar()
 
-crear_tablas(engine)
 
 app = FastAPI(
     title="API Valuación de Vehículos",
     description="Sistema de valuación con reglas dinámicas y auditoría completa",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -73,6 +116,8 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(metricas.MiddlewareMetricas)
+app.add_middleware(MiddlewarePerfilador)
 
 
 def get_db():
@@ -129,6 +174,8 @@ class ReglaResponse(BaseModel):
     fecha_creacion: datetime
     modificado_por: Optional[str]
     fecha_modificacion: Optional[datetime]
+    # Conflictos detectados al guardar (solo en creación y modificación)
+    advertencias: List[str] = []
 
     class Config:
         from_attributes = True
@@ -184,7 +231,7 @@ async def root():
 
 
 @app.post("/reglas", response_model=ReglaResponse, tags=["Reglas"])
-async def crear_regla(
+def crear_regla(
     regla: ReglaCreate,
     request: Request,
     usuario_id: str = Query(...),
@@ -211,30 +258,126 @@ async def crear_regla(
             descripcion=nueva.descripcion, activo=nueva.activo,
             orden=nueva.orden, version=nueva.version,
             creado_por=nueva.creado_por, fecha_creacion=nueva.fecha_creacion,
-            modificado_por=nueva.modificado_por, fecha_modificacion=nueva.fecha_modificacion
+            modificado_por=nueva.modificado_por, fecha_modificacion=nueva.fecha_modificacion,
+            advertencias=nueva.advertencias
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+class SimulacionReglasRequest(BaseModel):
+    # Borrador de una regla nueva y/o cambios sobre reglas existentes (por código)
+    regla: Optional[ReglaCreate] = None
+    cambios: List[Dict[str, Any]] = []
+    muestra: int = Field(200, ge=1, le=5000, description="Valuaciones recientes sobre las que se simula")
+
+
+@app.post("/reglas/simular", tags=["Reglas"])
+async def simular_reglas_borrador(request: SimulacionReglasRequest, db: Session = Depends(get_db)):
+    """
+    Simula un borrador de reglas antes de guardarlo: repite las valuaciones
+    recientes con la configuración vigente, con y sin los cambios, sobre los
+    comparables guardados (sin IA ni red) y devuelve cómo se corre la
+    distribución de precios.
+    """
+    cambios = list(request.cambios)
+    if request.regla:
+        cambios.append({**request.regla.model_dump(exclude={"descripcion"}),
+                        "tipo": request.regla.tipo.value, "activo": True})
+    if not cambios:
+        raise HTTPException(status_code=400, detail="Debe enviar una regla o al menos un cambio")
+
+    service = ReglasService(db)
+    config = service.generar_configuracion_prompt()
+    snapshots = cargar_snapshots(db, limite=request.muestra)
+    try:
+        resultado = await asyncio.to_thread(simular_reglas, snapshots, config, cambios)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    # Conflictos del borrador con las reglas activas, como al guardarlo
+    advertencias = []
+    if request.regla:
+        advertencias = service.analizar_conflictos(Regla(
+            codigo=request.regla.codigo, nombre=request.regla.nombre, tipo=TipoRegla(request.regla.tipo.value),
+            parametros=request.regla.parametros, orden=request.regla.orden, activo=True
+        ))
+    return {**resultado, "advertencias": advertencias}
+
+
+class ReglaImportada(ReglaCreate):
+    activo: bool = True
+
+
+class ImportacionReglasRequest(BaseModel):
+    # Acepta tal cual lo que devuelve GET /reglas/exportar (los demás campos se ignoran)
+    reglas: List[ReglaImportada] = Field(..., min_length=1)
+    omitir_existentes: bool = False
+    notas: Optional[str] = None
+
+
+@app.post("/reglas/bulk", tags=["Reglas"])
+def importar_reglas(
+    importacion: ImportacionReglasRequest,
+    request: Request,
+    usuario_id: str = Query(...),
+    db: Session = Depends(get_db)
+):
+    """
+    Crea muchas reglas en una sola transacción (todo o nada), con su
+    historial y auditoría. Con omitir_existentes los códigos que ya existen
+    se saltean en lugar de rechazar el lote.
+    """
+    service = ReglasService(db)
+    try:
+        return service.importar_reglas(
+            [{**r.model_dump(), "tipo": r.tipo.value} for r in importacion.reglas],
+            usuario_id=usuario_id,
+            omitir_existentes=importacion.omitir_existentes,
+            ip_address=request.client.host if request.client else None,
+            user_agent=request.headers.get("user-agent"),
+            notas=importacion.notas
         )
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
 
 
+@app.get("/reglas/exportar", tags=["Reglas"])
+async def exportar_reglas(
+    formato: Literal["json", "yaml"] = "json",
+    solo_activas: bool = True,
+    db: Session = Depends(get_db)
+):
+    """Exporta las reglas en el formato que acepta POST /reglas/bulk"""
+    contenido = GeneradorPromptDinamico(db).exportar_reglas(formato, solo_activas=solo_activas)
+    return Response(
+        contenido,
+        media_type="application/json" if formato == "json" else "application/yaml",
+        headers={"Content-Disposition": f'attachment; filename="reglas_{datetime.now():%Y%m%d}.{formato}"'}
+    )
+
+
 @app.get("/reglas", response_model=List[ReglaResponse], tags=["Reglas"])
 async def listar_reglas(
+    request: Request,
     tipo: Optional[TipoReglaEnum] = None,
     solo_activas: bool = True,
     db: Session = Depends(get_db)
 ):
-    """Lista reglas con filtros"""
-    service = ReglasService(db)
-    tipo_filtro = TipoRegla(tipo.value) if tipo else None
-    reglas = service.listar_reglas(tipo=tipo_filtro, solo_activas=solo_activas)
-    
-    return [ReglaResponse(
-        id=r.id, codigo=r.codigo, nombre=r.nombre, tipo=r.tipo.value,
-        parametros=r.parametros, descripcion=r.descripcion, activo=r.activo,
-        orden=r.orden, version=r.version, creado_por=r.creado_por,
-        fecha_creacion=r.fecha_creacion, modificado_por=r.modificado_por,
-        fecha_modificacion=r.fecha_modificacion
-    ) for r in reglas]
+    """Lista reglas con filtros (ETag: versión del conjunto de reglas; 304 si no cambiaron)"""
+    def construir():
+        service = ReglasService(db)
+        tipo_filtro = TipoRegla(tipo.value) if tipo else None
+        reglas = service.listar_reglas(tipo=tipo_filtro, solo_activas=solo_activas)
+        return [ReglaResponse(
+            id=r.id, codigo=r.codigo, nombre=r.nombre, tipo=r.tipo.value,
+            parametros=r.parametros, descripcion=r.descripcion, activo=r.activo,
+            orden=r.orden, version=r.version, creado_por=r.creado_por,
+            fecha_creacion=r.fecha_creacion, modificado_por=r.modificado_por,
+            fecha_modificacion=r.fecha_modificacion
+        ) for r in reglas]
+
+    return respuesta_versionada(request, ("reglas", tipo, solo_activas), ReglasService(db).version_conjunto(), construir)
 
 
 @app.get("/reglas/{regla_id}", response_model=ReglaResponse, tags=["Reglas"])
@@ -254,7 +397,7 @@ async def obtener_regla(regla_id: str, db: Session = Depends(get_db)):
 
 
 @app.put("/reglas/{regla_id}", response_model=ReglaResponse, tags=["Reglas"])
-async def modificar_regla(
+def modificar_regla(
     regla_id: str,
     cambios: ReglaUpdate,
     request: Request,
@@ -282,14 +425,14 @@ async def modificar_regla(
             parametros=regla.parametros, descripcion=regla.descripcion, activo=regla.activo,
             orden=regla.orden, version=regla.version, creado_por=regla.creado_por,
             fecha_creacion=regla.fecha_creacion, modificado_por=regla.modificado_por,
-            fecha_modificacion=regla.fecha_modificacion
+            fecha_modificacion=regla.fecha_modificacion, advertencias=regla.advertencias
         )
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
 
 
 @app.delete("/reglas/{regla_id}", tags=["Reglas"])
-async def eliminar_regla(
+def eliminar_regla(
     regla_id: str,
     request: Request,
     usuario_id: str = Query(...),
@@ -313,7 +456,7 @@ async def eliminar_regla(
 
 
 @app.post("/reglas/{regla_id}/restaurar", response_model=ReglaResponse, tags=["Reglas"])
-async def restaurar_regla(
+def restaurar_regla(
     regla_id: str,
     request: Request,
     usuario_id: str = Query(...),
@@ -334,7 +477,7 @@ async def restaurar_regla(
             parametros=regla.parametros, descripcion=regla.descripcion, activo=regla.activo,
             orden=regla.orden, version=regla.version, creado_por=regla.creado_por,
             fecha_creacion=regla.fecha_creacion, modificado_por=regla.modificado_por,
-            fecha_modificacion=regla.fecha_modificacion
+            fecha_modificacion=regla.fecha_modificacion, advertencias=regla.advertencias
         )
     except ValueError as e:
         raise HTTPException(status_code=404, detail=str(e))
@@ -361,7 +504,7 @@ async def obtener_historial(regla_id: str, db: Session = Depends(get_db)):
 
 
 @app.get("/reglas/{regla_id}/auditoria", response_model=List[AuditoriaResponse], tags=["Auditoría"])
-async def obtener_auditoria_regla(regla_id: str, limit: int = 50, db: Session = Depends(get_db)):
+def obtener_auditoria_regla(regla_id: str, limit: int = 50, db: Session = Depends(get_db)):
     """Auditoría de una regla específica"""
     service = ReglasService(db)
     auditorias = service.obtener_auditoria_regla(regla_id=regla_id, limit=limit)
@@ -376,7 +519,8 @@ async def obtener_auditoria_regla(regla_id: str, limit: int = 50, db: Session =
 
 
 @app.get("/auditoria", response_model=List[AuditoriaResponse], tags=["Auditoría"])
-async def listar_auditoria_general(
+def listar_auditoria_general(
+    request: Request,
     usuario_id: Optional[str] = None,
     accion: Optional[str] = None,
     fecha_desde: Optional[datetime] = None,
@@ -384,21 +528,21 @@ async def listar_auditoria_general(
     limit: int = 100,
     db: Session = Depends(get_db)
 ):
-    """Auditoría general del sistema"""
+    """Auditoría general del sistema (ETag: responde 304 si no hubo cambios)"""
     service = ReglasService(db)
     accion_enum = TipoAccion(accion) if accion else None
     auditorias = service.obtener_auditoria_regla(
         usuario_id=usuario_id, accion=accion_enum,
         fecha_desde=fecha_desde, fecha_hasta=fecha_hasta, limit=limit
     )
-    return [AuditoriaResponse(
+    return respuesta_json(request, [AuditoriaResponse(
         id=a.id, regla_id=a.regla_id, usuario_id=a.usuario_id,
         usuario_nombre=a.usuario.nombre_completo if a.usuario else None,
         accion=a.accion.value, fecha=a.fecha,
         campos_modificados=a.campos_modificados,
         valor_anterior=a.valor_anterior, valor_nuevo=a.valor_nuevo,
         notas=a.notas
-    ) for a in auditorias]
+    ) for a in auditorias])
 
 
 @app.get("/reglas/{regla_id}/comparar", tags=["Auditoría"])
@@ -421,17 +565,21 @@ async def comparar_versiones(
 # ============================================
 
 @app.get("/configuracion/actual", tags=["Configuración"])
-async def obtener_config_actual(db: Session = Depends(get_db)):
-    """Configuración actual basada en reglas activas"""
-    service = ReglasService(db)
-    return service.generar_configuracion_prompt()
+async def obtener_config_actual(request: Request, db: Session = Depends(get_db)):
+    """
+    Configuración actual basada en reglas activas. Se arma una vez por versión
+    del conjunto de reglas (metadata.generado_en es el momento en que se armó).
+    """
+    return respuesta_versionada(request, "configuracion_actual", ReglasService(db).version_conjunto(),
+                                lambda: ReglasService(db).generar_configuracion_prompt())
 
 
 @app.get("/configuracion/prompt", tags=["Configuración"])
-async def obtener_prompt(db: Session = Depends(get_db)):
-    """Genera el prompt completo para el agente"""
-    generador = GeneradorPromptDinamico(db)
-    return {"prompt": generador.generar_prompt_completo()}
+async def obtener_prompt(request: Request, db: Session = Depends(get_db)):
+    """Genera el prompt completo para el agente (incluye la fecha: cambia también cada día)"""
+    version = f"{ReglasService(db).version_conjunto()}-{datetime.now():%Y%m%d}"
+    return respuesta_versionada(request, "configuracion_prompt", version,
+                                lambda: {"prompt": GeneradorPromptDinamico(db).generar_prompt_completo()})
 
 
 # ============================================
@@ -458,6 +606,52 @@ async def listar_usuarios(db: Session = Depends(get_db)):
     return [{"id": u.id, "email": u.email, "nombre": u.nombre_completo, "rol": u.rol} for u in usuarios]
 
 
+def verificar_admin(usuario_id: str = Query(...), db: Session = Depends(get_db)) -> Usuario:
+    """Dependencia de los endpoints de administración: el usuario debe tener rol admin"""
+    usuario = db.query(Usuario).filter(Usuario.id == usuario_id).first()
+    if not usuario:
+        raise HTTPException(status_code=404, detail="Usuario no encontrado")
+    if usuario.rol != "admin":
+        raise HTTPException(status_code=403, detail="Requiere rol admin")
+    return usuario
+
+
+# ============================================
+# ENDPOINTS - ADMINISTRACIÓN
+# ============================================
+
+class PerfiladorRequest(BaseModel):
+    # Cerrar tras N solicitudes (a `rutas`, si se indican) o T segundos, lo que ocurra primero
+    solicitudes: Optional[int] = Field(None, ge=1, example=5)
+    segundos: Optional[float] = Field(None, gt=0, le=600, example=60)
+    rutas: List[str] = Field(default_factory=list, example=["/buscar_urls", "/valuaciones"])
+    intervalo_ms: float = Field(5.0, ge=1, le=100)
+
+
+@app.post("/admin/perfilador", tags=["Administración"])
+async def iniciar_perfilador(request: PerfiladorRequest, admin: Usuario = Depends(verificar_admin)):
+    """
+    Enciende el perfilador por muestreo sin reiniciar el servidor. Al
+    terminar deja el perfil (speedscope y pilas colapsadas) en PERFILES_DIR.
+    """
+    try:
+        return PERFILADOR.iniciar(request.solicitudes, request.segundos, request.rutas, request.intervalo_ms)
+    except ValueError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+
+@app.get("/admin/perfilador", tags=["Administración"])
+async def estado_perfilador(admin: Usuario = Depends(verificar_admin)):
+    """Estado de la sesión en curso y archivos del último perfil"""
+    return PERFILADOR.estado()
+
+
+@app.delete("/admin/perfilador", tags=["Administración"])
+def detener_perfilador(admin: Usuario = Depends(verificar_admin)):
+    """Corta la sesión en curso y devuelve los archivos generados"""
+    return {"ultimo": PERFILADOR.detener()}
+
+
 # ============================================
 # SETUP INICIAL
 # ============================================
@@ -495,15 +689,11 @@ async def setup_inicial(db: Session = Depends(get_db)):
         ("AJUSTE_INFLACION", "Inflación 5% a 30 días", TipoRegla.AJUSTE_CALCULO, {"tipo": "inflacion", "porcentaje": 5, "periodo_dias": 30}, 1),
     ]
     
-    for codigo, nombre, tipo, params, orden in reglas_iniciales:
-        try:
-            service.crear_regla(
-                codigo=codigo, nombre=nombre, tipo=tipo,
-                parametros=params, usuario_id=admin.id, orden=orden,
-                notas="Configuración inicial"
-            )
-        except:
-            pass
+    service.importar_reglas(
+        [{"codigo": codigo, "nombre": nombre, "tipo": tipo.value, "parametros": params, "orden": orden}
+         for codigo, nombre, tipo, params, orden in reglas_iniciales],
+        usuario_id=admin.id, omitir_existentes=True, notas="Configuración inicial"
+    )
     
     return {"mensaje": "Setup completado", "admin_id": admin.id}
 
@@ -515,6 +705,12 @@ async def health(db: Session = Depends(get_db)):
     return {"status": "ok", "reglas_activas": count, "timestamp": datetime.utcnow().isoformat()}
 
 
+@app.get("/metrics", tags=["General"], include_in_schema=False)
+async def metrics():
+    """Métricas en formato de Prometheus (latencias por ruta, LLM, búsquedas, caches, navegador, DB)"""
+    return Response(metricas.exponer(), media_type=metricas.CONTENT_TYPE)
+
+
 # ============================================
 # ENDPOINTS - VEHÍCULOS
 # ============================================
@@ -686,12 +882,36 @@ class ValuacionRequest(BaseModel):
     transmision: Optional[str] = None
     combustible: Optional[str] = None
     # Proveedor IA
-    proveedor_ia: str = "mock"  # mock, ollama, groq, gemini
+    proveedor_ia: str = "mock"  # mock, offline, ollama, groq, gemini
     modelo_ia: Optional[str] = None
     api_key_ia: Optional[str] = None
     urls_previas: Optional[List[Dict]] = None
 
 
+class AnalisisMercado(BaseModel):
+    fuentes_consultadas: Optional[int] = None
+    resultados_iniciales: Optional[int] = None
+    resultados_tras_filtrado: Optional[int] = None
+    resultados_tras_depuracion: Optional[int] = None
+    precio_mercado_min: Optional[float] = None
+    precio_mercado_max: Optional[float] = None
+    precio_mercado_promedio: Optional[float] = None
+    precio_mercado_mediana: Optional[float] = None
+
+
+class ReglaAplicada(BaseModel):
+    codigo: str
+    resultado: str
+
+
+class PublicacionAnalizada(BaseModel):
+    fuente: str
+    precio: Optional[float] = None
+    url: str
+    titulo: Optional[str] = None
+    incluida: bool = False
+
+
 class ValuacionResponse(BaseModel):
     id: str
     vehiculo: Dict[str, Any]
@@ -699,15 +919,37 @@ class ValuacionResponse(BaseModel):
     precio_minimo: Optional[float]
     precio_maximo: Optional[float]
     confianza: Optional[str]
-    analisis: Dict[str, Any]
-    reglas_aplicadas: List[Dict]
-    publicaciones: List[Dict]
+    analisis: AnalisisMercado
+    reglas_aplicadas: List[ReglaAplicada]
+    publicaciones: List[PublicacionAnalizada]
     alertas: List[str]
     reporte: Optional[str]
     duracion_segundos: Optional[float]
     fecha: datetime
 
 
+# Campos que completa el servidor; el resto los produce la IA
+CAMPOS_VALUACION_SERVIDOR = {"id", "vehiculo", "duracion_segundos", "fecha", "reporte"}
+
+# Esquema de salida estructurada para los proveedores de IA, derivado de ValuacionResponse.
+# Los límites de tamaño acotan la respuesta generada.
+ResultadoValuacionIA = create_model(
+    "ResultadoValuacionIA",
+    **{
+        **{
+            nombre: (campo.annotation, ...)
+            for nombre, campo in ValuacionResponse.model_fields.items()
+            if nombre not in CAMPOS_VALUACION_SERVIDOR
+        },
+        "confianza": (Literal["ALTA", "MEDIA", "BAJA"], ...),
+        "publicaciones": (List[PublicacionAnalizada], Field(..., max_length=30)),
+        "alertas": (List[str], Field(..., max_length=10)),
+        "reporte_detallado": (str, Field(..., max_length=3000)),
+    }
+)
+ESQUEMA_RESULTADO_IA = ResultadoValuacionIA.model_json_schema()
+
+
 @app.post("/valuaciones", tags=["Valuaciones"])
 async def crear_valuacion(
     request: ValuacionRequest,
@@ -718,78 +960,87 @@ async def crear_valuacion(
     Ejecuta una valuación completa.
     Puede recibir un vehiculo_id existente o los datos del vehículo directamente.
     """
-    # Obtener o crear vehículo
-    if request.vehiculo_id:
-        vehiculo = db.query(Vehiculo).filter(Vehiculo.id == request.vehiculo_id).first()
-        if not vehiculo:
-            raise HTTPException(status_code=404, detail="Vehículo no encontrado")
-    elif request.marca and request.modelo and request.año and request.kilometraje:
-        vehiculo = Vehiculo(
-            marca=request.marca,
-            modelo=request.modelo,
-            año=request.año,
-            kilometraje=request.kilometraje,
-            version=request.version,
-            transmision=request.transmision,
-            combustible=request.combustible
-        )
-        db.add(vehiculo)
-        db.flush()
-    else:
-        raise HTTPException(
-            status_code=400, 
-            detail="Debe proporcionar vehiculo_id o los datos del vehículo (marca, modelo, año, kilometraje)"
-        )
-    
-    # Obtener configuración de reglas
-    service = ReglasService(db)
-    config = service.generar_configuracion_prompt()
+    with span("valuacion", proveedor=request.proveedor_ia, usuario_id=usuario_id) as raiz:
+        # Obtener o crear vehículo
+        if request.vehiculo_id:
+            vehiculo = db.query(Vehiculo).filter(Vehiculo.id == request.vehiculo_id).first()
+            if not vehiculo:
+                raise HTTPException(status_code=404, detail="Vehículo no encontrado")
+        elif request.marca and request.modelo and request.año and request.kilometraje:
+            vehiculo = Vehiculo(
+                marca=request.marca,
+                modelo=request.modelo,
+                año=request.año,
+                kilometraje=request.kilometraje,
+                version=request.version,
+                transmision=request.transmision,
+                combustible=request.combustible
+            )
+            db.add(vehiculo)
+            db.flush()
+        else:
+            raise HTTPException(
+                status_code=400, 
+                detail="Debe proporcionar vehiculo_id o los datos del vehículo (marca, modelo, año, kilometraje)"
+            )
     
-    # Ejecutar valuación según proveedor
-    import time
-    inicio = time.time()
+        # Obtener configuración de reglas
+        service = ReglasService(db)
+        with span("reglas.configuracion"):
+            config = service.generar_configuracion_prompt()
     
-    if request.proveedor_ia == "mock":
-        # Valuación de prueba/demo sin IA real
-        resultado = ejecutar_valuacion_mock(vehiculo, config)
-    else:
-        # Valuación con IA real
-        resultado = await ejecutar_valuacion_ia(
-            vehiculo=vehiculo,
-            config=config,
-            proveedor=request.proveedor_ia,
-            modelo=request.modelo_ia,
-            api_key=request.api_key_ia,
-            urls_previas=request.urls_previas
-        )
+        # Ejecutar valuación según proveedor
+        import time
+        inicio = time.time()
     
-    duracion = time.time() - inicio
+        with span("valuacion.motor", proveedor=request.proveedor_ia):
+            if request.proveedor_ia == "mock":
+                # Valuación de prueba/demo sin IA real
+                resultado = ejecutar_valuacion_mock(vehiculo, config)
+            elif request.proveedor_ia == "offline":
+                # Valuación determinística con comparables almacenados
+                resultado = ejecutar_valuacion_offline(db, vehiculo, config)
+            else:
+                # Valuación con IA real
+                resultado = await ejecutar_valuacion_ia(
+                    vehiculo=vehiculo,
+                    config=config,
+                    proveedor=request.proveedor_ia,
+                    modelo=request.modelo_ia,
+                    api_key=request.api_key_ia,
+                    urls_previas=request.urls_previas
+                )
+
+        duracion = time.time() - inicio
+        metricas.registrar_valuacion(request.proveedor_ia, resultado.get("confianza"), duracion)
     
-    # Guardar valuación
-    valuacion = Valuacion(
-        vehiculo_id=vehiculo.id,
-        usuario_id=usuario_id,
-        precio_sugerido=resultado.get("precio_sugerido"),
-        precio_minimo=resultado.get("precio_minimo"),
-        precio_maximo=resultado.get("precio_maximo"),
-        confianza=resultado.get("confianza"),
-        fuentes_consultadas=resultado.get("analisis", {}).get("fuentes_consultadas", 0),
-        resultados_encontrados=resultado.get("analisis", {}).get("resultados_iniciales", 0),
-        resultados_filtrados=resultado.get("analisis", {}).get("resultados_tras_depuracion", 0),
-        precio_mercado_minimo=resultado.get("analisis", {}).get("precio_mercado_min"),
-        precio_mercado_maximo=resultado.get("analisis", {}).get("precio_mercado_max"),
-        precio_mercado_promedio=resultado.get("analisis", {}).get("precio_mercado_promedio"),
-        precio_mercado_mediana=resultado.get("analisis", {}).get("precio_mercado_mediana"),
-        reglas_aplicadas=resultado.get("reglas_aplicadas", []),
-        configuracion_usada=config,
-        publicaciones_analizadas=resultado.get("publicaciones", []),
-        reporte_completo=resultado.get("reporte_detallado", ""),
-        duracion_segundos=duracion
-    )
+        # Guardar valuación
+        valuacion = Valuacion(
+            vehiculo_id=vehiculo.id,
+            usuario_id=usuario_id,
+            precio_sugerido=resultado.get("precio_sugerido"),
+            precio_minimo=resultado.get("precio_minimo"),
+            precio_maximo=resultado.get("precio_maximo"),
+            confianza=resultado.get("confianza"),
+            fuentes_consultadas=resultado.get("analisis", {}).get("fuentes_consultadas", 0),
+            resultados_encontrados=resultado.get("analisis", {}).get("resultados_iniciales", 0),
+            resultados_filtrados=resultado.get("analisis", {}).get("resultados_tras_depuracion", 0),
+            precio_mercado_minimo=resultado.get("analisis", {}).get("precio_mercado_min"),
+            precio_mercado_maximo=resultado.get("analisis", {}).get("precio_mercado_max"),
+            precio_mercado_promedio=resultado.get("analisis", {}).get("precio_mercado_promedio"),
+            precio_mercado_mediana=resultado.get("analisis", {}).get("precio_mercado_mediana"),
+            reglas_aplicadas=resultado.get("reglas_aplicadas", []),
+            configuracion_usada=config,
+            publicaciones_analizadas=resultado.get("publicaciones", []),
+            reporte_completo=resultado.get("reporte_detallado", ""),
+            duracion_segundos=duracion,
+            tokens_usados=tokens_de_traza(raiz),
+            tiempos=resumen_tiempos(raiz)
+        )
     
-    db.add(valuacion)
-    db.commit()
-    db.refresh(valuacion)
+        db.add(valuacion)
+        db.commit()
+        db.refresh(valuacion)
     
     return {
         "id": valuacion.id,
@@ -816,12 +1067,13 @@ async def crear_valuacion(
 
 @app.get("/valuaciones", tags=["Valuaciones"])
 async def listar_valuaciones(
+    request: Request,
     vehiculo_id: Optional[str] = None,
     usuario_id: Optional[str] = None,
     limit: int = 50,
     db: Session = Depends(get_db)
 ):
-    """Lista valuaciones con filtros"""
+    """Lista valuaciones con filtros (ETag: responde 304 si no hubo nuevas)"""
     query = db.query(Valuacion)
     if vehiculo_id:
         query = query.filter(Valuacion.vehiculo_id == vehiculo_id)
@@ -830,7 +1082,7 @@ async def listar_valuaciones(
     
     valuaciones = query.order_by(Valuacion.fecha.desc()).limit(limit).all()
     
-    return [{
+    return respuesta_json(request, [{
         "id": v.id,
         "vehiculo": {
             "marca": v.vehiculo.marca,
@@ -841,7 +1093,7 @@ async def listar_valuaciones(
         "confianza": v.confianza,
         "fecha": v.fecha,
         "duracion_segundos": v.duracion_segundos
-    } for v in valuaciones]
+    } for v in valuaciones])
 
 
 @app.get("/valuaciones/{valuacion_id}", tags=["Valuaciones"])
@@ -883,6 +1135,76 @@ async def obtener_valuacion(valuacion_id: str, db: Session = Depends(get_db)):
     }
 
 
+@app.get("/valuaciones/{valuacion_id}/timings", tags=["Valuaciones"])
+async def obtener_tiempos_valuacion(valuacion_id: str, db: Session = Depends(get_db)):
+    """
+    Desglose de tiempos de la valuación: total, suma por etapa (consultas a
+    la base, configuración de reglas, búsquedas, llamadas al LLM, parseo
+    del JSON) y los spans de la traza. None en valuaciones anteriores.
+    """
+    valuacion = db.query(Valuacion).filter(Valuacion.id == valuacion_id).first()
+    if not valuacion:
+        raise HTTPException(status_code=404, detail="Valuación no encontrada")
+
+    return {
+        "id": valuacion.id,
+        "duracion_segundos": valuacion.duracion_segundos,
+        "tokens_usados": valuacion.tokens_usados,
+        "tiempos": valuacion.tiempos
+    }
+
+
+class ReplayRequest(BaseModel):
+    # Reglas candidatas: reemplazan a la de igual código, se agregan o se quitan (activo=False)
+    reglas: List[Dict[str, Any]] = []
+
+
+class ReplayLoteRequest(BaseModel):
+    limite: int = Field(1000, ge=1, le=50000, description="Últimas N valuaciones a repetir")
+    reglas: List[Dict[str, Any]] = []
+    # Comparar contra el replay con la configuración original en lugar del resultado guardado
+    contra_replay: bool = False
+    workers: Optional[int] = Field(None, ge=1)
+
+
+@app.post("/valuaciones/replay", tags=["Valuaciones"])
+async def replay_valuaciones(request: ReplayLoteRequest, db: Session = Depends(get_db)):
+    """
+    What-if: repite las últimas N valuaciones con un conjunto de reglas
+    candidato, repartidas entre procesos, y resume el cambio de precio.
+    """
+    snapshots = cargar_snapshots(db, limite=request.limite)
+    print(f"🔁 Replay de {len(snapshots)} valuaciones ({len(request.reglas)} reglas candidatas)")
+    try:
+        resultado = await asyncio.to_thread(
+            repetir_lote, snapshots, request.reglas, request.contra_replay, request.workers
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    print(f"✅ Replay terminado en {resultado['resumen']['duracion_segundos']}s: "
+          f"{resultado['resumen']['con_cambios']} con cambios")
+    return resultado
+
+
+@app.post("/valuaciones/{valuacion_id}/replay", tags=["Valuaciones"])
+async def replay_valuacion(
+    valuacion_id: str,
+    request: Optional[ReplayRequest] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Repite una valuación guardada con el pipeline local (misma configuración,
+    publicaciones, semilla y fecha) y devuelve las diferencias etapa por etapa.
+    """
+    snapshots = cargar_snapshots(db, ids=[valuacion_id])
+    if not snapshots:
+        raise HTTPException(status_code=404, detail="Valuación no encontrada")
+    try:
+        return repetir_valuacion(snapshots[0], request.reglas if request else None)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 # ============================================
 # FUNCIONES DE VALUACIÓN
 # ============================================
@@ -943,6 +1265,8 @@ async def descubrir_publicaciones_en_portal(url_busqueda: str) -> List[Dict]:
 
     dominio = extraer_dominio_limpio(url_busqueda)
     
+    import httpx
+
     try:
         async with httpx.AsyncClient(headers=HEADERS, timeout=15.0, follow_redirects=True) as client:
             response = await client.get(url_busqueda)
@@ -1043,11 +1367,39 @@ def generar_queries_busqueda_desde_config(vehiculo: Vehiculo, config: Dict) -> L
         
     return queries
 
+def buscar_en_api_busqueda(query: str, max_resultados: int = 10) -> List[Dict[str, Any]]:
+    """Búsqueda contra la API configurada en BUSQUEDA_WEB_URL (formato de duckduckgo-search)"""
+    import httpx
+
+    try:
+        response = httpx.get(BUSQUEDA_WEB_URL, params={"q": query, "max_results": max_resultados}, timeout=10.0)
+        if response.status_code == 200:
+            results = response.json().get("results", [])
+            print(f"✅ Búsqueda ({BUSQUEDA_WEB_URL}) devolvió {len(results)} resultados.")
+            return [{
+                "titulo": r.get("title"),
+                "url": r.get("href"),
+                "snippet": r.get("body")
+            } for r in results]
+        print(f"❌ Error en búsqueda ({BUSQUEDA_WEB_URL}): {response.status_code}")
+    except Exception as e:
+        print(f"Error en búsqueda: {e}")
+    return []
+
 def buscar_en_web_gratis(query: str) -> List[Dict[str, Any]]:
     """
     Realiza una búsqueda web gratuita usando DuckDuckGo (sin API Key).
     Requiere: pip install duckduckgo-search
+    Con BUSQUEDA_WEB_URL definida consulta esa API en su lugar.
     """
+    with span("busqueda.web", query=query, motor="api" if BUSQUEDA_WEB_URL else "duckduckgo") as s:
+        resultados = buscar_en_api_busqueda(query) if BUSQUEDA_WEB_URL else buscar_en_duckduckgo(query)
+        s.set(resultados=len(resultados))
+        return resultados
+
+
+def buscar_en_duckduckgo(query: str) -> List[Dict[str, Any]]:
+    """Búsqueda con duckduckgo-search (región AR y, si no hay resultados, global)"""
     try:
         from duckduckgo_search import DDGS
         with DDGS() as ddgs:
@@ -1094,7 +1446,7 @@ async def buscar_en_google_custom_search(query: str, api_key: str, cx: str) -> L
     if not api_key or not cx:
         return []
 
-    url = "https://www.googleapis.com/customsearch/v1"
+    url = GOOGLE_SEARCH_URL
     params = {
         "key": api_key,
         "cx": cx,
@@ -1104,7 +1456,8 @@ async def buscar_en_google_custom_search(query: str, api_key: str, cx: str) -> L
 
     try:
         async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(url, params=params)
+            with span("busqueda.web", query=query, motor="google_cse"):
+                response = await client.get(url, params=params)
             if response.status_code == 200:
                 data = response.json()
                 items = data.get("items", [])
@@ -1145,29 +1498,13 @@ def ejecutar_valuacion_mock(vehiculo: Vehiculo, config: Dict) -> Dict[str, Any]:
     variacion = random.uniform(-0.1, 0.1)
     precio_base = int(precio_base * (1 + variacion))
     
-    # Aplicar ajustes de config
-    ajustes = config.get("ajustes_calculo", [])
-    for ajuste in ajustes:
-        params = ajuste.get("parametros", {})
-        tipo = params.get("tipo", "")
-        
-        if tipo == "inflacion":
-            porcentaje = params.get("porcentaje", 0)
-            precio_base = int(precio_base * (1 + porcentaje / 100))
-        elif tipo == "ajuste_porcentual":
-            porcentaje = params.get("porcentaje", 0)
-            operacion = params.get("operacion", "incrementar")
-            if operacion == "incrementar":
-                precio_base = int(precio_base * (1 + porcentaje / 100))
-            else:
-                precio_base = int(precio_base * (1 - porcentaje / 100))
-        elif tipo == "ajuste_fijo":
-            monto = params.get("monto", 0)
-            operacion = params.get("operacion", "incrementar")
-            if operacion == "incrementar":
-                precio_base += monto
-            else:
-                precio_base -= monto
+    # Aplicar ajustes de config (mismo evaluador que el motor offline)
+    datos_vehiculo = {"marca": vehiculo.marca, "modelo": vehiculo.modelo,
+                      "año": vehiculo.año, "kilometraje": vehiculo.kilometraje}
+    precios, _ = aplicar_ajustes(
+        compilar_ajustes(config.get("ajustes_calculo", [])), [precio_base], LoteVehiculos([datos_vehiculo])
+    )
+    precio_base = int(precios[0])
     
     precio_min = int(precio_base * 0.9)
     precio_max = int(precio_base * 1.1)
@@ -1229,6 +1566,25 @@ Esta es una valuación de demostración. Para resultados reales, configure un pr
     }
 
 
+def ejecutar_valuacion_offline(db: Session, vehiculo: Vehiculo, config: Dict) -> Dict[str, Any]:
+    """
+    Ejecuta una valuación sin red: toma las publicaciones guardadas en
+    valuaciones anteriores del mismo marca/modelo y aplica las reglas
+    activas con el motor determinístico.
+    """
+    datos_vehiculo = {
+        "marca": vehiculo.marca,
+        "modelo": vehiculo.modelo,
+        "año": vehiculo.año,
+        "kilometraje": vehiculo.kilometraje
+    }
+    # La semilla queda en configuracion_usada: la misma muestra se puede repetir
+    config.setdefault("metadata", {}).setdefault("semilla_muestreo", nueva_semilla())
+    fuente = FuenteHistorica(cargar_comparables_historicos(db, vehiculo.marca, vehiculo.modelo))
+    # Con la fecha de la configuración como "ahora", el replay repite exactamente el resultado
+    return PipelineValuacion(config, datos_vehiculo, ahora_configuracion(config)).ejecutar(fuente=fuente)
+
+
 async def ejecutar_valuacion_ia(
     vehiculo: Vehiculo,
     config: Dict,
@@ -1243,9 +1599,6 @@ async def ejecutar_valuacion_ia(
     import httpx
     import json
     
-    # Construir prompt
-    prompt = construir_prompt_valuacion(vehiculo, config)
-    
     # Usar URLs proporcionadas o realizar búsqueda nueva
     resultados_busqueda = urls_previas
     
@@ -1272,19 +1625,25 @@ async def ejecutar_valuacion_ia(
         # Filtrar resultados para asegurar que coincidan con las fuentes de las reglas
         resultados_busqueda = filtrar_resultados_por_fuentes(resultados_busqueda, config.get("fuentes", []))
 
+    # Gemini solo usa su búsqueda nativa (incompatible con salida estructurada)
+    # cuando no hay resultados previos; en ese caso el formato va en el prompt
+    usar_busqueda_gemini = proveedor == "gemini" and not resultados_busqueda
+    prompt = construir_prompt_valuacion(vehiculo, config, incluir_formato=usar_busqueda_gemini)
+
     if resultados_busqueda:
         prompt += f"\n\nRESULTADOS REALES DE BÚSQUEDA WEB:\n{json.dumps(resultados_busqueda, indent=2)}"
 
     try:
         resultado = {}
-        if proveedor == "ollama":
-            resultado = await valuacion_ollama(prompt, modelo or "llama3.2")
-        elif proveedor == "groq":
-            resultado = await valuacion_groq(prompt, modelo or "llama-3.3-70b-versatile", api_key)
-        elif proveedor == "gemini":
-            resultado = await valuacion_gemini(prompt, modelo or "gemini-2.0-flash", api_key)
-        else:
-            raise ValueError(f"Proveedor no soportado: {proveedor}")
+        with span(f"llm.{proveedor}", modelo=modelo, caracteres_prompt=len(prompt)):
+            if proveedor == "ollama":
+                resultado = await valuacion_ollama(prompt, modelo or "llama3.2")
+            elif proveedor == "groq":
+                resultado = await valuacion_groq(prompt, modelo or "llama-3.3-70b-versatile", api_key)
+            elif proveedor == "gemini":
+                resultado = await valuacion_gemini(prompt, modelo or "gemini-2.0-flash", api_key, usar_busqueda=usar_busqueda_gemini)
+            else:
+                raise ValueError(f"Proveedor no soportado: {proveedor}")
             
         # Si la IA no devolvió publicaciones pero DuckDuckGo sí encontró resultados,
         # los agregamos manualmente para asegurar visibilidad en el frontend
@@ -1309,8 +1668,12 @@ async def ejecutar_valuacion_ia(
         }
 
 
-def construir_prompt_valuacion(vehiculo: Vehiculo, config: Dict) -> str:
-    """Construye el prompt para la valuación"""
+def construir_prompt_valuacion(vehiculo: Vehiculo, config: Dict, incluir_formato: bool = True) -> str:
+    """
+    Construye el prompt para la valuación.
+    Con incluir_formato=False se omite la plantilla JSON: el proveedor
+    recibe el esquema como salida estructurada nativa.
+    """
     
     fuentes = config.get("fuentes", [])
     filtros = config.get("filtros_busqueda", [])
@@ -1336,7 +1699,7 @@ def construir_prompt_valuacion(vehiculo: Vehiculo, config: Dict) -> str:
 
     queries_texto = "\n".join([f"{i+1}. {q}" for i, q in enumerate(queries_busqueda)])
 
-    return f"""
+    prompt = f"""
 Eres un experto en valuación de vehículos usados en Argentina. Tu tarea es buscar precios REALES y actuales.
 
 VEHÍCULO A VALUAR:
@@ -1364,7 +1727,15 @@ AJUSTES A APLICAR DESPUÉS DEL CÁLCULO:
 
 ESTRATEGIA DE BÚSQUEDA RECOMENDADA:
 {queries_texto}
+"""
 
+    if not incluir_formato:
+        return prompt + """
+Responde con el JSON del esquema de salida indicado. Incluye las publicaciones reales que encuentres
+con sus precios y URLs, y un reporte_detallado breve.
+"""
+
+    return prompt + f"""
 Responde ÚNICAMENTE con un JSON válido:
 
 {{
@@ -1406,11 +1777,12 @@ async def valuacion_ollama(prompt: str, modelo: str) -> Dict[str, Any]:
     
     async with httpx.AsyncClient(timeout=120.0) as client:
         response = await client.post(
-            "http://localhost:11434/api/generate",
+            url_ollama_generate(),
             json={
                 "model": modelo,
                 "prompt": prompt,
-                "stream": False
+                "stream": False,
+                **parametros_ollama(ESQUEMA_RESULTADO_IA)
             }
         )
         
@@ -1418,6 +1790,7 @@ async def valuacion_ollama(prompt: str, modelo: str) -> Dict[str, Any]:
             raise Exception(f"Error Ollama: {response.status_code}")
         
         data = response.json()
+        anotar(modelo=modelo, tokens_entrada=data.get("prompt_eval_count"), tokens_salida=data.get("eval_count"))
         texto = data.get("response", "")
         
         return extraer_json_respuesta(texto)
@@ -1431,32 +1804,50 @@ async def valuacion_groq(prompt: str, modelo: str, api_key: str) -> Dict[str, An
     if not api_key:
         raise ValueError("API key de Groq requerida")
     
+    def armar_payload() -> Dict[str, Any]:
+        formato = parametros_groq(ESQUEMA_RESULTADO_IA, modelo)
+        contenido = prompt
+        if formato["response_format"]["type"] == "json_object":
+            # json_object no recibe el esquema: va en el prompt
+            contenido += instrucciones_json_object(ESQUEMA_RESULTADO_IA)
+        return {
+            "model": modelo,
+            "messages": [{"role": "user", "content": contenido}],
+            "temperature": 0.3,
+            "max_tokens": 2000,
+            **formato
+        }
+    
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json"
+    }
+    
     async with httpx.AsyncClient(timeout=60.0) as client:
-        response = await client.post(
-            "https://api.groq.com/openai/v1/chat/completions",
-            headers={
-                "Authorization": f"Bearer {api_key}",
-                "Content-Type": "application/json"
-            },
-            json={
-                "model": modelo,
-                "messages": [{"role": "user", "content": prompt}],
-                "temperature": 0.3,
-                "max_tokens": 2000
-            }
-        )
+        url = url_groq_chat()
+        response = await client.post(url, headers=headers, json=armar_payload())
+        
+        # Modelos sin soporte de json_schema: se recuerda y se usa json_object
+        if groq_rechazo_json_schema(modelo, response.status_code, response.text):
+            response = await client.post(url, headers=headers, json=armar_payload())
         
         if response.status_code != 200:
             raise Exception(f"Error Groq: {response.status_code} - {response.text}")
         
         data = response.json()
+        uso = data.get("usage") or {}
+        anotar(modelo=modelo, tokens_entrada=uso.get("prompt_tokens"), tokens_salida=uso.get("completion_tokens"))
         texto = data["choices"][0]["message"]["content"]
         
         return extraer_json_respuesta(texto)
 
 
-async def valuacion_gemini(prompt: str, modelo: str, api_key: str) -> Dict[str, Any]:
-    """Ejecuta valuación con Google Gemini + Google Search"""
+async def valuacion_gemini(prompt: str, modelo: str, api_key: str, usar_busqueda: bool = True) -> Dict[str, Any]:
+    """
+    Ejecuta valuación con Google Gemini.
+    Con usar_busqueda=True intenta primero con Google Search (texto libre);
+    sin búsqueda, o si esta falla, usa salida estructurada con responseSchema.
+    """
     import httpx
     import json
     
@@ -1479,44 +1870,56 @@ async def valuacion_gemini(prompt: str, modelo: str, api_key: str) -> Dict[str,
     
     try:
         async with httpx.AsyncClient(timeout=120.0) as client:
-            # Usar generateContent con Google Search grounding
-            response = await client.post(
-                f"https://generativelanguage.googleapis.com/v1beta/models/{modelo_api}:generateContent?key={api_key}",
-                headers={"Content-Type": "application/json"},
-                json={
-                    "contents": [{"parts": [{"text": prompt}]}],
-                    "generationConfig": {
-                        "temperature": 0.3,
-                        "maxOutputTokens": 4000
-                    },
-                    "tools": [{
-                        "google_search": {}
-                    }]
-                }
-            )
+            url = url_gemini_generate(modelo_api, api_key)
+            generation_config = {
+                "temperature": 0.3,
+                "maxOutputTokens": 4000
+            }
+            error_detail = ""
+            response = None
             
-            if response.status_code != 200:
-                error_detail = response.text
-                try:
-                    error_json = response.json()
-                    error_detail = error_json.get("error", {}).get("message", response.text)
-                except:
-                    pass
-                
-                # Si falla con search, intentar sin search
+            if usar_busqueda:
+                # Usar generateContent con Google Search grounding
                 response = await client.post(
-                    f"https://generativelanguage.googleapis.com/v1beta/models/{modelo_api}:generateContent?key={api_key}",
+                    url,
+                    headers={"Content-Type": "application/json"},
+                    json={
+                        "contents": [{"parts": [{"text": prompt}]}],
+                        "generationConfig": generation_config,
+                        "tools": [{
+                            "google_search": {}
+                        }]
+                    }
+                )
+                if response.status_code != 200:
+                    error_detail = response.text
+                    try:
+                        error_json = response.json()
+                        error_detail = error_json.get("error", {}).get("message", response.text)
+                    except:
+                        pass
+            
+            if response is None or response.status_code != 200:
+                # Sin search (o si falló): salida estructurada con el esquema de valuación
+                response = await client.post(
+                    url,
                     headers={"Content-Type": "application/json"},
                     json={
                         "contents": [{"parts": [{"text": prompt}]}],
                         "generationConfig": {
-                            "temperature": 0.3,
-                            "maxOutputTokens": 4000
+                            **generation_config,
+                            **parametros_gemini(ESQUEMA_RESULTADO_IA)
                         }
                     }
                 )
                 
                 if response.status_code != 200:
+                    if not error_detail:
+                        error_detail = response.text
+                        try:
+                            error_detail = response.json().get("error", {}).get("message", response.text)
+                        except:
+                            pass
                     return {
                         "precio_sugerido": None,
                         "confianza": "BAJA",
@@ -1525,6 +1928,8 @@ async def valuacion_gemini(prompt: str, modelo: str, api_key: str) -> Dict[str,
                     }
             
             data = response.json()
+            uso = data.get("usageMetadata") or {}
+            anotar(modelo=modelo, tokens_entrada=uso.get("promptTokenCount"), tokens_salida=uso.get("candidatesTokenCount"))
             
             # Verificar si hay candidatos en la respuesta
             if not data.get("candidates"):
@@ -1593,29 +1998,19 @@ async def valuacion_gemini(prompt: str, modelo: str, api_key: str) -> Dict[str,
 
 
 def extraer_json_respuesta(texto: str) -> Dict[str, Any]:
-    """Extrae JSON de la respuesta de la IA"""
-    import json
-    import re
-    
-    # --- INICIO DEPURACIÓN ---
-    print("\n" + "="*50)
-    print("🤖 RESPUESTA CRUDA DE GEMINI:")
-    print(texto)
-    print("="*50 + "\n")
-    # --- FIN DEPURACIÓN ---
-
-    # Limpiar markdown
-    texto = texto.replace("```json", "").replace("```", "").strip()
-    
-    # Buscar JSON en la respuesta
-    try:
-        json_match = re.search(r'\{[\s\S]*\}', texto)
-        if json_match:
-            return json.loads(json_match.group())
-    except json.JSONDecodeError:
-        pass
+    """Extrae y valida el JSON de la respuesta de la IA"""
+    registrar_respuesta_cruda(texto, origen="valuación")
+
+    with span("json.parseo", caracteres=len(texto or "")) as s:
+        resultado = extraer_json(texto, claves_esperadas=["precio_sugerido"])
+        s.set(parseado=resultado is not None)
+    if resultado is not None:
+        resultado, errores = validar_resultado_valuacion(resultado)
+        resultado["alertas"].extend(f"⚠️ Respuesta IA: {e}" for e in errores)
+        return resultado
     
     # Si no se puede parsear
+    registrar_respuesta_cruda(texto, origen="valuación - no parseable", forzar=True)
     return {
         "precio_sugerido": None,
         "confianza": "BAJA",
@@ -1624,4 +2019,4 @@ def extraer_json_respuesta(texto: str) -> Dict[str, Any]:
     }
 
 
-# Para ejecutar: uvicorn main:app --reload --port 8000
\ No newline at end of file
+# Para ejecutar: uvicorn main:app --reload --port 8000
@@ -0,0 +1,16 @@
+# backend/api/migrar.py
+"""
+Crea o actualiza el esquema de la base (tablas y columnas nuevas) sin
+levantar la API. Pensado como paso previo al despliegue; las réplicas
+luego arrancan con CREAR_TABLAS_AL_INICIAR=0.
+
+Uso (desde backend/api):
+    python migrar.py
+"""
+
+from main import DATABASE_URL, engine
+from models import crear_tablas
+
+if __name__ == "__main__":
+    crear_tablas(engine)
+    print(f"✅ Esquema actualizado en {DATABASE_URL}")
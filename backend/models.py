@@ -6,7 +6,7 @@ Incluye sistema completo de reglas con versionado y auditoría.
 
 from sqlalchemy import (
     create_engine, Column, Integer, String, Float, Boolean, 
-    DateTime, Text, ForeignKey, Enum, JSON, UniqueConstraint
+    DateTime, Text, ForeignKey, Enum, JSON, UniqueConstraint, inspect, text
 )
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, sessionmaker
@@ -347,6 +347,7 @@ class Valuacion(Base):
     fecha = Column(DateTime, default=datetime.utcnow)
     duracion_segundos = Column(Float, nullable=True)
     tokens_usados = Column(JSON, default=dict)
+    tiempos = Column(JSON, nullable=True)  # Desglose por etapa (spans de la traza)
     
     # Relaciones
     vehiculo = relationship("Vehiculo", back_populates="valuaciones")
@@ -360,9 +361,27 @@ class Valuacion(Base):
 # FUNCIONES DE UTILIDAD
 # ============================================
 
+# Columnas agregadas a tablas existentes: create_all no las crea en bases ya inicializadas
+COLUMNAS_AGREGADAS = {
+    "valuaciones": {"tiempos": "JSON"},
+}
+
+
 def crear_tablas(engine):
     """Crea todas las tablas en la base de datos"""
     Base.metadata.create_all(engine)
+    agregar_columnas_faltantes(engine)
+
+
+def agregar_columnas_faltantes(engine):
+    """ALTER TABLE ... ADD COLUMN para las columnas nuevas que falten (idempotente)"""
+    inspector = inspect(engine)
+    with engine.begin() as conexion:
+        for tabla, columnas in COLUMNAS_AGREGADAS.items():
+            existentes = {c["name"] for c in inspector.get_columns(tabla)}
+            for nombre, tipo in columnas.items():
+                if nombre not in existentes:
+                    conexion.execute(text(f"ALTER TABLE {tabla} ADD COLUMN {nombre} {tipo}"))
 
 
 def obtener_session(database_url: str = "sqlite:///valuacion.db"):
@@ -4,7 +4,7 @@ Servicio del agente de valuación.
 Consume las reglas dinámicamente y ejecuta valuaciones con trazabilidad completa.
 """
 
-import anthropic
+from functools import lru_cache
 from typing import Dict, Any, Optional
 from datetime import datetime
 import json
@@ -12,6 +12,17 @@ import time
 
 from models import Vehiculo, Valuacion, Usuario, obtener_session
 from services.reglas_service import ReglasService
+from services.parseo_json import extraer_json, validar_resultado_valuacion, registrar_respuesta_cruda
+
+
+@lru_cache(maxsize=8)
+def cliente_anthropic(api_key: Optional[str] = None):
+    """
+    Cliente de Anthropic compartido por API key (reutiliza su pool de
+    conexiones). anthropic se importa recién acá, al primer uso.
+    """
+    import anthropic
+    return anthropic.Anthropic(api_key=api_key) if api_key else anthropic.Anthropic()
 
 
 class AgenteValuacionService:
@@ -23,8 +34,12 @@ class AgenteValuacionService:
     def __init__(self, db_session, api_key: Optional[str] = None):
         self.db = db_session
         self.reglas_service = ReglasService(db_session)
-        self.client = anthropic.Anthropic(api_key=api_key) if api_key else anthropic.Anthropic()
+        self.api_key = api_key
         self.model = "claude-sonnet-4-20250514"
+
+    @property
+    def client(self):
+        return cliente_anthropic(self.api_key)
     
     def _construir_system_prompt(self, config: Dict[str, Any]) -> str:
         """
@@ -413,35 +428,17 @@ Responde con el JSON estructurado según el formato especificado.
         else:
             texto = str(response.content)
         
-        # --- INICIO DEPURACIÓN ---
-        print("\n" + "="*50)
-        print("🤖 RESPUESTA CRUDA DE GEMINI:")
-        print(texto)
-        print("="*50 + "\n")
-        # --- FIN DEPURACIÓN ---
-
-        # 2. Limpieza de Markdown (Claude suele envolver en ```json)
-        texto_limpio = texto.replace("```json", "").replace("```", "").strip()
-
-        # 3. Intentar parseo directo primero
-        try:
-            return json.loads(texto_limpio)
-        except json.JSONDecodeError:
-            pass
-
-        # 4. Búsqueda con Regex (Si hay texto alrededor)
-        try:
-            import re
-            # Busca el primer { y el último }
-            json_match = re.search(r'(\{[\s\S]*\})', texto_limpio)
-            if json_match:
-                # Intenta parsear lo encontrado
-                return json.loads(json_match.group(1))
-        except (json.JSONDecodeError, AttributeError):
-            pass
-        
-        # 5. Fallback: Retornar error estructurado para depuración
-        print(f"DEBUG - Texto recibido de IA que falló: {texto[:200]}...") # Log para ver qué llega
+        registrar_respuesta_cruda(texto, origen="agente")
+
+        # 2. Extracción en una pasada (tolera markdown, prosa alrededor y truncado)
+        resultado = extraer_json(texto, claves_esperadas=["precio_sugerido"])
+        if resultado is not None:
+            resultado, errores = validar_resultado_valuacion(resultado)
+            resultado["alertas"].extend(f"⚠️ Respuesta IA: {e}" for e in errores)
+            return resultado
+        
+        # 3. Fallback: Retornar error estructurado para depuración
+        registrar_respuesta_cruda(texto, origen="agente - no parseable", forzar=True)
         return {
             "precio_sugerido": 0,
             "confianza": "ERROR_PARSEO",
@@ -489,11 +486,26 @@ Fecha: {datetime.now().strftime('%d/%m/%Y')}
         Exporta la configuración actual para backup o documentación.
         """
         config = self.reglas_service.generar_configuracion_prompt()
-        
+        return self._serializar(config, formato)
+    
+    def exportar_reglas(self, formato: str = "json", solo_activas: bool = True) -> str:
+        """
+        Exporta las reglas con todos sus campos, en el formato que acepta
+        POST /reglas/bulk (para migrarlas a otra sucursal o restaurarlas).
+        """
+        reglas = self.reglas_service.exportar_reglas(solo_activas=solo_activas)
+        return self._serializar({
+            "exportado_en": datetime.utcnow().isoformat(),
+            "total_reglas": len(reglas),
+            "reglas": reglas
+        }, formato)
+    
+    @staticmethod
+    def _serializar(datos: Dict[str, Any], formato: str) -> str:
         if formato == "json":
-            return json.dumps(config, indent=2, ensure_ascii=False)
+            return json.dumps(datos, indent=2, ensure_ascii=False)
         elif formato == "yaml":
             import yaml
-            return yaml.dump(config, default_flow_style=False, allow_unicode=True)
+            return yaml.dump(datos, default_flow_style=False, allow_unicode=True, sort_keys=False)
         else:
-            return str(config)
+            return str(datos)
@@ -2,15 +2,32 @@ import asyncio
 import json
 import sys
 import re
-import httpx
-from playwright.async_api import async_playwright
-from typing import AsyncGenerator, List, Dict, Any
+import time
+from typing import AsyncGenerator, List, Dict, Any, Optional
+
+from services.grabacion_navegacion import Cronometro, GrabacionNavegacion, crear_grabacion
+from services.parseo_json import extraer_json
+from services.servicios_externos import url_gemini_generate, url_groq_chat, url_ollama_generate
+from services.metricas import navegador_abierto, navegador_cerrado
+from services.trazas import anotar, span
 
 class BrowserService:
-    def __init__(self):
+    def __init__(self, modo_navegacion: Optional[str] = None, dir_grabaciones: Optional[str] = None):
+        """
+        modo_navegacion: "grabar" | "reproducir" | "" (por defecto NAVEGACION_MODO).
+        dir_grabaciones: directorio base de las grabaciones (por defecto NAVEGACION_GRABACION_DIR).
+        """
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
         }
+        self.modo_navegacion = modo_navegacion
+        self.dir_grabaciones = dir_grabaciones
+        self.grabacion = GrabacionNavegacion()
+
+    async def _pausa(self, segundos: float):
+        """Pausa para que el sitio reaccione; al reproducir una grabación no hace falta esperar"""
+        if not self.grabacion.reproduciendo:
+            await asyncio.sleep(segundos)
 
     def _limpiar_arbol(self, arbol_raw: Dict) -> List[Dict]:
         nodos = arbol_raw.get("nodes", [])
@@ -45,11 +62,21 @@ class BrowserService:
         return datos_limpios
 
     async def _consultar_ia_paso(self, page, objetivo: str, historia: List[Dict], proveedor: str, modelo: str, api_key: str) -> Dict:
+        """Paso del agente como span "navegador.paso" (tiempos parciales y acción elegida como atributos)."""
+        with span("navegador.paso", objetivo=objetivo[:100], url=page.url) as s:
+            decision = await self._analizar_paso(page, objetivo, historia, proveedor, modelo, api_key)
+            s.set(accion=decision.get("accion"))
+            return decision
+
+    async def _analizar_paso(self, page, objetivo: str, historia: List[Dict], proveedor: str, modelo: str, api_key: str) -> Dict:
         """Suministra los datos del sitio a la IA para determinar el siguiente paso."""
         try:
+            cron = Cronometro()
             client = await page.context.new_cdp_session(page)
             arbol = await client.send("Accessibility.getFullAXTree")
+            cron.marcar("axtree")
             nodos = self._limpiar_arbol(arbol)
+            cron.marcar("limpieza")
             
             # Filtrar para no saturar el contexto de Llama
             nodos_interactuables = [n for n in nodos if n['tipo'] in ['button', 'combobox', 'listbox', 'link', 'menuitem', 'textbox', 'checkbox', 'searchbox', 'radio']]
@@ -82,61 +109,81 @@ class BrowserService:
             }}
             """
             
-            async with httpx.AsyncClient() as client_http:
-                res_text = ""
-                if proveedor == "ollama":
-                    response = await client_http.post(
-                        "http://localhost:11434/api/generate",
-                        json={
-                            "model": modelo or "llama3.2",
-                            "prompt": prompt,
-                            "stream": False,
-                            "format": "json"
-                        },
-                        timeout=20.0
-                    )
-                    if response.status_code == 200:
-                        res_text = response.json().get("response", "{}")
-                
-                elif proveedor == "gemini":
-                    url = f"https://generativelanguage.googleapis.com/v1beta/models/{modelo or 'gemini-2.0-flash'}:generateContent?key={api_key}"
-                    response = await client_http.post(
-                        url,
-                        json={
-                            "contents": [{"parts": [{"text": prompt}]}],
-                            "generationConfig": {"temperature": 0.1, "response_mime_type": "application/json"}
-                        },
-                        timeout=20.0
-                    )
-                    if response.status_code == 200:
-                        res_text = response.json()["candidates"][0]["content"]["parts"][0]["text"]
-                
-                elif proveedor == "groq":
-                    response = await client_http.post(
-                        "https://api.groq.com/openai/v1/chat/completions",
-                        headers={"Authorization": f"Bearer {api_key}"},
-                        json={
-                            "model": modelo or "llama-3.3-70b-versatile",
-                            "messages": [{"role": "user", "content": prompt}],
-                            "temperature": 0.1,
-                            "response_format": {"type": "json_object"}
-                        },
-                        timeout=20.0
-                    )
-                    if response.status_code == 200:
-                        res_text = response.json()["choices"][0]["message"]["content"]
+            decision = self.grabacion.decision_grabada()
+            if decision is None:
+                decision = await self._decidir_con_ia(prompt, proveedor, modelo, api_key)
+            cron.marcar("ia")
+            anotar(nodos_axtree=len(arbol.get("nodes", [])), **{f"ms_{k}": round(v * 1000, 2) for k, v in cron.tiempos.items()})
 
-                if res_text:
-                    try:
-                        return json.loads(res_text)
-                    except:
-                        match = re.search(r'\{.*\}', res_text, re.DOTALL)
-                        if match:
-                            return json.loads(match.group())
-            return {}
+            await self.grabacion.registrar_paso(page, objetivo, arbol, decision, cron.tiempos)
+            return decision
         except Exception:
             return {}
 
+    async def _decidir_con_ia(self, prompt: str, proveedor: str, modelo: str, api_key: str) -> Dict:
+        """Consulta al proveedor de IA y devuelve la decisión del paso ({} si no hay respuesta válida)."""
+        with span(f"llm.{proveedor}", modelo=modelo, caracteres_prompt=len(prompt)):
+            return await self._llamar_ia(prompt, proveedor, modelo, api_key)
+
+    async def _llamar_ia(self, prompt: str, proveedor: str, modelo: str, api_key: str) -> Dict:
+        import httpx
+
+        async with httpx.AsyncClient() as client_http:
+            res_text = ""
+            if proveedor == "ollama":
+                response = await client_http.post(
+                    url_ollama_generate(),
+                    json={
+                        "model": modelo or "llama3.2",
+                        "prompt": prompt,
+                        "stream": False,
+                        "format": "json"
+                    },
+                    timeout=20.0
+                )
+                if response.status_code == 200:
+                    data = response.json()
+                    anotar(tokens_entrada=data.get("prompt_eval_count"), tokens_salida=data.get("eval_count"))
+                    res_text = data.get("response", "{}")
+                
+            elif proveedor == "gemini":
+                url = url_gemini_generate(modelo or 'gemini-2.0-flash', api_key)
+                response = await client_http.post(
+                    url,
+                    json={
+                        "contents": [{"parts": [{"text": prompt}]}],
+                        "generationConfig": {"temperature": 0.1, "response_mime_type": "application/json"}
+                    },
+                    timeout=20.0
+                )
+                if response.status_code == 200:
+                    data = response.json()
+                    uso = data.get("usageMetadata") or {}
+                    anotar(tokens_entrada=uso.get("promptTokenCount"), tokens_salida=uso.get("candidatesTokenCount"))
+                    res_text = data["candidates"][0]["content"]["parts"][0]["text"]
+                
+            elif proveedor == "groq":
+                response = await client_http.post(
+                    url_groq_chat(),
+                    headers={"Authorization": f"Bearer {api_key}"},
+                    json={
+                        "model": modelo or "llama-3.3-70b-versatile",
+                        "messages": [{"role": "user", "content": prompt}],
+                        "temperature": 0.1,
+                        "response_format": {"type": "json_object"}
+                    },
+                    timeout=20.0
+                )
+                if response.status_code == 200:
+                    data = response.json()
+                    uso = data.get("usage") or {}
+                    anotar(tokens_entrada=uso.get("prompt_tokens"), tokens_salida=uso.get("completion_tokens"))
+                    res_text = data["choices"][0]["message"]["content"]
+
+            if res_text:
+                return extraer_json(res_text, claves_esperadas=["accion"]) or {}
+        return {}
+
     async def _ejecutar_con_ia(self, page, objetivo: str, proveedor: str, modelo: str, api_key: str, max_pasos: int = 10) -> AsyncGenerator[str, None]:
         """Bucle agentic que suministra datos del sitio a la IA en cada paso."""
         historia = []
@@ -157,6 +204,7 @@ class BrowserService:
 
             historia.append({"paso": i+1, "accion": accion, "target": target})
 
+            inicio_accion = time.perf_counter()
             try:
                 if accion == "click":
                     yield f"🖱️ IA decidió click en '{target}'"
@@ -176,7 +224,7 @@ class BrowserService:
                     if await elem.count() > 0:
                         await elem.scroll_into_view_if_needed()
                         await elem.evaluate("node => { (node.closest('button, a, [role=\"button\"], [role=\"link\"], [role=\"combobox\"]') || node).click(); }")
-                        await asyncio.sleep(2)
+                        await self._pausa(2)
                         await page.wait_for_load_state("domcontentloaded", timeout=5000)
                     else:
                         yield f"⚠️ No se encontró '{target}'"
@@ -196,22 +244,23 @@ class BrowserService:
                         if not await input_elem.is_editable() or await input_elem.get_attribute("readonly"):
                             yield "🖱️ Activando campo readonly..."
                             await input_elem.dispatch_event("click")
-                            await asyncio.sleep(1.5)
+                            await self._pausa(1.5)
                             # Re-localizar el input editable
                             input_elem = page.locator("input:not([readonly]), textarea:not([readonly])").filter(has_text=target).first.or_(
                                          page.locator("input:not([readonly]), textarea:not([readonly])").first)
                         
                         await input_elem.fill("")
                         await input_elem.type(valor_escribir, delay=100)
-                        await asyncio.sleep(1.5)
+                        await self._pausa(1.5)
                     else:
                         yield f"⚠️ No se encontró campo '{target}'"
                 
                 elif accion == "esperar":
                     yield "⏳ IA solicitó esperar..."
-                    await asyncio.sleep(3)
+                    await self._pausa(3)
             except Exception as e:
                 yield f"❌ Error en acción: {str(e)}"
+            self.grabacion.registrar_tiempo_accion(time.perf_counter() - inicio_accion)
 
     async def _aplicar_filtro_inteligente(self, page, campo: str, valor: str, proveedor: str, modelo: str, api_key: str) -> AsyncGenerator[str, None]:
         """
@@ -220,7 +269,6 @@ class BrowserService:
         async for step in self._ejecutar_con_ia(page, f"Filtrar el campo '{campo}' con el valor '{valor}'", proveedor, modelo, api_key):
             yield step
 
-    async def buscar_inteligente(self, url_base: str, vehiculo: Any, filtros_reglas: List[Dict], proveedor: str = "ollama", modelo: str = "llama3.2", api_key: str = None) -> AsyncGenerator[Dict, None]:
     async def buscar_inteligente(self, url_base: str, vehiculo: Any, filtros_reglas: List[Dict], proveedor: str = "ollama", modelo: str = "llama3.2", api_key: str = None, motor: str = "playwright") -> AsyncGenerator[Dict, None]:
         """
         Navega autónomamente, aplica filtros y extrae URLs.
@@ -251,18 +299,33 @@ class BrowserService:
                 yield {"step": f"❌ Error de Configuración: Se detectó {loop_type}. Playwright requiere ProactorEventLoop en Windows. Por favor, reinicie el servidor usando run_backend.py.", "status": "error"}
                 return
 
+        # Playwright se importa recién al primer uso: no pesa en el arranque de la API
+        try:
+            from playwright.async_api import async_playwright
+        except ImportError:
+            yield {"step": "❌ Playwright no está instalado. Ejecute: pip install playwright && playwright install chromium", "status": "error"}
+            return
+
+        self.grabacion = crear_grabacion(url_base, self.modo_navegacion, self.dir_grabaciones)
+        if self.grabacion.modo:
+            yield {"step": f"📼 Navegación en modo '{self.grabacion.modo}': {self.grabacion.directorio}", "status": "info"}
+
         async with async_playwright() as p:
             yield {"step": f"🚀 Iniciando navegador para {url_base}...", "status": "info"}
             # headless=False permite ver la ventana. 
             # slow_mo añade un retraso entre acciones para que sea humano-perceptible.
-            browser = await p.chromium.launch(headless=False, slow_mo=1000)
-            context = await browser.new_context(viewport={'width': 1280, 'height': 800}, user_agent=self.headers["User-Agent"])
+            # Al reproducir una grabación no hay nadie mirando: headless y sin retrasos.
+            reproduciendo = self.grabacion.reproduciendo
+            browser = await p.chromium.launch(headless=reproduciendo, slow_mo=0 if reproduciendo else 1000)
+            context = await self.grabacion.nuevo_contexto(browser, viewport={'width': 1280, 'height': 800}, user_agent=self.headers["User-Agent"])
             page = await context.new_page()
+            publicaciones = None
+            inicio_sesion = navegador_abierto()
 
             try:
                 yield {"step": f"🌐 Navegando a la home de la fuente...", "status": "info"}
                 await page.goto(url_base, wait_until="domcontentloaded", timeout=60000)
-                await asyncio.sleep(2)
+                await self._pausa(2)
                 
                 # Fase 0: Selección de país si la URL base lo sugiere
                 match_pais = re.search(r'\.com/([a-z]{2})/|\.com\.([a-z]{2})/', url_base)
@@ -308,19 +371,25 @@ class BrowserService:
                     campo_regla = str(regla.get("parametros", {}).get("campo", "")).lower()
                     if campo_regla in mapeo_campos:
                         valor = mapeo_campos[campo_regla]
-                        async for sub_step in self._aplicar_filtro_inteligente(page, campo, valor, proveedor, modelo, api_key):
+                        async for sub_step in self._aplicar_filtro_inteligente(page, campo_regla, valor, proveedor, modelo, api_key):
                             yield {"step": sub_step, "status": "info"}
 
                 yield {"step": "⏳ Esperando actualización final de la lista de resultados...", "status": "info"}
                 await page.wait_for_load_state("networkidle", timeout=15000)
-                await asyncio.sleep(2) 
+                await self._pausa(2) 
                 await page.mouse.wheel(0, 1000) # Scroll para cargar lazy items
                 
                 # 3. Extracción Final
                 yield {"step": "📡 Extrayendo publicaciones mediante AXTree...", "status": "info"}
-                client_final = await page.context.new_cdp_session(page)
-                arbol_final = await client_final.send("Accessibility.getFullAXTree")
-                resultados_sucios = self._limpiar_arbol(arbol_final)
+                cron = Cronometro()
+                with span("navegador.paso", objetivo="Extracción final", url=page.url):
+                    client_final = await page.context.new_cdp_session(page)
+                    arbol_final = await client_final.send("Accessibility.getFullAXTree")
+                    cron.marcar("axtree")
+                    resultados_sucios = self._limpiar_arbol(arbol_final)
+                    cron.marcar("limpieza")
+                    anotar(nodos_axtree=len(arbol_final.get("nodes", [])), **{f"ms_{k}": round(v * 1000, 2) for k, v in cron.tiempos.items()})
+                await self.grabacion.registrar_paso(page, "Extracción final", arbol_final, None, cron.tiempos)
                 
                 # Filtrar solo links que parezcan vehículos RELEVANTES (Heurística estricta)
                 publicaciones = []
@@ -353,4 +422,12 @@ class BrowserService:
             except Exception as e:
                 yield {"step": f"❌ Error en navegación: {str(e)}", "status": "error"}
             finally:
-                await browser.close()
\ No newline at end of file
+                # Cerrar el contexto primero: es lo que escribe el HAR al grabar
+                await context.close()
+                await browser.close()
+                navegador_cerrado(inicio_sesion)
+                self.grabacion.finalizar(
+                    publicaciones, url_base=url_base, proveedor=proveedor, modelo=modelo,
+                    vehiculo={"marca": vehiculo.marca, "modelo": vehiculo.modelo, "año": vehiculo.año},
+                    filtros_reglas=filtros_reglas
+                )
\ No newline at end of file
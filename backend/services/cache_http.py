@@ -0,0 +1,113 @@
+# backend/services/cache_http.py
+"""
+GET condicionales para los endpoints de listado: el cuerpo JSON se
+serializa una vez, se identifica con un ETag débil y, si el cliente ya
+tiene esa versión (If-None-Match), se responde 304 sin cuerpo.
+
+Los recursos derivados de las reglas (/reglas, /configuracion) usan como
+ETag la versión del conjunto de reglas (una consulta agregada sobre la
+tabla) más los parámetros de la consulta: el 304 se decide sin armar ni
+serializar la respuesta y el cuerpo serializado se reutiliza hasta la
+siguiente modificación.
+"""
+
+import hashlib
+import json
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from urllib.parse import urlencode
+
+from fastapi import Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import Response
+
+from services.metricas import CACHE_CONSULTAS
+
+# El cliente siempre revalida; el ETag evita reenviar y re-parsear el cuerpo
+CACHE_CONTROL = "no-cache"
+
+
+def serializar_json(contenido: Any) -> bytes:
+    """Mismo formato que JSONResponse de FastAPI"""
+    return json.dumps(jsonable_encoder(contenido), ensure_ascii=False, allow_nan=False,
+                      indent=None, separators=(",", ":")).encode("utf-8")
+
+
+def etag_debil(cuerpo: bytes) -> str:
+    return f'W/"{hashlib.blake2b(cuerpo, digest_size=8).hexdigest()}"'
+
+
+def consulta_normalizada(request: Request) -> str:
+    """Parámetros de la URL ordenados: ?b=1&a=2 y ?a=2&b=1 identifican el mismo recurso"""
+    return urlencode(sorted(request.query_params.multi_items()))
+
+
+def coincide_etag(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparación débil (RFC 9110 §13.1.2): ignora el prefijo W/ y acepta listas y '*'"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    buscado = etag.removeprefix("W/")
+    return any(candidato.strip().removeprefix("W/") == buscado for candidato in if_none_match.split(","))
+
+
+def respuesta_condicional(request: Request, cuerpo: bytes, etag: Optional[str] = None) -> Response:
+    """200 con el cuerpo y su ETag, o 304 si el cliente ya tiene esa versión"""
+    etag = etag or etag_debil(cuerpo)
+    headers = {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+    if coincide_etag(request.headers.get("if-none-match"), etag):
+        CACHE_CONSULTAS.inc(cache="etag", resultado="acierto")
+        return Response(status_code=304, headers=headers)
+    CACHE_CONSULTAS.inc(cache="etag", resultado="fallo")
+    return Response(cuerpo, media_type="application/json", headers=headers)
+
+
+def respuesta_json(request: Request, contenido: Any) -> Response:
+    """Serializa `contenido` y responde condicionalmente según su hash"""
+    return respuesta_condicional(request, serializar_json(contenido))
+
+
+class CacheRespuestas:
+    """Cuerpos JSON ya serializados, válidos mientras no cambie la versión con la que se armaron"""
+
+    def __init__(self, nombre: str = "versionado", max_entradas: int = 64):
+        self.nombre = nombre
+        self.max_entradas = max_entradas
+        self._cuerpos: Dict[Hashable, Tuple[str, bytes]] = {}
+        self._lock = threading.Lock()
+
+    def obtener(self, clave: Hashable, version: str, construir: Callable[[], Any]) -> bytes:
+        with self._lock:
+            guardado = self._cuerpos.get(clave)
+        if guardado and guardado[0] == version:
+            CACHE_CONSULTAS.inc(cache=self.nombre, resultado="acierto")
+            return guardado[1]
+        CACHE_CONSULTAS.inc(cache=self.nombre, resultado="fallo")
+        cuerpo = serializar_json(construir())
+        with self._lock:
+            if clave not in self._cuerpos and len(self._cuerpos) >= self.max_entradas:
+                self._cuerpos.clear()
+            self._cuerpos[clave] = (version, cuerpo)
+        return cuerpo
+
+
+CACHE_VERSIONADO = CacheRespuestas()
+
+
+def respuesta_versionada(request: Request, clave: Hashable, version: str,
+                         construir: Callable[[], Any]) -> Response:
+    """
+    Responde un recurso identificado por `version` y los parámetros de la
+    URL: 304 sin armar el cuerpo si el cliente ya lo tiene, o el cuerpo
+    cacheado (armado con `construir` solo la primera vez para esa versión).
+    """
+    # Cada combinación de parámetros es otro recurso: /reglas?tipo=A y ?tipo=B no comparten ETag
+    consulta = consulta_normalizada(request)
+    if consulta:
+        version = f"{version}-{hashlib.blake2b(consulta.encode(), digest_size=4).hexdigest()}"
+    etag = f'W/"{version}"'
+    if coincide_etag(request.headers.get("if-none-match"), etag):
+        CACHE_CONSULTAS.inc(cache="etag", resultado="acierto")
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": CACHE_CONTROL})
+    return respuesta_condicional(request, CACHE_VERSIONADO.obtener(clave, version, construir), etag)
@@ -0,0 +1,402 @@
+# backend/services/escritor_auditoria.py
+"""
+Escritura diferida y por lotes de la auditoría de reglas (AuditoriaRegla).
+
+Cada cambio de reglas anota sus filas de auditoría en un diario en disco
+(una línea JSON por fila, con fsync) antes de su commit, que ya no las
+incluye; después del commit las encola. Un hilo las inserta en lotes: todo
+lo que se acumuló mientras escribía el lote anterior va en una sola
+transacción, así los cambios de reglas dejan de competir por el lock de
+escritura de SQLite con la auditoría.
+
+Durabilidad (write-ahead): una fila está en el diario antes de que su
+cambio se confirme. Si el proceso muere antes de insertarla, recuperar()
+la inserta al arrancar, pero solo si el cambio llegó a confirmarse: existe
+la versión de HistorialRegla que dejó (o, en una baja física, la regla ya
+no existe). Las filas llevan su id: lo que ya estaba en la base no se
+duplica. El diario se vacía cuando todo lo anotado está resuelto y, bajo
+escritura continua, se compacta cada COMPACTAR_LINEAS líneas.
+
+Un lote que la base rechaza se reintenta MAX_REINTENTOS veces con espera
+creciente; después se inserta fila por fila y las que siguen fallando van
+al archivo de descartadas (<diario>.descartadas, mismo formato: renombrarlo
+como diario las reprocesa al arrancar). Si tampoco se puede escribir ahí,
+quedan en el diario. La cola es acotada: si sigue llena tras
+ESPERA_COLA_SEGUNDOS, quien hizo el cambio intenta una vez insertar sus
+filas; si no puede, se las deja al hilo. Si el hilo muere, escritor_para()
+deja de devolverlo y la auditoría vuelve a la misma transacción.
+
+Las lecturas de auditoría llaman a vaciar() antes de consultar, así quien
+acaba de cambiar una regla ve su registro. El diario es de un proceso (la
+API corre con un worker).
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from sqlalchemy import select
+
+from models import AuditoriaRegla, HistorialRegla, Regla, TipoAccion
+from services import metricas
+
+MAX_COLA = int(os.getenv("AUDITORIA_MAX_COLA", "10000"))
+TAMANO_LOTE = int(os.getenv("AUDITORIA_TAMANO_LOTE", "500"))
+FSYNC = os.getenv("AUDITORIA_FSYNC", "1") == "1"
+# Tras la primera fila de un lote se espera este tiempo a que lleguen más: una
+# transacción de auditoría cada tanto en lugar de una por cambio
+ESPERA_LOTE_SEGUNDOS = float(os.getenv("AUDITORIA_ESPERA_LOTE_MS", "200")) / 1000
+# Reintentos de un lote que la base rechaza (ej. "database is locked"); la espera se duplica en cada uno
+MAX_REINTENTOS = int(os.getenv("AUDITORIA_MAX_REINTENTOS", "5"))
+ESPERA_REINTENTO_SEGUNDOS = 0.5
+# Espera máxima por lugar en la cola antes de insertar en el hilo del cambio
+ESPERA_COLA_SEGUNDOS = float(os.getenv("AUDITORIA_ESPERA_COLA_MS", "100")) / 1000
+# El diario se reescribe con lo no resuelto al pasar esta cantidad de líneas
+COMPACTAR_LINEAS = int(os.getenv("AUDITORIA_COMPACTAR_LINEAS", "10000"))
+LOTE_CONSULTA = 500
+
+_ESCRITORES: Dict[object, "EscritorAuditoria"] = {}
+# Marcas en la cola del escritor (no son filas)
+_DETENER = object()
+_VACIAR = object()
+
+AUDITORIA_PENDIENTES = metricas.Gauge(
+    "auditoria_pendientes", "Filas de auditoría en el diario que todavía no se insertaron en la base"
+)
+AUDITORIA_LOTES = metricas.Histograma(
+    "auditoria_lote_filas", "Filas por lote de auditoría insertado", buckets=(1, 5, 10, 50, 100, 500, 1000)
+)
+AUDITORIA_REINTENTOS = metricas.Contador("auditoria_reintentos_total", "Lotes de auditoría que fallaron y se reintentan")
+AUDITORIA_DESCARTADAS = metricas.Contador(
+    "auditoria_descartadas_total", "Filas de auditoría que la base rechazó tras los reintentos (archivo de descartadas)"
+)
+AUDITORIA_SINCRONICAS = metricas.Contador(
+    "auditoria_sincronicas_total", "Filas de auditoría insertadas por el cambio mismo porque la cola estaba llena"
+)
+
+
+def _a_linea(fila: Dict) -> str:
+    return json.dumps({**fila, "fecha": fila["fecha"].isoformat(), "accion": fila["accion"].value},
+                      ensure_ascii=False, default=str)
+
+
+def _desde_linea(linea: str) -> Dict:
+    fila = json.loads(linea)
+    fila["fecha"] = datetime.fromisoformat(fila["fecha"])
+    fila["accion"] = TipoAccion(fila["accion"])
+    return fila
+
+
+class EscritorAuditoria:
+    """Un escritor por engine; ReglasService lo usa si está iniciado (escritor_para)"""
+
+    def __init__(self, engine, ruta_diario: str, max_cola: int = MAX_COLA, tamano_lote: int = TAMANO_LOTE,
+                 espera_lote: float = ESPERA_LOTE_SEGUNDOS):
+        self.engine = engine
+        self.ruta_diario = ruta_diario
+        self.ruta_descartadas = ruta_diario + ".descartadas"
+        self.tamano_lote = tamano_lote
+        self.espera_lote = espera_lote
+        self._cola: "queue.Queue[Dict]" = queue.Queue(maxsize=max_cola)
+        # Filas anotadas que todavía no se resolvieron (vaciar() espera que lleguen a 0)
+        self._pendientes = 0
+        # Filas del diario que todavía no están en la base (ni apartadas), por id: lo que sobrevive a una compactación
+        self._sin_confirmar: Dict[str, Dict] = {}
+        # Filas que quien hizo el cambio no pudo insertar con la cola llena: las toma el hilo
+        self._rezagadas: List[Dict] = []
+        self._lineas = 0
+        self._lock = threading.Lock()
+        self._sin_pendientes = threading.Condition(self._lock)
+        self._hilo: Optional[threading.Thread] = None
+        self._diario = None
+
+    @property
+    def activo(self) -> bool:
+        return self._hilo is not None and self._hilo.is_alive()
+
+    def iniciar(self):
+        """Inserta lo que haya quedado en el diario y arranca el hilo escritor"""
+        recuperadas = self.recuperar()
+        if recuperadas:
+            print(f"📒 Auditoría: {recuperadas} registros recuperados del diario")
+        self._diario = open(self.ruta_diario, "a", encoding="utf-8")
+        self._lineas = len(self._sin_confirmar)
+        self._hilo = threading.Thread(target=self._escribir, name="escritor-auditoria", daemon=True)
+        self._hilo.start()
+        _ESCRITORES[self.engine] = self
+
+    def cerrar(self, timeout: float = 10.0):
+        """Inserta lo pendiente y detiene el hilo"""
+        if self._hilo is None:
+            return
+        _ESCRITORES.pop(self.engine, None)
+        if self._hilo.is_alive():
+            self.vaciar(timeout)
+            self._cola.put(_DETENER)  # despierta al hilo si está esperando filas
+            self._hilo.join(timeout)
+        self._hilo = None
+        self._diario.close()
+
+    def anotar(self, filas: List[Dict]):
+        """Anota las filas en el diario (antes del commit del cambio: write-ahead)"""
+        if not filas:
+            return
+        with self._lock:
+            self._diario.write("".join(_a_linea(f) + "\n" for f in filas))
+            self._diario.flush()
+            if FSYNC:
+                os.fsync(self._diario.fileno())
+            self._lineas += len(filas)
+            self._pendientes += len(filas)
+            self._sin_confirmar.update((f["id"], f) for f in filas)
+        AUDITORIA_PENDIENTES.inc(len(filas))
+
+    def encolar(self, filas: List[Dict]):
+        """
+        Pasa al hilo las filas de un cambio ya confirmado. Si la cola sigue
+        llena tras ESPERA_COLA_SEGUNDOS, las que faltan se insertan acá.
+        """
+        encoladas = 0
+        try:
+            while encoladas < len(filas) and self.activo:
+                self._cola.put(filas[encoladas], timeout=ESPERA_COLA_SEGUNDOS)
+                encoladas += 1
+        except queue.Full:
+            pass
+        if encoladas < len(filas):
+            self._insertar_en_el_cambio(filas[encoladas:])
+
+    def descartar(self, filas: List[Dict]):
+        """El commit del cambio falló: sus filas anotadas no se insertan"""
+        self._liberar(filas, filas)
+
+    def vaciar(self, timeout: float = 5.0) -> bool:
+        """Espera a que todo lo registrado esté en la base; False si venció el timeout"""
+        with self._sin_pendientes:
+            if self._pendientes:
+                try:
+                    self._cola.put_nowait(_VACIAR)  # que el lote en curso no espere toda la ventana
+                except queue.Full:
+                    pass
+            return self._sin_pendientes.wait_for(lambda: self._pendientes == 0, timeout)
+
+    def recuperar(self) -> int:
+        """
+        Inserta las filas del diario que no llegaron a la base. Las que la
+        base sigue rechazando y no se pudieron apartar quedan en el diario.
+        """
+        if not os.path.exists(self.ruta_diario):
+            return 0
+        with open(self.ruta_diario, encoding="utf-8") as f:
+            filas = []
+            for linea in f:
+                try:
+                    filas.append(_desde_linea(linea))
+                except (ValueError, KeyError):
+                    # Línea cortada por un corte a mitad de escritura: su cambio no llegó a responder
+                    print(f"⚠️ Auditoría: línea del diario ilegible descartada: {linea[:120]!r}")
+        tabla = AuditoriaRegla.__table__
+        with self.engine.connect() as conexion:
+            existentes = set(_consultar_en(conexion, tabla.c.id, [f["id"] for f in filas]))
+            faltantes = _confirmadas(conexion, [f for f in filas if f["id"] not in existentes])
+        resueltas = {f["id"] for f in self._insertar(faltantes, reintentos=0)} if faltantes else set()
+        self._sin_confirmar = {f["id"]: f for f in faltantes if f["id"] not in resueltas}
+        with open(self.ruta_diario, "w", encoding="utf-8") as f:
+            f.write("".join(_a_linea(fila) + "\n" for fila in self._sin_confirmar.values()))
+        return len(resueltas)
+
+    def _escribir(self):
+        while True:
+            fila = self._cola.get()
+            if fila is _DETENER:
+                return
+            lote = [] if fila is _VACIAR else [fila]
+            # Lo que llegue dentro de la ventana va en la misma transacción; vaciar() la corta
+            limite = time.monotonic() + self.espera_lote
+            while lote and len(lote) < self.tamano_lote:
+                try:
+                    fila = self._cola.get(timeout=max(limite - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if fila is _DETENER or fila is _VACIAR:
+                    break
+                lote.append(fila)
+            with self._lock:
+                lote += self._rezagadas
+                self._rezagadas = []
+            if lote:
+                self._procesar(lote)
+            if fila is _DETENER:
+                return
+
+    def _procesar(self, lote: List[Dict]):
+        # Nada de lo que pase con un lote puede matar al hilo ni dejar a vaciar() esperando
+        resueltas = []
+        try:
+            resueltas = self._insertar(lote)
+        except Exception as e:
+            print(f"❌ Auditoría: falló el lote de {len(lote)} ({e}); queda en el diario para recuperar()")
+        finally:
+            self._liberar(lote, resueltas)
+
+    def _insertar_en_el_cambio(self, filas: List[Dict]):
+        """
+        Cola llena: un solo intento en el hilo del cambio, sin esperas. El
+        cambio ya se confirmó, así que esto nunca falla hacia el endpoint:
+        si la base rechaza las filas, quedan para el hilo (o en el diario).
+        """
+        try:
+            with self.engine.begin() as conexion:
+                conexion.execute(AuditoriaRegla.__table__.insert(), filas)
+        except Exception as e:
+            print(f"⚠️ Auditoría: cola llena y la base rechazó {len(filas)} registros ({e}); quedan para el escritor")
+            if self.activo:
+                with self._lock:
+                    self._rezagadas += filas
+                try:
+                    self._cola.put_nowait(_VACIAR)  # por si el hilo ya estaba esperando filas
+                except queue.Full:
+                    pass
+            else:
+                self._liberar(filas, [])
+            return
+        AUDITORIA_SINCRONICAS.inc(len(filas))
+        self._liberar(filas, filas)
+
+    def _insertar(self, lote: List[Dict], reintentos: int = MAX_REINTENTOS) -> List[Dict]:
+        """Inserta el lote; devuelve las filas resueltas (en la base o apartadas)"""
+        error = None
+        for intento in range(reintentos + 1):
+            if intento:
+                AUDITORIA_REINTENTOS.inc()
+                print(f"⚠️ Auditoría: no se pudo insertar un lote de {len(lote)} ({error}); "
+                      f"reintento {intento}/{reintentos}")
+                time.sleep(ESPERA_REINTENTO_SEGUNDOS * 2 ** (intento - 1))
+            try:
+                with self.engine.begin() as conexion:
+                    conexion.execute(AuditoriaRegla.__table__.insert(), lote)
+                AUDITORIA_LOTES.observar(len(lote))
+                return lote
+            except Exception as e:
+                error = e
+        # Una fila mala no debe frenar a las demás: se insertan de a una y las rechazadas se apartan
+        return self._apartar_rechazadas(lote)
+
+    def _apartar_rechazadas(self, lote: List[Dict]) -> List[Dict]:
+        insertadas, rechazadas = [], []
+        for fila in lote:
+            try:
+                with self.engine.begin() as conexion:
+                    conexion.execute(AuditoriaRegla.__table__.insert(), [fila])
+                insertadas.append(fila)
+            except Exception as e:
+                rechazadas.append((fila, e))
+        if not rechazadas:
+            return insertadas
+        try:
+            with open(self.ruta_descartadas, "a", encoding="utf-8") as f:
+                f.write("".join(_a_linea(fila) + "\n" for fila, _ in rechazadas))
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            print(f"❌ Auditoría: no se pudo escribir {self.ruta_descartadas} ({e}); "
+                  f"{len(rechazadas)} registros rechazados quedan en el diario")
+            return insertadas
+        AUDITORIA_DESCARTADAS.inc(len(rechazadas))
+        print(f"❌ Auditoría: {len(rechazadas)} registros rechazados por la base van a {self.ruta_descartadas} "
+              f"(último error: {rechazadas[-1][1]})")
+        return lote
+
+    def _liberar(self, filas: List[Dict], resueltas: List[Dict]):
+        """Las filas dejan de estar pendientes; las resueltas salen además del diario"""
+        AUDITORIA_PENDIENTES.dec(len(resueltas))
+        with self._sin_pendientes:
+            for fila in resueltas:
+                self._sin_confirmar.pop(fila["id"], None)
+            self._pendientes -= len(filas)
+            try:
+                self._compactar()
+            except OSError as e:
+                print(f"⚠️ Auditoría: no se pudo compactar el diario ({e})")
+            if self._pendientes == 0:
+                self._sin_pendientes.notify_all()
+
+    def _compactar(self):
+        """
+        Con el lock tomado. Vacía el diario si todo lo anotado se resolvió;
+        si no, cuando acumula COMPACTAR_LINEAS líneas y la mayoría ya están
+        resueltas, lo reescribe solo con las que faltan. Así no crece sin
+        límite aunque la cola nunca llegue a vaciarse.
+        """
+        if not self._sin_confirmar:
+            if self._lineas:
+                self._diario.truncate(0)
+                self._diario.seek(0)
+                self._lineas = 0
+            return
+        if self._lineas < COMPACTAR_LINEAS or self._lineas < 2 * len(self._sin_confirmar):
+            return
+        temporal = self.ruta_diario + ".tmp"
+        with open(temporal, "w", encoding="utf-8") as f:
+            f.write("".join(_a_linea(fila) + "\n" for fila in self._sin_confirmar.values()))
+            f.flush()
+            if FSYNC:
+                os.fsync(f.fileno())
+        os.replace(temporal, self.ruta_diario)
+        self._diario.close()
+        self._diario = open(self.ruta_diario, "a", encoding="utf-8")
+        self._lineas = len(self._sin_confirmar)
+
+
+def _consultar_en(conexion, columna, valores: List) -> List:
+    """Valores de `columna` presentes entre `valores` (IN por tandas)"""
+    encontrados = []
+    for desde in range(0, len(valores), LOTE_CONSULTA):
+        encontrados += conexion.execute(
+            select(columna).where(columna.in_(valores[desde:desde + LOTE_CONSULTA]))
+        ).scalars().all()
+    return encontrados
+
+
+def _confirmadas(conexion, filas: List[Dict]) -> List[Dict]:
+    """
+    Filas del diario cuyo cambio llegó a confirmarse. Todo cambio salvo la
+    baja física guarda en la misma transacción la versión de HistorialRegla
+    que figura en valor_nuevo; la baja física deja la regla sin existir.
+    """
+    if not filas:
+        return []
+    historial = HistorialRegla.__table__
+    ids = list({f["regla_id"] for f in filas})
+    versiones = set()
+    for desde in range(0, len(ids), LOTE_CONSULTA):
+        versiones.update(conexion.execute(
+            select(historial.c.regla_id, historial.c.version)
+            .where(historial.c.regla_id.in_(ids[desde:desde + LOTE_CONSULTA]))
+        ).tuples())
+    reglas_existentes = set(_consultar_en(conexion, Regla.__table__.c.id, ids))
+
+    confirmadas = []
+    for fila in filas:
+        version = (fila.get("valor_nuevo") or {}).get("version")
+        if version is not None:
+            confirmada = (fila["regla_id"], version) in versiones
+        else:
+            confirmada = fila["regla_id"] not in reglas_existentes
+        if confirmada:
+            confirmadas.append(fila)
+        else:
+            print(f"⚠️ Auditoría: registro {fila['id']} del diario descartado: su cambio no se confirmó")
+    return confirmadas
+
+
+def escritor_para(db) -> Optional[EscritorAuditoria]:
+    """Escritor activo para el engine de la sesión, o None (auditoría en la misma transacción)"""
+    if not _ESCRITORES:
+        return None
+    escritor = _ESCRITORES.get(db.get_bind())
+    return escritor if escritor is not None and escritor.activo else None
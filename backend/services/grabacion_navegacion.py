@@ -0,0 +1,141 @@
+# backend/services/grabacion_navegacion.py
+"""
+Grabación y reproducción de la búsqueda agentic de BrowserService.
+
+- Modo "grabar": la navegación real se guarda en un directorio por sitio:
+  la red completa en HAR (record_har_path de Playwright) y, por cada paso
+  del agente, el HTML de la página, el AXTree crudo, la decisión de la IA
+  y los tiempos (pasos.json).
+- Modo "reproducir": el contexto del navegador sirve la red desde el HAR
+  por intercepción de rutas (route_from_har, sin salir a internet), las
+  decisiones de la IA se toman de la grabación en el mismo orden y no hay
+  pausas "humanas": la búsqueda completa corre offline en segundos y se
+  puede perfilar paso a paso y comparar contra lo grabado.
+
+Se activa con NAVEGACION_MODO=grabar|reproducir y NAVEGACION_GRABACION_DIR.
+"""
+
+import json
+import os
+import re
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+NAVEGACION_MODO = os.getenv("NAVEGACION_MODO", "")
+NAVEGACION_GRABACION_DIR = os.getenv("NAVEGACION_GRABACION_DIR", "grabaciones_navegacion")
+
+MODOS = ("", "grabar", "reproducir")
+ARCHIVO_HAR = "red.har"
+ARCHIVO_PASOS = "pasos.json"
+
+
+def directorio_sitio(base: str, url: str) -> str:
+    """Un subdirectorio por sitio y ruta (kavak.com/ar/usados -> kavak.com_ar_usados)"""
+    partes = urlparse(url if "://" in url else f"https://{url}")
+    nombre = re.sub(r"[^\w.-]+", "_", f"{partes.netloc}{partes.path}").strip("_")
+    return os.path.join(base, nombre or "sitio")
+
+
+class GrabacionNavegacion:
+    """Estado de grabación/reproducción de una búsqueda sobre un sitio"""
+
+    def __init__(self, modo: str = "", directorio: Optional[str] = None):
+        if modo not in MODOS:
+            raise ValueError(f"Modo de navegación desconocido: '{modo}' (opciones: grabar, reproducir)")
+        self.modo = modo
+        self.directorio = directorio
+        self.pasos: List[Dict[str, Any]] = []
+        self.metadata: Dict[str, Any] = {}
+        self.publicaciones: Optional[List[Dict]] = None
+        self._decisiones: List[Dict[str, Any]] = []
+
+        if self.reproduciendo:
+            with open(os.path.join(directorio, ARCHIVO_PASOS), encoding="utf-8") as f:
+                grabado = json.load(f)
+            self.metadata = grabado.get("metadata", {})
+            self.pasos_grabados = grabado.get("pasos", [])
+            self._decisiones = [p["decision"] for p in self.pasos_grabados if p.get("decision") is not None]
+        elif self.grabando:
+            os.makedirs(directorio, exist_ok=True)
+
+    @property
+    def grabando(self) -> bool:
+        return self.modo == "grabar"
+
+    @property
+    def reproduciendo(self) -> bool:
+        return self.modo == "reproducir"
+
+    async def nuevo_contexto(self, browser, **opciones):
+        """Contexto que graba la red en HAR o la sirve desde el HAR grabado"""
+        har = os.path.join(self.directorio, ARCHIVO_HAR) if self.directorio else None
+        if self.grabando:
+            return await browser.new_context(record_har_path=har, record_har_content="embed", **opciones)
+        context = await browser.new_context(**opciones)
+        if self.reproduciendo:
+            # Lo que no está grabado se aborta: la reproducción nunca sale a internet
+            await context.route_from_har(har, not_found="abort")
+        return context
+
+    def decision_grabada(self) -> Optional[Dict[str, Any]]:
+        """Próxima decisión de la IA grabada (solo al reproducir; {} si se agotaron)"""
+        if not self.reproduciendo:
+            return None
+        return self._decisiones.pop(0) if self._decisiones else {}
+
+    async def registrar_paso(self, page, objetivo: str, arbol: Dict, decision: Optional[Dict],
+                             tiempos: Dict[str, float]):
+        """Agrega el paso; al grabar guarda también HTML y AXTree crudo"""
+        paso = {
+            "paso": len(self.pasos) + 1,
+            "objetivo": objetivo,
+            "url": page.url,
+            "nodos_axtree": len(arbol.get("nodes", [])),
+            "decision": decision,
+            "tiempos_ms": {k: round(v * 1000, 2) for k, v in tiempos.items()},
+        }
+        if self.grabando:
+            prefijo = os.path.join(self.directorio, f"paso_{paso['paso']:03d}")
+            with open(f"{prefijo}.html", "w", encoding="utf-8") as f:
+                f.write(await page.content())
+            with open(f"{prefijo}_axtree.json", "w", encoding="utf-8") as f:
+                json.dump(arbol, f, ensure_ascii=False)
+        self.pasos.append(paso)
+
+    def registrar_tiempo_accion(self, segundos: float):
+        """Tiempo de la acción (click, escribir...) ejecutada tras la decisión del último paso"""
+        if self.pasos:
+            self.pasos[-1]["tiempos_ms"]["accion"] = round(segundos * 1000, 2)
+
+    def finalizar(self, publicaciones: Optional[List[Dict]] = None, **metadata):
+        """Guarda el resultado; al grabar escribe pasos.json con la metadata de la búsqueda"""
+        self.publicaciones = publicaciones
+        if not self.grabando:
+            return
+        self.metadata.update(metadata, publicaciones=publicaciones)
+        self.metadata["grabado_en"] = datetime.now().isoformat(timespec="seconds")
+        with open(os.path.join(self.directorio, ARCHIVO_PASOS), "w", encoding="utf-8") as f:
+            json.dump({"metadata": self.metadata, "pasos": self.pasos}, f, indent=2, ensure_ascii=False, default=str)
+
+
+def crear_grabacion(url_base: str, modo: Optional[str] = None, base: Optional[str] = None) -> GrabacionNavegacion:
+    """Grabación según la configuración (por defecto, la de las variables de entorno)"""
+    modo = NAVEGACION_MODO if modo is None else modo
+    if not modo:
+        return GrabacionNavegacion()
+    return GrabacionNavegacion(modo, directorio_sitio(base or NAVEGACION_GRABACION_DIR, url_base))
+
+
+class Cronometro:
+    """Tiempos parciales de un paso: cron.marcar("arbol") guarda lo transcurrido desde la marca anterior"""
+
+    def __init__(self):
+        self.tiempos: Dict[str, float] = {}
+        self._ultimo = time.perf_counter()
+
+    def marcar(self, nombre: str):
+        ahora = time.perf_counter()
+        self.tiempos[nombre] = ahora - self._ultimo
+        self._ultimo = ahora
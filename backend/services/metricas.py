@@ -0,0 +1,264 @@
+# backend/services/metricas.py
+"""
+Métricas en proceso en formato de exposición de Prometheus (texto 0.0.4),
+sin depender de prometheus_client.
+
+Contadores, gauges e histogramas con etiquetas; cada métrica tiene su
+propio lock, así que se pueden actualizar desde el event loop y desde el
+threadpool de FastAPI a la vez. Actualizar es un incremento bajo lock (los
+histogramas ubican el bucket con bisect): no hay costo por request más
+allá de eso, el texto se arma solo al leer /metrics.
+
+Las llamadas al LLM y las búsquedas se registran a partir de los spans de
+services/trazas.py (observar_span), las consultas SQL con un evento de
+SQLAlchemy (instrumentar_db) y el resto desde el código que las origina.
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Sequence, Tuple
+
+PREFIJO = "valuacion"
+
+BUCKETS_LATENCIA = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_LLM = (0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+BUCKETS_TOKENS = (64, 128, 256, 512, 1024, 2048, 4096, 8192, 16384, 32768)
+BUCKETS_NAVEGADOR = (5.0, 15.0, 30.0, 60.0, 120.0, 300.0, 600.0)
+
+_REGISTRO: List["Metrica"] = []
+
+
+def _escapar(valor) -> str:
+    return str(valor).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _etiquetas(nombres: Sequence[str], valores: Sequence, extra: str = "") -> str:
+    pares = [f'{n}="{_escapar(v)}"' for n, v in zip(nombres, valores)]
+    if extra:
+        pares.append(extra)
+    return "{" + ",".join(pares) + "}" if pares else ""
+
+
+def _numero(valor: float) -> str:
+    if valor == float("inf"):
+        return "+Inf"
+    return repr(float(valor)) if isinstance(valor, float) and not valor.is_integer() else str(int(valor))
+
+
+class Metrica:
+    tipo = "untyped"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()):
+        self.nombre = f"{PREFIJO}_{nombre}"
+        self.ayuda = ayuda
+        self.etiquetas = tuple(etiquetas)
+        self._valores: Dict[Tuple, object] = {}
+        self._lock = threading.Lock()
+        _REGISTRO.append(self)
+
+    def _clave(self, etiquetas: Dict[str, object]) -> Tuple:
+        return tuple(str(etiquetas.get(n) if etiquetas.get(n) is not None else "") for n in self.etiquetas)
+
+    def exponer(self) -> List[str]:
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} {self.tipo}"]
+        with self._lock:
+            valores = list(self._valores.items())
+        for clave, valor in sorted(valores):
+            lineas.extend(self._lineas(clave, valor))
+        return lineas
+
+    def _lineas(self, clave: Tuple, valor) -> List[str]:
+        return [f"{self.nombre}{_etiquetas(self.etiquetas, clave)} {_numero(valor)}"]
+
+
+class Contador(Metrica):
+    tipo = "counter"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = ()):
+        super().__init__(nombre, ayuda, etiquetas)
+        if not self.etiquetas:
+            self._valores[()] = 0
+
+    def inc(self, cantidad: float = 1, **etiquetas):
+        clave = self._clave(etiquetas)
+        with self._lock:
+            self._valores[clave] = self._valores.get(clave, 0) + cantidad
+
+    def valor(self, **etiquetas) -> float:
+        with self._lock:
+            return self._valores.get(self._clave(etiquetas), 0)
+
+
+class Gauge(Contador):
+    tipo = "gauge"
+
+    def dec(self, cantidad: float = 1, **etiquetas):
+        self.inc(-cantidad, **etiquetas)
+
+
+class Histograma(Metrica):
+    tipo = "histogram"
+
+    def __init__(self, nombre: str, ayuda: str, etiquetas: Sequence[str] = (),
+                 buckets: Sequence[float] = BUCKETS_LATENCIA):
+        super().__init__(nombre, ayuda, etiquetas)
+        self.buckets = tuple(sorted(buckets))
+
+    def observar(self, valor: float, **etiquetas):
+        clave = self._clave(etiquetas)
+        indice = bisect_left(self.buckets, valor)
+        with self._lock:
+            conteos = self._valores.get(clave)
+            if conteos is None:
+                # Un conteo por bucket más el de +Inf, la suma y el total
+                conteos = self._valores[clave] = [0] * (len(self.buckets) + 1) + [0.0, 0]
+            conteos[indice] += 1
+            conteos[-2] += valor
+            conteos[-1] += 1
+
+    def _lineas(self, clave: Tuple, conteos) -> List[str]:
+        lineas = []
+        acumulado = 0
+        for limite, cantidad in zip(self.buckets + (float("inf"),), conteos):
+            acumulado += cantidad
+            le = f'le="{_numero(limite)}"'
+            lineas.append(f"{self.nombre}_bucket{_etiquetas(self.etiquetas, clave, le)} {acumulado}")
+        etiquetas = _etiquetas(self.etiquetas, clave)
+        lineas.append(f"{self.nombre}_sum{etiquetas} {_numero(conteos[-2])}")
+        lineas.append(f"{self.nombre}_count{etiquetas} {conteos[-1]}")
+        return lineas
+
+
+def exponer() -> str:
+    """Todas las métricas en formato de texto de Prometheus"""
+    lineas = []
+    for metrica in _REGISTRO:
+        lineas.extend(metrica.exponer())
+    return "\n".join(lineas) + "\n"
+
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+# ============================================
+# MÉTRICAS DE LA APLICACIÓN
+# ============================================
+
+HTTP_DURACION = Histograma(
+    "http_duracion_segundos", "Latencia de los requests por ruta (hasta enviar los headers)",
+    ("metodo", "ruta", "codigo")
+)
+LLM_DURACION = Histograma(
+    "llm_duracion_segundos", "Latencia de las llamadas al LLM", ("proveedor", "modelo"), BUCKETS_LLM
+)
+LLM_TOKENS = Histograma(
+    "llm_tokens", "Tokens por llamada al LLM (tipo=entrada|salida)", ("proveedor", "modelo", "tipo"), BUCKETS_TOKENS
+)
+LLM_ERRORES = Contador("llm_errores_total", "Llamadas al LLM que terminaron en excepción", ("proveedor", "modelo"))
+BUSQUEDAS = Contador(
+    "busquedas_total", "Búsquedas web por motor y resultado (con_resultados|vacia|error)", ("motor", "resultado")
+)
+BUSQUEDA_DURACION = Histograma("busqueda_duracion_segundos", "Latencia de las búsquedas web", ("motor",))
+CACHE_CONSULTAS = Contador(
+    "cache_consultas_total", "Consultas a los caches de respuestas (resultado=acierto|fallo)", ("cache", "resultado")
+)
+NAVEGADORES_ACTIVOS = Gauge("navegador_sesiones_activas", "Navegadores Playwright abiertos en este momento")
+NAVEGADOR_SESIONES = Histograma(
+    "navegador_sesion_segundos", "Duración de cada sesión de navegador (sum/tiempo = ocupación media)",
+    buckets=BUCKETS_NAVEGADOR
+)
+DB_CONSULTAS = Contador("db_consultas_total", "Sentencias SQL ejecutadas por operación", ("operacion",))
+VALUACIONES = Contador("valuaciones_total", "Valuaciones realizadas por proveedor y confianza", ("proveedor", "confianza"))
+VALUACION_DURACION = Histograma(
+    "valuaciones_duracion_segundos", "Duración de las valuaciones", ("proveedor",), BUCKETS_LLM
+)
+
+
+def observar_span(span):
+    """Oyente de services.trazas: LLM (latencia, tokens, errores) y búsquedas web a partir de sus spans"""
+    if span.nombre.startswith("llm."):
+        proveedor = span.nombre[4:]
+        modelo = span.atributos.get("modelo") or "default"
+        LLM_DURACION.observar(span.duracion_ms / 1000, proveedor=proveedor, modelo=modelo)
+        for tipo in ("entrada", "salida"):
+            tokens = span.atributos.get(f"tokens_{tipo}")
+            if tokens is not None:
+                LLM_TOKENS.observar(tokens, proveedor=proveedor, modelo=modelo, tipo=tipo)
+        if span.estado == "ERROR":
+            LLM_ERRORES.inc(proveedor=proveedor, modelo=modelo)
+    elif span.nombre == "busqueda.web":
+        motor = span.atributos.get("motor")
+        if span.estado == "ERROR":
+            resultado = "error"
+        else:
+            resultado = "con_resultados" if span.atributos.get("resultados") else "vacia"
+        BUSQUEDAS.inc(motor=motor, resultado=resultado)
+        BUSQUEDA_DURACION.observar(span.duracion_ms / 1000, motor=motor)
+
+
+def registrar_valuacion(proveedor: str, confianza: Optional[str], segundos: float):
+    VALUACIONES.inc(proveedor=proveedor, confianza=confianza or "sin_dato")
+    VALUACION_DURACION.observar(segundos, proveedor=proveedor)
+
+
+class MiddlewareMetricas:
+    """
+    Middleware ASGI que mide cada request hasta el envío de los headers
+    (en respuestas streaming no incluye el cuerpo). La ruta es la plantilla
+    (/valuaciones/{valuacion_id}), no la URL, para acotar las etiquetas.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        inicio = time.perf_counter()
+        medido = False
+
+        def observar(codigo):
+            ruta = scope.get("route")
+            HTTP_DURACION.observar(time.perf_counter() - inicio, metodo=scope["method"],
+                                   ruta=getattr(ruta, "path", "sin_ruta"), codigo=codigo)
+
+        async def enviar(mensaje):
+            nonlocal medido
+            if mensaje["type"] == "http.response.start" and not medido:
+                medido = True
+                observar(mensaje["status"])
+            await send(mensaje)
+
+        try:
+            await self.app(scope, receive, enviar)
+        except Exception:
+            if not medido:
+                observar(500)
+            raise
+
+
+def navegador_abierto() -> float:
+    """Cuenta un navegador abierto; devuelve el inicio para navegador_cerrado"""
+    NAVEGADORES_ACTIVOS.inc()
+    return time.perf_counter()
+
+
+def navegador_cerrado(inicio: float):
+    NAVEGADORES_ACTIVOS.dec()
+    NAVEGADOR_SESIONES.observar(time.perf_counter() - inicio)
+
+
+def instrumentar_db():
+    """Cuenta cada sentencia SQL ejecutada (de cualquier engine) por operación"""
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    if getattr(instrumentar_db, "_instalado", False):
+        return
+    instrumentar_db._instalado = True
+
+    @event.listens_for(Engine, "after_cursor_execute")
+    def _contar(conn, cursor, statement, parameters, context, executemany):
+        DB_CONSULTAS.inc(operacion=statement.lstrip().split(" ", 1)[0].upper())
@@ -0,0 +1,18 @@
+# backend/services/motor/__init__.py
+"""
+Motor de valuación determinístico (sin IA).
+Aplica las reglas de negocio sobre comparables almacenados.
+"""
+
+from .ajustes import LoteVehiculos, aplicar_ajustes, compilar_ajustes
+from .comparables import Comparables, cargar_comparables_historicos
+from .control import FuenteComparables, FuenteHistorica
+from .muestreo import nueva_semilla
+from .pipeline import PipelineValuacion
+from .replay import ahora_configuracion, cargar_snapshots, repetir_lote, repetir_valuacion, simular_reglas
+
+__all__ = [
+    'Comparables', 'cargar_comparables_historicos', 'FuenteComparables', 'FuenteHistorica',
+    'LoteVehiculos', 'aplicar_ajustes', 'compilar_ajustes', 'PipelineValuacion', 'nueva_semilla',
+    'ahora_configuracion', 'cargar_snapshots', 'repetir_lote', 'repetir_valuacion', 'simular_reglas'
+]
@@ -0,0 +1,341 @@
+# backend/services/motor/ajustes.py
+"""
+Ajustes de cálculo (reglas AJUSTE_CALCULO) sobre lotes de vehículos.
+
+Cada regla se compila una sola vez en un predicado (a qué vehículos aplica:
+marca, modelo, año, km, precio, condición de campo y período de vigencia)
+y una transformación del precio. El evaluador aplica las reglas en su
+`orden` sobre el lote y deja una auditoría por ajuste. Un índice de
+aplicabilidad (marca y vigencia) limita cada regla a las filas que puede
+alcanzar.
+"""
+
+import json
+import os
+from datetime import date, datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.parseo_json import a_numero
+from services.motor.condiciones import comparar
+from services.motor.aplicabilidad import IndiceAplicabilidad, vigencia_desde_params
+
+
+# Cotización de referencia para montos en otra moneda (pesos por unidad)
+COTIZACION_USD_ARS = float(os.getenv("COTIZACION_USD_ARS", "1000"))
+# Otras monedas: "EUR=1100,BRL=200"
+COTIZACIONES_EXTRA = os.getenv("COTIZACIONES", "")
+
+# Cantidad de configuraciones de ajustes compiladas que se mantienen en memoria
+MAX_CACHE_COMPILADOS = 64
+
+_OPERACIONES_RESTA = ("decrementar", "restar", "disminuir", "reducir")
+
+# Tipos que necesitan datos de ventas o tendencia que el motor no tiene
+TIPOS_SIN_DATOS = ("margen_historico", "margen_indexado")
+# Tipos multiplicativos: el resultado no depende del orden entre ellos
+TIPOS_CONMUTATIVOS = ("inflacion", "ajuste_por_condicion", "ajuste_porcentual")
+
+# Tabla de cotizaciones: moneda -> pesos por unidad (se carga una vez)
+_cotizaciones: Dict[str, float] = {}
+# Clave de la configuración -> ajustes compilados
+_cache_compilados: Dict[str, List["AjusteCompilado"]] = {}
+
+
+def cotizacion(moneda: Optional[str]) -> float:
+    """Pesos por unidad de `moneda` (ARS = 1); una moneda desconocida cuenta 1"""
+    if not _cotizaciones:
+        _cotizaciones.update({"ARS": 1.0, "USD": COTIZACION_USD_ARS})
+        for par in COTIZACIONES_EXTRA.split(","):
+            if "=" in par:
+                codigo, valor = par.split("=", 1)
+                if a_numero(valor):
+                    _cotizaciones[codigo.strip().upper()] = a_numero(valor)
+    return _cotizaciones.get(str(moneda or "ARS").upper(), 1.0)
+
+
+# ==========================================
+# Lote de vehículos
+# ==========================================
+
+class LoteVehiculos:
+    """
+    Vehículos a ajustar en formato columnar, con la fecha de valuación y
+    las estadísticas de mercado de cada uno (las bases de los ajustes).
+    """
+
+    _ALIAS = {"km": "kilometraje", "anio": "año", "precio": "precio_mercado"}
+
+    def __init__(self, vehiculos: Sequence[Dict[str, Any]], fechas: Any = None,
+                 mercado: Optional[Dict[str, Sequence[float]]] = None):
+        n = len(vehiculos)
+        self.marca = np.array([str(v.get("marca") or "").strip().lower() for v in vehiculos], dtype=object)
+        self.modelo = np.array([str(v.get("modelo") or "").strip().lower() for v in vehiculos], dtype=object)
+        self.año = np.array([a_numero(v.get("año")) or np.nan for v in vehiculos], dtype=float)
+        self.kilometraje = np.array([a_numero(v.get("kilometraje")) or np.nan for v in vehiculos], dtype=float)
+
+        fechas = datetime.utcnow() if fechas is None else fechas
+        if isinstance(fechas, (datetime, date)):
+            fechas = [fechas] * n
+        self.fecha = np.array([np.datetime64(f.date() if isinstance(f, datetime) else f, "D") for f in fechas],
+                              dtype="datetime64[D]")
+
+        self.mercado = {clave: np.asarray(valores, dtype=float) for clave, valores in (mercado or {}).items()}
+
+    def __len__(self) -> int:
+        return len(self.marca)
+
+    def tomar(self, filas: np.ndarray) -> "LoteVehiculos":
+        """Sub-lote con las filas indicadas"""
+        nuevo = LoteVehiculos.__new__(LoteVehiculos)
+        for columna in ("marca", "modelo", "año", "kilometraje", "fecha"):
+            setattr(nuevo, columna, getattr(self, columna)[filas])
+        nuevo.mercado = {clave: valores[filas] for clave, valores in self.mercado.items()}
+        return nuevo
+
+    def columna(self, nombre: str) -> Optional[np.ndarray]:
+        """Columna por nombre de campo de regla; None si el lote no la tiene"""
+        nombre = self._ALIAS.get(nombre, nombre)
+        if nombre in ("marca", "modelo", "año", "kilometraje"):
+            return getattr(self, nombre)
+        return self.mercado.get(nombre)
+
+
+# ==========================================
+# Compilación
+# ==========================================
+
+Predicado = Callable[[LoteVehiculos], np.ndarray]
+Transformacion = Callable[[np.ndarray, LoteVehiculos], np.ndarray]
+
+
+class AjusteCompilado:
+    """
+    Regla de ajuste lista para evaluar. `marcas` y `vigencia` las resuelve
+    el índice de aplicabilidad; `predicado` evalúa el resto de las
+    condiciones y `transformacion` calcula el nuevo precio.
+    """
+
+    def __init__(self, regla: Dict[str, Any], predicado: Predicado,
+                 transformacion: Optional[Transformacion], detalle: str):
+        params = regla.get("parametros", {})
+        self.codigo = regla.get("codigo", "")
+        self.orden = a_numero(regla.get("orden")) or 0
+        self.tipo = params.get("tipo", "")
+        self.moneda = str(params.get("moneda") or "ARS").upper() if self.tipo == "ajuste_fijo" else None
+        self.predicado = predicado
+        self.transformacion = transformacion
+        self.detalle = detalle
+
+        # Dominio de la regla (índice de aplicabilidad y análisis de conflictos)
+        self.marcas = frozenset(_texto(params.get("condicion_marca") or "")) or None
+        self.modelos = frozenset(_texto(params.get("condicion_modelo") or "")) or None
+        año = a_numero(params.get("condicion_año"))
+        self.año = año if año and params.get("condicion_año_operador", "igual") == "igual" else None
+        self.vigencia = vigencia_desde_params(params.get("periodo_vigencia"))
+
+        # Sentido del ajuste (+1 sube el precio, -1 lo baja) y si conmuta con otros
+        porcentaje = a_numero(params.get("entonces_porcentaje" if self.tipo == "ajuste_por_condicion"
+                                         else "porcentaje")) or 0
+        signo = -1 if params.get("operacion") in _OPERACIONES_RESTA else 1
+        self.signo = -1 if signo < 0 or porcentaje < 0 else 1
+        self.conmutativo = self.tipo in TIPOS_CONMUTATIVOS and not params.get("base")
+
+
+def _texto(valor: Any) -> List[str]:
+    valores = valor if isinstance(valor, (list, tuple)) else str(valor).split(",")
+    return [str(v).strip().lower() for v in valores if str(v).strip()]
+
+
+def _rango_valor(valor: Any) -> Any:
+    """'50000' -> 50000.0; '30000,70000' o [30000, 70000] -> [30000.0, 70000.0]"""
+    if isinstance(valor, str) and "," in valor:
+        valor = valor.split(",")
+    if isinstance(valor, (list, tuple)):
+        return [a_numero(v) for v in valor[:2]]
+    return a_numero(valor)
+
+
+def _predicado(params: Dict[str, Any]) -> Predicado:
+    """Conjunción de las condiciones de la regla, salvo marca y vigencia (las resuelve el índice)"""
+    condiciones: List[Predicado] = []
+
+    modelos = _texto(params.get("condicion_modelo") or "")
+    if modelos:
+        condiciones.append(lambda lote: np.isin(lote.modelo, modelos))
+
+    año = a_numero(params.get("condicion_año"))
+    if año:
+        operador = params.get("condicion_año_operador", "igual")
+        condiciones.append(lambda lote: comparar(lote.año, operador, año))
+
+    for clave, campo, operador in (("condicion_km_min", "kilometraje", "mayor_igual"),
+                                   ("condicion_km_max", "kilometraje", "menor_igual"),
+                                   ("condicion_precio_min", "precio_mercado", "mayor_igual"),
+                                   ("condicion_precio_max", "precio_mercado", "menor_igual")):
+        limite = a_numero(params.get(clave))
+        if limite is not None:
+            condiciones.append(lambda lote, c=campo, o=operador, l=limite: _comparar_lote(lote, c, o, l))
+
+    # "si kilometraje > X entonces %": la condición del ajuste_por_condicion
+    if params.get("condicion_campo"):
+        campo, operador = params["condicion_campo"], params.get("condicion_operador", "mayor_que")
+        valor = _rango_valor(params.get("condicion_valor"))
+        if valor is not None and (not isinstance(valor, list) or None not in valor):
+            condiciones.append(lambda lote: _comparar_lote(lote, campo, operador, valor))
+
+    def predicado(lote: LoteVehiculos) -> np.ndarray:
+        mascara = np.ones(len(lote), dtype=bool)
+        for condicion in condiciones:
+            mascara &= condicion(lote)
+        return mascara
+
+    return predicado
+
+
+def _comparar_lote(lote: LoteVehiculos, campo: str, operador: str, valor: Any) -> np.ndarray:
+    """Condición numérica sobre una columna del lote; sin la columna no aplica"""
+    columna = lote.columna(campo)
+    if columna is None:
+        return np.zeros(len(lote), dtype=bool)
+    return comparar(columna, operador, valor) & ~np.isnan(columna)
+
+
+def _transformacion(params: Dict[str, Any]) -> Tuple[Optional[Transformacion], str]:
+    """Transformación del precio según el tipo de ajuste y su descripción"""
+    tipo = params.get("tipo", "")
+    porcentaje = a_numero(params.get("porcentaje")) or 0
+    signo = -1 if params.get("operacion") in _OPERACIONES_RESTA else 1
+
+    if tipo == "inflacion":
+        # Tasa del período (mensual por defecto) compuesta por los días proyectados
+        meses = (a_numero(params.get("periodo_dias")) or 30) / 30
+        factor = (1 + porcentaje / 100) ** meses
+        return (lambda precios, lote: precios * factor), f"inflación {porcentaje:g}% × {meses:g} meses"
+
+    if tipo == "ajuste_porcentual":
+        tasa = signo * abs(porcentaje) / 100
+        base = params.get("base")
+
+        def porcentual(precios: np.ndarray, lote: LoteVehiculos) -> np.ndarray:
+            sobre = lote.columna(base) if base else None
+            sobre = precios if sobre is None else np.where(np.isnan(sobre), precios, sobre)
+            return precios + tasa * sobre
+
+        return porcentual, f"{tasa * 100:+g}%" + (f" sobre {base}" if base else "")
+
+    if tipo == "ajuste_por_condicion":
+        tasa = (a_numero(params.get("entonces_porcentaje")) or 0) / 100
+        return (lambda precios, lote: precios * (1 + tasa)), f"{tasa * 100:+g}% si se cumple la condición"
+
+    if tipo == "ajuste_fijo":
+        monto = abs(a_numero(params.get("monto")) or 0) * signo
+        moneda = str(params.get("moneda") or "ARS").upper()
+        # La cotización se busca al aplicar: la tabla puede recargarse sin recompilar
+        return (lambda precios, lote: precios + monto * cotizacion(moneda)), f"{monto:+,.0f} {moneda}"
+
+    if tipo == "margen_ganancia":
+        minimo = a_numero(params.get("minimo_pesos"))
+        maximo = a_numero(params.get("maximo_pesos"))
+
+        def margen(precios: np.ndarray, lote: LoteVehiculos) -> np.ndarray:
+            valor = precios * porcentaje / 100
+            if minimo is not None or maximo is not None:
+                valor = np.clip(valor, minimo, maximo)
+            return precios + valor
+
+        limites = "".join([f", mínimo ${minimo:,.0f}" if minimo else "", f", máximo ${maximo:,.0f}" if maximo else ""])
+        return margen, f"margen {porcentaje:g}%{limites}"
+
+    return None, f"{tipo}: tipo sin cálculo automático" if tipo in TIPOS_SIN_DATOS else f"{tipo}: tipo desconocido"
+
+
+def compilar_ajuste(regla: Dict[str, Any]) -> AjusteCompilado:
+    params = regla.get("parametros", {})
+    transformacion, detalle = _transformacion(params)
+    return AjusteCompilado(regla, _predicado(params), transformacion, detalle)
+
+
+def compilar_ajustes(reglas: List[Dict[str, Any]]) -> List[AjusteCompilado]:
+    """
+    Compila las reglas AJUSTE_CALCULO ordenadas por `orden`.
+    El resultado se cachea por contenido de las reglas: valuar muchos
+    vehículos con la misma configuración compila una sola vez.
+    """
+    clave = json.dumps(
+        [(r.get("codigo"), r.get("orden"), r.get("parametros")) for r in reglas],
+        sort_keys=True, default=str, ensure_ascii=False
+    )
+    compilados = _cache_compilados.get(clave)
+    if compilados is None:
+        compilados = sorted((compilar_ajuste(r) for r in reglas), key=lambda a: a.orden)
+        if len(_cache_compilados) >= MAX_CACHE_COMPILADOS:
+            _cache_compilados.pop(next(iter(_cache_compilados)))
+        _cache_compilados[clave] = compilados
+    return compilados
+
+
+# ==========================================
+# Evaluación
+# ==========================================
+
+def aplicar_ajustes(compilados: List[AjusteCompilado], precios: np.ndarray, lote: LoteVehiculos,
+                    indice: Optional[IndiceAplicabilidad] = None) -> Tuple[np.ndarray, List[Dict[str, Any]]]:
+    """
+    Aplica los ajustes en orden sobre los precios del lote. Cada regla
+    solo evalúa las filas que el índice de aplicabilidad le asigna (por
+    marca y vigencia); las reglas sin filas candidatas no se evalúan.
+    `indice` permite reutilizar uno ya construido para estos `compilados`.
+
+    Returns:
+        (precios ajustados, auditoría): una entrada por ajuste con las filas
+        alcanzadas, sus precios antes y después y la cotización usada en
+        los montos en otra moneda.
+    """
+    precios = np.asarray(precios, dtype=float).copy()
+    indice = indice or IndiceAplicabilidad(compilados)
+    candidatas = indice.agrupar(lote.marca, lote.fecha)
+
+    auditoria = []
+    for i, ajuste in enumerate(compilados):
+        filas = candidatas.get(i, np.empty(0, dtype=int))
+        if len(filas):
+            sub_lote = lote.tomar(filas)
+            aplica = ajuste.predicado(sub_lote)
+            filas, sub_lote = filas[aplica], sub_lote.tomar(aplica)
+        antes = precios[filas]
+        if len(filas):
+            precios[filas] = ajuste.transformacion(antes, sub_lote)
+        auditoria.append({
+            "codigo": ajuste.codigo,
+            "tipo": ajuste.tipo,
+            "detalle": ajuste.detalle,
+            "cotizacion": cotizacion(ajuste.moneda) if ajuste.moneda else None,
+            "filas": filas,
+            "antes": antes,
+            "despues": precios[filas],
+        })
+    return precios, auditoria
+
+
+def auditoria_vehiculo(auditoria: List[Dict[str, Any]], precio_inicial: float,
+                       fila: int = 0) -> List[Dict[str, Any]]:
+    """Auditoría de un vehículo del lote en formato serializable"""
+    precio = float(precio_inicial)
+    salida = []
+    for a in auditoria:
+        posicion = int(np.searchsorted(a["filas"], fila))
+        aplicado = posicion < len(a["filas"]) and a["filas"][posicion] == fila
+        antes = float(a["antes"][posicion]) if aplicado else precio
+        precio = float(a["despues"][posicion]) if aplicado else precio
+        salida.append({
+            "codigo": a["codigo"],
+            "tipo": a["tipo"],
+            "detalle": a["detalle"],
+            "cotizacion": a["cotizacion"],
+            "aplicado": bool(aplicado),
+            "antes": antes,
+            "despues": precio,
+        })
+    return salida
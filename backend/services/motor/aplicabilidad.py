@@ -0,0 +1,306 @@
+# backend/services/motor/aplicabilidad.py
+"""
+Aplicabilidad de reglas AJUSTE_CALCULO.
+
+- Vigencia: el período de una regla normalizado a intervalos de fechas
+  absolutos o a meses del año (períodos recurrentes sin año).
+- IndiceAplicabilidad: índice precalculado sobre el conjunto de reglas
+  (marca → reglas y segmentos de fecha → reglas) para que un lote de
+  vehículos solo evalúe las reglas que pueden aplicarle.
+- analizar_conflictos: superposiciones y contradicciones entre reglas
+  cuyos dominios (marca, modelo, año, vigencia) se intersectan.
+"""
+
+from typing import Any, Dict, FrozenSet, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.parseo_json import a_numero
+
+
+MESES = {
+    "enero": 1, "febrero": 2, "marzo": 3, "abril": 4, "mayo": 5, "junio": 6, "julio": 7,
+    "agosto": 8, "septiembre": 9, "setiembre": 9, "octubre": 10, "noviembre": 11, "diciembre": 12,
+}
+_ORDINALES = {"primer": 1, "primero": 1, "segundo": 2, "tercer": 3, "tercero": 3, "cuarto": 4}
+
+# Día (datetime64[D] como entero) mínimo y máximo de un intervalo abierto
+_DIA_MIN = int(np.datetime64("0001-01-01", "D").astype(int))
+_DIA_MAX = int(np.datetime64("9999-12-31", "D").astype(int))
+
+
+def _ordinal(valor: Any, maximo: int) -> Optional[int]:
+    """'Q2', 2, 'segundo', 'S1' -> número de trimestre/semestre"""
+    if isinstance(valor, str):
+        texto = (valor.strip().lower().split() or [""])[0]
+        if texto in _ORDINALES:
+            return _ORDINALES[texto]
+        valor = texto.lstrip("qs")
+    numero = a_numero(valor)
+    return int(numero) if numero and 1 <= numero <= maximo else None
+
+
+def _dia(año: int, mes: int) -> int:
+    """Primer día del mes como entero datetime64[D]"""
+    return int(np.datetime64(f"{año:04d}-{mes:02d}", "M").astype("datetime64[D]").astype(int))
+
+
+def meses_y_años(dias: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Año y mes (1-12) de cada día datetime64[D]"""
+    meses = np.asarray(dias).astype("datetime64[D]").astype("datetime64[M]").astype(int)
+    return meses // 12 + 1970, meses % 12 + 1
+
+
+# ==========================================
+# Vigencia
+# ==========================================
+
+class Vigencia:
+    """
+    Período de vigencia normalizado. Es una de:
+        siempre (sin período o "permanente")
+        intervalos de días absolutos [(desde, hasta)], ambos incluidos
+        meses del año, todos los años (período recurrente sin año)
+        nunca (período que no se puede interpretar)
+    """
+
+    def __init__(self, intervalos: Optional[List[Tuple[int, int]]] = None,
+                 meses: Optional[FrozenSet[int]] = None, nunca: bool = False):
+        self.intervalos = intervalos
+        self.meses = meses
+        self.nunca = nunca
+
+    @property
+    def siempre(self) -> bool:
+        return self.intervalos is None and self.meses is None and not self.nunca
+
+    def mascara(self, fechas: np.ndarray) -> np.ndarray:
+        """Qué fechas (datetime64[D]) caen dentro del período"""
+        if self.siempre:
+            return np.ones(len(fechas), dtype=bool)
+        if self.nunca:
+            return np.zeros(len(fechas), dtype=bool)
+        if self.meses is not None:
+            return np.isin(meses_y_años(fechas)[1], list(self.meses))
+        dias = fechas.astype("datetime64[D]").astype(int)
+        mascara = np.zeros(len(fechas), dtype=bool)
+        for desde, hasta in self.intervalos:
+            mascara |= (dias >= desde) & (dias <= hasta)
+        return mascara
+
+    def _meses_de_intervalos(self) -> FrozenSet[int]:
+        meses = set()
+        for desde, hasta in self.intervalos:
+            if hasta - desde >= 366:
+                return frozenset(range(1, 13))
+            _, cubiertos = meses_y_años(np.arange(desde, hasta + 1).astype("datetime64[D]"))
+            meses.update(cubiertos.tolist())
+        return frozenset(meses)
+
+    def se_superpone(self, otra: "Vigencia") -> bool:
+        if self.nunca or otra.nunca:
+            return False
+        if self.siempre or otra.siempre:
+            return True
+        if self.meses is not None and otra.meses is not None:
+            return bool(self.meses & otra.meses)
+        if self.intervalos is not None and otra.intervalos is not None:
+            return any(a <= d and c <= b for a, b in self.intervalos for c, d in otra.intervalos)
+        # Un período absoluto contra uno recurrente: se comparan los meses que cubre
+        absoluta, recurrente = (self, otra) if self.intervalos is not None else (otra, self)
+        return bool(absoluta._meses_de_intervalos() & recurrente.meses)
+
+    def describir(self) -> str:
+        if self.siempre:
+            return "permanente"
+        if self.nunca:
+            return "período no reconocido"
+        if self.meses is not None:
+            nombres = {numero: nombre for nombre, numero in MESES.items() if nombre != "setiembre"}
+            return "en " + "/".join(nombres[m] for m in sorted(self.meses))
+        return ", ".join(
+            f"del {np.datetime64(desde, 'D')} al {np.datetime64(hasta, 'D')}" for desde, hasta in self.intervalos
+        )
+
+
+def vigencia_desde_params(periodo: Any) -> Vigencia:
+    """Normaliza `periodo_vigencia` (mes, trimestre, semestre, año, rango_fechas, permanente)"""
+    if not isinstance(periodo, dict) or periodo.get("tipo") in (None, "", "permanente"):
+        return Vigencia()
+    tipo = periodo["tipo"]
+    año = a_numero(periodo.get("año"))
+    año = int(año) if año else None
+
+    if tipo == "rango_fechas":
+        try:
+            desde = periodo.get("fecha_inicio")
+            hasta = periodo.get("fecha_fin")
+            desde = int(np.datetime64(desde, "D").astype(int)) if desde else _DIA_MIN
+            hasta = int(np.datetime64(hasta, "D").astype(int)) if hasta else _DIA_MAX
+        except ValueError:
+            return Vigencia(nunca=True)
+        return Vigencia(intervalos=[(desde, hasta)]) if desde <= hasta else Vigencia(nunca=True)
+
+    if tipo == "año":
+        return Vigencia(intervalos=[(_dia(año, 1), _dia(año + 1, 1) - 1)]) if año else Vigencia(nunca=True)
+
+    if tipo == "mes":
+        mes = periodo.get("mes", periodo.get("valor"))
+        mes = MESES.get(str(mes).strip().lower()) or _ordinal(mes, 12)
+        meses = [mes] if mes else []
+    elif tipo in ("trimestre", "semestre"):
+        largo = 3 if tipo == "trimestre" else 6
+        numero = _ordinal(periodo.get("valor", periodo.get(tipo)), 12 // largo)
+        meses = list(range((numero - 1) * largo + 1, numero * largo + 1)) if numero else []
+    else:
+        meses = []
+
+    if not meses:
+        return Vigencia(nunca=True)
+    if año:
+        fin = _dia(año + (meses[-1] == 12), meses[-1] % 12 + 1) - 1
+        return Vigencia(intervalos=[(_dia(año, meses[0]), fin)])
+    return Vigencia(meses=frozenset(meses))
+
+
+# ==========================================
+# Índice de aplicabilidad
+# ==========================================
+
+class IndiceAplicabilidad:
+    """
+    Índice de un conjunto de ajustes compilados (cada uno con `marcas` y
+    `vigencia`). Las reglas sin marca y sin período quedan en "siempre".
+
+    Para las fechas, los bordes de todos los intervalos absolutos parten
+    la línea de tiempo en segmentos con un conjunto fijo de reglas vigentes
+    (un índice de intervalos estático): ubicar un lote entero es un
+    np.searchsorted. Los períodos recurrentes se indexan por mes del año.
+    """
+
+    def __init__(self, compilados: Sequence[Any]):
+        self.total = len(compilados)
+        self.por_marca: Dict[str, set] = {}
+        self.cualquier_marca = set()
+        self.sin_fecha = set()
+        self.por_mes: List[set] = [set() for _ in range(12)]
+        absolutas = []
+
+        for i, ajuste in enumerate(compilados):
+            if ajuste.transformacion is None or ajuste.vigencia.nunca:
+                continue
+            if ajuste.marcas is None:
+                self.cualquier_marca.add(i)
+            else:
+                for marca in ajuste.marcas:
+                    self.por_marca.setdefault(marca, set()).add(i)
+
+            if ajuste.vigencia.siempre:
+                self.sin_fecha.add(i)
+            elif ajuste.vigencia.meses is not None:
+                for mes in ajuste.vigencia.meses:
+                    self.por_mes[mes - 1].add(i)
+            else:
+                absolutas.extend((desde, hasta, i) for desde, hasta in ajuste.vigencia.intervalos)
+
+        # Segmento k = [bordes[k-1], bordes[k]); el 0 y el último son abiertos
+        self.bordes = np.unique(np.array(
+            [desde for desde, _, _ in absolutas] + [hasta + 1 for _, hasta, _ in absolutas], dtype=np.int64
+        ))
+        self.por_segmento: List[set] = [set() for _ in range(len(self.bordes) + 1)]
+        for desde, hasta, i in absolutas:
+            primero = int(np.searchsorted(self.bordes, desde, side="right"))
+            ultimo = int(np.searchsorted(self.bordes, hasta + 1, side="right")) - 1
+            for segmento in range(primero, ultimo + 1):
+                self.por_segmento[segmento].add(i)
+
+    def candidatas(self, marca: str, segmento: int, mes: int) -> set:
+        """Reglas que pueden aplicar a un vehículo de `marca` valuado en ese segmento/mes"""
+        por_marca = self.por_marca.get(marca, set()) | self.cualquier_marca
+        por_fecha = self.sin_fecha | self.por_segmento[segmento] | self.por_mes[mes - 1]
+        return por_marca & por_fecha
+
+    def agrupar(self, marcas: np.ndarray, fechas: np.ndarray) -> Dict[int, np.ndarray]:
+        """
+        Filas del lote que cada regla puede alcanzar (solo reglas con al menos una).
+        Los vehículos se agrupan por (marca, segmento, mes): las consultas al
+        índice son por grupo, no por vehículo.
+        """
+        if len(marcas) == 0:
+            return {}
+        dias = fechas.astype("datetime64[D]").astype(np.int64)
+        segmentos = np.searchsorted(self.bordes, dias, side="right")
+        meses = meses_y_años(fechas)[1]
+        nombres, codigos = np.unique(marcas.astype(str), return_inverse=True)
+        claves = (codigos.astype(np.int64) * (len(self.bordes) + 1) + segmentos) * 12 + (meses - 1)
+
+        orden = np.argsort(claves, kind="stable")
+        claves_ordenadas = claves[orden]
+        inicios = np.flatnonzero(np.r_[True, claves_ordenadas[1:] != claves_ordenadas[:-1]])
+        fines = np.r_[inicios[1:], len(orden)]
+
+        filas_por_regla: Dict[int, List[np.ndarray]] = {}
+        for inicio, fin in zip(inicios.tolist(), fines.tolist()):
+            fila = orden[inicio]
+            reglas = self.candidatas(nombres[codigos[fila]], int(segmentos[fila]), int(meses[fila]))
+            for i in reglas:
+                filas_por_regla.setdefault(i, []).append(orden[inicio:fin])
+        return {i: np.sort(np.concatenate(partes)) for i, partes in filas_por_regla.items()}
+
+
+# ==========================================
+# Conflictos
+# ==========================================
+
+def _intersectan(a: Optional[FrozenSet], b: Optional[FrozenSet]) -> bool:
+    return a is None or b is None or bool(a & b)
+
+
+def _describir_dominio(ajuste: Any) -> str:
+    partes = []
+    if ajuste.marcas is not None:
+        partes.append("/".join(sorted(ajuste.marcas)))
+    if ajuste.modelos is not None:
+        partes.append("/".join(sorted(ajuste.modelos)))
+    if not ajuste.vigencia.siempre:
+        partes.append(ajuste.vigencia.describir())
+    return " ".join(partes) or "todos los vehículos"
+
+
+def analizar_conflictos(ajuste: Any, otros: Sequence[Any]) -> List[str]:
+    """
+    Compara un ajuste compilado contra el resto de los ajustes activos.
+    Dos ajustes chocan si sus dominios (marca, modelo, año y vigencia) se
+    intersectan:
+        contradictorios: mismo tipo con signo opuesto
+        superpuestos:    mismo tipo con el mismo signo (los efectos se acumulan)
+        orden ambiguo:   mismo `orden` y al menos uno no conmutativo (monto
+                         fijo, margen con tope, porcentaje sobre otra base)
+    """
+    advertencias = []
+    if ajuste.transformacion is None or ajuste.vigencia.nunca:
+        return advertencias
+
+    for otro in otros:
+        if otro.codigo == ajuste.codigo or otro.transformacion is None:
+            continue
+        if not (_intersectan(ajuste.marcas, otro.marcas) and _intersectan(ajuste.modelos, otro.modelos)
+                and ajuste.vigencia.se_superpone(otro.vigencia)
+                and (ajuste.año is None or otro.año is None or ajuste.año == otro.año)):
+            continue
+
+        dominio = _describir_dominio(ajuste if ajuste.marcas is not None else otro)
+        if ajuste.tipo == otro.tipo and ajuste.signo * otro.signo < 0:
+            advertencias.append(
+                f"Contradice a '{otro.codigo}': {ajuste.tipo} en sentido opuesto para {dominio}"
+            )
+        elif ajuste.tipo == otro.tipo:
+            advertencias.append(
+                f"Se superpone con '{otro.codigo}': ambos aplican {ajuste.tipo} a {dominio} y se acumulan"
+            )
+        elif ajuste.orden == otro.orden and not (ajuste.conmutativo and otro.conmutativo):
+            advertencias.append(
+                f"Mismo orden ({ajuste.orden:g}) que '{otro.codigo}' ({otro.tipo}) sobre {dominio}: "
+                f"el resultado depende de cuál se aplique primero"
+            )
+    return advertencias
@@ -0,0 +1,231 @@
+# backend/services/motor/comparables.py
+"""
+Comparables de mercado para el motor de valuación determinístico.
+Carga publicaciones guardadas en valuaciones anteriores y las expone
+como columnas NumPy para las etapas del pipeline.
+"""
+
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+from sqlalchemy import func
+
+from models import Valuacion, Vehiculo
+from services.parseo_json import a_numero
+
+
+# Cantidad de valuaciones anteriores que se leen por marca/modelo
+LIMITE_VALUACIONES_HISTORICAS = 200
+# Cantidad de marca/modelo cuyos comparables se mantienen en memoria
+MAX_CACHE_COMPARABLES = 64
+
+# (marca, modelo) -> (firma de las valuaciones, registros)
+_cache_comparables: Dict[tuple, tuple] = {}
+# Lo usan requests concurrentes del threadpool: el desalojo no es atómico
+_lock_cache = threading.Lock()
+
+
+def _a_numeros(valores: List[Any]) -> np.ndarray:
+    """Convierte una lista a float64; los valores no numéricos pasan por a_numero"""
+    salida = np.full(len(valores), np.nan)
+    for i, v in enumerate(valores):
+        if type(v) in (int, float):
+            salida[i] = v
+        elif v is not None:
+            numero = a_numero(v)
+            if numero is not None:
+                salida[i] = numero
+    return salida
+
+
+def _antiguedad_dias(fechas: List[Any], ahora: datetime) -> np.ndarray:
+    """Días desde cada fecha ISO (o datetime) hasta `ahora`; NaN si falta"""
+    texto = np.array(
+        [f.isoformat() if isinstance(f, datetime) else (f or "NaT") for f in fechas],
+        dtype=object
+    )
+    try:
+        convertidas = texto.astype("datetime64[s]")
+    except ValueError:
+        # Alguna fecha con zona horaria u otro formato: se convierte una por una
+        convertidas = np.array([_a_datetime64(f) for f in texto], dtype="datetime64[s]")
+    dias = (np.datetime64(ahora.replace(tzinfo=None), "s") - convertidas) / np.timedelta64(1, "D")
+    return dias.astype(float)
+
+
+def _a_datetime64(valor: str) -> np.datetime64:
+    try:
+        return np.datetime64(datetime.fromisoformat(valor.replace("Z", "+00:00")).replace(tzinfo=None), "s")
+    except ValueError:
+        return np.datetime64("NaT")
+
+
+class Comparables:
+    """
+    Conjunto de publicaciones comparables en formato columnar.
+
+    Cada columna es un array NumPy alineado con `registros`. Los valores
+    faltantes son NaN en las columnas numéricas. `indices` conserva la
+    posición original de cada fila para reportar qué publicaciones
+    descartó cada regla.
+    """
+
+    def __init__(self, registros: List[Dict[str, Any]], referencia: Optional[Dict[str, Any]] = None,
+                 ahora: Optional[datetime] = None):
+        referencia = referencia or {}
+        ahora = ahora or datetime.utcnow()
+
+        self.registros = registros
+        self.indices = np.arange(len(registros))
+        self.precio = _a_numeros([r.get("precio") for r in registros])
+        self.año = _a_numeros([r.get("año") for r in registros])
+        self.km = _a_numeros([r.get("km", r.get("kilometraje")) for r in registros])
+        self.antiguedad_dias = _antiguedad_dias(
+            [r.get("fecha_publicacion") or r.get("fecha_captura") for r in registros], ahora
+        )
+        self.verificado = np.array([r.get("verificado") is not False for r in registros], dtype=bool)
+        self.tiene_fotos = np.array(
+            [r.get("tiene_fotos") is not False and r.get("fotos") != 0 for r in registros], dtype=bool
+        )
+        self.fuente = np.array([str(r.get("fuente") or "") for r in registros], dtype=object)
+        self.url = np.array([str(r.get("url") or "") for r in registros], dtype=object)
+
+        # Las publicaciones históricas no siempre traen año/km: se asume el del vehículo origen
+        año_ref = a_numero(referencia.get("año"))
+        km_ref = a_numero(referencia.get("kilometraje"))
+        if año_ref is not None:
+            self.año[np.isnan(self.año)] = año_ref
+        if km_ref is not None:
+            self.km[np.isnan(self.km)] = km_ref
+
+    _COLUMNAS = ("indices", "precio", "año", "km", "antiguedad_dias",
+                 "verificado", "tiene_fotos", "fuente", "url")
+
+    @classmethod
+    def desde_columnas(cls, precio: np.ndarray, **columnas) -> "Comparables":
+        """
+        Construye el conjunto directamente desde arrays (sin registros).
+        Las columnas omitidas toman su valor neutro (NaN, True o "").
+        """
+        n = len(precio)
+        nuevo = cls.__new__(cls)
+        nuevo.registros = [{} for _ in range(n)]
+        nuevo.indices = np.arange(n)
+        nuevo.precio = np.asarray(precio, dtype=float)
+        for nombre in ("año", "km", "antiguedad_dias"):
+            setattr(nuevo, nombre, np.asarray(columnas.get(nombre, np.full(n, np.nan)), dtype=float))
+        for nombre in ("verificado", "tiene_fotos"):
+            setattr(nuevo, nombre, np.asarray(columnas.get(nombre, np.ones(n, dtype=bool)), dtype=bool))
+        for nombre in ("fuente", "url"):
+            setattr(nuevo, nombre, np.asarray(columnas.get(nombre, np.full(n, "", dtype=object)), dtype=object))
+        return nuevo
+
+    @classmethod
+    def concatenar(cls, conjuntos: Sequence["Comparables"]) -> "Comparables":
+        """Une varios conjuntos en uno; los índices pasan a ser posiciones del conjunto unido"""
+        nuevo = cls.__new__(cls)
+        nuevo.registros = [c.registros[i] for c in conjuntos for i in c.indices.tolist()]
+        nuevo.indices = np.arange(len(nuevo.registros))
+        for columna in cls._COLUMNAS[1:]:
+            setattr(nuevo, columna, np.concatenate([getattr(c, columna) for c in conjuntos]))
+        return nuevo
+
+    def __len__(self) -> int:
+        return len(self.indices)
+
+    def tomar(self, seleccion: Sequence) -> "Comparables":
+        """Devuelve un nuevo conjunto con las filas seleccionadas (máscara o índices)"""
+        nuevo = Comparables.__new__(Comparables)
+        nuevo.registros = self.registros
+        for columna in self._COLUMNAS:
+            setattr(nuevo, columna, getattr(self, columna)[seleccion])
+        return nuevo
+
+    def columna(self, nombre: str) -> np.ndarray:
+        """Obtiene una columna por nombre de campo de regla (acepta alias)"""
+        alias = {"kilometraje": "km", "anio": "año", "precio_mercado": "precio"}
+        nombre = alias.get(nombre, nombre)
+        if nombre not in self._COLUMNAS:
+            # Campo libre de la publicación original
+            return np.array([self.registros[i].get(nombre) for i in self.indices], dtype=object)
+        return getattr(self, nombre)
+
+    def publicaciones(self, incluidas: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """
+        Publicaciones originales de este conjunto, con el flag `incluida`
+        en las filas cuyos índices originales están en `incluidas`.
+        """
+        marcadas = np.isin(self.indices, self.indices if incluidas is None else incluidas)
+        return [
+            {**self.registros[i], "incluida": bool(m)}
+            for i, m in zip(self.indices.tolist(), marcadas.tolist())
+        ]
+
+
+def _consultar_historicos(db, marca: str, modelo: str):
+    return (
+        db.query(Valuacion)
+        .join(Vehiculo, Valuacion.vehiculo_id == Vehiculo.id)
+        .filter(func.lower(Vehiculo.marca) == marca.lower())
+        .filter(func.lower(Vehiculo.modelo) == modelo.lower())
+    )
+
+
+def cargar_comparables_historicos(db, marca: str, modelo: str,
+                                  limite: int = LIMITE_VALUACIONES_HISTORICAS) -> List[Dict[str, Any]]:
+    """
+    Lee las publicaciones analizadas en valuaciones anteriores del mismo
+    marca/modelo. Deduplica por URL quedándose con la captura más reciente.
+    Cada publicación se completa con año/km del vehículo valuado y la
+    fecha de la valuación como fecha de captura.
+
+    El resultado se cachea por marca/modelo; una consulta liviana (cantidad
+    y última fecha) detecta valuaciones nuevas e invalida la entrada.
+    La lista devuelta es compartida: no debe modificarse.
+    """
+    clave_cache = (marca.lower(), modelo.lower(), limite)
+    firma = tuple(
+        _consultar_historicos(db, marca, modelo)
+        .with_entities(func.count(Valuacion.id), func.max(Valuacion.fecha))
+        .one()
+    )
+    with _lock_cache:
+        cacheado = _cache_comparables.get(clave_cache)
+    if cacheado and cacheado[0] == firma:
+        return cacheado[1]
+
+    filas = (
+        _consultar_historicos(db, marca, modelo)
+        .with_entities(Valuacion.publicaciones_analizadas, Valuacion.fecha, Vehiculo.año, Vehiculo.kilometraje)
+        .order_by(Valuacion.fecha.desc())
+        .limit(limite)
+        .all()
+    )
+
+    vistas = set()
+    registros = []
+    for publicaciones, fecha, año, km in filas:
+        captura = fecha.isoformat() if fecha else None
+        for p in publicaciones or []:
+            if not isinstance(p, dict) or p.get("precio") is None:
+                continue
+            clave = p.get("url") or (p.get("fuente"), p.get("precio"), p.get("titulo"))
+            if clave in vistas:
+                continue
+            vistas.add(clave)
+
+            # Cada fila trae su propia copia deserializada del JSON: se completa en el lugar
+            p.pop("incluida", None)
+            p.setdefault("año", año)
+            p.setdefault("km", km)
+            if captura and not p.get("fecha_captura"):
+                p["fecha_captura"] = captura
+            registros.append(p)
+
+    with _lock_cache:
+        if clave_cache not in _cache_comparables and len(_cache_comparables) >= MAX_CACHE_COMPARABLES:
+            _cache_comparables.pop(next(iter(_cache_comparables)))
+        _cache_comparables[clave_cache] = (firma, registros)
+    return registros
@@ -0,0 +1,50 @@
+# backend/services/motor/condiciones.py
+"""
+Evaluación vectorizada de condiciones de reglas (campo, operador, valor)
+sobre columnas de comparables.
+"""
+
+from typing import Any
+
+import numpy as np
+
+
+def comparar(columna: np.ndarray, operador: str, valor: Any) -> np.ndarray:
+    """
+    Evalúa una condición de regla sobre una columna.
+    Los valores desconocidos (NaN / None) no descartan la publicación.
+    """
+    if columna.dtype != object:
+        desconocido = np.isnan(columna)
+        if operador == "entre" and isinstance(valor, (list, tuple)) and len(valor) == 2:
+            mascara = (columna >= valor[0]) & (columna <= valor[1])
+        elif operador in ("mayor", "mayor_que"):
+            mascara = columna > valor
+        elif operador in ("menor", "menor_que"):
+            mascara = columna < valor
+        elif operador == "mayor_igual":
+            mascara = columna >= valor
+        elif operador == "menor_igual":
+            mascara = columna <= valor
+        elif operador in ("igual", "igual_a"):
+            mascara = columna == valor
+        elif operador == "diferente":
+            mascara = columna != valor
+        else:
+            return np.ones(len(columna), dtype=bool)
+        return mascara | desconocido
+
+    texto = np.array([str(v).lower() if v is not None else "" for v in columna], dtype=object)
+    desconocido = texto == ""
+    if operador in ("igual", "igual_a"):
+        mascara = texto == str(valor).lower()
+    elif operador == "diferente":
+        mascara = texto != str(valor).lower()
+    elif operador == "contiene":
+        buscado = str(valor).lower()
+        mascara = np.array([buscado in t for t in texto], dtype=bool)
+    elif operador == "en_lista" and isinstance(valor, (list, tuple)):
+        mascara = np.isin(texto, [str(v).lower() for v in valor])
+    else:
+        return np.ones(len(columna), dtype=bool)
+    return mascara | desconocido
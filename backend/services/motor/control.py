@@ -0,0 +1,180 @@
+# backend/services/motor/control.py
+"""
+Puntos de control (reglas PUNTO_CONTROL) con ampliación incremental.
+
+Una búsqueda cubre una ventana de año × km. Cuando un umbral no se cumple,
+la ventana se amplía según `nuevos_parametros` y solo se consultan las
+bandas nuevas (la diferencia entre la ventana ampliada y la anterior);
+las publicaciones ya obtenidas se reutilizan.
+"""
+
+import copy
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from services.parseo_json import a_numero
+from services.motor.comparables import Comparables
+
+
+# Ventana de búsqueda: {"año": (min, max) | None, "km": (min, max) | None}; None = sin límite
+Ventana = Dict[str, Optional[Tuple[float, float]]]
+
+# Campo de la regla -> dimensión de la ventana y campo del vehículo
+_DIMENSIONES = {"año": ("año", "año"), "anio": ("año", "año"),
+                "km": ("km", "kilometraje"), "kilometraje": ("km", "kilometraje")}
+
+# Acciones de PUNTO_CONTROL que amplían la búsqueda
+ACCIONES_AMPLIAR = ("ampliar", "ampliar_busqueda")
+
+
+class FuenteComparables(ABC):
+    """
+    Origen de publicaciones consultable por ventana de año × km.
+    Las implementaciones devuelven solo publicaciones dentro de la ventana.
+    """
+
+    def __init__(self):
+        self.consultas: List[Ventana] = []
+
+    @abstractmethod
+    def consultar(self, ventana: Ventana) -> List[Dict[str, Any]]:
+        """Publicaciones dentro de la ventana que no se entregaron antes"""
+
+
+class FuenteHistorica(FuenteComparables):
+    """
+    Fuente sobre las publicaciones almacenadas de valuaciones anteriores.
+    Cada publicación se entrega una sola vez; las que no tienen año/km
+    se entregan en la primera consulta.
+    """
+
+    def __init__(self, registros: List[Dict[str, Any]]):
+        super().__init__()
+        self.registros = registros
+        self._columnas = Comparables(registros)
+        self._pendientes = np.ones(len(registros), dtype=bool)
+
+    def consultar(self, ventana: Ventana) -> List[Dict[str, Any]]:
+        self.consultas.append(ventana)
+        mascara = self._pendientes.copy()
+        if len(self.consultas) > 1:
+            mascara &= ~np.isnan(self._columnas.año) & ~np.isnan(self._columnas.km)
+        for dimension, columna in (("año", self._columnas.año), ("km", self._columnas.km)):
+            rango = ventana.get(dimension)
+            if rango is not None:
+                mascara &= ~((columna < rango[0]) | (columna > rango[1]))
+        self._pendientes &= ~mascara
+        return [self.registros[i] for i in np.flatnonzero(mascara)]
+
+
+def _rango_relativo(valor: Any, referencia: Optional[float]) -> Optional[Tuple[float, float]]:
+    """Convierte [-a, b] relativo al vehículo en un rango absoluto"""
+    if referencia is None or not isinstance(valor, (list, tuple)) or len(valor) != 2:
+        return None
+    desde, hasta = (a_numero(v) for v in valor)
+    if desde is None or hasta is None:
+        return None
+    return (referencia + desde, referencia + hasta)
+
+
+def ventana_desde_filtros(config: Dict[str, Any], vehiculo: Dict[str, Any]) -> Ventana:
+    """Ventana inicial a partir de los filtros de búsqueda año/km relativos"""
+    ventana: Ventana = {"año": None, "km": None}
+    for regla in config.get("filtros_busqueda", []):
+        params = regla.get("parametros", {})
+        for cond in params.get("filtros") or [params]:
+            dimension = _DIMENSIONES.get(cond.get("campo"))
+            if not dimension or cond.get("operador") != "entre" or not cond.get("relativo"):
+                continue
+            rango = _rango_relativo(cond.get("valor"), a_numero(vehiculo.get(dimension[1])))
+            if rango:
+                ventana[dimension[0]] = rango
+    return ventana
+
+
+def ventana_ampliada(ventana: Ventana, nuevos_parametros: Dict[str, Any],
+                     vehiculo: Dict[str, Any]) -> Ventana:
+    """
+    Ventana que cubre la anterior y los nuevos rangos relativos
+    (`año`/`km` o `año_rango`/`km_rango`). Nunca se achica.
+    """
+    nueva = dict(ventana)
+    for clave, valor in nuevos_parametros.items():
+        dimension = _DIMENSIONES.get(clave.replace("_rango", ""))
+        if not dimension or ventana.get(dimension[0]) is None:
+            continue
+        rango = _rango_relativo(valor, a_numero(vehiculo.get(dimension[1])))
+        if rango:
+            actual = ventana[dimension[0]]
+            nueva[dimension[0]] = (min(actual[0], rango[0]), max(actual[1], rango[1]))
+    return nueva
+
+
+def bandas_nuevas(anterior: Ventana, nueva: Ventana) -> List[Ventana]:
+    """
+    Diferencia entre dos ventanas como bandas disjuntas: primero los años
+    nuevos (con todo el rango de km) y luego los km nuevos dentro de los
+    años ya cubiertos. Año y km son enteros, los bordes no se repiten.
+    """
+    año_ant, km_ant = anterior.get("año"), anterior.get("km")
+    año_nue, km_nue = nueva.get("año"), nueva.get("km")
+    bandas: List[Ventana] = []
+
+    if año_ant is not None and año_nue is not None:
+        if año_nue[0] < año_ant[0]:
+            bandas.append({"año": (año_nue[0], año_ant[0] - 1), "km": km_nue})
+        if año_nue[1] > año_ant[1]:
+            bandas.append({"año": (año_ant[1] + 1, año_nue[1]), "km": km_nue})
+
+    if km_ant is not None and km_nue is not None:
+        if km_nue[0] < km_ant[0]:
+            bandas.append({"año": año_ant, "km": (km_nue[0], km_ant[0] - 1)})
+        if km_nue[1] > km_ant[1]:
+            bandas.append({"año": año_ant, "km": (km_ant[1] + 1, km_nue[1])})
+
+    return bandas
+
+
+def config_con_ventana(config: Dict[str, Any], ventana: Ventana, vehiculo: Dict[str, Any]) -> Dict[str, Any]:
+    """Copia de la configuración con los filtros relativos de año/km llevados a la ventana"""
+    # Solo se modifican los filtros: el resto de las secciones se comparte
+    nueva = {**config, "filtros_busqueda": copy.deepcopy(config.get("filtros_busqueda", []))}
+    for regla in nueva["filtros_busqueda"]:
+        params = regla.get("parametros", {})
+        for cond in params.get("filtros") or [params]:
+            dimension = _DIMENSIONES.get(cond.get("campo"))
+            if not dimension or cond.get("operador") != "entre" or not cond.get("relativo"):
+                continue
+            rango = ventana.get(dimension[0])
+            referencia = a_numero(vehiculo.get(dimension[1]))
+            if rango is not None and referencia is not None:
+                cond["valor"] = [rango[0] - referencia, rango[1] - referencia]
+    return nueva
+
+
+def evaluar_puntos_control(config: Dict[str, Any], cantidad: int,
+                           ya_ampliados: set) -> Tuple[List[Dict[str, Any]], Optional[Dict], bool]:
+    """
+    Evalúa los puntos de control en orden sobre la cantidad de resultados útiles.
+
+    Returns:
+        (evaluaciones, regla a ampliar o None, continuar)
+        `continuar` es False si un punto con acción "abortar" no se cumplió.
+    """
+    evaluaciones = []
+    for regla in config.get("puntos_control", []):
+        params = regla.get("parametros", {})
+        umbral = int(a_numero(params.get("umbral_minimo")) or 0)
+        cumple = cantidad >= umbral
+        evaluaciones.append({"regla": regla, "umbral": umbral, "cumple": cumple})
+        if cumple:
+            continue
+        accion = params.get("accion")
+        if accion == "abortar":
+            return evaluaciones, None, False
+        if (accion in ACCIONES_AMPLIAR and params.get("nuevos_parametros")
+                and regla.get("codigo") not in ya_ampliados):
+            return evaluaciones, regla, True
+    return evaluaciones, None, True
@@ -0,0 +1,192 @@
+# backend/services/motor/depuracion.py
+"""
+Etapas de depuración (reglas DEPURACION) sobre columnas NumPy.
+Cada etapa devuelve una máscara booleana con las publicaciones que se
+conservan. Todas son O(n): selección por partición en lugar de
+ordenamiento, y un diccionario de claves para los duplicados.
+"""
+
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from services.parseo_json import a_numero
+from services.motor.comparables import Comparables
+from services.motor.condiciones import comparar
+
+
+# Valores por defecto de las cercas estadísticas
+FACTOR_IQR = 1.5
+UMBRAL_MAD = 3.5     # z-score modificado (Iglewicz y Hoaglin)
+UMBRAL_ZSCORE = 3.0
+
+# Constante que lleva la MAD a la escala del desvío estándar
+_ESCALA_MAD = 0.6745
+
+_CONDICIONES = {
+    "menor_que": "menor", "mayor_que": "mayor", "igual_a": "igual",
+    "menor": "menor", "mayor": "mayor", "igual": "igual",
+    "mayor_igual": "mayor_igual", "menor_igual": "menor_igual",
+    "diferente": "diferente", "contiene": "contiene", "entre": "entre", "en_lista": "en_lista",
+}
+
+
+def recortar_extremos(precios: np.ndarray, inferior: int = 0, superior: int = 0) -> np.ndarray:
+    """
+    Descarta los `inferior` precios más bajos y los `superior` más altos.
+    Usa np.argpartition (selección en O(n)) en lugar de ordenar todo el array.
+    """
+    n = len(precios)
+    conservar = np.ones(n, dtype=bool)
+    if inferior + superior >= n:
+        conservar[:] = False
+        return conservar
+    if inferior > 0:
+        conservar[np.argpartition(precios, inferior - 1)[:inferior]] = False
+    if superior > 0:
+        conservar[np.argpartition(precios, n - superior)[n - superior:]] = False
+    return conservar
+
+
+def cerca_iqr(precios: np.ndarray, factor: float = FACTOR_IQR) -> np.ndarray:
+    """Conserva los precios dentro de [Q1 - f·IQR, Q3 + f·IQR]"""
+    if len(precios) < 4:
+        return np.ones(len(precios), dtype=bool)
+    q1, q3 = np.percentile(precios, [25, 75])
+    rango = q3 - q1
+    return (precios >= q1 - factor * rango) & (precios <= q3 + factor * rango)
+
+
+def cerca_mad(precios: np.ndarray, umbral: float = UMBRAL_MAD) -> np.ndarray:
+    """Conserva los precios con |z-score modificado| <= umbral (mediana y MAD)"""
+    if len(precios) < 3:
+        return np.ones(len(precios), dtype=bool)
+    mediana = np.median(precios)
+    desvios = np.abs(precios - mediana)
+    mad = np.median(desvios)
+    if mad == 0:
+        return np.ones(len(precios), dtype=bool)
+    return _ESCALA_MAD * desvios / mad <= umbral
+
+
+def cerca_zscore(precios: np.ndarray, umbral: float = UMBRAL_ZSCORE) -> np.ndarray:
+    """Conserva los precios con |z-score| <= umbral (media y desvío estándar)"""
+    if len(precios) < 3:
+        return np.ones(len(precios), dtype=bool)
+    desvio = precios.std()
+    if desvio == 0:
+        return np.ones(len(precios), dtype=bool)
+    return np.abs(precios - precios.mean()) / desvio <= umbral
+
+
+def corte_antiguedad(antiguedad_dias: np.ndarray, dias_maximos: float) -> np.ndarray:
+    """Conserva publicaciones con antigüedad <= dias_maximos (fecha desconocida se conserva)"""
+    return ~(antiguedad_dias > dias_maximos)
+
+
+def sin_duplicados(comparables: Comparables) -> np.ndarray:
+    """Conserva la primera aparición de cada URL (o de fuente+precio si no hay URL)"""
+    primeros: Dict[Any, int] = {}
+    for i, (url, fuente, precio) in enumerate(zip(comparables.url.tolist(), comparables.fuente.tolist(),
+                                                  comparables.precio.tolist())):
+        # Una pasada con hash: np.unique ordenaría strings en O(n log n)
+        primeros.setdefault(url or (fuente, precio), i)
+    conservar = np.zeros(len(comparables), dtype=bool)
+    conservar[list(primeros.values())] = True
+    return conservar
+
+
+def _a_booleano(valor: Any) -> Optional[float]:
+    """Criterio booleano como 0/1 (a_numero descarta True/False); None si no se reconoce"""
+    if isinstance(valor, (bool, int, float)):
+        return float(bool(valor))
+    texto = str(valor).strip().lower()
+    if texto in ("true", "verdadero", "si", "sí", "1"):
+        return 1.0
+    if texto in ("false", "falso", "no", "0"):
+        return 0.0
+    return None
+
+
+def condicion_campo(comparables: Comparables, campo: str, condicion: str, valor: Any) -> np.ndarray:
+    """Conserva las publicaciones que NO cumplen la condición de eliminación"""
+    columna = comparables.columna(campo)
+    convertir = a_numero
+    if columna.dtype == bool:
+        # verificado, tiene_fotos: se comparan como 0/1
+        columna = columna.astype(float)
+        convertir = _a_booleano
+    if columna.dtype != object:
+        if isinstance(valor, str) and "," in valor:
+            valor = [convertir(v) for v in valor.split(",")]
+        elif isinstance(valor, (list, tuple)):
+            valor = [convertir(v) for v in valor]
+        else:
+            valor = convertir(valor)
+        if valor is None or (isinstance(valor, list) and None in valor):
+            return np.ones(len(comparables), dtype=bool)
+
+    cumple = comparar(columna, _CONDICIONES.get(condicion, condicion), valor)
+    # comparar() considera "cumple" a los desconocidos; acá no deben eliminarse
+    if columna.dtype != object:
+        desconocido = np.isnan(columna)
+    else:
+        desconocido = np.array([v is None or v == "" for v in columna.tolist()], dtype=bool)
+    return ~(cumple & ~desconocido)
+
+
+def _cantidades(params: Dict[str, Any]) -> tuple:
+    """Cantidad de extremos a recortar (inferior, superior) según los parámetros"""
+    extremo = params.get("extremo", "ambos")
+    cantidad = int(a_numero(params.get("cantidad")) or 0)
+    inferior = int(a_numero(params.get("cantidad_inferior")) or 0)
+    superior = int(a_numero(params.get("cantidad_superior")) or 0)
+    if not (inferior or superior):
+        inferior = cantidad if extremo in ("inferior", "ambos") else 0
+        superior = cantidad if extremo in ("superior", "ambos") else 0
+    return inferior, superior
+
+
+def _mascara_criterio(comparables: Comparables, criterio: Dict[str, Any]) -> np.ndarray:
+    """Máscara de una sola acción de depuración"""
+    n = len(comparables)
+    accion = criterio.get("accion") or criterio.get("tipo") or ""
+    metodo = criterio.get("metodo")
+
+    if criterio.get("criterio") == "usuario_no_verificado" or accion == "eliminar_no_verificados":
+        return comparables.verificado.copy()
+    if accion == "eliminar_sin_fotos":
+        return comparables.tiene_fotos.copy()
+    if accion == "eliminar_duplicados":
+        return sin_duplicados(comparables)
+    if accion == "eliminar_antiguos" or (criterio.get("dias_maximos") is not None and not metodo):
+        dias = a_numero(criterio.get("dias_maximos"))
+        return corte_antiguedad(comparables.antiguedad_dias, dias) if dias else np.ones(n, dtype=bool)
+    if accion == "eliminar_por_criterio" and criterio.get("campo"):
+        return condicion_campo(comparables, criterio["campo"], criterio.get("condicion", "igual_a"),
+                               criterio.get("valor"))
+
+    if metodo == "iqr":
+        return cerca_iqr(comparables.precio, a_numero(criterio.get("factor")) or FACTOR_IQR)
+    if metodo == "mad":
+        return cerca_mad(comparables.precio, a_numero(criterio.get("umbral")) or UMBRAL_MAD)
+    if metodo == "zscore":
+        return cerca_zscore(comparables.precio, a_numero(criterio.get("umbral")) or UMBRAL_ZSCORE)
+
+    inferior, superior = _cantidades(criterio)
+    if inferior or superior:
+        return recortar_extremos(comparables.precio, inferior, superior)
+    return np.ones(n, dtype=bool)
+
+
+def mascara_depuracion(comparables: Comparables, params: Dict[str, Any]) -> np.ndarray:
+    """
+    Evalúa una regla DEPURACION completa. Soporta una acción simple o una
+    lista `criterios`; una publicación se conserva si pasa todos.
+    """
+    criterios: List[Dict[str, Any]] = params.get("criterios") or [params]
+    conservar = np.ones(len(comparables), dtype=bool)
+    for criterio in criterios:
+        if isinstance(criterio, dict):
+            conservar &= _mascara_criterio(comparables, criterio)
+    return conservar
@@ -0,0 +1,389 @@
+# backend/services/motor/metodos.py
+"""
+Métodos de valuación (reglas METODO_VALUACION) sobre lotes de vehículos.
+
+Los precios de cada vehículo ocupan una fila de una matriz rellenada con
+NaN, así una sola llamada calcula el precio de miles de vehículos. Cada
+estadístico es exacto (mismo resultado que np.median / np.percentile /
+np.average sobre la fila) y sale de un único ordenamiento por fila.
+
+El intervalo de confianza se estima por bootstrap: las remuestras se
+apilan como filas adicionales y pasan por los mismos métodos.
+"""
+
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from services.parseo_json import a_numero
+from services.motor.comparables import Comparables
+
+
+METODOS = ("mediana", "promedio", "promedio_ponderado", "moda", "percentil", "minimo", "maximo", "combinado")
+
+# Bootstrap: remuestras por vehículo y nivel del intervalo
+REMUESTRAS_BOOTSTRAP = 200
+NIVEL_CONFIANZA = 0.95
+# Tope de celdas por bloque de remuestras (acota la memoria en lotes grandes)
+MAX_CELDAS_BLOQUE = 2_000_000
+
+# Confianza: cantidad mínima de comparables y ancho relativo máximo del intervalo
+MINIMO_CONFIANZA_ALTA = 10
+MINIMO_CONFIANZA_MEDIA = 5
+ANCHO_CONFIANZA_ALTA = 0.10
+ANCHO_CONFIANZA_MEDIA = 0.25
+
+# Valores por defecto de las ponderaciones del promedio ponderado
+DIAS_MAX_ANTIGUEDAD = 30
+TOLERANCIA_KM = 20_000
+
+
+# ==========================================
+# Ponderaciones por publicación
+# ==========================================
+
+def pesos_ponderacion(comparables: Comparables, params: Dict[str, Any],
+                      km_referencia: Any = None) -> np.ndarray:
+    """
+    Peso de cada publicación para el promedio ponderado.
+
+    Acepta `pesos` del formulario ({"verificacion_vendedor": 1.5, ...}) o
+    `ponderaciones` del generador ({"similitud_km": {"peso": 1.2, "tolerancia": 10000}}).
+    Cada criterio multiplica el peso por un factor entre 1 (la publicación
+    no califica) y `peso` (califica del todo):
+        antiguedad_publicacion: publicada hoy → peso, `dias_max` o más → 1
+        verificacion_vendedor:  verificado → peso (solo_verificados descarta el resto)
+        similitud_km:           mismo km → peso, diferencia >= `tolerancia` → 1
+        cantidad_fotos:         con fotos → peso
+        tipo_vendedor:          {"concesionaria": 1.3, "particular": 1.0}
+
+    `km_referencia` es el km del vehículo valuado: un número, o un array
+    alineado a las filas cuando se ponderan comparables de varios vehículos.
+    """
+    pesos = np.ones(len(comparables))
+    criterios = params.get("ponderaciones") or params.get("pesos") or {}
+
+    for criterio, valor in criterios.items():
+        opciones = valor if isinstance(valor, dict) else {"peso": valor}
+        if criterio == "tipo_vendedor":
+            tipos = comparables.columna("tipo_vendedor")
+            pesos *= np.array([a_numero(opciones.get(str(t))) or 1.0 for t in tipos])
+            continue
+
+        peso = a_numero(opciones.get("peso"))
+        if peso is None:
+            continue
+        if criterio == "antiguedad_publicacion":
+            dias_max = a_numero(opciones.get("dias_max")) or DIAS_MAX_ANTIGUEDAD
+            dias = np.nan_to_num(comparables.antiguedad_dias, nan=dias_max)
+            califica = np.clip(1 - dias / dias_max, 0, 1)
+        elif criterio == "verificacion_vendedor":
+            califica = comparables.verificado.astype(float)
+            if opciones.get("solo_verificados"):
+                pesos *= califica
+        elif criterio == "similitud_km":
+            if km_referencia is None:
+                continue
+            tolerancia = a_numero(opciones.get("tolerancia")) or TOLERANCIA_KM
+            diferencia = np.nan_to_num(np.abs(comparables.km - km_referencia), nan=tolerancia)
+            califica = np.clip(1 - diferencia / tolerancia, 0, 1)
+        elif criterio == "cantidad_fotos":
+            califica = comparables.tiene_fotos.astype(float)
+        else:
+            continue
+        pesos *= 1 + (peso - 1) * califica
+
+    return pesos
+
+
+# ==========================================
+# Matrices de precios
+# ==========================================
+
+def matriz_precios(grupos: Sequence[np.ndarray]) -> np.ndarray:
+    """Una fila por vehículo, precios al principio y NaN al final"""
+    return _a_matriz(
+        np.concatenate(grupos) if len(grupos) else np.empty(0),
+        np.array([len(g) for g in grupos], dtype=int)
+    )
+
+
+def _a_matriz(valores: np.ndarray, largos: np.ndarray, relleno: float = np.nan) -> np.ndarray:
+    """Reparte valores consecutivos en filas de `largos[i]` elementos"""
+    matriz = np.full((len(largos), max(int(largos.max(initial=0)), 1)), relleno)
+    fila = np.repeat(np.arange(len(largos)), largos)
+    columna = np.arange(len(valores)) - np.repeat(np.cumsum(largos) - largos, largos)
+    matriz[fila, columna] = valores
+    return matriz
+
+
+def _ordenar(precios: np.ndarray, pesos: Sequence[Optional[np.ndarray]]) -> Tuple[np.ndarray, List, np.ndarray]:
+    """
+    Ordena cada fila (NaN al final) arrastrando cada matriz de pesos;
+    devuelve también la cantidad de precios por fila.
+    """
+    orden = np.argsort(precios, axis=1, kind="stable")
+    ordenados = np.take_along_axis(precios, orden, axis=1)
+    pesos = [None if p is None else np.take_along_axis(p, orden, axis=1) for p in pesos]
+    return ordenados, pesos, np.count_nonzero(~np.isnan(precios), axis=1)
+
+
+def _recortar(ordenados: np.ndarray, pesos: Optional[np.ndarray], n: np.ndarray,
+              cantidad: int) -> Tuple[np.ndarray, Optional[np.ndarray], np.ndarray]:
+    """Excluye los `cantidad` extremos de cada lado de filas ya ordenadas"""
+    if cantidad <= 0:
+        return ordenados, pesos, n
+    n = np.maximum(n - 2 * cantidad, 0)
+    columnas = np.arange(ordenados.shape[1] - cantidad)
+    fuera = columnas[None, :] >= n[:, None]
+    ordenados = np.where(fuera, np.nan, ordenados[:, cantidad:])
+    if pesos is not None:
+        pesos = np.where(fuera, 0.0, pesos[:, cantidad:])
+    return ordenados, pesos, n
+
+
+def _en_posicion(ordenados: np.ndarray, posicion: np.ndarray) -> np.ndarray:
+    posicion = np.clip(posicion, 0, ordenados.shape[1] - 1)
+    return np.take_along_axis(ordenados, posicion[:, None], axis=1)[:, 0]
+
+
+def _percentil(ordenados: np.ndarray, n: np.ndarray, q: float) -> np.ndarray:
+    """Percentil con interpolación lineal (el método por defecto de np.percentile)"""
+    posicion = (n - 1) * q / 100
+    inferior = np.floor(posicion).astype(int)
+    fraccion = posicion - inferior
+    bajo = _en_posicion(ordenados, inferior)
+    alto = _en_posicion(ordenados, np.minimum(inferior + 1, n - 1))
+    # Misma interpolación que NumPy: desde el extremo más cercano
+    diferencia = alto - bajo
+    valor = np.where(fraccion >= 0.5, alto - diferencia * (1 - fraccion), bajo + diferencia * fraccion)
+    return np.where(n > 0, valor, np.nan)
+
+
+def _mediana(ordenados: np.ndarray, n: np.ndarray) -> np.ndarray:
+    centro = (_en_posicion(ordenados, (n - 1) // 2) + _en_posicion(ordenados, n // 2)) / 2
+    return np.where(n > 0, centro, np.nan)
+
+
+def _moda(ordenados: np.ndarray, n: np.ndarray, redondeo: float = 0) -> np.ndarray:
+    """
+    Valor más repetido por fila; ante empate, el menor (igual que np.unique).
+    Con `redondeo` los precios se agrupan al múltiplo más cercano.
+    """
+    if redondeo:
+        ordenados = np.round(ordenados / redondeo) * redondeo
+    columnas = np.arange(ordenados.shape[1])
+    inicio_racha = np.ones(ordenados.shape, dtype=bool)
+    inicio_racha[:, 1:] = ordenados[:, 1:] != ordenados[:, :-1]
+    # Largo de la racha de valores iguales que termina en cada posición
+    inicio = np.maximum.accumulate(np.where(inicio_racha, columnas, 0), axis=1)
+    largo = np.where(columnas[None, :] < n[:, None], columnas - inicio + 1, 0)
+    return np.where(n > 0, _en_posicion(ordenados, np.argmax(largo, axis=1)), np.nan)
+
+
+def _estadistico(metodo: str, params: Dict[str, Any], ordenados: np.ndarray,
+                 pesos: Optional[np.ndarray], n: np.ndarray) -> np.ndarray:
+    """Valor de un método (no combinado) por fila"""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        if metodo == "promedio" or (metodo == "promedio_ponderado" and pesos is None):
+            return np.nansum(ordenados, axis=1) / n
+        if metodo == "promedio_ponderado":
+            pesos = np.where(np.isnan(ordenados), 0.0, pesos)
+            total = pesos.sum(axis=1)
+            ponderado = np.nansum(ordenados * pesos, axis=1) / total
+            return np.where(total > 0, ponderado, np.nansum(ordenados, axis=1) / n)
+        if metodo == "percentil":
+            return _percentil(ordenados, n, float(a_numero(params.get("percentil")) or 50))
+        if metodo == "moda":
+            return _moda(ordenados, n, a_numero(params.get("redondeo")) or 0)
+        if metodo == "minimo":
+            return np.where(n > 0, ordenados[:, 0], np.nan)
+        if metodo == "maximo":
+            return np.where(n > 0, _en_posicion(ordenados, n - 1), np.nan)
+        return _mediana(ordenados, n)
+
+
+def _valor_ordenado(params: Dict[str, Any], ordenados: np.ndarray,
+                    pesos: Optional[np.ndarray], n: np.ndarray) -> np.ndarray:
+    if params.get("excluir_extremos"):
+        ordenados, pesos, n = _recortar(ordenados, pesos, n, int(a_numero(params.get("cantidad_excluir")) or 0))
+
+    if params.get("metodo") != "combinado":
+        return _estadistico(params.get("metodo", "mediana"), params, ordenados, pesos, n)
+
+    combinacion = [c for c in params.get("combinacion") or [] if isinstance(c, dict)]
+    if not combinacion:
+        return _estadistico("mediana", params, ordenados, pesos, n)
+    total = np.zeros(len(ordenados))
+    suma_pesos = 0.0
+    for parte in combinacion:
+        peso = a_numero(parte.get("peso"))
+        peso = 1.0 if peso is None else peso
+        total += peso * _estadistico(parte.get("metodo", "mediana"), {**params, **parte}, ordenados, pesos, n)
+        suma_pesos += peso
+    return total / suma_pesos if suma_pesos else _estadistico("mediana", params, ordenados, pesos, n)
+
+
+def valor_regla(params: Dict[str, Any], precios: np.ndarray, pesos: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Valor de una regla METODO_VALUACION por fila de `precios`.
+    `combinado` promedia los métodos de `combinacion` según su `peso`;
+    `excluir_extremos` descarta `cantidad_excluir` precios de cada lado.
+    """
+    ordenados, (pesos,), n = _ordenar(precios, [pesos])
+    return _valor_ordenado(params, ordenados, pesos, n)
+
+
+def peso_final(params: Dict[str, Any]) -> float:
+    """Peso de la regla en la mezcla de métodos; sin valor cuenta 1, 0 la excluye"""
+    peso = a_numero(params.get("peso_en_calculo_final"))
+    return 1.0 if peso is None else max(peso, 0.0)
+
+
+def _mezclar(reglas: List[Dict[str, Any]], ordenados: np.ndarray, pesos: List[Optional[np.ndarray]],
+             n: np.ndarray) -> Tuple[np.ndarray, List[np.ndarray]]:
+    valores = [_valor_ordenado(r.get("parametros", {}), ordenados, p, n) for r, p in zip(reglas, pesos)]
+    ponderacion = np.array([peso_final(r.get("parametros", {})) for r in reglas])
+    if ponderacion.sum() == 0:
+        ponderacion = np.ones(len(reglas))
+    mezcla = np.tensordot(ponderacion / ponderacion.sum(), np.vstack(valores), axes=1)
+    return mezcla, valores
+
+
+def combinar_reglas(reglas: List[Dict[str, Any]], precios: np.ndarray,
+                    pesos: Optional[List[Optional[np.ndarray]]] = None) -> Tuple[np.ndarray, List[np.ndarray]]:
+    """
+    Mezcla las reglas activas según `peso_en_calculo_final`.
+    Si todas pesan 0 se promedian por igual.
+
+    Returns:
+        (valor mezclado por fila, valor de cada regla por fila)
+    """
+    ordenados, pesos, n = _ordenar(precios, pesos or [None] * len(reglas))
+    return _mezclar(reglas, ordenados, pesos, n)
+
+
+# ==========================================
+# Bootstrap y confianza
+# ==========================================
+
+def _remuestras_ordenadas(ordenados: np.ndarray, n: np.ndarray, remuestras: int,
+                          rng: np.random.Generator) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Remuestras con reposición de filas ya ordenadas, sin volver a ordenar:
+    se cuenta cuántas veces sale cada posición y se repite cada columna
+    esa cantidad de veces, lo que deja la remuestra ordenada.
+
+    Returns:
+        (fila de origen, columnas tomadas) de forma (filas·remuestras, ancho)
+    """
+    filas, ancho = ordenados.shape
+    total = filas * remuestras
+    origen = np.repeat(np.arange(filas), remuestras)
+    n_origen = n[origen][:, None]
+    sorteo = (rng.random((total, ancho)) * n_origen).astype(np.int64)
+    # Las celdas más allá de n apuntan a la última columna, que en esas filas es relleno NaN
+    sorteo = np.where(np.arange(ancho)[None, :] < n_origen, sorteo, ancho - 1)
+    conteos = np.bincount((sorteo + (np.arange(total) * ancho)[:, None]).ravel(), minlength=total * ancho)
+    columnas = np.repeat(np.tile(np.arange(ancho), total), conteos).reshape(total, ancho)
+    return origen, columnas
+
+
+def intervalo_bootstrap(reglas: List[Dict[str, Any]], precios: np.ndarray,
+                        pesos: Optional[List[Optional[np.ndarray]]], rng: np.random.Generator,
+                        remuestras: int = REMUESTRAS_BOOTSTRAP,
+                        nivel: float = NIVEL_CONFIANZA) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Intervalo de confianza del valor mezclado por bootstrap percentil.
+    Cada remuestra toma n precios con reposición de la fila (con sus pesos);
+    las remuestras de un bloque de vehículos se evalúan como una sola matriz.
+    Las filas sin precios quedan en NaN.
+    """
+    ordenados, pesos, n = _ordenar(precios, pesos or [None] * len(reglas))
+    inferior = np.full(len(ordenados), np.nan)
+    superior = np.full(len(ordenados), np.nan)
+    alfa = (1 - nivel) / 2 * 100
+
+    # Las filas se agrupan por cantidad de precios: cada grupo se remuestrea sin relleno
+    for cantidad in np.unique(n[n > 0]):
+        filas_grupo = np.flatnonzero(n == cantidad)
+        bloque = max(1, MAX_CELDAS_BLOQUE // (remuestras * int(cantidad)))
+        for desde in range(0, len(filas_grupo), bloque):
+            filas = filas_grupo[desde:desde + bloque]
+            grupo = ordenados[filas, :cantidad]
+            origen, columnas = _remuestras_ordenadas(grupo, n[filas], remuestras, rng)
+            origen = origen[:, None]
+            mezcla, _ = _mezclar(
+                reglas,
+                grupo[origen, columnas],
+                [None if p is None else p[filas, :cantidad][origen, columnas] for p in pesos],
+                np.full(len(origen), cantidad)
+            )
+            with np.errstate(invalid="ignore"):
+                limites = np.percentile(mezcla.reshape(len(filas), remuestras), [alfa, 100 - alfa], axis=1)
+            inferior[filas], superior[filas] = limites
+
+    return inferior, superior
+
+
+def confianza_por_intervalo(n: np.ndarray, valor: np.ndarray, inferior: np.ndarray,
+                            superior: np.ndarray) -> np.ndarray:
+    """ALTA / MEDIA / BAJA según la cantidad de comparables y el ancho relativo del intervalo"""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        ancho = (superior - inferior) / np.abs(valor)
+    alta = (n >= MINIMO_CONFIANZA_ALTA) & (ancho <= ANCHO_CONFIANZA_ALTA)
+    media = (n >= MINIMO_CONFIANZA_MEDIA) & (ancho <= ANCHO_CONFIANZA_MEDIA)
+    return np.where(alta, "ALTA", np.where(media, "MEDIA", "BAJA"))
+
+
+# ==========================================
+# Lotes
+# ==========================================
+
+def valuar_lote(reglas: List[Dict[str, Any]], lotes: Sequence[Comparables],
+                vehiculos: Optional[Sequence[Dict[str, Any]]] = None,
+                semilla: int = 0, remuestras: int = REMUESTRAS_BOOTSTRAP) -> Dict[str, Any]:
+    """
+    Valúa varios vehículos a la vez: `lotes[i]` son los comparables ya
+    depurados y muestreados del vehículo `vehiculos[i]`.
+
+    Returns:
+        dict con arrays alineados a `lotes`: valor, minimo, maximo,
+        confianza, cantidad y por_regla (una lista de arrays por regla).
+    """
+    reglas = reglas or [{"codigo": "", "parametros": {"metodo": "mediana"}}]
+    vehiculos = vehiculos or [{}] * len(lotes)
+    largos = np.array([len(c) for c in lotes], dtype=int)
+    precios = matriz_precios([c.precio for c in lotes])
+
+    pesos = []
+    todos = None
+    for regla in reglas:
+        params = regla.get("parametros", {})
+        usa_pesos = params.get("metodo") == "promedio_ponderado" or any(
+            isinstance(c, dict) and c.get("metodo") == "promedio_ponderado" for c in params.get("combinacion") or []
+        )
+        if not usa_pesos:
+            pesos.append(None)
+            continue
+        # Los pesos de todos los vehículos se calculan de una vez sobre los comparables unidos
+        if todos is None:
+            todos = Comparables.concatenar(lotes)
+            km_referencia = np.repeat([a_numero(v.get("kilometraje")) or np.nan for v in vehiculos], largos)
+        pesos.append(_a_matriz(pesos_ponderacion(todos, params, km_referencia), largos, 0.0))
+
+    valor, por_regla = combinar_reglas(reglas, precios, pesos)
+    cantidad = np.count_nonzero(~np.isnan(precios), axis=1)
+    if remuestras > 0:
+        minimo, maximo = intervalo_bootstrap(reglas, precios, pesos, np.random.default_rng(semilla), remuestras)
+    else:
+        minimo, maximo = valor.copy(), valor.copy()
+
+    return {
+        "valor": valor,
+        "minimo": minimo,
+        "maximo": maximo,
+        "confianza": confianza_por_intervalo(cantidad, valor, minimo, maximo),
+        "cantidad": cantidad,
+        "por_regla": por_regla,
+    }
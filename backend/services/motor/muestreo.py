@@ -0,0 +1,111 @@
+# backend/services/motor/muestreo.py
+"""
+Etapas de muestreo (reglas MUESTREO) sobre columnas NumPy.
+Toda la aleatoriedad sale de un generador con semilla explícita, que se
+guarda en la configuración usada por la valuación para poder repetirla.
+"""
+
+import secrets
+from typing import Any, Dict
+
+import numpy as np
+
+from services.parseo_json import a_numero
+from services.motor.comparables import Comparables
+
+
+def nueva_semilla() -> int:
+    """Semilla de 32 bits para una valuación nueva"""
+    return secrets.randbits(32)
+
+
+def _top_k(clave: np.ndarray, k: int) -> np.ndarray:
+    """Índices de los k menores valores de `clave` (argpartition, O(n)), en orden"""
+    if k >= len(clave):
+        return np.argsort(clave, kind="stable")
+    seleccion = np.argpartition(clave, k - 1)[:k]
+    return seleccion[np.argsort(clave[seleccion], kind="stable")]
+
+
+def _rango_en_grupo(grupos: np.ndarray, *claves: np.ndarray) -> np.ndarray:
+    """
+    Posición de cada fila dentro de su grupo (0 = primera), ordenando por
+    `claves` (la primera es la más significativa).
+    """
+    orden = np.lexsort(tuple(reversed(claves)) + (grupos,))
+    grupos_ordenados = grupos[orden]
+    inicios = np.flatnonzero(np.r_[True, grupos_ordenados[1:] != grupos_ordenados[:-1]])
+    largo = np.diff(np.r_[inicios, len(orden)])
+    rango = np.empty(len(orden), dtype=int)
+    rango[orden] = np.arange(len(orden)) - np.repeat(inicios, largo)
+    return rango
+
+
+def _asignacion_proporcional(tamaños: np.ndarray, total: int) -> np.ndarray:
+    """Reparte `total` entre estratos en proporción a su tamaño (mayores restos)"""
+    cuota = tamaños / tamaños.sum() * total
+    asignado = np.floor(cuota).astype(int)
+    resto = total - asignado.sum()
+    if resto > 0:
+        asignado[np.argsort(-(cuota - asignado), kind="stable")[:resto]] += 1
+    return np.minimum(asignado, tamaños)
+
+
+def clave_orden(comparables: Comparables, metodo: str, rng: np.random.Generator) -> np.ndarray:
+    """Clave de selección por método: se toman las filas con menor clave"""
+    if metodo == "primeros_por_precio_asc":
+        return comparables.precio
+    if metodo == "primeros_por_precio_desc":
+        return -comparables.precio
+    if metodo == "primeros_por_fecha":
+        return np.nan_to_num(comparables.antiguedad_dias, nan=np.inf)
+    # aleatorio: claves uniformes; los k menores son una muestra sin reemplazo
+    return rng.random(len(comparables))
+
+
+def seleccionar_muestra(comparables: Comparables, params: Dict[str, Any],
+                        rng: np.random.Generator) -> np.ndarray:
+    """
+    Devuelve los índices (posiciones en `comparables`) de la muestra.
+
+    Parámetros soportados:
+        metodo: aleatorio | primeros_por_precio_asc | primeros_por_precio_desc |
+                primeros_por_fecha | todos
+        cantidad: tamaño de la muestra
+        maximo_por_fuente: tope de publicaciones por fuente
+        estratificar_por: "fuente" para repartir la muestra en proporción
+                          a la cantidad de publicaciones de cada fuente
+        priorizar_verificados: completa primero con vendedores verificados
+    """
+    n = len(comparables)
+    metodo = params.get("metodo", "todos")
+    cantidad = int(a_numero(params.get("cantidad")) or 0)
+    clave = clave_orden(comparables, metodo, rng)
+    # Con priorizar_verificados los no verificados van detrás de todos los verificados
+    relegados = (~comparables.verificado if params.get("priorizar_verificados")
+                 else np.zeros(n, dtype=bool))
+    elegibles = np.ones(n, dtype=bool)
+
+    maximo_por_fuente = int(a_numero(params.get("maximo_por_fuente")) or 0)
+    estratificar = params.get("estratificar_por") == "fuente" or params.get("estratificado")
+    if maximo_por_fuente or (estratificar and cantidad):
+        _, grupos, tamaños = np.unique(comparables.fuente.astype(str), return_inverse=True, return_counts=True)
+        rango = _rango_en_grupo(grupos, relegados, clave)
+        if maximo_por_fuente:
+            elegibles &= rango < maximo_por_fuente
+            tamaños = np.minimum(tamaños, maximo_por_fuente)
+        if estratificar and cantidad:
+            elegibles &= rango < _asignacion_proporcional(tamaños, min(cantidad, int(tamaños.sum())))[grupos]
+
+    candidatos = np.flatnonzero(elegibles)
+    if metodo == "todos" or not cantidad or cantidad >= len(candidatos):
+        return candidatos
+
+    # Se llena primero con el grupo prioritario y se completa con el resto
+    seleccion = []
+    for grupo in (candidatos[~relegados[candidatos]], candidatos[relegados[candidatos]]):
+        faltan = cantidad - sum(len(s) for s in seleccion)
+        if faltan <= 0:
+            break
+        seleccion.append(grupo[_top_k(clave[grupo], faltan)])
+    return np.sort(np.concatenate(seleccion))
@@ -0,0 +1,346 @@
+# backend/services/motor/pipeline.py
+"""
+Pipeline determinístico de valuación.
+Aplica las reglas activas (filtros, depuración, muestreo, puntos de control,
+métodos y ajustes) sobre un conjunto de comparables, sin llamar a la IA.
+"""
+
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from services.parseo_json import a_numero
+from services.motor.comparables import Comparables
+from services.motor.condiciones import comparar
+from services.motor.depuracion import mascara_depuracion
+from services.motor.muestreo import seleccionar_muestra
+from services.motor.metodos import valuar_lote, peso_final
+from services.motor.ajustes import LoteVehiculos, compilar_ajustes, aplicar_ajustes, auditoria_vehiculo
+from services.motor.control import (
+    FuenteComparables, ventana_desde_filtros, ventana_ampliada, bandas_nuevas,
+    config_con_ventana, evaluar_puntos_control
+)
+
+
+# Campos de filtro que se evalúan sobre columnas numéricas
+CAMPOS_NUMERICOS = {"año", "anio", "km", "kilometraje", "precio"}
+
+
+def _describir_ventana(ventana: Dict[str, Any]) -> str:
+    """Texto de una ventana año × km para el reporte"""
+    partes = []
+    if ventana.get("año") is not None:
+        partes.append(f"año {ventana['año'][0]:.0f}-{ventana['año'][1]:.0f}")
+    if ventana.get("km") is not None:
+        partes.append(f"km {ventana['km'][0]:,.0f}-{ventana['km'][1]:,.0f}")
+    return ", ".join(partes) or "sin límites"
+
+
+class PipelineValuacion:
+    """
+    Ejecuta la configuración de reglas sobre comparables almacenados.
+    Cada etapa registra en `traza` cuántas publicaciones entraron, cuántas
+    quedaron y cuáles se descartaron (por índice original).
+    """
+
+    def __init__(self, config: Dict[str, Any], vehiculo: Dict[str, Any], ahora: Optional[datetime] = None):
+        self.config = config
+        self.vehiculo = vehiculo
+        self.ahora = ahora or datetime.utcnow()
+        # Semilla del muestreo: guardada en la configuración para repetir la valuación
+        self.semilla = int(config.get("metadata", {}).get("semilla_muestreo", 0))
+        self.traza: List[Dict[str, Any]] = []
+        self.reglas_aplicadas: List[Dict[str, str]] = []
+        self.alertas: List[str] = []
+        self.ajustes: List[Dict[str, Any]] = []
+
+    # ------------------------------------------
+    # Registro
+    # ------------------------------------------
+
+    def _registrar(self, etapa: str, regla: Dict, antes: Comparables, despues: Comparables, detalle: str):
+        # Las etapas solo seleccionan filas: se marcan las que quedaron (más barato que setdiff1d)
+        quedaron = np.zeros(len(antes.registros), dtype=bool)
+        quedaron[despues.indices] = True
+        eliminados = np.sort(antes.indices[~quedaron[antes.indices]])
+        self.traza.append({
+            "etapa": etapa,
+            "codigo": regla.get("codigo", ""),
+            "antes": len(antes),
+            "despues": len(despues),
+            "eliminados": eliminados.tolist()
+        })
+        self.reglas_aplicadas.append({"codigo": regla.get("codigo", ""), "resultado": detalle})
+
+    # ------------------------------------------
+    # Etapas
+    # ------------------------------------------
+
+    def _filtrar(self, comparables: Comparables) -> Comparables:
+        """FILTRO_BUSQUEDA: condiciones de campo, absolutas o relativas al vehículo"""
+        for regla in self.config.get("filtros_busqueda", []):
+            params = regla.get("parametros", {})
+            condiciones = params.get("filtros") or [params]
+            antes = comparables
+            mascara = np.ones(len(comparables), dtype=bool)
+
+            for cond in condiciones:
+                campo = cond.get("campo")
+                operador = cond.get("operador", "igual")
+                valor = cond.get("valor")
+                # marca/modelo ya se resolvieron al cargar los comparables
+                if not campo or campo in ("marca", "modelo") or valor is None:
+                    continue
+                if campo in CAMPOS_NUMERICOS:
+                    referencia = a_numero(self.vehiculo.get("kilometraje" if campo == "km" else campo)) or 0
+                    if isinstance(valor, (list, tuple)):
+                        valor = [a_numero(v) or 0 for v in valor]
+                        if cond.get("relativo"):
+                            valor = [referencia + v for v in valor]
+                    else:
+                        valor = a_numero(valor) or 0
+                        if cond.get("relativo"):
+                            valor = referencia + valor
+                mascara &= comparar(comparables.columna(campo), operador, valor)
+
+            comparables = comparables.tomar(mascara)
+            self._registrar("filtro_busqueda", regla, antes, comparables,
+                            f"{len(antes) - len(comparables)} publicaciones fuera de filtro")
+        return comparables
+
+    def _depurar(self, comparables: Comparables) -> Comparables:
+        """DEPURACION: extremos, cercas estadísticas, antigüedad y criterios de campo"""
+        for regla in self.config.get("depuracion", []):
+            antes = comparables
+            comparables = comparables.tomar(mascara_depuracion(comparables, regla.get("parametros", {})))
+            self._registrar("depuracion", regla, antes, comparables,
+                            f"Eliminadas {len(antes) - len(comparables)} publicaciones")
+        return comparables
+
+    def _muestrear(self, comparables: Comparables) -> Comparables:
+        """MUESTREO: selección reproducible con la semilla de la valuación"""
+        rng = np.random.default_rng(self.semilla)
+        for regla in self.config.get("muestreo", []):
+            params = regla.get("parametros", {})
+            antes = comparables
+            comparables = comparables.tomar(seleccionar_muestra(comparables, params, rng))
+            self._registrar("muestreo", regla, antes, comparables,
+                            f"Muestra de {len(comparables)} ({params.get('metodo', 'todos')}, semilla {self.semilla})")
+        return comparables
+
+    def _calcular_base(self, muestra: Comparables) -> Dict[str, Any]:
+        """
+        METODO_VALUACION: mezcla los métodos activos según su peso e
+        intervalo de confianza por bootstrap (ver services.motor.metodos)
+        """
+        metodos = self.config.get("metodos_valuacion", [])
+        valuacion = valuar_lote(metodos, [muestra], [self.vehiculo], semilla=self.semilla)
+        for regla, valores in zip(metodos, valuacion["por_regla"]):
+            params = regla.get("parametros", {})
+            self.reglas_aplicadas.append({
+                "codigo": regla.get("codigo", ""),
+                "resultado": f"{params.get('metodo', 'mediana')}: ${valores[0]:,.0f} "
+                             f"(peso {peso_final(params):g})"
+            })
+        return {clave: valuacion[clave][0] for clave in ("valor", "minimo", "maximo", "confianza")}
+
+    def _ajustar(self, precio: float, muestra: Comparables) -> float:
+        """
+        AJUSTE_CALCULO: reglas compiladas aplicadas en orden sobre el precio
+        base (ver services.motor.ajustes). Las bases de los ajustes
+        porcentuales salen de la muestra.
+        """
+        mercado = {
+            "precio_mercado": [float(np.median(muestra.precio))],
+            "mediana_mercado": [float(np.median(muestra.precio))],
+            "promedio_mercado": [float(np.mean(muestra.precio))],
+            "precio_minimo": [float(np.min(muestra.precio))],
+            "precio_maximo": [float(np.max(muestra.precio))],
+            "cantidad_resultados": [len(muestra)],
+        }
+        lote = LoteVehiculos([self.vehiculo], self.ahora, mercado)
+        compilados = compilar_ajustes(self.config.get("ajustes_calculo", []))
+        precios, auditoria = aplicar_ajustes(compilados, np.array([precio]), lote)
+
+        self.ajustes = auditoria_vehiculo(auditoria, precio)
+        for ajuste in self.ajustes:
+            if ajuste["aplicado"]:
+                resultado = f"{ajuste['detalle']}: ${ajuste['antes']:,.0f} → ${ajuste['despues']:,.0f}"
+            else:
+                resultado = f"No aplica ({ajuste['detalle']})"
+            self.reglas_aplicadas.append({"codigo": ajuste["codigo"], "resultado": resultado})
+        return float(precios[0])
+
+    # ------------------------------------------
+    # Ejecución
+    # ------------------------------------------
+
+    def _controlar(self, comparables: Comparables, fuente: Optional[FuenteComparables]):
+        """
+        PUNTO_CONTROL: ejecuta filtros, depuración y muestreo; si un umbral no
+        se cumple y la regla pide ampliar, amplía la ventana año × km, consulta
+        a la fuente solo las bandas nuevas y repite las etapas.
+
+        Returns:
+            (comparables acumulados, filtrados, depurados, muestra, continuar)
+        """
+        ventana = ventana_desde_filtros(self.config, self.vehiculo)
+        if fuente is not None:
+            registros = list(fuente.consultar(ventana))
+            comparables = Comparables(registros, referencia=self.vehiculo, ahora=self.ahora)
+        ya_ampliados = set()
+        ampliaciones = []
+
+        while True:
+            self.traza, self.reglas_aplicadas, self.alertas = list(ampliaciones), [], []
+            filtrados = self._filtrar(comparables.tomar(~np.isnan(comparables.precio)))
+            depurados = self._depurar(filtrados)
+            muestra = self._muestrear(depurados)
+
+            evaluaciones, regla_ampliar, continuar = evaluar_puntos_control(
+                self.config, len(depurados), ya_ampliados
+            )
+            if regla_ampliar is None:
+                break
+
+            nueva = ventana_ampliada(ventana, regla_ampliar["parametros"]["nuevos_parametros"], self.vehiculo)
+            bandas = bandas_nuevas(ventana, nueva)
+            nuevas = 0
+            if fuente is not None:
+                for banda in bandas:
+                    agregados = fuente.consultar(banda)
+                    registros.extend(agregados)
+                    nuevas += len(agregados)
+                comparables = Comparables(registros, referencia=self.vehiculo, ahora=self.ahora)
+
+            ya_ampliados.add(regla_ampliar.get("codigo"))
+            ampliaciones.append({
+                "etapa": "punto_control",
+                "codigo": regla_ampliar.get("codigo", ""),
+                "antes": len(depurados),
+                "ventana_anterior": ventana,
+                "ventana_ampliada": nueva,
+                "bandas_consultadas": bandas,
+                "publicaciones_nuevas": nuevas
+            })
+            self.config = config_con_ventana(self.config, nueva, self.vehiculo)
+            ventana = nueva
+
+        for evaluacion in evaluaciones:
+            regla = evaluacion["regla"]
+            if evaluacion["cumple"]:
+                self.reglas_aplicadas.append({"codigo": regla.get("codigo", ""), "resultado": "Umbral cumplido"})
+                continue
+            self.alertas.append(
+                f"⚠️ {regla.get('codigo', 'Punto de control')}: {len(depurados)} resultados "
+                f"(mínimo {evaluacion['umbral']})"
+            )
+            self.reglas_aplicadas.append({"codigo": regla.get("codigo", ""), "resultado": "Umbral no cumplido"})
+
+        for ampliacion in ampliaciones:
+            self.reglas_aplicadas.append({
+                "codigo": ampliacion["codigo"],
+                "resultado": f"Búsqueda ampliada: +{ampliacion['publicaciones_nuevas']} publicaciones "
+                             f"en {len(ampliacion['bandas_consultadas'])} bandas nuevas"
+            })
+        return comparables, filtrados, depurados, muestra, continuar
+
+    def ejecutar(self, comparables: Optional[Comparables] = None,
+                 fuente: Optional[FuenteComparables] = None) -> Dict[str, Any]:
+        """
+        Ejecuta todas las etapas y devuelve el resultado con el mismo
+        formato que la valuación por IA.
+
+        Con `fuente`, las publicaciones se consultan por ventana de año × km
+        y los puntos de control pueden ampliar la búsqueda. Con `comparables`
+        se trabaja sobre un conjunto fijo (ej: repetir una valuación guardada).
+        """
+        comparables, filtrados, depurados, muestra, continuar = self._controlar(comparables, fuente)
+        iniciales = comparables.tomar(~np.isnan(comparables.precio))
+
+        analisis = {
+            "fuentes_consultadas": len(set(iniciales.fuente.tolist())),
+            "resultados_iniciales": len(iniciales),
+            "resultados_tras_filtrado": len(filtrados),
+            "resultados_tras_depuracion": len(depurados),
+        }
+
+        if not continuar or len(muestra) == 0:
+            if len(muestra) == 0:
+                self.alertas.append("⚠️ No quedaron publicaciones comparables tras aplicar las reglas")
+            return self._resultado(None, None, None, "BAJA", analisis, filtrados, muestra)
+
+        precios = muestra.precio
+        analisis.update({
+            "precio_mercado_min": float(np.min(precios)),
+            "precio_mercado_max": float(np.max(precios)),
+            "precio_mercado_promedio": float(np.mean(precios)),
+            "precio_mercado_mediana": float(np.median(precios)),
+        })
+
+        calculo = self._calcular_base(muestra)
+        base = float(calculo["valor"])
+        sugerido = self._ajustar(base, muestra)
+        # El intervalo bootstrap del precio base se lleva a la escala del precio ajustado
+        factor = sugerido / base if base else 1.0
+        minimo = float(calculo["minimo"]) * factor
+        maximo = float(calculo["maximo"]) * factor
+        confianza = str(calculo["confianza"])
+
+        return self._resultado(round(sugerido), round(minimo), round(maximo), confianza,
+                               analisis, filtrados, muestra)
+
+    def _resultado(self, sugerido, minimo, maximo, confianza, analisis, analizados, muestra) -> Dict[str, Any]:
+        """
+        Arma el resultado. Solo se devuelven las publicaciones que pasaron los
+        filtros de búsqueda: son las que se guardan como analizadas.
+        """
+        vehiculo = self.vehiculo
+        lineas = [
+            "# Reporte de Valuación (OFFLINE)",
+            "",
+            "## Vehículo",
+            f"- **Marca:** {vehiculo.get('marca')}",
+            f"- **Modelo:** {vehiculo.get('modelo')}",
+            f"- **Año:** {vehiculo.get('año')}",
+            f"- **Kilometraje:** {vehiculo.get('kilometraje')} km",
+            "",
+            "## Pipeline",
+        ]
+        for t in self.traza:
+            if t["etapa"] == "punto_control":
+                lineas.append(f"- {t['etapa']} `{t['codigo']}`: {t['antes']} resultados, búsqueda ampliada "
+                              f"a {_describir_ventana(t['ventana_ampliada'])} "
+                              f"(+{t['publicaciones_nuevas']} publicaciones)")
+            else:
+                lineas.append(f"- {t['etapa']} `{t['codigo']}`: {t['antes']} → {t['despues']}")
+        if self.ajustes:
+            lineas += ["", "## Ajustes"]
+            lineas += [
+                f"- `{a['codigo']}` {a['detalle']}: ${a['antes']:,.0f} → ${a['despues']:,.0f}"
+                if a["aplicado"] else f"- `{a['codigo']}` {a['detalle']}: no aplica"
+                for a in self.ajustes
+            ]
+        lineas += [
+            "",
+            "## Resultado",
+            f"- **Precio Sugerido:** ${sugerido:,}" if sugerido is not None else "- **Precio Sugerido:** sin datos",
+            f"- **Confianza:** {confianza}",
+            "",
+            "*Calculado con publicaciones almacenadas de valuaciones anteriores, sin consultar IA.*",
+        ]
+
+        return {
+            "precio_sugerido": sugerido,
+            "precio_minimo": minimo,
+            "precio_maximo": maximo,
+            "confianza": confianza,
+            "analisis": analisis,
+            "reglas_aplicadas": self.reglas_aplicadas,
+            "publicaciones": analizados.publicaciones(muestra.indices),
+            "alertas": ["⚠️ Valuación OFFLINE - basada en comparables almacenados"] + self.alertas,
+            "reporte_detallado": "\n".join(lineas),
+            "traza": self.traza,
+            "ajustes": self.ajustes
+        }
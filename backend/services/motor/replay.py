@@ -0,0 +1,369 @@
+# backend/services/motor/replay.py
+"""
+Repetición (replay) de valuaciones guardadas.
+
+Una valuación guarda la configuración usada (con la semilla del muestreo
+y la fecha de generación) y las publicaciones analizadas: con eso el
+pipeline local puede recalcular el precio y comparar etapa por etapa
+contra el resultado guardado. En lote, las mismas valuaciones se repiten
+con un conjunto de reglas candidato ("what-if") repartidas entre procesos.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from models import Valuacion, Vehiculo
+from services.motor.comparables import Comparables
+from services.motor.pipeline import PipelineValuacion
+
+
+# Procesos para el replay en lote (0 = uno por CPU)
+REPLAY_WORKERS = int(os.getenv("REPLAY_WORKERS", "0"))
+# Por debajo de esta cantidad de valuaciones por proceso no conviene abrir un pool
+MIN_VALUACIONES_POR_WORKER = 250
+# Diferencia de precio (en pesos) que se considera un cambio
+TOLERANCIA_PRECIO = 0.5
+
+# Secciones de la configuración en orden de ejecución y el tipo de regla de cada una
+SECCIONES = (
+    ("fuentes", "fuente"),
+    ("filtros_busqueda", "filtro_busqueda"),
+    ("depuracion", "depuracion"),
+    ("muestreo", "muestreo"),
+    ("puntos_control", "punto_control"),
+    ("metodos_valuacion", "metodo_valuacion"),
+    ("ajustes_calculo", "ajuste_calculo"),
+)
+SECCION_POR_TIPO = {tipo: seccion for seccion, tipo in SECCIONES}
+
+# (etapa, campo guardado en Valuacion, campo del resultado del pipeline).
+# Las publicaciones guardadas ya pasaron los filtros de búsqueda: la cantidad
+# inicial de comparables no se puede repetir y no se compara.
+CAMPOS_COMPARADOS = (
+    ("depuracion", "resultados_filtrados", ("analisis", "resultados_tras_depuracion")),
+    ("mercado_minimo", "precio_mercado_minimo", ("analisis", "precio_mercado_min")),
+    ("mercado_maximo", "precio_mercado_maximo", ("analisis", "precio_mercado_max")),
+    ("mercado_promedio", "precio_mercado_promedio", ("analisis", "precio_mercado_promedio")),
+    ("mercado_mediana", "precio_mercado_mediana", ("analisis", "precio_mercado_mediana")),
+    ("precio_sugerido", "precio_sugerido", ("precio_sugerido",)),
+    ("precio_minimo", "precio_minimo", ("precio_minimo",)),
+    ("precio_maximo", "precio_maximo", ("precio_maximo",)),
+    ("confianza", "confianza", ("confianza",)),
+)
+
+
+# ------------------------------------------
+# Snapshots
+# ------------------------------------------
+
+def cargar_snapshots(db, limite: Optional[int] = None, ids: Optional[Sequence[str]] = None) -> List[Dict[str, Any]]:
+    """
+    Lee de la base lo necesario para repetir valuaciones (las más recientes
+    primero): vehículo, configuración, publicaciones y resultado guardado.
+    """
+    columnas_guardadas = [campo for _, campo, _ in CAMPOS_COMPARADOS]
+    consulta = (
+        db.query(Valuacion)
+        .join(Vehiculo, Valuacion.vehiculo_id == Vehiculo.id)
+        .with_entities(
+            Valuacion.id, Valuacion.fecha, Valuacion.configuracion_usada, Valuacion.publicaciones_analizadas,
+            Valuacion.reglas_aplicadas, Vehiculo.marca, Vehiculo.modelo, Vehiculo.año, Vehiculo.kilometraje,
+            *[getattr(Valuacion, campo) for campo in columnas_guardadas]
+        )
+    )
+    if ids is not None:
+        consulta = consulta.filter(Valuacion.id.in_(list(ids)))
+    consulta = consulta.order_by(Valuacion.fecha.desc())
+    if limite:
+        consulta = consulta.limit(limite)
+
+    snapshots = []
+    for fila in consulta.all():
+        id_, fecha, config, publicaciones, reglas_aplicadas, marca, modelo, año, km, *guardados = fila
+        snapshots.append({
+            "id": id_,
+            "fecha": fecha.isoformat() if fecha else None,
+            "vehiculo": {"marca": marca, "modelo": modelo, "año": año, "kilometraje": km},
+            "configuracion": config or {},
+            "publicaciones": publicaciones or [],
+            "guardado": {**dict(zip(columnas_guardadas, guardados)), "reglas_aplicadas": reglas_aplicadas or []},
+        })
+    return snapshots
+
+
+def ahora_configuracion(config: Dict[str, Any], por_defecto: Optional[str] = None) -> Optional[datetime]:
+    """Fecha de generación de la configuración (o `por_defecto`): el "ahora" de la valuación"""
+    for texto in (config.get("metadata", {}).get("generado_en"), por_defecto):
+        if texto:
+            try:
+                return datetime.fromisoformat(str(texto).replace("Z", "+00:00")).replace(tzinfo=None)
+            except ValueError:
+                continue
+    return None
+
+
+def config_con_reglas(config: Dict[str, Any], reglas: Sequence[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Configuración candidata: cada regla reemplaza a la de igual código (en
+    cualquier sección), se agrega si es nueva o se quita si `activo` es
+    False. La metadata (semilla y fecha) se conserva.
+    """
+    codigos = {r.get("codigo") for r in reglas}
+    nueva = {
+        seccion: [r for r in config.get(seccion, []) if r.get("codigo") not in codigos]
+        for seccion, _ in SECCIONES
+    }
+    for regla in reglas:
+        seccion = SECCION_POR_TIPO.get(str(regla.get("tipo", "")).lower())
+        if seccion is None:
+            raise ValueError(f"Tipo de regla desconocido: {regla.get('tipo')}")
+        if regla.get("activo", True):
+            nueva[seccion].append({"orden": 0, "parametros": {}, **regla})
+    for seccion, _ in SECCIONES:
+        nueva[seccion].sort(key=lambda r: r.get("orden", 0))
+    nueva["metadata"] = dict(config.get("metadata", {}))
+    return nueva
+
+
+# ------------------------------------------
+# Replay
+# ------------------------------------------
+
+def repetir(snapshot: Dict[str, Any], config: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """
+    Ejecuta el pipeline local sobre las publicaciones guardadas con la
+    configuración del snapshot (o `config`), con la misma semilla y fecha.
+    """
+    config = config if config is not None else snapshot["configuracion"]
+    vehiculo = snapshot["vehiculo"]
+    ahora = ahora_configuracion(config, snapshot.get("fecha"))
+    comparables = Comparables(snapshot["publicaciones"], referencia=vehiculo, ahora=ahora)
+    return PipelineValuacion(config, vehiculo, ahora).ejecutar(comparables=comparables)
+
+
+def resumen_resultado(resultado: Dict[str, Any]) -> Dict[str, Any]:
+    """Resultado del pipeline con los mismos campos que guarda una Valuacion"""
+    resumen = {}
+    for _, campo, ruta in CAMPOS_COMPARADOS:
+        valor = resultado
+        for clave in ruta:
+            valor = (valor or {}).get(clave)
+        resumen[campo] = valor
+    resumen["reglas_aplicadas"] = resultado.get("reglas_aplicadas", [])
+    return resumen
+
+
+def _resultados_por_codigo(reglas_aplicadas: List[Dict[str, str]]) -> Dict[str, List[str]]:
+    por_codigo: Dict[str, List[str]] = {}
+    for r in reglas_aplicadas or []:
+        if isinstance(r, dict):
+            por_codigo.setdefault(r.get("codigo", ""), []).append(r.get("resultado", ""))
+    return por_codigo
+
+
+def _distinto(a: Any, b: Any) -> bool:
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        return abs(a - b) > TOLERANCIA_PRECIO
+    return a != b
+
+
+def comparar(referencia: Dict[str, Any], replay: Dict[str, Any], config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Diferencias etapa por etapa entre dos resúmenes (guardado o replay):
+    los totales de cada etapa y el resultado de cada regla, en el orden
+    en que se ejecutan las secciones de `config`.
+    """
+    etapas = []
+    for etapa, campo, _ in CAMPOS_COMPARADOS:
+        antes, despues = referencia.get(campo), replay.get(campo)
+        fila = {"etapa": etapa, "guardado": antes, "replay": despues, "cambio": _distinto(antes, despues)}
+        if isinstance(antes, (int, float)) and isinstance(despues, (int, float)):
+            fila["diferencia"] = despues - antes
+        etapas.append(fila)
+
+    guardadas = _resultados_por_codigo(referencia.get("reglas_aplicadas"))
+    repetidas = _resultados_por_codigo(replay.get("reglas_aplicadas"))
+    reglas, vistos = [], set()
+    codigos = [(tipo, r.get("codigo", "")) for seccion, tipo in SECCIONES for r in config.get(seccion, [])]
+    # Reglas que figuran en el resultado pero ya no en la configuración
+    codigos += [(None, c) for c in list(guardadas) + list(repetidas)]
+    for tipo, codigo in codigos:
+        if codigo in vistos or (codigo not in guardadas and codigo not in repetidas):
+            continue
+        vistos.add(codigo)
+        antes, despues = guardadas.get(codigo, []), repetidas.get(codigo, [])
+        reglas.append({"codigo": codigo, "tipo": tipo, "guardado": antes, "replay": despues,
+                       "cambio": antes != despues})
+
+    return {
+        "coincide": not any(e["cambio"] for e in etapas),
+        "etapas": etapas,
+        "reglas": reglas,
+    }
+
+
+def repetir_valuacion(snapshot: Dict[str, Any], reglas: Optional[Sequence[Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    Replay de una valuación con su configuración (o con `reglas` aplicadas
+    encima) y diferencias contra el resultado guardado.
+    """
+    config = config_con_reglas(snapshot["configuracion"], reglas) if reglas else snapshot["configuracion"]
+    resultado = repetir(snapshot, config)
+    return {
+        "valuacion_id": snapshot["id"],
+        **comparar(snapshot["guardado"], resumen_resultado(resultado), config),
+        "resultado": {clave: valor for clave, valor in resultado.items() if clave != "publicaciones"},
+    }
+
+
+def _fila_lote(snapshot: Dict[str, Any], reglas, contra_replay: bool) -> Dict[str, Any]:
+    """Replay de una valuación del lote, resumido a precio, confianza y reglas que cambiaron"""
+    try:
+        config = config_con_reglas(snapshot["configuracion"], reglas) if reglas else snapshot["configuracion"]
+        replay = resumen_resultado(repetir(snapshot, config))
+        referencia = resumen_resultado(repetir(snapshot)) if contra_replay else snapshot["guardado"]
+    except Exception as e:
+        return {"valuacion_id": snapshot["id"], "error": f"{type(e).__name__}: {e}"}
+
+    diferencias = comparar(referencia, replay, config)
+    antes, despues = referencia.get("precio_sugerido"), replay.get("precio_sugerido")
+    fila = {
+        "valuacion_id": snapshot["id"],
+        "precio_referencia": antes,
+        "precio_replay": despues,
+        "confianza_referencia": referencia.get("confianza"),
+        "confianza_replay": replay.get("confianza"),
+        "coincide": diferencias["coincide"],
+        "reglas_cambiadas": [r["codigo"] for r in diferencias["reglas"] if r["cambio"]],
+    }
+    if antes and despues is not None:
+        fila["diferencia_pct"] = (despues - antes) / antes * 100
+    return fila
+
+
+def _repetir_bloque(snapshots: List[Dict[str, Any]], reglas, contra_replay: bool) -> List[Dict[str, Any]]:
+    return [_fila_lote(s, reglas, contra_replay) for s in snapshots]
+
+
+def repetir_lote(snapshots: List[Dict[str, Any]], reglas: Optional[Sequence[Dict[str, Any]]] = None,
+                 contra_replay: bool = False, workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Repite muchas valuaciones ("what-if" si se pasan `reglas`) repartiendo
+    el lote en bloques entre procesos. Con `contra_replay` la referencia es
+    el replay con la configuración original en lugar del resultado guardado:
+    así solo se mide el efecto del cambio de reglas.
+    """
+    inicio = time.perf_counter()
+    reglas = list(reglas or [])
+    if reglas:
+        # Valida la configuración candidata antes de repartir el trabajo
+        config_con_reglas({}, reglas)
+
+    workers = workers or REPLAY_WORKERS or os.cpu_count() or 1
+    workers = max(1, min(workers, len(snapshots) // MIN_VALUACIONES_POR_WORKER))
+    if workers == 1:
+        filas = _repetir_bloque(snapshots, reglas, contra_replay)
+    else:
+        # Varios bloques por proceso para repartir mejor valuaciones de distinto tamaño
+        bloques = [snapshots[i::workers * 4] for i in range(workers * 4)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            partes = list(pool.map(_repetir_bloque, bloques, [reglas] * len(bloques),
+                                   [contra_replay] * len(bloques)))
+        orden = {s["id"]: i for i, s in enumerate(snapshots)}
+        filas = sorted((f for parte in partes for f in parte), key=lambda f: orden[f["valuacion_id"]])
+
+    diferencias = np.array([f["diferencia_pct"] for f in filas if "diferencia_pct" in f], dtype=float)
+    resumen = {
+        "valuaciones": len(filas),
+        "con_cambios": sum(1 for f in filas if "error" not in f and not f["coincide"]),
+        "con_error": sum(1 for f in filas if "error" in f),
+        "workers": workers,
+        "duracion_segundos": round(time.perf_counter() - inicio, 3),
+    }
+    if len(diferencias):
+        resumen.update({
+            "diferencia_pct_promedio": float(np.mean(diferencias)),
+            "diferencia_pct_mediana": float(np.median(diferencias)),
+            "diferencia_pct_minima": float(np.min(diferencias)),
+            "diferencia_pct_maxima": float(np.max(diferencias)),
+        })
+    return {"resumen": resumen, "valuaciones": filas}
+
+
+# ------------------------------------------
+# Simulación de reglas en borrador
+# ------------------------------------------
+
+PERCENTILES_SIMULACION = (5, 25, 50, 75, 95)
+# Valuaciones con mayor cambio que se devuelven como ejemplo
+MAX_EJEMPLOS_SIMULACION = 10
+
+
+def _percentiles(valores: np.ndarray) -> Dict[str, float]:
+    if len(valores) == 0:
+        return {}
+    return {f"p{p}": float(v) for p, v in zip(PERCENTILES_SIMULACION, np.percentile(valores, PERCENTILES_SIMULACION))}
+
+
+def simular_reglas(snapshots: List[Dict[str, Any]], config: Dict[str, Any], reglas: Sequence[Dict[str, Any]],
+                   workers: Optional[int] = None) -> Dict[str, Any]:
+    """
+    Impacto de un borrador de reglas sobre valuaciones recientes: cada
+    snapshot se repite con la configuración vigente (`config`) con y sin
+    `reglas`, sobre sus publicaciones guardadas y con su semilla y fecha.
+    Devuelve el corrimiento de la distribución de precios.
+    """
+    vigentes = [
+        {**s, "configuracion": {**config, "metadata": s["configuracion"].get("metadata", {})}}
+        for s in snapshots
+    ]
+    lote = repetir_lote(vigentes, reglas, contra_replay=True, workers=workers)
+    validas = [f for f in lote["valuaciones"] if "error" not in f]
+    filas = [f for f in validas if f["precio_referencia"] is not None and f["precio_replay"] is not None]
+
+    antes = np.array([f["precio_referencia"] for f in filas], dtype=float)
+    despues = np.array([f["precio_replay"] for f in filas], dtype=float)
+    delta = despues - antes
+    with np.errstate(divide="ignore", invalid="ignore"):
+        delta_pct = np.where(antes != 0, delta / antes * 100, np.nan)
+    afectadas = np.abs(delta) > TOLERANCIA_PRECIO
+    pct_afectadas = delta_pct[afectadas & ~np.isnan(delta_pct)]
+    delta_pct = delta_pct[~np.isnan(delta_pct)]
+
+    confianza = {}
+    for clave in ("confianza_referencia", "confianza_replay"):
+        conteo = {}
+        for f in lote["valuaciones"]:
+            if f.get(clave):
+                conteo[f[clave]] = conteo.get(f[clave], 0) + 1
+        confianza[clave.replace("confianza_", "")] = conteo
+
+    vehiculos = {s["id"]: s["vehiculo"] for s in snapshots}
+    ejemplos = sorted((f for f in filas if "diferencia_pct" in f), key=lambda f: -abs(f["diferencia_pct"]))
+    return {
+        "valuaciones": lote["resumen"]["valuaciones"],
+        "con_precio": len(filas),
+        # Incluye las que pasan a tener o a no tener precio (ej: un punto de control que aborta)
+        "afectadas": int(afectadas.sum()) + len(validas) - len(filas)
+        - sum(1 for f in validas if f["precio_referencia"] is None and f["precio_replay"] is None),
+        "sin_precio_antes": sum(1 for f in validas if f["precio_referencia"] is None),
+        "sin_precio_despues": sum(1 for f in validas if f["precio_replay"] is None),
+        "con_error": lote["resumen"]["con_error"],
+        "delta_promedio": float(delta.mean()) if len(delta) else None,
+        "delta_pct_promedio": float(delta_pct.mean()) if len(delta_pct) else None,
+        "delta_pct_afectadas_promedio": float(pct_afectadas.mean()) if len(pct_afectadas) else None,
+        "delta_pct_percentiles": _percentiles(delta_pct),
+        "precio_antes_percentiles": _percentiles(antes),
+        "precio_despues_percentiles": _percentiles(despues),
+        "confianza": confianza,
+        "reglas_cambiadas": sorted({c for f in filas for c in f["reglas_cambiadas"]}),
+        "mayores_cambios": [{**f, "vehiculo": vehiculos.get(f["valuacion_id"])}
+                            for f in ejemplos[:MAX_EJEMPLOS_SIMULACION]],
+        "duracion_segundos": lote["resumen"]["duracion_segundos"],
+        "workers": lote["resumen"]["workers"],
+    }
@@ -0,0 +1,365 @@
+# backend/services/parseo_json.py
+"""
+Extracción robusta de JSON desde respuestas de modelos de lenguaje.
+Parseo directo con json (en C) cuando alcanza, escaneo de una sola pasada
+con balanceo de llaves como respaldo, reparación tolerante y validación del
+resultado de valuación.
+"""
+
+import json
+import os
+import random
+import re
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# ============================================
+# LOG DE RESPUESTAS CRUDAS
+# ============================================
+
+# Fracción de respuestas que se imprimen completas (0 = ninguna, 1 = todas)
+LOG_RESPUESTAS_MUESTREO = float(os.getenv("LOG_RESPUESTAS_IA_MUESTREO", "0.05"))
+# Máximo de caracteres impresos por respuesta
+LOG_RESPUESTAS_MAX_CARACTERES = int(os.getenv("LOG_RESPUESTAS_IA_MAX_CARACTERES", "2000"))
+
+
+def registrar_respuesta_cruda(texto: str, origen: str = "IA", forzar: bool = False) -> None:
+    """
+    Imprime la respuesta cruda de la IA de forma muestreada y recortada.
+    Con forzar=True se imprime siempre (ej: cuando el parseo falla).
+    """
+    if not forzar and (LOG_RESPUESTAS_MUESTREO <= 0 or random.random() >= LOG_RESPUESTAS_MUESTREO):
+        return
+
+    texto = texto or ""
+    recorte = texto[:LOG_RESPUESTAS_MAX_CARACTERES]
+    omitidos = len(texto) - len(recorte)
+
+    print("\n" + "=" * 50)
+    print(f"🤖 RESPUESTA CRUDA ({origen}) - {len(texto)} caracteres:")
+    print(recorte + (f"\n... [{omitidos} caracteres omitidos]" if omitidos > 0 else ""))
+    print("=" * 50 + "\n")
+
+
+# ============================================
+# EXTRACCIÓN DE JSON
+# ============================================
+
+_CIERRES = {"{": "}", "[": "]"}
+
+# Dentro de un objeto solo importan los strings (enteros, con sus escapes;
+# sin comilla de cierre si el texto se corta) y los caracteres estructurales
+_TOKENS = re.compile(r'"[^"\\]*(?:\\[\s\S][^"\\]*)*(?P<cierre>")?|[{}\[\],]')
+# Un objeto JSON empieza con una clave o está vacío; descarta "{precio}" en la prosa
+_APERTURA_OBJETO = re.compile(r'\{\s*["}]')
+
+# Cantidad de puntos de corte recordados para reparar objetos truncados
+_MAX_PUNTOS_CORTE = 8
+# Comas colgantes que se quitan de a una (reparseando) antes de limpiar todo el fragmento
+_MAX_COMAS_REPARADAS = 16
+
+_DECODIFICADOR = json.JSONDecoder()
+# Un string completo (o sin cerrar al final) se deja igual; una coma seguida de un cierre se quita
+_COMA_FINAL = re.compile(r'("[^"\\]*(?:\\[\s\S][^"\\]*)*(?:"|$))|,(\s*[}\]])')
+
+
+def _quitar_comas_finales(fragmento: str) -> str:
+    """Elimina comas colgantes antes de '}' o ']' (fuera de strings)"""
+    return _COMA_FINAL.sub(lambda m: m.group(1) or m.group(2), fragmento)
+
+
+def _coma_colgante(fragmento: str, posicion: int) -> Optional[int]:
+    """Posición de la coma que precede al cierre donde falló el parseo, si la hay"""
+    if posicion < len(fragmento) and fragmento[posicion] in "}]":
+        previo = len(fragmento[:posicion].rstrip()) - 1
+        if previo >= 0 and fragmento[previo] == ",":
+            return previo
+    # Python 3.13+ señala la coma misma ("Illegal trailing comma")
+    if posicion < len(fragmento) and fragmento[posicion] == ",":
+        if fragmento[posicion + 1:].lstrip()[:1] in ("}", "]"):
+            return posicion
+    return None
+
+
+def _intentar_cargar(fragmento: str) -> Optional[Dict[str, Any]]:
+    """
+    Parsea un fragmento; si falla por una coma colgante la quita y reintenta.
+    El parser indica dónde falló, así solo se tocan comas fuera de strings.
+    """
+    candidato = fragmento
+    for _ in range(_MAX_COMAS_REPARADAS):
+        try:
+            valor = json.loads(candidato)
+        except json.JSONDecodeError as e:
+            coma = _coma_colgante(candidato, e.pos)
+            if coma is None:
+                return None
+            candidato = candidato[:coma] + candidato[coma + 1:]
+            continue
+        except (ValueError, RecursionError):
+            return None
+        return valor if isinstance(valor, dict) else None
+
+    # Demasiadas comas para quitarlas de a una: una pasada sobre todo el fragmento
+    try:
+        valor = json.loads(_quitar_comas_finales(fragmento))
+    except (ValueError, RecursionError):
+        return None
+    return valor if isinstance(valor, dict) else None
+
+
+def _reparar_truncado(texto: str, inicio: int, pila: List[str], en_string: bool,
+                      puntos_corte: deque) -> Optional[Dict[str, Any]]:
+    """
+    Intenta cerrar un objeto truncado (respuesta cortada por max_tokens).
+    Primero cierra tal cual; si no alcanza, retrocede al último valor completo.
+    """
+    fragmento = texto[inicio:]
+    if en_string:
+        fragmento += '"'
+    cierre = "".join(_CIERRES[c] for c in reversed(pila))
+    resultado = _intentar_cargar(fragmento.rstrip().rstrip(",") + cierre)
+    if resultado is not None:
+        return resultado
+
+    for posicion, pila_corte in reversed(puntos_corte):
+        cierre = "".join(_CIERRES[c] for c in reversed(pila_corte))
+        resultado = _intentar_cargar(texto[inicio:posicion].rstrip().rstrip(",") + cierre)
+        if resultado is not None:
+            return resultado
+    return None
+
+
+def extraer_json(texto: str, claves_esperadas: Optional[List[str]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Extrae el primer objeto JSON válido de un texto libre.
+
+    Primero intenta json sobre el tramo entre la primera '{' y la última '}'
+    y luego raw_decode desde cada apertura de objeto: ambos corren en C y
+    resuelven las respuestas bien formadas aunque haya prosa con llaves
+    alrededor. Si no alcanza, recorre los strings y caracteres estructurales
+    balanceando llaves y corchetes. Repara comas colgantes y objetos
+    truncados al final del texto.
+
+    Args:
+        texto: Respuesta cruda del modelo
+        claves_esperadas: Si se indican, se prefiere el primer objeto que
+            contenga alguna de estas claves
+
+    Returns:
+        Diccionario extraído o None si no hay JSON recuperable
+    """
+    if not texto:
+        return None
+
+    # Camino rápido: la respuesta es un único objeto (opcionalmente con markdown)
+    desde, hasta = texto.find("{"), texto.rfind("}")
+    if desde != -1 and hasta > desde:
+        objeto = _intentar_cargar(texto[desde:hasta + 1])
+        if objeto is not None and (not claves_esperadas or any(k in objeto for k in claves_esperadas)):
+            return objeto
+
+    # Camino intermedio: hay prosa con llaves alrededor. raw_decode parsea en C
+    # desde cada apertura de objeto e ignora lo que sigue; ante el primer
+    # candidato inválido (comas colgantes, truncado) se pasa al escaneo
+    primer_valido = None
+    desde = 0
+    while (apertura := _APERTURA_OBJETO.search(texto, desde)) is not None:
+        try:
+            objeto, desde = _DECODIFICADOR.raw_decode(texto, apertura.start())
+        except (json.JSONDecodeError, ValueError, RecursionError):
+            break
+        if not claves_esperadas or any(k in objeto for k in claves_esperadas):
+            return objeto
+        if primer_valido is None:
+            primer_valido = objeto
+    else:
+        return primer_valido
+
+    primer_valido = None
+    pila: List[str] = []
+    en_string = False
+    inicio = -1
+    puntos_corte: deque = deque(maxlen=_MAX_PUNTOS_CORTE)
+    posicion = 0
+
+    # Fuera de un objeto solo interesa el próximo '{' que abra un objeto JSON
+    while (apertura := _APERTURA_OBJETO.search(texto, posicion)) is not None:
+        inicio = apertura.start()
+        pila = ["{"]
+        en_string = False
+        puntos_corte.clear()
+        puntos_corte.append((inicio + 1, tuple(pila)))
+
+        for token in _TOKENS.finditer(texto, inicio + 1):
+            i = token.start()
+            c = texto[i]
+            if c == '"':
+                en_string = token.group("cierre") is None
+            elif c in "{[":
+                pila.append(c)
+                puntos_corte.append((i + 1, tuple(pila)))
+            elif c in "}]":
+                if _CIERRES[pila[-1]] != c:
+                    # Cierre desbalanceado: se descarta el candidato
+                    pila.clear()
+                    posicion = i + 1
+                    break
+                pila.pop()
+                if not pila:
+                    objeto = _intentar_cargar(texto[inicio:i + 1])
+                    if objeto is not None:
+                        if not claves_esperadas or any(k in objeto for k in claves_esperadas):
+                            return objeto
+                        if primer_valido is None:
+                            primer_valido = objeto
+                    posicion = i + 1
+                    break
+            else:
+                puntos_corte.append((i, tuple(pila)))
+        else:
+            # El texto terminó con el objeto abierto (respuesta truncada)
+            break
+
+    if pila:
+        objeto = _reparar_truncado(texto, inicio, pila, en_string, puntos_corte)
+        if objeto is not None:
+            if primer_valido is None:
+                return objeto
+            if claves_esperadas and any(k in objeto for k in claves_esperadas):
+                return objeto
+
+    return primer_valido
+
+
+# ============================================
+# VALIDACIÓN DEL RESULTADO DE VALUACIÓN
+# ============================================
+
+CONFIANZAS_VALIDAS = ("ALTA", "MEDIA", "BAJA")
+
+CAMPOS_PRECIO = ("precio_sugerido", "precio_minimo", "precio_maximo")
+
+CAMPOS_ANALISIS = (
+    "fuentes_consultadas", "resultados_iniciales", "resultados_tras_filtrado",
+    "resultados_tras_depuracion", "precio_mercado_min", "precio_mercado_max",
+    "precio_mercado_promedio", "precio_mercado_mediana"
+)
+
+
+def a_numero(valor: Any) -> Optional[float]:
+    """
+    Convierte un valor a número. Acepta formatos de moneda como
+    "$15.000.000", "15,000,000" o "15.000.000,50".
+    """
+    if valor is None or isinstance(valor, bool):
+        return None
+    if isinstance(valor, (int, float)):
+        return float(valor)
+    if not isinstance(valor, str):
+        return None
+
+    limpio = "".join(c for c in valor if c.isdigit() or c in ".,-")
+    if not limpio or not any(c.isdigit() for c in limpio):
+        return None
+
+    if "," in limpio and "." in limpio:
+        # El último separador es el decimal
+        if limpio.rfind(",") > limpio.rfind("."):
+            limpio = limpio.replace(".", "").replace(",", ".")
+        else:
+            limpio = limpio.replace(",", "")
+    elif limpio.count(".") > 1 or limpio.count(",") > 1:
+        limpio = limpio.replace(".", "").replace(",", "")
+    elif "," in limpio:
+        entero, _, decimal = limpio.partition(",")
+        limpio = entero + decimal if len(decimal) == 3 else f"{entero}.{decimal}"
+    elif "." in limpio:
+        entero, _, decimal = limpio.partition(".")
+        if len(decimal) == 3:
+            limpio = entero + decimal
+
+    try:
+        return float(limpio)
+    except ValueError:
+        return None
+
+
+def validar_resultado_valuacion(resultado: Dict[str, Any]) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Valida y normaliza el JSON de valuación devuelto por la IA.
+
+    Convierte precios a número, normaliza la confianza y asegura que
+    las listas tengan la forma esperada.
+
+    Returns:
+        (resultado normalizado, lista de errores encontrados)
+    """
+    errores = []
+    normalizado = dict(resultado)
+
+    for campo in CAMPOS_PRECIO:
+        if campo in normalizado and normalizado[campo] is not None:
+            numero = a_numero(normalizado[campo])
+            if numero is None:
+                errores.append(f"'{campo}' no es numérico: {normalizado[campo]!r}")
+            normalizado[campo] = numero
+
+    confianza = normalizado.get("confianza")
+    if confianza is not None:
+        confianza = str(confianza).strip().upper()
+        if confianza not in CONFIANZAS_VALIDAS:
+            errores.append(f"'confianza' inválida: {confianza!r}")
+            confianza = "BAJA"
+        normalizado["confianza"] = confianza
+
+    analisis = normalizado.get("analisis")
+    if analisis is None:
+        normalizado["analisis"] = {}
+    elif not isinstance(analisis, dict):
+        errores.append("'analisis' no es un objeto")
+        normalizado["analisis"] = {}
+    else:
+        analisis = dict(analisis)
+        for campo in CAMPOS_ANALISIS:
+            if analisis.get(campo) is not None:
+                numero = a_numero(analisis[campo])
+                if numero is None:
+                    errores.append(f"'analisis.{campo}' no es numérico")
+                analisis[campo] = numero
+        normalizado["analisis"] = analisis
+
+    for campo in ("reglas_aplicadas", "publicaciones", "alertas"):
+        valor = normalizado.get(campo)
+        if valor is None:
+            normalizado[campo] = []
+        elif not isinstance(valor, list):
+            errores.append(f"'{campo}' no es una lista")
+            normalizado[campo] = []
+
+    normalizado["reglas_aplicadas"] = [
+        r for r in normalizado["reglas_aplicadas"] if isinstance(r, dict)
+    ]
+
+    publicaciones = []
+    for p in normalizado["publicaciones"]:
+        if not isinstance(p, dict):
+            continue
+        p = dict(p)
+        p["precio"] = a_numero(p.get("precio"))
+        p["incluida"] = bool(p.get("incluida", False))
+        publicaciones.append(p)
+    normalizado["publicaciones"] = publicaciones
+
+    normalizado["alertas"] = [str(a) for a in normalizado["alertas"]]
+
+    reporte = normalizado.get("reporte_detallado")
+    if reporte is not None and not isinstance(reporte, str):
+        normalizado["reporte_detallado"] = json.dumps(reporte, ensure_ascii=False)
+
+    minimo, sugerido, maximo = (normalizado.get(c) for c in CAMPOS_PRECIO)
+    if None not in (minimo, sugerido, maximo) and not (minimo <= sugerido <= maximo):
+        errores.append("el precio sugerido no está entre el mínimo y el máximo")
+
+    return normalizado, errores
@@ -0,0 +1,191 @@
+# backend/services/perfilador.py
+"""
+Perfilador por muestreo que se enciende en caliente (POST /admin/perfilador).
+
+Un hilo toma cada `intervalo_ms` las pilas de todos los hilos del proceso
+(sys._current_frames: sirve para el event loop y para el threadpool de
+FastAPI, y funciona igual en Windows, donde no hay SIGPROF) hasta que
+terminan las próximas N solicitudes a las rutas elegidas o pasan T
+segundos. Al cerrar escribe en PERFILES_DIR:
+
+- <nombre>.speedscope.json: abrir en https://www.speedscope.app
+- <nombre>.folded: pilas colapsadas para flamegraph.pl / inferno
+
+Apagado no hay hilo ni hooks: el middleware solo consulta `activo`.
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+PERFILES_DIR = os.getenv("PERFILES_DIR", "perfiles")
+# Si no se indica ni cantidad de solicitudes ni duración
+SEGUNDOS_DEFAULT = 30
+MAX_SEGUNDOS = 600
+MAX_PROFUNDIDAD = 200
+
+Marco = Tuple[str, str, int]  # (función, archivo, línea de inicio)
+
+
+class Perfilador:
+    """Una sesión de muestreo a la vez"""
+
+    def __init__(self, directorio: str = PERFILES_DIR):
+        self.directorio = directorio
+        self.activo = False
+        self.ultimo: Optional[Dict] = None
+        self._lock = threading.Lock()
+        self._detener = threading.Event()
+        self._hilo: Optional[threading.Thread] = None
+
+    def iniciar(self, solicitudes: Optional[int] = None, segundos: Optional[float] = None,
+                rutas: Sequence[str] = (), intervalo_ms: float = 5.0) -> Dict:
+        """Empieza a muestrear; ValueError si ya hay una sesión en curso"""
+        with self._lock:
+            if self.activo:
+                raise ValueError("Ya hay una sesión de perfilado en curso")
+            if solicitudes is None and segundos is None:
+                segundos = SEGUNDOS_DEFAULT
+            self.solicitudes = solicitudes
+            self.restantes = solicitudes
+            self.segundos = min(segundos or MAX_SEGUNDOS, MAX_SEGUNDOS)
+            self.rutas = tuple(rutas)
+            self.intervalo = intervalo_ms / 1000
+            self.inicio = time.perf_counter()
+            self.fecha = datetime.now()
+            self.muestras: Dict[int, Counter] = {}
+            self.cantidad_muestras = 0
+            self._detener.clear()
+            self._hilo = threading.Thread(target=self._muestrear, name="perfilador", daemon=True)
+            self.activo = True
+            self._hilo.start()
+        print(f"🔬 Perfilador activo: {solicitudes or 'sin límite de'} solicitudes, hasta {self.segundos:.0f} s")
+        return self.estado()
+
+    def detener(self) -> Optional[Dict]:
+        """Corta la sesión en curso y espera a que se escriban los archivos"""
+        hilo = self._hilo
+        if hilo is None:
+            return self.ultimo
+        self._detener.set()
+        if hilo is not threading.current_thread():
+            hilo.join()
+        return self.ultimo
+
+    def solicitud_terminada(self, ruta: str):
+        """Descuenta una solicitud perfilada; al llegar a N cierra la sesión"""
+        if self.restantes is None or (self.rutas and not ruta.startswith(self.rutas)):
+            return
+        with self._lock:
+            self.restantes -= 1
+            if self.restantes > 0:
+                return
+        self._detener.set()
+
+    def estado(self) -> Dict:
+        if not self.activo:
+            return {"activo": False, "ultimo": self.ultimo}
+        return {
+            "activo": True,
+            "segundos_transcurridos": round(time.perf_counter() - self.inicio, 1),
+            "segundos_maximos": self.segundos,
+            "solicitudes_restantes": self.restantes,
+            "rutas": list(self.rutas),
+            "muestras": self.cantidad_muestras,
+            "ultimo": self.ultimo,
+        }
+
+    def _muestrear(self):
+        propio = threading.get_ident()
+        limite = self.inicio + self.segundos
+        try:
+            while not self._detener.wait(self.intervalo) and time.perf_counter() < limite:
+                for hilo_id, marco in sys._current_frames().items():
+                    if hilo_id != propio:
+                        self.muestras.setdefault(hilo_id, Counter())[_pila(marco)] += 1
+                self.cantidad_muestras += 1
+        finally:
+            nombres = {h.ident: h.name for h in threading.enumerate()}
+            self.ultimo = self._escribir(nombres)
+            self._hilo = None
+            self.activo = False
+            print(f"🔬 Perfil guardado: {self.ultimo['speedscope']}")
+
+    def _escribir(self, nombres: Dict[int, str]) -> Dict:
+        os.makedirs(self.directorio, exist_ok=True)
+        base = os.path.join(self.directorio, f"perfil_{self.fecha:%Y%m%d_%H%M%S}")
+        sufijo = 1
+        while os.path.exists(f"{base}.speedscope.json"):
+            sufijo += 1
+            base = os.path.join(self.directorio, f"perfil_{self.fecha:%Y%m%d_%H%M%S}_{sufijo}")
+        duracion_ms = (time.perf_counter() - self.inicio) * 1000
+        peso = self.intervalo * 1000
+
+        marcos: Dict[Marco, int] = {}
+        perfiles = []
+        lineas_folded = []
+        for hilo_id, pilas in self.muestras.items():
+            nombre_hilo = nombres.get(hilo_id, str(hilo_id))
+            muestras, pesos = [], []
+            for pila, cantidad in pilas.most_common():
+                muestras.append([marcos.setdefault(m, len(marcos)) for m in pila])
+                pesos.append(round(cantidad * peso, 3))
+                lineas_folded.append(";".join([nombre_hilo] + [f"{m[0]} ({os.path.basename(m[1])}:{m[2]})" for m in pila])
+                                     + f" {cantidad}")
+            perfiles.append({
+                "type": "sampled", "name": f"hilo {nombre_hilo}", "unit": "milliseconds",
+                "startValue": 0, "endValue": round(duracion_ms, 3), "samples": muestras, "weights": pesos,
+            })
+
+        speedscope = {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": f"valuacion_vehiculos {self.fecha:%Y-%m-%d %H:%M:%S}",
+            "exporter": "valuacion_vehiculos/perfilador",
+            "shared": {"frames": [{"name": f, "file": a, "line": l} for f, a, l in marcos]},
+            "profiles": perfiles,
+        }
+        with open(f"{base}.speedscope.json", "w", encoding="utf-8") as f:
+            json.dump(speedscope, f, ensure_ascii=False)
+        with open(f"{base}.folded", "w", encoding="utf-8") as f:
+            f.write("\n".join(lineas_folded) + "\n")
+
+        return {
+            "speedscope": f"{base}.speedscope.json",
+            "folded": f"{base}.folded",
+            "muestras": self.cantidad_muestras,
+            "segundos": round(duracion_ms / 1000, 2),
+            "solicitudes": None if self.solicitudes is None else self.solicitudes - max(self.restantes, 0),
+        }
+
+
+def _pila(marco) -> Tuple[Marco, ...]:
+    """Pila de la raíz a la hoja, a nivel de función"""
+    pila: List[Marco] = []
+    while marco is not None and len(pila) < MAX_PROFUNDIDAD:
+        codigo = marco.f_code
+        pila.append((codigo.co_name, codigo.co_filename, codigo.co_firstlineno))
+        marco = marco.f_back
+    pila.reverse()
+    return tuple(pila)
+
+
+PERFILADOR = Perfilador()
+
+
+class MiddlewarePerfilador:
+    """Middleware ASGI que descuenta las solicitudes terminadas mientras hay una sesión activa"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            if PERFILADOR.activo and scope["type"] == "http" and not scope["path"].startswith("/admin/"):
+                PERFILADOR.solicitud_terminada(scope["path"])
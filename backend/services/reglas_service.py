@@ -7,21 +7,75 @@ Permite CRUD de reglas con versionado y trazabilidad.
 from typing import List, Optional, Dict, Any
 from datetime import datetime
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy import and_, or_, func, select
+import hashlib
 import json
 import copy
+import uuid
 
 from models import (
     Regla, HistorialRegla, AuditoriaRegla, Usuario, ConfiguracionGlobal,
     TipoRegla, TipoAccion
 )
+from services.escritor_auditoria import escritor_para
+from services.motor.ajustes import compilar_ajuste
+from services.motor.aplicabilidad import analizar_conflictos
 
 
 class ReglasService:
     """Servicio para gestionar reglas de negocio"""
-    
+
+    # Códigos por consulta IN al validar una importación (límite de parámetros de SQLite)
+    LOTE_CONSULTA = 500
+    # Agregados de los que sale version_conjunto() (Core: se consulta en cada GET de /reglas)
+    _CONSULTA_VERSION = select(
+        func.count(), func.coalesce(func.sum(Regla.__table__.c.version), 0),
+        func.max(Regla.__table__.c.fecha_creacion), func.max(Regla.__table__.c.fecha_modificacion)
+    ).select_from(Regla.__table__)
+
     def __init__(self, db: Session):
         self.db = db
+
+    def version_conjunto(self) -> str:
+        """
+        Versión del conjunto de reglas, derivada de la base: identifica las
+        respuestas cacheadas de /reglas y /configuracion (ETag). Toda alta,
+        baja física, modificación, baja lógica o restauración cambia la
+        cantidad o la suma de `version`; las fechas cubren una baja y un alta
+        que se compensen. Al salir de la base vale para varios workers o
+        réplicas y para escrituras que no pasan por este servicio.
+        """
+        cantidad, suma_versiones, ultima_creacion, ultima_modificacion = self.db.execute(
+            self._CONSULTA_VERSION
+        ).one()
+        huella = f"{cantidad}|{suma_versiones}|{ultima_creacion}|{ultima_modificacion}"
+        return hashlib.blake2b(huella.encode(), digest_size=8).hexdigest()
+
+    @staticmethod
+    def _fila_auditoria(fecha: Optional[datetime] = None, **campos) -> Dict[str, Any]:
+        """Fila de AuditoriaRegla (con id propio: el escritor diferido la inserta por su cuenta)"""
+        return {"id": str(uuid.uuid4()), "fecha": fecha or datetime.utcnow(), **campos}
+
+    def _guardar(self, auditorias: List[Dict[str, Any]]):
+        """
+        Commit del cambio en curso con su auditoría. Con el escritor diferido
+        iniciado (services/escritor_auditoria.py) la auditoría se anota en su
+        diario antes del commit y se inserta en lote después; si no, va en
+        la misma transacción.
+        """
+        escritor = escritor_para(self.db)
+        if escritor is None:
+            self.db.flush()
+            self.db.execute(AuditoriaRegla.__table__.insert(), auditorias)
+            self.db.commit()
+            return
+        escritor.anotar(auditorias)
+        try:
+            self.db.commit()
+        except Exception:
+            escritor.descartar(auditorias)
+            raise
+        escritor.encolar(auditorias)
     
     # ============================================
     # CRUD DE REGLAS
@@ -56,7 +110,7 @@ class ReglasService:
             notas: Notas adicionales sobre la creación
         
         Returns:
-            Regla creada
+            Regla creada, con `advertencias` de conflictos con otras reglas activas
         """
         # Verificar que el código no exista
         existente = self.db.query(Regla).filter(Regla.codigo == codigo).first()
@@ -81,11 +135,10 @@ class ReglasService:
         self.db.flush()  # Para obtener el ID
         
         # Crear registro de auditoría
-        auditoria = AuditoriaRegla(
+        auditoria = self._fila_auditoria(
             regla_id=regla.id,
             usuario_id=usuario_id,
             accion=TipoAccion.CREAR,
-            fecha=datetime.utcnow(),
             valor_anterior=None,
             valor_nuevo=regla.to_dict(),
             campos_modificados=None,
@@ -93,7 +146,6 @@ class ReglasService:
             user_agent=user_agent,
             notas=notas or f"Creación de regla '{nombre}'"
         )
-        self.db.add(auditoria)
         
         # Crear primera versión en historial
         historial = HistorialRegla(
@@ -112,11 +164,153 @@ class ReglasService:
         )
         self.db.add(historial)
         
-        self.db.commit()
+        self._guardar([auditoria])
         self.db.refresh(regla)
+        regla.advertencias = self.analizar_conflictos(regla)
         
         return regla
     
+    def importar_reglas(
+        self,
+        reglas: List[Dict[str, Any]],
+        usuario_id: str,
+        omitir_existentes: bool = False,
+        ip_address: Optional[str] = None,
+        user_agent: Optional[str] = None,
+        notas: Optional[str] = None
+    ) -> Dict[str, Any]:
+        """
+        Crea muchas reglas de una vez (carga inicial, migración de un conjunto
+        exportado con exportar_reglas).
+
+        Se valida todo antes de escribir: códigos repetidos en el lote, códigos
+        ya existentes (una sola consulta) y tipos. Si algo falla no se escribe
+        nada. Las reglas y su primera versión en el historial se insertan por
+        lotes en una única transacción (un solo commit); la auditoría, por
+        lotes también, va en ella o en el escritor diferido (ver _guardar).
+
+        Args:
+            reglas: Dicts con codigo, nombre, tipo, parametros y opcionalmente
+                descripcion, orden y activo (default True)
+            usuario_id: ID del usuario que importa
+            omitir_existentes: Si True, los códigos que ya existen se saltean
+                en lugar de rechazar el lote
+            ip_address, user_agent: Para la auditoría
+            notas: Notas de auditoría (una por regla)
+
+        Returns:
+            {"creadas": [codigos], "omitidas": [codigos], "advertencias": {codigo: [...]}}
+        """
+        errores = []
+        vistos = set()
+        for i, datos in enumerate(reglas):
+            codigo = datos.get("codigo")
+            if not codigo or not datos.get("nombre"):
+                errores.append(f"Regla #{i + 1}: faltan código o nombre")
+            elif len(codigo) > 50:
+                errores.append(f"'{codigo}': el código supera los 50 caracteres")
+            elif codigo in vistos:
+                errores.append(f"'{codigo}': código repetido en el lote")
+            vistos.add(codigo)
+            try:
+                TipoRegla(datos.get("tipo"))
+            except ValueError:
+                errores.append(f"'{codigo}': tipo de regla desconocido '{datos.get('tipo')}'")
+
+        existentes = set()
+        codigos = list(vistos - {None, ""})
+        for desde in range(0, len(codigos), self.LOTE_CONSULTA):
+            existentes.update(c for (c,) in self.db.query(Regla.codigo).filter(
+                Regla.codigo.in_(codigos[desde:desde + self.LOTE_CONSULTA])
+            ))
+        if existentes and not omitir_existentes:
+            errores += [f"Ya existe una regla con código '{c}'" for c in sorted(existentes)]
+        if errores:
+            raise ValueError("; ".join(errores))
+
+        ahora = datetime.utcnow()
+        nuevas, filas_historial, filas_auditoria = [], [], []
+        for datos in reglas:
+            if datos["codigo"] in existentes:
+                continue
+            regla = Regla(
+                id=str(uuid.uuid4()),
+                codigo=datos["codigo"],
+                nombre=datos["nombre"],
+                descripcion=datos.get("descripcion"),
+                tipo=TipoRegla(datos["tipo"]),
+                parametros=datos.get("parametros") or {},
+                orden=datos.get("orden", 0),
+                activo=datos.get("activo", True),
+                version=1,
+                creado_por=usuario_id,
+                fecha_creacion=ahora
+            )
+            nuevas.append(regla)
+            filas_historial.append({
+                "id": str(uuid.uuid4()), "regla_id": regla.id, "version": 1,
+                "codigo": regla.codigo, "nombre": regla.nombre, "descripcion": regla.descripcion,
+                "tipo": regla.tipo, "parametros": regla.parametros, "activo": regla.activo,
+                "orden": regla.orden, "modificado_por": usuario_id, "fecha": ahora,
+                "motivo_cambio": "Creación inicial"
+            })
+            filas_auditoria.append(self._fila_auditoria(
+                regla_id=regla.id, usuario_id=usuario_id, accion=TipoAccion.CREAR, fecha=ahora,
+                valor_anterior=None, valor_nuevo=regla.to_dict(), campos_modificados=None,
+                ip_address=ip_address, user_agent=user_agent,
+                notas=notas or f"Creación de regla '{regla.nombre}' (importación)"
+            ))
+
+        if nuevas:
+            try:
+                self.db.execute(Regla.__table__.insert(), [
+                    {columna.key: getattr(regla, columna.key) for columna in Regla.__table__.columns}
+                    for regla in nuevas
+                ])
+                self.db.execute(HistorialRegla.__table__.insert(), filas_historial)
+                self._guardar(filas_auditoria)
+            except Exception:
+                self.db.rollback()
+                raise
+
+        # Conflictos contra todas las reglas activas (incluidas las del lote): una
+        # sola consulta y cada ajuste compilado una vez
+        por_tipo: Dict[TipoRegla, List[Regla]] = {}
+        if any(r.activo for r in nuevas):
+            for activa in self.listar_reglas():
+                por_tipo.setdefault(activa.tipo, []).append(activa)
+        compilados = {
+            r.id: compilar_ajuste(r.to_dict()) for r in por_tipo.get(TipoRegla.AJUSTE_CALCULO, [])
+        }
+        advertencias = {}
+        for regla in nuevas:
+            if regla.activo:
+                encontradas = self._conflictos(regla, por_tipo.get(regla.tipo, []), compilados)
+                if encontradas:
+                    advertencias[regla.codigo] = encontradas
+
+        print(f"📥 Importadas {len(nuevas)} reglas ({len(existentes)} omitidas por código existente)")
+        if advertencias:
+            print(f"⚠️ {len(advertencias)} reglas importadas con advertencias de conflicto")
+        return {
+            "creadas": [r.codigo for r in nuevas],
+            "omitidas": sorted(existentes),
+            "advertencias": advertencias
+        }
+
+    def exportar_reglas(self, solo_activas: bool = True) -> List[Dict[str, Any]]:
+        """Reglas en el formato que acepta importar_reglas, ordenadas por tipo y orden"""
+        reglas = self.listar_reglas(solo_activas=solo_activas)
+        return [{
+            "codigo": r.codigo,
+            "nombre": r.nombre,
+            "tipo": r.tipo.value,
+            "parametros": r.parametros,
+            "descripcion": r.descripcion,
+            "orden": r.orden,
+            "activo": r.activo
+        } for r in sorted(reglas, key=lambda r: (r.tipo.value, r.orden, r.codigo))]
+
     def modificar_regla(
         self,
         regla_id: str,
@@ -138,7 +332,7 @@ class ReglasService:
             user_agent: User agent del navegador
         
         Returns:
-            Regla modificada
+            Regla modificada, con `advertencias` de conflictos con otras reglas activas
         """
         regla = self.db.query(Regla).filter(Regla.id == regla_id).first()
         if not regla:
@@ -160,6 +354,7 @@ class ReglasService:
                     setattr(regla, campo, valor)
         
         if not campos_modificados:
+            regla.advertencias = []
             return regla  # No hubo cambios reales
         
         # Incrementar versión
@@ -185,11 +380,10 @@ class ReglasService:
         self.db.add(historial)
         
         # Crear registro de auditoría
-        auditoria = AuditoriaRegla(
+        auditoria = self._fila_auditoria(
             regla_id=regla.id,
             usuario_id=usuario_id,
             accion=TipoAccion.MODIFICAR,
-            fecha=datetime.utcnow(),
             valor_anterior=valor_anterior,
             valor_nuevo=regla.to_dict(),
             campos_modificados=campos_modificados,
@@ -197,10 +391,10 @@ class ReglasService:
             user_agent=user_agent,
             notas=motivo_cambio
         )
-        self.db.add(auditoria)
         
-        self.db.commit()
+        self._guardar([auditoria])
         self.db.refresh(regla)
+        regla.advertencias = self.analizar_conflictos(regla)
         
         return regla
     
@@ -235,11 +429,10 @@ class ReglasService:
         
         if eliminacion_fisica:
             # Eliminación física - guardar auditoría antes de eliminar
-            auditoria = AuditoriaRegla(
+            auditoria = self._fila_auditoria(
                 regla_id=regla.id,
                 usuario_id=usuario_id,
                 accion=TipoAccion.ELIMINAR,
-                fecha=datetime.utcnow(),
                 valor_anterior=valor_anterior,
                 valor_nuevo=None,
                 campos_modificados=None,
@@ -247,7 +440,6 @@ class ReglasService:
                 user_agent=user_agent,
                 notas=motivo or "Eliminación física de regla"
             )
-            self.db.add(auditoria)
             self.db.delete(regla)
         else:
             # Eliminación lógica - desactivar
@@ -274,11 +466,10 @@ class ReglasService:
             self.db.add(historial)
             
             # Auditoría
-            auditoria = AuditoriaRegla(
+            auditoria = self._fila_auditoria(
                 regla_id=regla.id,
                 usuario_id=usuario_id,
                 accion=TipoAccion.DESACTIVAR,
-                fecha=datetime.utcnow(),
                 valor_anterior=valor_anterior,
                 valor_nuevo=regla.to_dict(),
                 campos_modificados=["activo"],
@@ -286,9 +477,8 @@ class ReglasService:
                 user_agent=user_agent,
                 notas=motivo
             )
-            self.db.add(auditoria)
         
-        self.db.commit()
+        self._guardar([auditoria])
         return True
     
     def restaurar_regla(
@@ -310,7 +500,7 @@ class ReglasService:
             user_agent: User agent del navegador
         
         Returns:
-            Regla restaurada
+            Regla restaurada, con `advertencias` de conflictos con otras reglas activas
         """
         regla = self.db.query(Regla).filter(Regla.id == regla_id).first()
         if not regla:
@@ -362,11 +552,10 @@ class ReglasService:
         self.db.add(historial_nuevo)
         
         # Auditoría
-        auditoria = AuditoriaRegla(
+        auditoria = self._fila_auditoria(
             regla_id=regla.id,
             usuario_id=usuario_id,
             accion=TipoAccion.RESTAURAR,
-            fecha=datetime.utcnow(),
             valor_anterior=valor_anterior,
             valor_nuevo=regla.to_dict(),
             campos_modificados=["restaurado"],
@@ -374,10 +563,10 @@ class ReglasService:
             user_agent=user_agent,
             notas=f"Restauración a versión {version}" if version else "Reactivación de regla"
         )
-        self.db.add(auditoria)
         
-        self.db.commit()
+        self._guardar([auditoria])
         self.db.refresh(regla)
+        regla.advertencias = self.analizar_conflictos(regla)
         
         return regla
     
@@ -427,6 +616,37 @@ class ReglasService:
         
         return query.all()
     
+    def analizar_conflictos(self, regla: Regla) -> List[str]:
+        """
+        Advertencias sobre una regla activa frente a las demás reglas activas
+        de su tipo: parámetros duplicados y, en los ajustes de cálculo,
+        superposiciones y contradicciones entre dominios que se intersectan.
+        No bloquea el guardado.
+        """
+        if not regla.activo:
+            return []
+        advertencias = self._conflictos(regla, self.listar_reglas(tipo=regla.tipo))
+        for advertencia in advertencias:
+            print(f"⚠️ Regla {regla.codigo}: {advertencia}")
+        return advertencias
+    
+    def _conflictos(self, regla: Regla, activas: List[Regla],
+                    compilados: Optional[Dict[str, Any]] = None) -> List[str]:
+        """
+        analizar_conflictos contra `activas` (reglas activas del mismo tipo).
+        `compilados` ({regla_id: ajuste compilado}) evita recompilar los
+        ajustes al analizar muchas reglas seguidas.
+        """
+        otras = [r for r in activas if r.id != regla.id]
+        advertencias = [
+            f"Parámetros idénticos a '{otra.codigo}'" for otra in otras if otra.parametros == regla.parametros
+        ]
+        if regla.tipo == TipoRegla.AJUSTE_CALCULO:
+            def compilado(r: Regla):
+                return compilados[r.id] if compilados is not None else compilar_ajuste(r.to_dict())
+            advertencias += analizar_conflictos(compilado(regla), [compilado(otra) for otra in otras])
+        return advertencias
+    
     def obtener_reglas_por_tipo(self) -> Dict[str, List[Dict]]:
         """
         Obtiene todas las reglas activas agrupadas por tipo.
@@ -476,6 +696,9 @@ class ReglasService:
         Returns:
             Lista de registros de auditoría
         """
+        escritor = escritor_para(self.db)
+        if escritor is not None:
+            escritor.vaciar()
         query = self.db.query(AuditoriaRegla)
         
         if regla_id:
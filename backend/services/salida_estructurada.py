@@ -0,0 +1,129 @@
+# backend/services/salida_estructurada.py
+"""
+Salida estructurada nativa para los proveedores de IA.
+Convierte un JSON Schema de Pydantic al dialecto que acepta cada proveedor
+(Ollama `format`, OpenAI/Groq `response_format`, Gemini `responseSchema`).
+"""
+
+import copy
+import json
+from typing import Any, Dict, Set
+
+
+# Claves de JSON Schema que Gemini acepta en responseSchema (subconjunto OpenAPI)
+_CLAVES_GEMINI = {
+    "type", "format", "description", "nullable", "enum", "properties",
+    "required", "items", "minItems", "maxItems", "propertyOrdering"
+}
+
+# Modelos de Groq que rechazaron json_schema (se degrada a json_object)
+_GROQ_SIN_JSON_SCHEMA: Set[str] = set()
+
+
+def esquema_plano(esquema: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Resuelve las referencias $ref/$defs de Pydantic y quita títulos y defaults.
+    Los proveedores no soportan referencias de forma consistente.
+    """
+    definiciones = esquema.get("$defs", {})
+
+    def resolver(nodo):
+        if isinstance(nodo, list):
+            return [resolver(n) for n in nodo]
+        if not isinstance(nodo, dict):
+            return nodo
+        if "$ref" in nodo:
+            nombre = nodo["$ref"].split("/")[-1]
+            return resolver(copy.deepcopy(definiciones[nombre]))
+        return {
+            k: resolver(v) for k, v in nodo.items()
+            if k not in ("$defs", "title", "default")
+        }
+
+    return resolver(esquema)
+
+
+def esquema_gemini(esquema: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Adapta un esquema plano al subconjunto OpenAPI de Gemini:
+    anyOf [X, null] pasa a X con nullable, y se descartan claves no soportadas.
+    """
+    def convertir(nodo):
+        if not isinstance(nodo, dict):
+            return nodo
+
+        if "anyOf" in nodo:
+            opciones = [o for o in nodo["anyOf"] if o.get("type") != "null"]
+            anulable = len(opciones) < len(nodo["anyOf"])
+            base = dict(opciones[0]) if opciones else {"type": "string"}
+            base.update({k: v for k, v in nodo.items() if k != "anyOf"})
+            nodo = base
+            if anulable:
+                nodo["nullable"] = True
+
+        salida = {}
+        for clave, valor in nodo.items():
+            if clave not in _CLAVES_GEMINI:
+                continue
+            if clave == "properties":
+                salida[clave] = {k: convertir(v) for k, v in valor.items()}
+            elif clave == "items":
+                salida[clave] = convertir(valor)
+            else:
+                salida[clave] = valor
+
+        if salida.get("type") == "object" and not salida.get("properties"):
+            # Gemini no admite objetos libres: se pide como texto JSON
+            return {"type": "string", "description": "objeto JSON serializado"}
+        if "properties" in salida:
+            salida["propertyOrdering"] = list(salida["properties"].keys())
+        return salida
+
+    return convertir(esquema_plano(esquema))
+
+
+def parametros_ollama(esquema: Dict[str, Any]) -> Dict[str, Any]:
+    """Parámetros del body de /api/generate para salida estructurada"""
+    return {"format": esquema_plano(esquema)}
+
+
+def parametros_groq(esquema: Dict[str, Any], modelo: str, nombre: str = "resultado") -> Dict[str, Any]:
+    """Parámetros del body de chat/completions (OpenAI compatible)"""
+    if modelo in _GROQ_SIN_JSON_SCHEMA:
+        return {"response_format": {"type": "json_object"}}
+    return {
+        "response_format": {
+            "type": "json_schema",
+            "json_schema": {"name": nombre, "schema": esquema_plano(esquema)}
+        }
+    }
+
+
+def instrucciones_json_object(esquema: Dict[str, Any]) -> str:
+    """
+    Texto a agregar al prompt cuando Groq usa json_object: ese modo no
+    recibe el esquema, así que el modelo tiene que leerlo del prompt.
+    """
+    return (
+        "\n\nResponde ÚNICAMENTE con un objeto JSON válido que cumpla este JSON Schema, "
+        "sin texto adicional ni markdown:\n" + json.dumps(esquema_plano(esquema), ensure_ascii=False)
+    )
+
+
+def groq_rechazo_json_schema(modelo: str, status_code: int, texto_error: str) -> bool:
+    """
+    Detecta el rechazo de json_schema por un modelo de Groq y lo recuerda,
+    para que las siguientes llamadas usen json_object sin volver a fallar.
+    """
+    if status_code == 400 and ("json_schema" in texto_error or "response_format" in texto_error):
+        _GROQ_SIN_JSON_SCHEMA.add(modelo)
+        return True
+    return False
+
+
+def parametros_gemini(esquema: Dict[str, Any]) -> Dict[str, Any]:
+    """Claves de generationConfig para salida estructurada en Gemini"""
+    return {
+        "responseMimeType": "application/json",
+        "responseSchema": esquema_gemini(esquema)
+    }
@@ -0,0 +1,31 @@
+# backend/services/servicios_externos.py
+"""
+URLs base de los servicios externos (proveedores de IA y búsqueda web).
+
+Todas se pueden reemplazar por variables de entorno: apuntándolas al
+servidor simulado (python -m benchmarks.servidor_simulado) los benchmarks
+y las pruebas de carga corren sin red y con respuestas deterministas.
+"""
+
+import os
+
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434").rstrip("/")
+GROQ_URL = os.getenv("GROQ_URL", "https://api.groq.com/openai/v1").rstrip("/")
+GEMINI_URL = os.getenv("GEMINI_URL", "https://generativelanguage.googleapis.com/v1beta").rstrip("/")
+GOOGLE_SEARCH_URL = os.getenv("GOOGLE_SEARCH_URL", "https://www.googleapis.com/customsearch/v1")
+
+# Si está definida, la búsqueda web gratuita usa esta API (GET ?q=&max_results=,
+# mismo formato que duckduckgo-search) en lugar de DuckDuckGo
+BUSQUEDA_WEB_URL = os.getenv("BUSQUEDA_WEB_URL", "")
+
+
+def url_ollama_generate() -> str:
+    return f"{OLLAMA_URL}/api/generate"
+
+
+def url_groq_chat() -> str:
+    return f"{GROQ_URL}/chat/completions"
+
+
+def url_gemini_generate(modelo: str, api_key: str) -> str:
+    return f"{GEMINI_URL}/models/{modelo}:generateContent?key={api_key}"
@@ -0,0 +1,211 @@
+# backend/services/trazas.py
+"""
+Trazas por request con spans al estilo OpenTelemetry, sin colector.
+
+    with span("reglas.configuracion", reglas=n) as s:
+        ...
+        s.set(tokens_entrada=120)
+
+Cada span conoce su traza y su padre (por contextvars, así que funciona
+igual en código async); al cerrarse se exporta según TRAZAS_EXPORTAR:
+"consola" (una línea por span), "archivo" (JSONL en TRAZAS_ARCHIVO con
+los campos de OTLP: trace_id, span_id, parent_span_id, name, ...) o ambos
+separados por coma. Sin exportador los spans igual se acumulan en la traza
+para armar el desglose de tiempos de la valuación (resumen_tiempos).
+
+Las consultas SQL se registran como spans "db.consulta" solo dentro de
+una traza activa (instrumentar_sqlalchemy). Otros módulos pueden recibir
+cada span terminado con al_terminar_span (p. ej. services/metricas.py).
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Dict, List, Optional
+
+TRAZAS_EXPORTAR = {e.strip() for e in os.getenv("TRAZAS_EXPORTAR", "").split(",") if e.strip()}
+TRAZAS_ARCHIVO = os.getenv("TRAZAS_ARCHIVO", "trazas.jsonl")
+# Largo máximo del SQL guardado como atributo de los spans de base de datos
+MAX_CARACTERES_SQL = 300
+
+_span_actual: ContextVar[Optional["Span"]] = ContextVar("span_actual", default=None)
+_lock_archivo = threading.Lock()
+_oyentes: List = []
+
+
+class Traza:
+    """Spans terminados de un mismo request"""
+
+    def __init__(self):
+        self.id = uuid.uuid4().hex
+        self.spans: List["Span"] = []
+        self._lock = threading.Lock()
+
+    def agregar(self, span: "Span"):
+        with self._lock:
+            self.spans.append(span)
+
+
+class Span:
+    __slots__ = ("nombre", "traza", "id", "padre_id", "inicio", "fin", "atributos", "estado", "_inicio_unix")
+
+    def __init__(self, nombre: str, traza: Traza, padre_id: Optional[str], atributos: Dict[str, Any],
+                 inicio: Optional[float] = None):
+        self.nombre = nombre
+        self.traza = traza
+        self.id = uuid.uuid4().hex[:16]
+        self.padre_id = padre_id
+        self.inicio = time.perf_counter() if inicio is None else inicio
+        self._inicio_unix = time.time() - (time.perf_counter() - self.inicio)
+        self.fin: Optional[float] = None
+        self.atributos = dict(atributos)
+        self.estado = "OK"
+
+    def set(self, **atributos):
+        self.atributos.update(atributos)
+
+    @property
+    def duracion_ms(self) -> float:
+        return ((self.fin or time.perf_counter()) - self.inicio) * 1000
+
+    def terminar(self, fin: Optional[float] = None):
+        self.fin = time.perf_counter() if fin is None else fin
+        self.traza.agregar(self)
+        _exportar(self)
+        for oyente in _oyentes:
+            oyente(self)
+
+    def a_dict(self) -> Dict[str, Any]:
+        """Formato de exportación (nombres de campo de OTLP/JSON)"""
+        return {
+            "trace_id": self.traza.id,
+            "span_id": self.id,
+            "parent_span_id": self.padre_id,
+            "name": self.nombre,
+            "start_time_unix_nano": int(self._inicio_unix * 1e9),
+            "end_time_unix_nano": int((self._inicio_unix + self.duracion_ms / 1000) * 1e9),
+            "duration_ms": round(self.duracion_ms, 3),
+            "attributes": self.atributos,
+            "status": self.estado,
+        }
+
+
+def span_actual() -> Optional[Span]:
+    return _span_actual.get()
+
+
+@contextmanager
+def span(nombre: str, **atributos):
+    """Span hijo del actual (o raíz de una traza nueva si no hay ninguno)"""
+    padre = _span_actual.get()
+    actual = Span(nombre, padre.traza if padre else Traza(), padre.id if padre else None, atributos)
+    token = _span_actual.set(actual)
+    try:
+        yield actual
+    except BaseException as e:
+        actual.estado = "ERROR"
+        actual.atributos["error"] = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _span_actual.reset(token)
+        actual.terminar()
+
+
+def al_terminar_span(oyente):
+    """Registra una función que recibe cada span al terminar"""
+    if oyente not in _oyentes:
+        _oyentes.append(oyente)
+
+
+def registrar_span(nombre: str, inicio: float, fin: float, **atributos) -> Optional[Span]:
+    """Span ya medido (inicio/fin de perf_counter) como hijo del actual; nada si no hay traza"""
+    padre = _span_actual.get()
+    if padre is None:
+        return None
+    medido = Span(nombre, padre.traza, padre.id, atributos, inicio=inicio)
+    medido.terminar(fin)
+    return medido
+
+
+def _exportar(span: Span):
+    if not TRAZAS_EXPORTAR:
+        return
+    if "consola" in TRAZAS_EXPORTAR:
+        atributos = " ".join(f"{k}={v}" for k, v in span.atributos.items() if k != "sql")
+        print(f"🔭 [{span.traza.id[:8]}] {span.nombre} {span.duracion_ms:.1f} ms {atributos}".rstrip())
+    if "archivo" in TRAZAS_EXPORTAR:
+        linea = json.dumps(span.a_dict(), ensure_ascii=False, default=str)
+        with _lock_archivo, open(TRAZAS_ARCHIVO, "a", encoding="utf-8") as f:
+            f.write(linea + "\n")
+
+
+def resumen_tiempos(raiz: Span) -> Dict[str, Any]:
+    """
+    Desglose de la traza de `raiz` (puede estar abierta): total, suma por
+    nombre de span y la lista de spans con su inicio relativo a la raíz.
+    """
+    etapas: Dict[str, Dict[str, float]] = {}
+    spans = []
+    for s in sorted(raiz.traza.spans, key=lambda s: s.inicio):
+        etapa = etapas.setdefault(s.nombre, {"ms": 0.0, "cantidad": 0})
+        etapa["ms"] = round(etapa["ms"] + s.duracion_ms, 3)
+        etapa["cantidad"] += 1
+        spans.append({
+            "nombre": s.nombre,
+            "inicio_ms": round((s.inicio - raiz.inicio) * 1000, 3),
+            "duracion_ms": round(s.duracion_ms, 3),
+            "padre": s.padre_id,
+            "id": s.id,
+            "atributos": {k: v for k, v in s.atributos.items() if k != "sql"},
+        })
+    return {"traza_id": raiz.traza.id, "total_ms": round(raiz.duracion_ms, 3), "etapas": etapas, "spans": spans}
+
+
+def tokens_de_traza(raiz: Span) -> Dict[str, int]:
+    """Tokens de entrada/salida sumados de los spans de LLM de la traza"""
+    totales = {"entrada": 0, "salida": 0}
+    for s in raiz.traza.spans:
+        totales["entrada"] += s.atributos.get("tokens_entrada") or 0
+        totales["salida"] += s.atributos.get("tokens_salida") or 0
+    return totales
+
+
+def instrumentar_sqlalchemy():
+    """Registra cada consulta SQL como span "db.consulta" dentro de la traza activa"""
+    from sqlalchemy import event
+    from sqlalchemy.engine import Engine
+
+    if getattr(instrumentar_sqlalchemy, "_instalado", False):
+        return
+    instrumentar_sqlalchemy._instalado = True
+
+    @event.listens_for(Engine, "before_cursor_execute")
+    def _antes(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("_trazas_inicio", []).append(time.perf_counter())
+
+    @event.listens_for(Engine, "after_cursor_execute")
+    def _despues(conn, cursor, statement, parameters, context, executemany):
+        inicios = conn.info.get("_trazas_inicio")
+        if not inicios:
+            return
+        inicio = inicios.pop()
+        if _span_actual.get() is not None:
+            registrar_span("db.consulta", inicio, time.perf_counter(),
+                           sql=statement[:MAX_CARACTERES_SQL], operacion=statement.lstrip().split(" ", 1)[0].upper())
+
+    @event.listens_for(Engine, "handle_error")
+    def _error(contexto):
+        inicios = contexto.connection.info.get("_trazas_inicio") if contexto.connection is not None else None
+        if inicios:
+            inicios.pop()
+
+
+def anotar(**atributos):
+    """Agrega atributos al span actual (sin efecto fuera de una traza)"""
+    actual = _span_actual.get()
+    if actual is not None:
+        actual.set(**atributos)
@@ -0,0 +1,17 @@
+# benchmarks/__init__.py
+"""
+Benchmarks reproducibles de los caminos críticos del sistema de valuación.
+Ejecutar desde la raíz del proyecto: python -m benchmarks.<modulo>
+"""
+
+import os
+import sys
+
+RAIZ_PROYECTO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DIR_DATOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), "datos")
+
+# Los módulos del backend se importan como en la API (from services..., from models...)
+# y los del frontend como en Streamlit (from servicios...)
+for _ruta in (os.path.join(RAIZ_PROYECTO, "backend"), os.path.join(RAIZ_PROYECTO, "frontend")):
+    if _ruta not in sys.path:
+        sys.path.insert(0, _ruta)
@@ -0,0 +1,145 @@
+# benchmarks/base_sintetica.py
+"""
+Bases SQLite temporales con datos sintéticos para los benchmarks que pasan
+por el servicio de reglas o por la API. Cada base vive en un directorio
+temporal propio y nunca toca backend/api/valuacion.db.
+
+Todo se inserta por lotes con SQLAlchemy Core (sin pasar por ReglasService,
+que audita y analiza conflictos regla por regla) para poder llegar al
+millón de filas en tiempos razonables.
+"""
+
+import os
+import random
+import shutil
+import tempfile
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import benchmarks  # noqa: F401  (agrega backend/ al path)
+from models import AuditoriaRegla, Regla, TipoAccion, TipoRegla, Usuario, Valuacion, Vehiculo, crear_tablas
+
+LOTE_INSERCION = 10_000
+
+# Plantillas de reglas por tipo: se rotan y se varían los números para que
+# N reglas tengan el tamaño y la mezcla de una configuración real
+PLANTILLAS_REGLAS = [
+    (TipoRegla.FUENTE, lambda i: {"url": f"portal{i}.com.ar", "prioridad": i % 10 + 1}),
+    (TipoRegla.FILTRO_BUSQUEDA, lambda i: {"campo": "año", "operador": "entre", "valor": [-(i % 3 + 1), i % 3 + 1], "relativo": True}),
+    (TipoRegla.FILTRO_BUSQUEDA, lambda i: {"campo": "km", "operador": "entre", "valor": [-10000 * (i % 4 + 1), 10000 * (i % 4 + 1)], "relativo": True}),
+    (TipoRegla.DEPURACION, lambda i: {"accion": "eliminar", "cantidad": i % 8 + 1, "extremo": "inferior" if i % 2 else "superior"}),
+    (TipoRegla.MUESTREO, lambda i: {"metodo": "aleatorio", "cantidad": 10 + i % 30}),
+    (TipoRegla.PUNTO_CONTROL, lambda i: {"umbral_minimo": 3 + i % 5, "accion": "ampliar",
+                                         "nuevos_parametros": {"año": [-2, 2], "km": [-15000, 15000]}}),
+    (TipoRegla.METODO_VALUACION, lambda i: {"metodo": ["mediana", "promedio", "moda"][i % 3]}),
+    (TipoRegla.AJUSTE_CALCULO, lambda i: {"tipo": "inflacion", "porcentaje": 1 + i % 9, "periodo_dias": 30}),
+]
+
+MARCAS_MODELOS = [("Toyota", "Corolla"), ("Volkswagen", "Gol"), ("Ford", "Ranger"),
+                  ("Chevrolet", "Cruze"), ("Fiat", "Cronos"), ("Peugeot", "208")]
+
+
+class BaseSintetica:
+    """Base SQLite en un archivo temporal con un usuario admin"""
+
+    def __init__(self, semilla: int = 1):
+        self.rnd = random.Random(semilla)
+        self.directorio = tempfile.mkdtemp(prefix="bench_valuacion_")
+        self.url = f"sqlite:///{os.path.join(self.directorio, 'bench.db')}"
+        self.engine = create_engine(self.url, connect_args={"check_same_thread": False})
+        crear_tablas(self.engine)
+        self.Sesion = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+
+        with self.Sesion() as db:
+            admin = Usuario(email="bench@empresa.com", nombre="Bench", apellido="Admin", rol="admin")
+            db.add(admin)
+            db.commit()
+            self.admin_id = admin.id
+        self.regla_auditada_id = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def cerrar(self):
+        self.engine.dispose()
+        shutil.rmtree(self.directorio, ignore_errors=True)
+
+    def get_db(self):
+        """Reemplazo de la dependencia get_db de la API"""
+        db = self.Sesion()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def cargar_reglas(self, cantidad: int):
+        """Inserta `cantidad` reglas activas rotando las plantillas por tipo"""
+        ahora = datetime.utcnow()
+        filas = []
+        for i in range(cantidad):
+            tipo, parametros = PLANTILLAS_REGLAS[i % len(PLANTILLAS_REGLAS)]
+            filas.append({
+                "id": str(uuid.uuid4()), "codigo": f"BENCH_{tipo.name}_{i:05d}",
+                "nombre": f"Regla sintética {i}", "descripcion": f"Regla de benchmark {i}",
+                "tipo": tipo, "parametros": parametros(i), "activo": True, "orden": i, "version": 1,
+                "creado_por": self.admin_id, "fecha_creacion": ahora,
+            })
+        with self.engine.begin() as conexion:
+            for desde in range(0, cantidad, LOTE_INSERCION):
+                conexion.execute(Regla.__table__.insert(), filas[desde:desde + LOTE_INSERCION])
+        if filas and self.regla_auditada_id is None:
+            self.regla_auditada_id = filas[0]["id"]
+
+    def cargar_valuaciones(self, cantidad: int, por_vehiculo: int = 20):
+        """Inserta `cantidad` valuaciones (y un vehículo cada `por_vehiculo`) en lotes"""
+        ahora = datetime.utcnow()
+        tabla_vehiculos, tabla_valuaciones = Vehiculo.__table__, Valuacion.__table__
+        with self.engine.begin() as conexion:
+            for desde in range(0, cantidad, LOTE_INSERCION):
+                hasta = min(desde + LOTE_INSERCION, cantidad)
+                vehiculos, valuaciones = [], []
+                vehiculo_id = None
+                for v in range(desde, hasta):
+                    if vehiculo_id is None or v % por_vehiculo == 0:
+                        marca, modelo = self.rnd.choice(MARCAS_MODELOS)
+                        vehiculo_id = str(uuid.uuid4())
+                        vehiculos.append({
+                            "id": vehiculo_id, "marca": marca, "modelo": modelo,
+                            "año": self.rnd.randint(2012, 2024), "kilometraje": self.rnd.randint(0, 200_000),
+                            "estado": "en_stock", "fecha_creacion": ahora,
+                        })
+                    precio = round(self.rnd.gauss(18_000_000, 2_500_000), -3)
+                    valuaciones.append({
+                        "id": str(uuid.uuid4()), "vehiculo_id": vehiculo_id, "usuario_id": self.admin_id,
+                        "precio_sugerido": precio, "precio_minimo": precio * 0.95, "precio_maximo": precio * 1.05,
+                        "confianza": self.rnd.choice(["ALTA", "MEDIA", "BAJA"]),
+                        "fuentes_consultadas": 2, "resultados_encontrados": 30, "resultados_filtrados": 20,
+                        "reglas_aplicadas": [], "configuracion_usada": {}, "publicaciones_analizadas": [],
+                        "tokens_usados": {},
+                        "fecha": ahora - timedelta(minutes=v), "duracion_segundos": self.rnd.uniform(0.5, 30),
+                    })
+                conexion.execute(tabla_vehiculos.insert(), vehiculos)
+                conexion.execute(tabla_valuaciones.insert(), valuaciones)
+
+    def cargar_auditoria(self, cantidad: int):
+        """Inserta `cantidad` registros de auditoría sobre una regla existente"""
+        if self.regla_auditada_id is None:
+            self.cargar_reglas(1)
+        ahora = datetime.utcnow()
+        acciones = [TipoAccion.MODIFICAR, TipoAccion.ACTIVAR, TipoAccion.DESACTIVAR]
+        tabla = AuditoriaRegla.__table__
+        with self.engine.begin() as conexion:
+            for desde in range(0, cantidad, LOTE_INSERCION):
+                conexion.execute(tabla.insert(), [{
+                    "id": str(uuid.uuid4()), "regla_id": self.regla_auditada_id, "usuario_id": self.admin_id,
+                    "accion": acciones[a % len(acciones)], "fecha": ahora - timedelta(seconds=a),
+                    "valor_anterior": {"parametros": {"cantidad": a % 10}},
+                    "valor_nuevo": {"parametros": {"cantidad": a % 10 + 1}},
+                    "campos_modificados": ["parametros.cantidad"],
+                } for a in range(desde, min(desde + LOTE_INSERCION, cantidad))])
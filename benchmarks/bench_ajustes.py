@@ -0,0 +1,130 @@
+# benchmarks/bench_ajustes.py
+"""
+Benchmark de los ajustes de cálculo sobre un lote grande: decenas de
+reglas condicionadas por marca y vigencia aplicadas a N vehículos con el
+índice de aplicabilidad, contra la evaluación de todas las reglas sobre
+todos los vehículos. Verifica que ambos caminos den los mismos precios.
+
+Uso:
+    python -m benchmarks.bench_ajustes [--vehiculos 100000] [--reglas 60] [--json]
+"""
+
+import argparse
+import json
+import time
+from datetime import date, timedelta
+
+import numpy as np
+
+import benchmarks  # noqa: F401  (agrega backend/ al path)
+from services.motor.ajustes import LoteVehiculos, aplicar_ajustes, compilar_ajustes
+from services.motor.aplicabilidad import IndiceAplicabilidad
+
+MARCAS = ["Toyota", "Ford", "Chevrolet", "Volkswagen", "Renault", "Fiat", "Peugeot", "Honda",
+          "Nissan", "Citroën", "Jeep", "Hyundai", "Kia", "BMW", "Audi", "Mercedes-Benz"]
+MESES = ["enero", "febrero", "marzo", "abril", "mayo", "junio", "julio", "agosto",
+         "septiembre", "octubre", "noviembre", "diciembre"]
+
+
+def reglas_sinteticas(cantidad: int, semilla: int = 3) -> list:
+    """Ajustes porcentuales y fijos por marca, con vigencia por mes, trimestre o rango de fechas"""
+    rng = np.random.default_rng(semilla)
+    reglas = [{"codigo": "INFLACION", "orden": 0, "parametros": {"tipo": "inflacion", "porcentaje": 4}}]
+    for i in range(cantidad - 1):
+        params = {"condicion_marca": MARCAS[i % len(MARCAS)]}
+        if i % 3 == 0:
+            params.update({"tipo": "ajuste_fijo", "monto": int(rng.integers(100, 1000)), "moneda": "USD",
+                           "operacion": "decrementar"})
+        else:
+            params.update({"tipo": "ajuste_porcentual", "porcentaje": float(rng.integers(1, 15)),
+                           "operacion": "incrementar" if i % 2 else "decrementar"})
+        vigencia = i % 4
+        if vigencia == 0:
+            params["periodo_vigencia"] = {"tipo": "mes", "mes": MESES[int(rng.integers(0, 12))]}
+        elif vigencia == 1:
+            params["periodo_vigencia"] = {"tipo": "trimestre", "valor": f"Q{int(rng.integers(1, 5))}", "año": 2026}
+        elif vigencia == 2:
+            inicio = date(2026, 1, 1) + timedelta(days=int(rng.integers(0, 300)))
+            params["periodo_vigencia"] = {"tipo": "rango_fechas", "fecha_inicio": inicio.isoformat(),
+                                          "fecha_fin": (inicio + timedelta(days=30)).isoformat()}
+        reglas.append({"codigo": f"AJUSTE_{i}", "orden": i + 1, "parametros": params})
+    return reglas
+
+
+def lote_sintetico(vehiculos: int, semilla: int = 5) -> tuple:
+    rng = np.random.default_rng(semilla)
+    marcas = rng.choice(MARCAS, vehiculos)
+    fechas = np.datetime64("2026-01-01") + rng.integers(0, 365, vehiculos).astype("timedelta64[D]")
+    lote = LoteVehiculos(
+        [{"marca": m, "modelo": "X", "año": 2020, "kilometraje": 50_000} for m in marcas],
+        fechas.tolist()
+    )
+    return lote, rng.uniform(5e6, 40e6, vehiculos)
+
+
+def aplicar_sin_indice(compilados, precios: np.ndarray, lote: LoteVehiculos) -> np.ndarray:
+    """Referencia: cada regla evalúa marca, vigencia y condiciones sobre todo el lote"""
+    precios = precios.copy()
+    for ajuste in compilados:
+        if ajuste.transformacion is None:
+            continue
+        aplica = ajuste.vigencia.mascara(lote.fecha) & ajuste.predicado(lote)
+        if ajuste.marcas is not None:
+            aplica &= np.isin(lote.marca, list(ajuste.marcas))
+        precios = np.where(aplica, ajuste.transformacion(precios, lote), precios)
+    return precios
+
+
+def ejecutar(vehiculos: int = 100_000, reglas: int = 60) -> dict:
+    config = reglas_sinteticas(reglas)
+    lote, precios = lote_sintetico(vehiculos)
+
+    inicio = time.perf_counter()
+    compilados = compilar_ajustes(config)
+    indice = IndiceAplicabilidad(compilados)
+    ms_compilacion = (time.perf_counter() - inicio) * 1e3
+
+    inicio = time.perf_counter()
+    con_indice, auditoria = aplicar_ajustes(compilados, precios, lote, indice)
+    ms_con_indice = (time.perf_counter() - inicio) * 1e3
+
+    inicio = time.perf_counter()
+    sin_indice = aplicar_sin_indice(compilados, precios, lote)
+    ms_sin_indice = (time.perf_counter() - inicio) * 1e3
+
+    evaluaciones = sum(len(a["filas"]) for a in auditoria)
+    return {
+        "benchmark": "ajustes",
+        "vehiculos": vehiculos,
+        "reglas": reglas,
+        "ms_compilacion": ms_compilacion,
+        "ms_con_indice": ms_con_indice,
+        "ms_sin_indice": ms_sin_indice,
+        "ajustes_aplicados": evaluaciones,
+        "ajustes_posibles": vehiculos * reglas,
+        "iguales": bool(np.allclose(con_indice, sin_indice, rtol=1e-12)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vehiculos", type=int, default=100_000)
+    parser.add_argument("--reglas", type=int, default=60)
+    parser.add_argument("--json", action="store_true", help="Imprimir resultados en JSON")
+    args = parser.parse_args()
+
+    resultado = ejecutar(args.vehiculos, args.reglas)
+    if args.json:
+        print(json.dumps(resultado, indent=2, ensure_ascii=False))
+        return
+
+    print(f"Vehículos: {resultado['vehiculos']:,} - reglas: {resultado['reglas']}")
+    print(f"Compilación + índice: {resultado['ms_compilacion']:.1f} ms")
+    print(f"Con índice: {resultado['ms_con_indice']:.1f} ms "
+          f"({resultado['ajustes_aplicados']:,} de {resultado['ajustes_posibles']:,} regla×vehículo)")
+    print(f"Todas las reglas sobre todo el lote: {resultado['ms_sin_indice']:.1f} ms")
+    print(f"Mismos precios: {resultado['iguales']}")
+
+
+if __name__ == "__main__":
+    main()
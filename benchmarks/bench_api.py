@@ -0,0 +1,134 @@
+# benchmarks/bench_api.py
+"""
+Benchmark de los caminos críticos de la API, en proceso con TestClient y
+una base SQLite temporal (la dependencia get_db se reemplaza; la base de
+backend/api no se toca):
+
+- POST /valuaciones con el proveedor "mock" (configuración + guardado)
+- GET /valuaciones, /auditoria y /reglas con 10k..1M filas en la tabla
+- extraer_json_respuesta sobre el corpus de respuestas grabadas de IA
+
+Los listados se miden sin If-None-Match (siempre 200 con cuerpo), que es
+el peor caso: consulta, serialización y hash del ETag.
+
+Uso:
+    python -m benchmarks.bench_api [--filas 10000 100000 1000000] [--valuaciones 200] [--json]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import time
+
+import numpy as np
+from fastapi.testclient import TestClient
+
+from benchmarks.base_sintetica import BaseSintetica
+from benchmarks.bench_parseo_json import cargar_corpus
+from benchmarks.bench_valuacion_offline import VEHICULO_EJEMPLO
+
+# El benchmark trabaja sobre la base sintética: el arranque de la API no toca la suya
+os.environ.setdefault("CREAR_TABLAS_AL_INICIAR", "0")
+os.environ.setdefault("AUDITORIA_DIFERIDA", "0")
+from api import main as api  # noqa: E402
+
+REGLAS_CONFIGURADAS = 30
+REPETICIONES_LISTADO = 20
+
+
+def _tiempos_ms(funcion, repeticiones: int) -> list:
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        tiempos.append((time.perf_counter() - inicio) * 1e3)
+    return tiempos
+
+
+def _get_ok(cliente: TestClient, ep: str, params: dict = None):
+    response = cliente.get(ep, params=params)
+    assert response.status_code == 200, f"{ep}: {response.status_code} {response.text[:200]}"
+    return response
+
+
+def medir_crear_valuacion(cliente: TestClient, usuario_id: str, valuaciones: int) -> dict:
+    pedido = {**VEHICULO_EJEMPLO, "proveedor_ia": "mock"}
+
+    def crear():
+        response = cliente.post("/valuaciones", json=pedido, params={"usuario_id": usuario_id})
+        assert response.status_code == 200, response.text[:200]
+
+    tiempos = _tiempos_ms(crear, valuaciones)
+    return {"ms_crear_valuacion_p50": float(np.percentile(tiempos, 50)),
+            "ms_crear_valuacion_p95": float(np.percentile(tiempos, 95))}
+
+
+def medir_listados(base: BaseSintetica, cliente: TestClient, filas) -> dict:
+    """Agranda las tablas hasta cada tamaño pedido y mide los tres listados"""
+    resultado = {}
+    cargadas = 0
+    for cantidad in sorted(filas):
+        base.cargar_valuaciones(cantidad - cargadas)
+        base.cargar_auditoria(cantidad - cargadas)
+        cargadas = cantidad
+        for ep, params in (("/valuaciones", {"limit": 50}), ("/auditoria", {"limit": 100}), ("/reglas", None)):
+            _get_ok(cliente, ep, params)  # calentamiento
+            tiempos = _tiempos_ms(lambda: _get_ok(cliente, ep, params), REPETICIONES_LISTADO)
+            resultado[f"ms_{ep.strip('/')}_{cantidad}"] = float(np.median(tiempos))
+    return resultado
+
+
+def medir_extraer_json(repeticiones: int = 50) -> dict:
+    textos = [c["texto"] for c in cargar_corpus()]
+    # Las respuestas no parseables se imprimen siempre: a /dev/null para no ensuciar la salida
+    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+        exitos = sum(api.extraer_json_respuesta(t).get("precio_sugerido") is not None for t in textos)
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            for texto in textos:
+                api.extraer_json_respuesta(texto)
+        us = (time.perf_counter() - inicio) * 1e6 / (repeticiones * len(textos))
+    return {"respuestas_corpus": len(textos), "exito_extraer_json": exitos, "us_extraer_json_respuesta": us}
+
+
+def ejecutar(filas=(10_000, 100_000), valuaciones: int = 200) -> dict:
+    resultado = {"benchmark": "api", "filas": list(filas), "valuaciones": valuaciones}
+    with BaseSintetica() as base:
+        base.cargar_reglas(REGLAS_CONFIGURADAS)
+        api.app.dependency_overrides[api.get_db] = base.get_db
+        try:
+            with TestClient(api.app) as cliente:
+                resultado.update(medir_crear_valuacion(cliente, base.admin_id, valuaciones))
+                resultado.update(medir_listados(base, cliente, filas))
+        finally:
+            api.app.dependency_overrides.pop(api.get_db, None)
+    resultado.update(medir_extraer_json())
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filas", type=int, nargs="+", default=[10_000, 100_000],
+                        help="Tamaños de tabla para los listados (ej: 10000 100000 1000000)")
+    parser.add_argument("--valuaciones", type=int, default=200, help="POST /valuaciones mock a medir")
+    parser.add_argument("--json", action="store_true", help="Imprimir resultados en JSON")
+    args = parser.parse_args()
+
+    resultado = ejecutar(args.filas, args.valuaciones)
+    if args.json:
+        print(json.dumps(resultado, indent=2, ensure_ascii=False))
+        return
+
+    print(f"POST /valuaciones (mock): p50 {resultado['ms_crear_valuacion_p50']:.1f} ms - "
+          f"p95 {resultado['ms_crear_valuacion_p95']:.1f} ms")
+    for cantidad in sorted(args.filas):
+        print(f"{cantidad:>9} filas: /valuaciones {resultado[f'ms_valuaciones_{cantidad}']:.1f} ms - "
+              f"/auditoria {resultado[f'ms_auditoria_{cantidad}']:.1f} ms - "
+              f"/reglas {resultado[f'ms_reglas_{cantidad}']:.1f} ms")
+    print(f"extraer_json_respuesta: {resultado['us_extraer_json_respuesta']:.0f} µs por respuesta "
+          f"({resultado['exito_extraer_json']}/{resultado['respuestas_corpus']} con precio)")
+
+
+if __name__ == "__main__":
+    main()
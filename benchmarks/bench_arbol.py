@@ -0,0 +1,118 @@
+# benchmarks/bench_arbol.py
+"""
+Benchmark de BrowserService._limpiar_arbol, que corre en cada paso del
+agente de navegación sobre el árbol de accesibilidad completo de la página
+(Accessibility.getFullAXTree).
+
+Con --arbol se usan árboles grabados, como el estructura_raw.json que deja
+Prueba.py; sin archivos se genera un árbol sintético con la forma de CDP
+(mayoría de nodos genéricos/ignorados, links con url, filtros con estado).
+
+Uso:
+    python -m benchmarks.bench_arbol [--arbol estructura_raw.json ...] [--nodos 20000] [--repeticiones 20] [--json]
+"""
+
+import argparse
+import json
+import os
+import random
+import time
+
+import benchmarks  # noqa: F401  (agrega backend/ al path)
+from services.browser_service import BrowserService
+
+ROLES_INTERACTUABLES = ["button", "combobox", "link", "checkbox", "textbox", "menuitem", "radio"]
+ROLES_CONTENIDO = ["StaticText", "heading", "img", "listitem", "paragraph"]
+
+
+def _valor(tipo: str, valor) -> dict:
+    return {"type": tipo, "value": valor}
+
+
+def arbol_sintetico(nodos: int = 20_000, semilla: int = 3) -> dict:
+    """AXTree con la proporción típica de un listado de autos usados"""
+    rnd = random.Random(semilla)
+    lista = []
+    for i in range(nodos):
+        nodo = {"nodeId": str(i), "ignored": False, "childIds": [str(i + 1)] if i + 1 < nodos else []}
+        sorteo = rnd.random()
+        if sorteo < 0.35:
+            nodo["ignored"] = True
+            nodo["role"] = _valor("role", "none")
+        elif sorteo < 0.6:
+            nodo["role"] = _valor("role", "generic")
+            nodo["name"] = _valor("computedString", "")
+        elif sorteo < 0.85:
+            nodo["role"] = _valor("role", rnd.choice(ROLES_CONTENIDO))
+            nodo["name"] = _valor("computedString", f"Toyota Corolla {2015 + i % 10}  -  ${rnd.randint(10, 30)}.{i % 1000:03d}.000")
+        else:
+            rol = rnd.choice(ROLES_INTERACTUABLES)
+            nodo["role"] = _valor("role", rol)
+            nodo["name"] = _valor("computedString", f"Filtro {i % 50}")
+            nodo["properties"] = [{"name": "focusable", "value": _valor("booleanOrUndefined", True)}]
+            if rol == "link":
+                nodo["properties"].append({"name": "url", "value": _valor("string", f"https://www.kavak.com/ar/usado/{i}")})
+            elif rol in ("checkbox", "radio"):
+                nodo["properties"].append({"name": "checked", "value": _valor("tristate", rnd.random() < 0.2)})
+            elif rol == "combobox":
+                nodo["value"] = _valor("string", "Más relevantes")
+                nodo["properties"].append({"name": "expanded", "value": _valor("booleanOrUndefined", False)})
+        lista.append(nodo)
+    return {"nodes": lista}
+
+
+def cargar_arboles(rutas) -> dict:
+    arboles = {}
+    for ruta in rutas:
+        with open(ruta, encoding="utf-8") as f:
+            arboles[os.path.basename(ruta)] = json.load(f)
+    return arboles
+
+
+def ejecutar(arboles=None, nodos: int = 20_000, repeticiones: int = 20) -> dict:
+    arboles = cargar_arboles(arboles) if arboles else {"sintetico": arbol_sintetico(nodos)}
+    servicio = BrowserService()
+
+    detalle = []
+    nodos_totales = 0
+    segundos_totales = 0.0
+    for nombre, arbol in arboles.items():
+        limpios = servicio._limpiar_arbol(arbol)
+        inicio = time.perf_counter()
+        for _ in range(repeticiones):
+            servicio._limpiar_arbol(arbol)
+        segundos = (time.perf_counter() - inicio) / repeticiones
+        cantidad = len(arbol.get("nodes", []))
+        nodos_totales += cantidad
+        segundos_totales += segundos
+        detalle.append({"arbol": nombre, "nodos": cantidad, "nodos_limpios": len(limpios), "ms": segundos * 1e3})
+
+    return {
+        "benchmark": "arbol",
+        "arboles": detalle,
+        "nodos": nodos_totales,
+        "ms_por_arbol": segundos_totales * 1e3 / len(detalle),
+        "us_por_nodo": segundos_totales * 1e6 / nodos_totales if nodos_totales else None,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--arbol", nargs="+", help="AXTrees grabados (JSON de Accessibility.getFullAXTree)")
+    parser.add_argument("--nodos", type=int, default=20_000, help="Tamaño del árbol sintético")
+    parser.add_argument("--repeticiones", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="Imprimir resultados en JSON")
+    args = parser.parse_args()
+
+    resultado = ejecutar(args.arbol, args.nodos, args.repeticiones)
+    if args.json:
+        print(json.dumps(resultado, indent=2, ensure_ascii=False))
+        return
+
+    for arbol in resultado["arboles"]:
+        print(f"{arbol['arbol']}: {arbol['nodos']} nodos -> {arbol['nodos_limpios']} limpios en {arbol['ms']:.1f} ms")
+    print(f"Promedio: {resultado['us_por_nodo']:.2f} µs por nodo")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+# benchmarks/bench_auditoria.py
+"""
+Benchmark de la auditoría de reglas bajo concurrencia: N hilos modifican
+reglas a la vez (como una herramienta de carga masiva o varios usuarios)
+sobre una base SQLite en archivo, con la auditoría en la misma transacción
+de cada cambio y con el escritor diferido (services/escritor_auditoria.py).
+
+Mide el tiempo por cambio visto por quien modifica, el total hasta que la
+auditoría quedó en la base y verifica que no falte ni sobre ningún registro.
+
+Uso:
+    python -m benchmarks.bench_auditoria [--hilos 4] [--cambios 50] [--json]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import statistics
+import threading
+import time
+
+from benchmarks.base_sintetica import BaseSintetica
+from models import AuditoriaRegla, TipoAccion
+from services.escritor_auditoria import EscritorAuditoria
+from services.reglas_service import ReglasService
+
+
+def medir(diferida: bool, hilos: int, cambios: int) -> dict:
+    with BaseSintetica() as base:
+        base.cargar_reglas(hilos)
+        with base.Sesion() as db:
+            ids = [r.id for r in ReglasService(db).listar_reglas()]
+        escritor = EscritorAuditoria(base.engine, os.path.join(base.directorio, "auditoria.diario"))
+        if diferida:
+            escritor.iniciar()
+
+        tiempos = []
+        lock = threading.Lock()
+
+        def modificar(regla_id: str):
+            with base.Sesion() as db:
+                service = ReglasService(db)
+                for i in range(cambios):
+                    inicio = time.perf_counter()
+                    service.modificar_regla(regla_id, base.admin_id, {"orden": 1000 + i}, motivo_cambio="bench")
+                    with lock:
+                        tiempos.append((time.perf_counter() - inicio) * 1e3)
+
+        # Cada hilo modifica su propia regla: la única contención es el lock de escritura de la base
+        trabajadores = [threading.Thread(target=modificar, args=(regla_id,)) for regla_id in ids]
+        with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+            inicio = time.perf_counter()
+            for t in trabajadores:
+                t.start()
+            for t in trabajadores:
+                t.join()
+            escritor.cerrar()
+            ms_total = (time.perf_counter() - inicio) * 1e3
+
+        with base.Sesion() as db:
+            registrados = db.query(AuditoriaRegla).filter(AuditoriaRegla.accion == TipoAccion.MODIFICAR).count()
+    return {
+        "ms_por_cambio_p50": statistics.median(tiempos),
+        "ms_por_cambio_p95": statistics.quantiles(tiempos, n=20)[-1],
+        "ms_total": ms_total,
+        "completa": registrados == hilos * cambios,
+    }
+
+
+def ejecutar(hilos: int = 4, cambios: int = 50) -> dict:
+    sincronica = medir(False, hilos, cambios)
+    diferida = medir(True, hilos, cambios)
+    resultado = {"benchmark": "auditoria", "hilos": hilos, "cambios_por_hilo": cambios}
+    for nombre, medicion in (("sincronica", sincronica), ("diferida", diferida)):
+        for clave, valor in medicion.items():
+            if clave != "completa":
+                resultado[f"{clave}_{nombre}"] = valor
+    resultado["auditoria_completa"] = sincronica["completa"] and diferida["completa"]
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--hilos", type=int, default=4)
+    parser.add_argument("--cambios", type=int, default=50, help="Modificaciones por hilo")
+    parser.add_argument("--json", action="store_true", help="Imprimir resultados en JSON")
+    args = parser.parse_args()
+
+    resultado = ejecutar(args.hilos, args.cambios)
+    if args.json:
+        print(json.dumps(resultado, indent=2, ensure_ascii=False))
+        return
+    print(f"{args.hilos} hilos x {args.cambios} modificaciones")
+    for nombre in ("sincronica", "diferida"):
+        print(f"   {nombre:<11} p50 {resultado[f'ms_por_cambio_p50_{nombre}']:.2f} ms - "
+              f"p95 {resultado[f'ms_por_cambio_p95_{nombre}']:.2f} ms - total {resultado[f'ms_total_{nombre}']:.0f} ms")
+    print(f"Auditoría completa en ambos modos: {'sí' if resultado['auditoria_completa'] else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# benchmarks/bench_clasificador.py
+"""
+Benchmark de la detección heurística del tipo de regla: compara la regex
+combinada (una pasada) contra la búsqueda de subcadenas frase por frase
+en las siete listas, y verifica que las frases cortas ya no coinciden
+dentro de otras palabras ("si" en "sitio").
+
+Uso:
+    python -m benchmarks.bench_clasificador [--repeticiones 2000] [--json]
+"""
+
+import argparse
+import json
+import time
+
+import benchmarks  # noqa: F401  (agrega backend/ y frontend/ al path)
+from servicios.clasificador_reglas import PALABRAS_POR_TIPO, coincidencias_por_tipo, tipo_ganador
+
+
+DESCRIPCIONES = [
+    "Aumentar 15% el precio final de los Renault",
+    "Consultar precios en kavak.com y autos.mercadolibre.com.ar",
+    "Eliminar las 5 publicaciones más caras y las 5 más baratas",
+    "Buscar autos del mismo modelo con año ±1 y kilometraje ±10000 km",
+    "Tomar una muestra aleatoria de 20 publicaciones",
+    "Si hay menos de 5 resultados, ampliar el rango de años a ±2",
+    "Calcular el precio de referencia con la mediana de la muestra",
+    "Descartar publicaciones sin fotos o de usuarios no verificados",
+    "Restar 500 USD a los Toyota publicados en diciembre",
+    "Aplicar la inflación mensual del 4% sobre el valor de mercado",
+]
+
+# (descripción, tipo, frase que la búsqueda por subcadenas encuentra dentro de otra palabra)
+FALSOS_POSITIVOS = [
+    ("Consultar el sitio de Kavak", "punto_control", "si"),
+    ("Promedio ponderado por precisión de los datos", "punto_control", "si"),
+    ("Descartar autos con más de 200000 kms", "filtro_busqueda", "km"),
+    ("Tomar las publicaciones aparte de las de Olx", "muestreo", "parte"),
+    ("Buscar autos publicados en Hurlingham", "fuente", "url"),
+    ("Descartar vendedores intermediarios", "metodo_valuacion", "media"),
+    ("Eliminar publicaciones en modalidad consignación", "metodo_valuacion", "moda"),
+]
+
+
+def coincidencias_subcadenas(descripcion: str) -> dict:
+    """Implementación anterior: `frase in texto` para cada frase de cada tipo"""
+    texto = descripcion.lower()
+    return {tipo: [p for p in palabras if p in texto] for tipo, palabras in PALABRAS_POR_TIPO.items()}
+
+
+def _medir(funcion, textos, repeticiones: int) -> float:
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        for texto in textos:
+            funcion(texto)
+    return (time.perf_counter() - inicio) * 1e6 / (repeticiones * len(textos))
+
+
+def ejecutar(repeticiones: int = 2000) -> dict:
+    largas = [" ".join(DESCRIPCIONES)] * 3
+
+    tipos_distintos = []
+    for descripcion in DESCRIPCIONES:
+        anterior = coincidencias_subcadenas(descripcion)
+        nuevo = coincidencias_por_tipo(descripcion)
+        ganador_anterior = tipo_ganador({k: len(v) for k, v in anterior.items()})
+        ganador_nuevo = tipo_ganador({k: len(v) for k, v in nuevo.items()})
+        if ganador_anterior != ganador_nuevo:
+            tipos_distintos.append({"descripcion": descripcion, "antes": ganador_anterior, "ahora": ganador_nuevo})
+
+    corregidos = [
+        {"descripcion": d, "tipo": t, "frase": f}
+        for d, t, f in FALSOS_POSITIVOS
+        if f in coincidencias_subcadenas(d)[t] and f not in coincidencias_por_tipo(d)[t]
+    ]
+
+    return {
+        "benchmark": "clasificador",
+        "frases": sum(len(p) for p in PALABRAS_POR_TIPO.values()),
+        "us_subcadenas": _medir(coincidencias_subcadenas, DESCRIPCIONES, repeticiones),
+        "us_regex": _medir(coincidencias_por_tipo, DESCRIPCIONES, repeticiones),
+        "us_subcadenas_texto_largo": _medir(coincidencias_subcadenas, largas, repeticiones // 10),
+        "us_regex_texto_largo": _medir(coincidencias_por_tipo, largas, repeticiones // 10),
+        "falsos_positivos_corregidos": len(corregidos),
+        "falsos_positivos_probados": len(FALSOS_POSITIVOS),
+        "tipos_distintos": tipos_distintos,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticiones", type=int, default=2000)
+    parser.add_argument("--json", action="store_true", help="Imprimir resultados en JSON")
+    args = parser.parse_args()
+
+    resultado = ejecutar(args.repeticiones)
+    if args.json:
+        print(json.dumps(resultado, indent=2, ensure_ascii=False))
+        return
+
+    print(f"Frases: {resultado['frases']}")
+    print(f"Descripción típica: subcadenas {resultado['us_subcadenas']:.1f} µs - "
+          f"regex combinada {resultado['us_regex']:.1f} µs")
+    print(f"Texto largo: subcadenas {resultado['us_subcadenas_texto_largo']:.1f} µs - "
+          f"regex combinada {resultado['us_regex_texto_largo']:.1f} µs")
+    print(f"Falsos positivos corregidos: {resultado['falsos_positivos_corregidos']} "
+          f"de {resultado['falsos_positivos_probados']}")
+    for cambio in resultado["tipos_distintos"]:
+        print(f"  Tipo distinto: '{cambio['descripcion']}': {cambio['antes']} → {cambio['ahora']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+# benchmarks/bench_configuracion.py
+"""
+Benchmark de ReglasService.generar_configuracion_prompt con 10, 100 y 1000
+reglas activas: es lo primero que hace cada valuación (y /configuracion),
+así que su costo crece con el tamaño del catálogo de reglas.
+
+Uso:
+    python -m benchmarks.bench_configuracion [--reglas 10 100 1000] [--repeticiones 50] [--json]
+"""
+
+import argparse
+import json
+import time
+
+from benchmarks.base_sintetica import BaseSintetica
+from services.reglas_service import ReglasService
+
+
+def medir(cantidad: int, repeticiones: int) -> float:
+    """ms por llamada con `cantidad` reglas activas"""
+    with BaseSintetica() as base:
+        base.cargar_reglas(cantidad)
+        with base.Sesion() as db:
+            service = ReglasService(db)
+            config = service.generar_configuracion_prompt()
+            assert config["metadata"]["total_reglas"] == cantidad
+            inicio = time.perf_counter()
+            for _ in range(repeticiones):
+                service.generar_configuracion_prompt()
+            return (time.perf_counter() - inicio) * 1e3 / repeticiones
+
+
+def ejecutar(reglas=(10, 100, 1000), repeticiones: int = 50) -> dict:
+    resultado = {"benchmark": "configuracion", "repeticiones": repeticiones}
+    for cantidad in reglas:
+        resultado[f"ms_{cantidad}_reglas"] = medir(cantidad, repeticiones)
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reglas", type=int, nargs="+", default=[10, 100, 1000])
+    parser.add_argument("--repeticiones", type=int, default=50)
+    parser.add_argument("--json", action="store_true", help="Imprimir resultados en JSON")
+    args = parser.parse_args()
+
+    resultado = ejecutar(args.reglas, args.repeticiones)
+    if args.json:
+        print(json.dumps(resultado, indent=2, ensure_ascii=False))
+        return
+
+    for cantidad in args.reglas:
+        print(f"{cantidad:>6} reglas: {resultado[f'ms_{cantidad}_reglas']:.2f} ms por configuración")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+# benchmarks/bench_depuracion.py
+"""
+Benchmark de las etapas de depuración y de muestreo vectorizadas sobre N
+publicaciones sintéticas. Mide cada regla a N/10 y N para verificar el costo
+lineal y compara el recorte de extremos por argpartition contra un argsort
+completo. Cada etapa queda también como métrica plana (ms_depuracion_<regla>,
+ms_muestreo_<regla>) para que la suite la vigile.
+
+Uso:
+    python -m benchmarks.bench_depuracion [--publicaciones 100000] [--repeticiones 20] [--json]
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+import benchmarks  # noqa: F401  (agrega backend/ al path)
+from services.motor.comparables import Comparables
+from services.motor.depuracion import mascara_depuracion
+from services.motor.muestreo import seleccionar_muestra
+
+FUENTES = np.array(["Kavak", "MercadoLibre", "DeMotores", "AutoCosmos"], dtype=object)
+
+
+def reglas_benchmark(n: int) -> dict:
+    """Una regla por tipo de etapa; el recorte grande es el 1% de cada extremo"""
+    return {
+        "recortar_5_ambos": {"accion": "eliminar", "cantidad": 5, "extremo": "ambos"},
+        "recortar_1pct_ambos": {"accion": "eliminar_outliers", "cantidad": n // 100, "extremo": "ambos"},
+        "iqr": {"accion": "eliminar_outliers", "metodo": "iqr", "factor": 1.5},
+        "mad": {"accion": "eliminar_outliers", "metodo": "mad", "umbral": 3.5},
+        "zscore": {"accion": "eliminar_outliers", "metodo": "zscore", "umbral": 3},
+        "antiguedad_60_dias": {"accion": "eliminar_antiguos", "dias_maximos": 60},
+        "no_verificados": {"accion": "eliminar", "criterio": "usuario_no_verificado"},
+        "criterio_km": {"accion": "eliminar_por_criterio", "campo": "km", "condicion": "mayor_que", "valor": "150000"},
+        "duplicados": {"accion": "eliminar_duplicados"},
+    }
+
+
+def muestreos_benchmark(n: int) -> dict:
+    """Una regla de MUESTREO por variante; las muestras son del 10%"""
+    cantidad = max(n // 10, 1)
+    return {
+        "aleatorio": {"metodo": "aleatorio", "cantidad": cantidad},
+        "precio_asc": {"metodo": "primeros_por_precio_asc", "cantidad": cantidad},
+        "estratificado_fuente": {"metodo": "aleatorio", "cantidad": cantidad, "estratificar_por": "fuente"},
+        "tope_por_fuente": {"metodo": "primeros_por_fecha", "maximo_por_fuente": max(n // 50, 1)},
+        "verificados_primero": {"metodo": "aleatorio", "cantidad": cantidad, "priorizar_verificados": True},
+    }
+
+
+def comparables_sinteticos(n: int, semilla: int = 7) -> Comparables:
+    """Precios log-normales con 2% de outliers, antigüedad, km, fuentes y URLs con duplicados"""
+    rng = np.random.default_rng(semilla)
+    precio = rng.lognormal(np.log(18_000_000), 0.15, n)
+    outliers = rng.random(n) < 0.02
+    precio[outliers] *= rng.choice([0.1, 10.0], outliers.sum())
+    return Comparables.desde_columnas(
+        precio,
+        km=rng.integers(0, 250_000, n).astype(float),
+        antiguedad_dias=rng.uniform(0, 120, n),
+        verificado=rng.random(n) > 0.1,
+        fuente=FUENTES[rng.choice(len(FUENTES), n, p=[0.4, 0.35, 0.15, 0.1])],
+        url=np.array([f"https://ejemplo.com/{i}" for i in rng.integers(0, int(n * 0.9), n)], dtype=object),
+    )
+
+
+def _mejor_ms(funcion, repeticiones: int) -> float:
+    """Mejor tiempo de `repeticiones` llamadas: el mínimo es lo más estable ante ruido en etapas de µs"""
+    mejor = float("inf")
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        funcion()
+        mejor = min(mejor, time.perf_counter() - inicio)
+    return mejor * 1e3
+
+
+def _medir(comparables: Comparables, params: dict, repeticiones: int) -> tuple:
+    mascara = mascara_depuracion(comparables, params)
+    return _mejor_ms(lambda: mascara_depuracion(comparables, params), repeticiones), int((~mascara).sum())
+
+
+def _medir_muestreo(comparables: Comparables, params: dict, repeticiones: int) -> tuple:
+    rng = np.random.default_rng(0)
+    muestra = seleccionar_muestra(comparables, params, rng)
+    return _mejor_ms(lambda: seleccionar_muestra(comparables, params, rng), repeticiones), len(muestra)
+
+
+def _etapas(medir, reglas_chico: dict, reglas_grande: dict, chico: Comparables, grande: Comparables,
+            repeticiones: int, clave_cantidad: str) -> list:
+    resultados = []
+    for nombre, params in reglas_grande.items():
+        ms_chico, _ = medir(chico, reglas_chico[nombre], repeticiones)
+        ms_grande, cantidad = medir(grande, params, repeticiones)
+        resultados.append({
+            "regla": nombre,
+            "ms": ms_grande,
+            clave_cantidad: cantidad,
+            "escala_10x": ms_grande / ms_chico if ms_chico else None,
+        })
+    return resultados
+
+
+def ejecutar(publicaciones: int = 100_000, repeticiones: int = 20) -> dict:
+    chico = comparables_sinteticos(publicaciones // 10)
+    grande = comparables_sinteticos(publicaciones)
+
+    resultados = _etapas(_medir, reglas_benchmark(len(chico)), reglas_benchmark(publicaciones),
+                         chico, grande, repeticiones, "eliminadas")
+    muestreos = _etapas(_medir_muestreo, muestreos_benchmark(len(chico)), muestreos_benchmark(publicaciones),
+                        chico, grande, repeticiones, "muestra")
+
+    # Referencia: mismo recorte con un ordenamiento completo (implementación anterior)
+    k = publicaciones // 100
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        orden = np.argsort(grande.precio, kind="stable")
+        np.sort(orden[k:publicaciones - k])
+    ms_argsort = (time.perf_counter() - inicio) / repeticiones * 1e3
+
+    return {
+        "benchmark": "depuracion",
+        "publicaciones": publicaciones,
+        "reglas": resultados,
+        "muestreos": muestreos,
+        **{f"ms_depuracion_{r['regla']}": r["ms"] for r in resultados},
+        **{f"ms_muestreo_{r['regla']}": r["ms"] for r in muestreos},
+        "ms_recorte_argsort": ms_argsort,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--publicaciones", type=int, default=100_000)
+    parser.add_argument("--repeticiones", type=int, default=20)
+    parser.add_argument("--json", action="store_true", help="Imprimir resultados en JSON")
+    args = parser.parse_args()
+
+    resultado = ejecutar(args.publicaciones, args.repeticiones)
+    if args.json:
+        print(json.dumps(resultado, indent=2, ensure_ascii=False))
+        return
+
+    print(f"Publicaciones: {resultado['publicaciones']:,}")
+    print(f"{'regla':<22}{'ms':>10}{'eliminadas':>12}{'x10 datos':>12}")
+    for r in resultado["reglas"]:
+        print(f"{r['regla']:<22}{r['ms']:>10.2f}{r['eliminadas']:>12,}{r['escala_10x']:>11.1f}x")
+    print(f"\n{'muestreo':<22}{'ms':>10}{'muestra':>12}{'x10 datos':>12}")
+    for r in resultado["muestreos"]:
+        print(f"{r['regla']:<22}{r['ms']:>10.2f}{r['muestra']:>12,}{r['escala_10x']:>11.1f}x")
+    print(f"\nRecorte 1% con argsort completo (referencia): {resultado['ms_recorte_argsort']:.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# benchmarks/bench_frontend.py
+"""
+Benchmark de la app Streamlit con streamlit.testing (AppTest, sin
+navegador): primer dibujado, ingreso, cambio a cada página y rerun por
+interacción dentro de una página (lo que paga el usuario en cada click).
+
+El backend y Ollama no hacen falta: sin backend las páginas muestran el
+error de conexión, y Ollama conviene apuntarlo al servidor simulado
+(OLLAMA_URL) para que el sondeo no dependa de la red.
+
+Para comparar antes/después de un cambio se mide otra versión de la app
+con --app (ej. un checkout anterior en otro directorio).
+
+Uso:
+    python -m benchmarks.bench_frontend [--app frontend/app.py] [--repeticiones 5] [--json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import time
+
+from streamlit.testing.v1 import AppTest
+
+from benchmarks import RAIZ_PROYECTO
+
+APP_DEFAULT = os.path.join(RAIZ_PROYECTO, "frontend", "app.py")
+TIMEOUT_SEGUNDOS = 60
+
+
+def _ms(funcion) -> float:
+    inicio = time.perf_counter()
+    funcion()
+    return (time.perf_counter() - inicio) * 1e3
+
+
+def medir_sesion(app: str) -> dict:
+    """Una sesión completa: primer dibujado, ingreso, cada página y un rerun en cada una"""
+    at = AppTest.from_file(app, default_timeout=TIMEOUT_SEGUNDOS)
+    tiempos = {"primer_dibujado": _ms(at.run)}
+
+    at.session_state["usuario_id"] = "admin"
+    at.session_state["usuario_nombre"] = "Admin Sistema"
+    tiempos["ingreso"] = _ms(at.run)
+
+    menu = at.sidebar.radio[0]
+    for pagina in menu.options:
+        tiempos[f"pagina {pagina}"] = _ms(lambda: at.sidebar.radio[0].set_value(pagina).run())
+        # Rerun sin cambios de navegación: lo que cuesta cada interacción dentro de la página
+        tiempos[f"rerun {pagina}"] = _ms(lambda: at.sidebar.checkbox[-1].check().run())
+        at.sidebar.checkbox[-1].uncheck().run()
+    if at.exception:
+        raise RuntimeError(f"La app lanzó excepciones: {[e.value for e in at.exception]}")
+    return tiempos
+
+
+def ejecutar(app: str = APP_DEFAULT, repeticiones: int = 5) -> dict:
+    sesiones = [medir_sesion(app) for _ in range(repeticiones)]
+    medianas = {clave: statistics.median(s[clave] for s in sesiones) for clave in sesiones[0]}
+    reruns = [ms for clave, ms in medianas.items() if clave.startswith("rerun ")]
+    cambios = [ms for clave, ms in medianas.items() if clave.startswith("pagina ")]
+    return {
+        "benchmark": "frontend",
+        "app": os.path.relpath(app, RAIZ_PROYECTO),
+        "repeticiones": repeticiones,
+        "tiempos_ms": medianas,
+        "ms_primer_dibujado": medianas["primer_dibujado"],
+        "ms_ingreso": medianas["ingreso"],
+        "ms_cambio_pagina": statistics.median(cambios),
+        "ms_rerun": statistics.median(reruns),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", default=APP_DEFAULT, help="Script de Streamlit a medir")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--json", action="store_true", help="Imprimir resultados en JSON")
+    args = parser.parse_args()
+
+    resultado = ejecutar(args.app, args.repeticiones)
+    if args.json:
+        print(json.dumps(resultado, indent=2, ensure_ascii=False))
+        return
+    print(f"{resultado['app']} (mediana de {args.repeticiones} sesiones)")
+    for clave, ms in resultado["tiempos_ms"].items():
+        print(f"   {clave:<40} {ms:>8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
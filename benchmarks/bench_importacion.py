@@ -0,0 +1,115 @@
+# benchmarks/bench_importacion.py
+"""
+Benchmark del tiempo de importación de la API (arranque en frío de cada
+réplica), medido con `python -X importtime` en un proceso nuevo por
+repetición.
+
+Verifica además dos invariantes del arranque:
+- el total queda dentro del presupuesto (PRESUPUESTO_MS o --presupuesto-ms)
+- las dependencias pesadas que solo se usan en algunos endpoints
+  (Playwright, anthropic, httpx, duckduckgo-search) no se importan al
+  arrancar: se cargan en el primer uso.
+
+La suite (benchmarks/suite.py) vigila ambos y falla si se rompen;
+tests/test_importacion.py los verifica con pytest.
+
+Uso:
+    python -m benchmarks.bench_importacion [--modulo api.main] [--repeticiones 5]
+                                           [--presupuesto-ms 1500] [--json]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+from benchmarks import RAIZ_PROYECTO
+
+DIR_BACKEND = os.path.join(RAIZ_PROYECTO, "backend")
+PRESUPUESTO_MS = float(os.getenv("PRESUPUESTO_IMPORTACION_MS", "1500"))
+MODULOS_DIFERIDOS = ("playwright", "anthropic", "httpx", "duckduckgo_search")
+
+Linea = Tuple[str, int, int]  # (módulo, µs propios, µs acumulados)
+
+
+def importar(modulo: str = "api.main") -> List[Linea]:
+    """Importa `modulo` en un intérprete nuevo y devuelve las líneas de -X importtime"""
+    proceso = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modulo}"],
+        cwd=DIR_BACKEND, capture_output=True, text=True,
+        # Que importar no toque la base aunque alguien vuelva a crear tablas al importar
+        env={**os.environ, "CREAR_TABLAS_AL_INICIAR": "0"},
+    )
+    if proceso.returncode != 0:
+        raise RuntimeError(f"No se pudo importar {modulo}:\n{proceso.stderr[-2000:]}")
+    lineas = []
+    for linea in proceso.stderr.splitlines():
+        if not linea.startswith("import time:") or "|" not in linea or "self [us]" in linea:
+            continue
+        propio, acumulado, nombre = linea[len("import time:"):].split("|")
+        lineas.append((nombre.strip(), int(propio), int(acumulado)))
+    return lineas
+
+
+def por_paquete(lineas: List[Linea], top: int = 10) -> Dict[str, float]:
+    """ms propios sumados por paquete de primer nivel (fastapi, sqlalchemy, ...)"""
+    totales: Dict[str, int] = {}
+    for nombre, propio, _ in lineas:
+        paquete = nombre.split(".")[0]
+        totales[paquete] = totales.get(paquete, 0) + propio
+    mayores = sorted(totales.items(), key=lambda t: t[1], reverse=True)[:top]
+    return {paquete: round(us / 1000, 1) for paquete, us in mayores}
+
+
+def ejecutar(modulo: str = "api.main", repeticiones: int = 5, presupuesto_ms: float = PRESUPUESTO_MS) -> dict:
+    importar(modulo)  # precalienta el caché de bytecode
+    mediciones = [importar(modulo) for _ in range(repeticiones)]
+    totales = [next(acumulado for nombre, _, acumulado in lineas if nombre == modulo) / 1000
+               for lineas in mediciones]
+    mediana = statistics.median(totales)
+    importados = {nombre.split(".")[0] for nombre, _, _ in mediciones[0]}
+    diferidos = sorted(m for m in MODULOS_DIFERIDOS if m in importados)
+    return {
+        "benchmark": "importacion",
+        "modulo": modulo,
+        "repeticiones": repeticiones,
+        "ms_importacion": mediana,
+        "ms_importacion_min": min(totales),
+        "presupuesto_ms": presupuesto_ms,
+        "dentro_del_presupuesto": mediana <= presupuesto_ms,
+        "modulos": len(mediciones[0]),
+        "ms_por_paquete": por_paquete(mediciones[0]),
+        "diferidos_importados": diferidos,
+        "sin_importaciones_diferidas": not diferidos,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--modulo", default="api.main")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--presupuesto-ms", type=float, default=PRESUPUESTO_MS)
+    parser.add_argument("--json", action="store_true", help="Imprimir resultados en JSON")
+    args = parser.parse_args()
+
+    resultado = ejecutar(args.modulo, args.repeticiones, args.presupuesto_ms)
+    if args.json:
+        print(json.dumps(resultado, indent=2, ensure_ascii=False))
+    else:
+        estado = "✅" if resultado["dentro_del_presupuesto"] else "❌"
+        print(f"{estado} import {args.modulo}: {resultado['ms_importacion']:.0f} ms (mediana de {args.repeticiones}, "
+              f"mín {resultado['ms_importacion_min']:.0f} ms) - presupuesto {args.presupuesto_ms:.0f} ms, "
+              f"{resultado['modulos']} módulos")
+        for paquete, ms in resultado["ms_por_paquete"].items():
+            print(f"   {paquete:<24} {ms:>8.1f} ms")
+        if resultado["diferidos_importados"]:
+            print(f"❌ Se importan al arrancar: {', '.join(resultado['diferidos_importados'])}")
+    if not (resultado["dentro_del_presupuesto"] and resultado["sin_importaciones_diferidas"]):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+# benchmarks/bench_interprete_reglas.py
+"""
+Benchmark del intérprete local de reglas sobre un corpus etiquetado de
+descripciones (benchmarks/datos/reglas_etiquetadas.jsonl). Mide cobertura
+(reglas resueltas sin IA), exactitud de tipo y de parámetros sobre las que
+resuelve, y latencia por descripción.
+
+Una regla "aceptada" (confianza >= UMBRAL_CONFIANZA_LOCAL) con parámetros
+distintos a los etiquetados es un error que llega al usuario: el objetivo
+es que sean cero, aunque eso deje más reglas para la IA.
+
+Uso:
+    python -m benchmarks.bench_interprete_reglas [--repeticiones 200] [--json]
+"""
+
+import argparse
+import json
+import os
+import time
+
+from benchmarks import DIR_DATOS
+from servicios.interprete_reglas import UMBRAL_CONFIANZA_LOCAL, interpretar_regla
+
+
+def cargar_corpus(ruta: str = None) -> list:
+    """Descripciones etiquetadas (una por línea en JSONL)"""
+    ruta = ruta or os.path.join(DIR_DATOS, "reglas_etiquetadas.jsonl")
+    with open(ruta, encoding="utf-8") as f:
+        return [json.loads(linea) for linea in f if linea.strip()]
+
+
+def ejecutar(repeticiones: int = 200) -> dict:
+    corpus = cargar_corpus()
+
+    tipos_correctos = 0
+    aceptadas = []
+    campos_totales = campos_correctos = 0
+    errores_aceptados = []
+    for caso in corpus:
+        resultado = interpretar_regla(caso["descripcion"])
+        tipos_correctos += resultado["tipo_detectado"] == caso["tipo"]
+        if resultado["confianza"] < UMBRAL_CONFIANZA_LOCAL:
+            continue
+        aceptadas.append(caso)
+        esperado, obtenido = caso["parametros"], resultado["parametros"]
+        campos_totales += len(esperado)
+        campos_correctos += sum(obtenido.get(k) == v for k, v in esperado.items())
+        if resultado["tipo_detectado"] != caso["tipo"] or obtenido != esperado:
+            errores_aceptados.append({"descripcion": caso["descripcion"], "esperado": esperado, "obtenido": obtenido})
+
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        for caso in corpus:
+            interpretar_regla(caso["descripcion"])
+    us_por_regla = (time.perf_counter() - inicio) * 1e6 / (repeticiones * len(corpus))
+
+    return {
+        "benchmark": "interprete_reglas",
+        "reglas": len(corpus),
+        "umbral_confianza": UMBRAL_CONFIANZA_LOCAL,
+        "exactitud_tipo": tipos_correctos / len(corpus),
+        "aceptadas": len(aceptadas),
+        "cobertura": len(aceptadas) / len(corpus),
+        "exactitud_aceptadas": (len(aceptadas) - len(errores_aceptados)) / len(aceptadas) if aceptadas else None,
+        "exactitud_campos_aceptadas": campos_correctos / campos_totales if campos_totales else None,
+        "us_por_regla": us_por_regla,
+        "errores_aceptados": errores_aceptados,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticiones", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="Imprimir resultados en JSON")
+    args = parser.parse_args()
+
+    resultado = ejecutar(args.repeticiones)
+    if args.json:
+        print(json.dumps(resultado, indent=2, ensure_ascii=False))
+        return
+
+    print(f"Reglas etiquetadas: {resultado['reglas']} - umbral de confianza: {resultado['umbral_confianza']}")
+    print(f"Tipo correcto: {resultado['exactitud_tipo']:.0%}")
+    print(f"Resueltas sin IA: {resultado['aceptadas']} ({resultado['cobertura']:.0%})")
+    if resultado["aceptadas"]:
+        print(f"Exactas entre las resueltas: {resultado['exactitud_aceptadas']:.0%} "
+              f"(campos: {resultado['exactitud_campos_aceptadas']:.0%})")
+    print(f"Latencia: {resultado['us_por_regla']:.0f} µs por regla")
+    for error in resultado["errores_aceptados"]:
+        print(f"  ❌ '{error['descripcion']}'")
+        print(f"     esperado: {json.dumps(error['esperado'], ensure_ascii=False)}")
+        print(f"     obtenido: {json.dumps(error['obtenido'], ensure_ascii=False)}")
+
+
+if __name__ == "__main__":
+    main()
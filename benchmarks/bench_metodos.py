@@ -0,0 +1,146 @@
+# benchmarks/bench_metodos.py
+"""
+Benchmark de los métodos de valuación por lotes: valúa N vehículos con
+sus comparables en una sola llamada (con y sin bootstrap) y compara cada
+método contra NumPy fila por fila para verificar que el resultado es exacto.
+
+Uso:
+    python -m benchmarks.bench_metodos [--vehiculos 5000] [--remuestras 200] [--json]
+"""
+
+import argparse
+import json
+import time
+
+import numpy as np
+
+import benchmarks  # noqa: F401  (agrega backend/ al path)
+from services.motor.comparables import Comparables
+from services.motor.metodos import matriz_precios, pesos_ponderacion, valor_regla, valuar_lote
+
+
+REGLAS_BENCHMARK = [
+    {"codigo": "MED", "parametros": {"metodo": "mediana", "peso_en_calculo_final": 1.0}},
+    {"codigo": "POND", "parametros": {
+        "metodo": "promedio_ponderado", "peso_en_calculo_final": 0.5,
+        "pesos": {"antiguedad_publicacion": 1.0, "verificacion_vendedor": 1.5, "similitud_km": 1.2}
+    }},
+    {"codigo": "COMB", "parametros": {
+        "metodo": "combinado", "peso_en_calculo_final": 1.0,
+        "combinacion": [{"metodo": "mediana", "peso": 0.7}, {"metodo": "promedio", "peso": 0.3}]
+    }},
+]
+
+
+def lotes_sinteticos(vehiculos: int, semilla: int = 11) -> tuple:
+    """
+    Entre 3 y 60 comparables por vehículo, precios redondeados a $10.000.
+    Devuelve los comparables y el km de cada vehículo.
+    """
+    rng = np.random.default_rng(semilla)
+    lotes, km_vehiculos = [], []
+    for _ in range(vehiculos):
+        n = int(rng.integers(3, 61))
+        base = rng.uniform(8e6, 40e6)
+        km_ref = float(rng.integers(10_000, 150_000))
+        precio = np.round(rng.normal(base, base * 0.08, n), -4)
+        lotes.append(Comparables.desde_columnas(
+            precio,
+            km=km_ref + rng.normal(0, 15_000, n),
+            antiguedad_dias=rng.uniform(0, 60, n),
+            verificado=rng.random(n) > 0.2,
+        ))
+        km_vehiculos.append(km_ref)
+    return lotes, km_vehiculos
+
+
+def _referencia_numpy(params: dict, precios: np.ndarray, pesos: np.ndarray) -> float:
+    metodo = params["metodo"]
+    if metodo == "mediana":
+        return float(np.median(precios))
+    if metodo == "promedio":
+        return float(np.mean(precios))
+    if metodo == "promedio_ponderado":
+        return float(np.average(precios, weights=pesos))
+    if metodo == "percentil":
+        return float(np.percentile(precios, params["percentil"]))
+    if metodo == "moda":
+        unicos, conteos = np.unique(precios, return_counts=True)
+        return float(unicos[np.argmax(conteos)])
+    if metodo == "minimo":
+        return float(np.min(precios))
+    return float(np.max(precios))
+
+
+def verificar_exactitud(lotes, km_vehiculos, muestras: int = 500) -> dict:
+    """Máximo error relativo de cada método contra NumPy sobre `muestras` vehículos"""
+    lotes, km_vehiculos = lotes[:muestras], km_vehiculos[:muestras]
+    precios = matriz_precios([c.precio for c in lotes])
+    errores = {}
+    for params in ({"metodo": "mediana"}, {"metodo": "promedio"}, {"metodo": "percentil", "percentil": 75},
+                   {"metodo": "moda"}, {"metodo": "minimo"}, {"metodo": "maximo"},
+                   {"metodo": "promedio_ponderado", "pesos": REGLAS_BENCHMARK[1]["parametros"]["pesos"]}):
+        pesos = [pesos_ponderacion(c, params, km) for c, km in zip(lotes, km_vehiculos)]
+        lote = valor_regla(params, precios, np.nan_to_num(matriz_precios(pesos)))
+        esperado = np.array([_referencia_numpy(params, c.precio, p) for c, p in zip(lotes, pesos)])
+        errores[params["metodo"]] = float(np.max(np.abs(lote - esperado) / esperado))
+    return errores
+
+
+def ejecutar(vehiculos: int = 5000, remuestras: int = 200) -> dict:
+    lotes, km_vehiculos = lotes_sinteticos(vehiculos)
+    vehiculos_lote = [{"kilometraje": km} for km in km_vehiculos]
+
+    inicio = time.perf_counter()
+    valuar_lote(REGLAS_BENCHMARK, lotes, vehiculos_lote, remuestras=0)
+    ms_sin_bootstrap = (time.perf_counter() - inicio) * 1e3
+
+    inicio = time.perf_counter()
+    resultado = valuar_lote(REGLAS_BENCHMARK, lotes, vehiculos_lote, semilla=1, remuestras=remuestras)
+    ms_con_bootstrap = (time.perf_counter() - inicio) * 1e3
+
+    # Referencia: un vehículo por llamada
+    inicio = time.perf_counter()
+    for comparables, vehiculo in zip(lotes[:500], vehiculos_lote[:500]):
+        valuar_lote(REGLAS_BENCHMARK, [comparables], [vehiculo], semilla=1, remuestras=remuestras)
+    ms_por_vehiculo = (time.perf_counter() - inicio) * 1e3 / 500
+
+    confianzas = {c: int((resultado["confianza"] == c).sum()) for c in ("ALTA", "MEDIA", "BAJA")}
+    return {
+        "benchmark": "metodos",
+        "vehiculos": vehiculos,
+        "remuestras": remuestras,
+        "ms_sin_bootstrap": ms_sin_bootstrap,
+        "ms_con_bootstrap": ms_con_bootstrap,
+        "ms_por_vehiculo_lote": ms_con_bootstrap / vehiculos,
+        "ms_por_vehiculo_individual": ms_por_vehiculo,
+        "confianza": confianzas,
+        "error_relativo_max": verificar_exactitud(lotes, km_vehiculos),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--vehiculos", type=int, default=5000)
+    parser.add_argument("--remuestras", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="Imprimir resultados en JSON")
+    args = parser.parse_args()
+
+    resultado = ejecutar(args.vehiculos, args.remuestras)
+    if args.json:
+        print(json.dumps(resultado, indent=2, ensure_ascii=False))
+        return
+
+    print(f"Vehículos: {resultado['vehiculos']:,} - remuestras bootstrap: {resultado['remuestras']}")
+    print(f"Lote sin bootstrap: {resultado['ms_sin_bootstrap']:.1f} ms")
+    print(f"Lote con bootstrap: {resultado['ms_con_bootstrap']:.1f} ms "
+          f"({resultado['ms_por_vehiculo_lote']:.3f} ms por vehículo)")
+    print(f"Un vehículo por llamada: {resultado['ms_por_vehiculo_individual']:.3f} ms por vehículo")
+    print(f"Confianza: {resultado['confianza']}")
+    print("Error relativo máximo contra NumPy:")
+    for metodo, error in resultado["error_relativo_max"].items():
+        print(f"  {metodo:<20}{error:.2e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+# benchmarks/bench_navegacion.py
+"""
+Benchmark de la búsqueda agentic de BrowserService reproduciendo
+navegaciones grabadas (HAR + AXTree + decisiones de la IA por paso, ver
+services/grabacion_navegacion.py): corre offline, headless y sin pausas,
+informa los tiempos de cada paso (AXTree, limpieza, IA, acción) y verifica
+que las publicaciones extraídas sean las mismas que en la grabación.
+
+Grabar una navegación real (navegador visible, IA real):
+    python -m benchmarks.bench_navegacion --grabar https://www.kavak.com/ar/usados \\
+        --marca Chevrolet --modelo Agile --año 2014 [--proveedor ollama] [--modelo-ia llama3.2]
+
+Reproducir todas las grabaciones del directorio:
+    python -m benchmarks.bench_navegacion [--dir benchmarks/datos/navegacion] [--json]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from types import SimpleNamespace
+
+from benchmarks import DIR_DATOS
+from services.browser_service import BrowserService
+from services.grabacion_navegacion import ARCHIVO_PASOS
+
+DIR_GRABACIONES = os.path.join(DIR_DATOS, "navegacion")
+
+
+async def _recorrer(servicio: BrowserService, url_base: str, vehiculo, filtros_reglas: list,
+                    proveedor: str, modelo: str, api_key: str = None, mostrar: bool = False) -> list:
+    """Ejecuta buscar_inteligente y devuelve las publicaciones halladas"""
+    publicaciones = []
+    async for update in servicio.buscar_inteligente(url_base, vehiculo, filtros_reglas,
+                                                    proveedor=proveedor, modelo=modelo, api_key=api_key):
+        if mostrar:
+            print(update["step"])
+        publicaciones.extend(update.get("data", []))
+    return publicaciones
+
+
+def grabar(url_base: str, vehiculo, filtros_reglas: list, proveedor: str, modelo: str,
+           api_key: str = None, directorio: str = DIR_GRABACIONES):
+    servicio = BrowserService(modo_navegacion="grabar", dir_grabaciones=directorio)
+    asyncio.run(_recorrer(servicio, url_base, vehiculo, filtros_reglas, proveedor, modelo, api_key, mostrar=True))
+    print(f"📼 Grabación en {servicio.grabacion.directorio} ({len(servicio.grabacion.pasos)} pasos)")
+
+
+def reproducir(directorio_sitio: str) -> dict:
+    """Reproduce una grabación y la compara contra lo grabado"""
+    with open(os.path.join(directorio_sitio, ARCHIVO_PASOS), encoding="utf-8") as f:
+        metadata = json.load(f)["metadata"]
+
+    servicio = BrowserService(modo_navegacion="reproducir", dir_grabaciones=os.path.dirname(directorio_sitio))
+    inicio = time.perf_counter()
+    publicaciones = asyncio.run(_recorrer(
+        servicio, metadata["url_base"], SimpleNamespace(**metadata["vehiculo"]),
+        metadata.get("filtros_reglas", []), metadata.get("proveedor"), metadata.get("modelo")
+    ))
+    segundos = time.perf_counter() - inicio
+
+    grabadas = {p["url"] for p in metadata.get("publicaciones") or []}
+    obtenidas = {p["url"] for p in publicaciones}
+    return {
+        "grabacion": os.path.basename(directorio_sitio),
+        "pasos": [{"paso": p["paso"], "objetivo": p["objetivo"], "nodos_axtree": p["nodos_axtree"],
+                   **p["tiempos_ms"]} for p in servicio.grabacion.pasos],
+        "segundos": segundos,
+        "publicaciones_grabadas": len(grabadas),
+        "publicaciones_obtenidas": len(obtenidas),
+        "coinciden": grabadas == obtenidas,
+    }
+
+
+def ejecutar(directorio: str = DIR_GRABACIONES) -> dict:
+    sitios = sorted(
+        os.path.join(directorio, d) for d in (os.listdir(directorio) if os.path.isdir(directorio) else [])
+        if os.path.exists(os.path.join(directorio, d, ARCHIVO_PASOS))
+    )
+    grabaciones = [reproducir(sitio) for sitio in sitios]
+    pasos = [p for g in grabaciones for p in g["pasos"]]
+    return {
+        "benchmark": "navegacion",
+        "grabaciones": grabaciones,
+        "pasos": len(pasos),
+        "segundos_total": sum(g["segundos"] for g in grabaciones),
+        "ms_por_paso": sum(g["segundos"] for g in grabaciones) * 1e3 / len(pasos) if pasos else None,
+        "publicaciones_coinciden": all(g["coinciden"] for g in grabaciones),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dir", default=DIR_GRABACIONES, help="Directorio de grabaciones")
+    parser.add_argument("--grabar", metavar="URL", help="Grabar una navegación real sobre URL")
+    parser.add_argument("--marca", default="Chevrolet")
+    parser.add_argument("--modelo", default="Agile")
+    parser.add_argument("--año", type=int, default=2014)
+    parser.add_argument("--proveedor", default="ollama")
+    parser.add_argument("--modelo-ia", default="llama3.2")
+    parser.add_argument("--api-key", default=None)
+    parser.add_argument("--json", action="store_true", help="Imprimir resultados en JSON")
+    args = parser.parse_args()
+
+    if args.grabar:
+        vehiculo = SimpleNamespace(marca=args.marca, modelo=args.modelo, año=args.año)
+        filtros = [{"codigo": f"FILTRO_{c.upper()}", "parametros": {"campo": c}} for c in ("marca", "modelo", "año")]
+        grabar(args.grabar, vehiculo, filtros, args.proveedor, args.modelo_ia, args.api_key, args.dir)
+        return
+
+    resultado = ejecutar(args.dir)
+    if args.json:
+        print(json.dumps(resultado, indent=2, ensure_ascii=False))
+        return
+
+    if not resultado["grabaciones"]:
+        print(f"No hay grabaciones en {args.dir} (grabar con --grabar URL)")
+        return
+    for grabacion in resultado["grabaciones"]:
+        estado = "✅" if grabacion["coinciden"] else "❌"
+        print(f"{estado} {grabacion['grabacion']}: {grabacion['segundos']:.1f} s - publicaciones "
+              f"{grabacion['publicaciones_obtenidas']}/{grabacion['publicaciones_grabadas']}")
+        for paso in grabacion["pasos"]:
+            tiempos = " ".join(f"{k}={v:.0f}ms" for k, v in paso.items() if k not in ("paso", "objetivo", "nodos_axtree"))
+            print(f"   {paso['paso']:>2}. {paso['objetivo'][:50]:<50} {paso['nodos_axtree']:>6} nodos  {tiempos}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# benchmarks/bench_parseo_json.py
+"""
+Benchmark de extracción de JSON sobre un corpus de respuestas grabadas de IA.
+Compara el extractor de una pasada contra la regex codiciosa anterior.
+
+Uso:
+    python -m benchmarks.bench_parseo_json [--repeticiones 200] [--json]
+"""
+
+import argparse
+import json
+import os
+import re
+import time
+
+from benchmarks import DIR_DATOS
+from services.parseo_json import extraer_json
+
+
+def _extraer_regex_legado(texto: str):
+    """Implementación anterior (regex codiciosa), solo para comparar"""
+    texto = texto.replace("```json", "").replace("```", "").strip()
+    try:
+        match = re.search(r'\{[\s\S]*\}', texto)
+        if match:
+            return json.loads(match.group())
+    except json.JSONDecodeError:
+        pass
+    return None
+
+
+def cargar_corpus(ruta: str = None) -> list:
+    """Carga las respuestas grabadas (una por línea en JSONL)"""
+    ruta = ruta or os.path.join(DIR_DATOS, "respuestas_ia.jsonl")
+    with open(ruta, encoding="utf-8") as f:
+        return [json.loads(linea) for linea in f if linea.strip()]
+
+
+def _respuesta_grande(corpus: list, tamano: int = 200_000) -> str:
+    """Respuesta sintética grande: prosa con llaves y un JSON al final"""
+    prosa = "El {precio} de referencia surge de {n} publicaciones. " * (tamano // 60)
+    return prosa + corpus[0]["texto"] + "\nFin del análisis {ok}."
+
+
+def _medir(funcion, textos: list, repeticiones: int) -> float:
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        for texto in textos:
+            funcion(texto)
+    return (time.perf_counter() - inicio) / (repeticiones * len(textos))
+
+
+def ejecutar(repeticiones: int = 200) -> dict:
+    corpus = cargar_corpus()
+    textos = [c["texto"] for c in corpus]
+
+    casos = []
+    for c in corpus:
+        nuevo = extraer_json(c["texto"], claves_esperadas=["precio_sugerido"])
+        legado = _extraer_regex_legado(c["texto"])
+        casos.append({
+            "caso": c["caso"],
+            "proveedor": c["proveedor"],
+            "nuevo_ok": bool(nuevo and "precio_sugerido" in nuevo),
+            "legado_ok": bool(legado and "precio_sugerido" in legado),
+        })
+
+    grande = _respuesta_grande(corpus)
+    rep_grande = max(1, repeticiones // 50)
+
+    return {
+        "benchmark": "parseo_json",
+        "corpus": len(corpus),
+        "exito_nuevo": sum(c["nuevo_ok"] for c in casos),
+        "exito_legado": sum(c["legado_ok"] for c in casos),
+        "us_por_respuesta_nuevo": _medir(extraer_json, textos, repeticiones) * 1e6,
+        "us_por_respuesta_legado": _medir(_extraer_regex_legado, textos, repeticiones) * 1e6,
+        "ms_respuesta_grande_nuevo": _medir(extraer_json, [grande], rep_grande) * 1e3,
+        "ms_respuesta_grande_legado": _medir(_extraer_regex_legado, [grande], rep_grande) * 1e3,
+        "tamano_respuesta_grande": len(grande),
+        "casos": casos,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeticiones", type=int, default=200)
+    parser.add_argument("--json", action="store_true", help="Imprimir resultados en JSON")
+    args = parser.parse_args()
+
+    resultado = ejecutar(args.repeticiones)
+    if args.json:
+        print(json.dumps(resultado, indent=2, ensure_ascii=False))
+        return
+
+    print(f"Corpus: {resultado['corpus']} respuestas")
+    print(f"{'caso':<25}{'proveedor':<10}{'nuevo':>8}{'legado':>8}")
+    for c in resultado["casos"]:
+        print(f"{c['caso']:<25}{c['proveedor']:<10}{'✓' if c['nuevo_ok'] else '✗':>8}{'✓' if c['legado_ok'] else '✗':>8}")
+    print(f"\nÉxito: nuevo {resultado['exito_nuevo']}/{resultado['corpus']} - legado {resultado['exito_legado']}/{resultado['corpus']}")
+    print(f"Tiempo medio: nuevo {resultado['us_por_respuesta_nuevo']:.1f} µs - legado {resultado['us_por_respuesta_legado']:.1f} µs")
+    print(f"Respuesta de {resultado['tamano_respuesta_grande']:,} caracteres: "
+          f"nuevo {resultado['ms_respuesta_grande_nuevo']:.1f} ms - legado {resultado['ms_respuesta_grande_legado']:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+# benchmarks/bench_reglas_bulk.py
+"""
+Benchmark de la carga de un conjunto de reglas: crear_regla una por una
+(una consulta de unicidad, un flush y un commit por regla, más el análisis
+de conflictos) contra importar_reglas (POST /reglas/bulk: validación previa
+e inserción por lotes en una sola transacción).
+
+Cada medición usa una base SQLite nueva en un archivo temporal, así el costo
+de los commits (fsync) entra en la cuenta. Las reglas rotan las plantillas
+de base_sintetica. Mide también la exportación (GET /reglas/exportar) y que
+importar lo exportado en una base vacía reproduzca el mismo conjunto.
+
+Uso:
+    python -m benchmarks.bench_reglas_bulk [--reglas 14 500] [--json]
+"""
+
+import argparse
+import contextlib
+import json
+import os
+import statistics
+import time
+
+from benchmarks.base_sintetica import PLANTILLAS_REGLAS, BaseSintetica
+from models import TipoRegla
+from services.agente_service import GeneradorPromptDinamico
+from services.reglas_service import ReglasService
+
+REPETICIONES_EXPORTAR = 10
+
+
+def generar_reglas(cantidad: int) -> list:
+    reglas = []
+    for i in range(cantidad):
+        tipo, parametros = PLANTILLAS_REGLAS[i % len(PLANTILLAS_REGLAS)]
+        reglas.append({"codigo": f"BULK_{tipo.name}_{i:05d}", "nombre": f"Regla importada {i}",
+                       "tipo": tipo.value, "parametros": parametros(i), "orden": i})
+    return reglas
+
+
+def _ms(funcion) -> float:
+    # Las advertencias de conflicto se imprimen por regla: a /dev/null para no ensuciar la salida
+    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+        inicio = time.perf_counter()
+        funcion()
+        return (time.perf_counter() - inicio) * 1e3
+
+
+def medir_uno_a_uno(reglas: list) -> float:
+    with BaseSintetica() as base, base.Sesion() as db:
+        service = ReglasService(db)
+        return _ms(lambda: [service.crear_regla(
+            codigo=r["codigo"], nombre=r["nombre"], tipo=TipoRegla(r["tipo"]),
+            parametros=r["parametros"], usuario_id=base.admin_id, orden=r["orden"]
+        ) for r in reglas])
+
+
+def medir_bulk(reglas: list) -> dict:
+    with BaseSintetica() as base, base.Sesion() as db:
+        service = ReglasService(db)
+        ms_bulk = _ms(lambda: service.importar_reglas(reglas, usuario_id=base.admin_id))
+        exportado = []
+        # Exportar tarda ~1 ms con pocas reglas: mediana de varias para que el ruido no la domine
+        ms_exportar = statistics.median(
+            _ms(lambda: exportado.append(GeneradorPromptDinamico(db).exportar_reglas("json")))
+            for _ in range(REPETICIONES_EXPORTAR)
+        )
+
+    # Ida y vuelta: lo exportado se importa en otra base y se vuelve a exportar igual
+    reglas_exportadas = json.loads(exportado[0])["reglas"]
+    with BaseSintetica() as base, base.Sesion() as db:
+        service = ReglasService(db)
+        _ms(lambda: service.importar_reglas(reglas_exportadas, usuario_id=base.admin_id))
+        reexportadas = service.exportar_reglas()
+    return {"ms_bulk": ms_bulk, "ms_exportar": ms_exportar, "ida_y_vuelta": reexportadas == reglas_exportadas}
+
+
+def ejecutar(reglas=(14, 500)) -> dict:
+    resultado = {"benchmark": "reglas_bulk", "reglas": list(reglas)}
+    ida_y_vuelta = True
+    for cantidad in reglas:
+        conjunto = generar_reglas(cantidad)
+        uno_a_uno = medir_uno_a_uno(conjunto)
+        bulk = medir_bulk(conjunto)
+        ida_y_vuelta = ida_y_vuelta and bulk["ida_y_vuelta"]
+        resultado[f"ms_uno_a_uno_{cantidad}"] = uno_a_uno
+        resultado[f"ms_bulk_{cantidad}"] = bulk["ms_bulk"]
+        resultado[f"ms_exportar_{cantidad}"] = bulk["ms_exportar"]
+        resultado[f"aceleracion_{cantidad}"] = uno_a_uno / bulk["ms_bulk"]
+    resultado["ida_y_vuelta"] = ida_y_vuelta
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--reglas", type=int, nargs="+", default=[14, 500], help="Tamaños del conjunto de reglas")
+    parser.add_argument("--json", action="store_true", help="Imprimir resultados en JSON")
+    args = parser.parse_args()
+
+    resultado = ejecutar(args.reglas)
+    if args.json:
+        print(json.dumps(resultado, indent=2, ensure_ascii=False))
+        return
+    for cantidad in args.reglas:
+        print(f"{cantidad:>6} reglas: una por una {resultado[f'ms_uno_a_uno_{cantidad}']:.0f} ms - "
+              f"bulk {resultado[f'ms_bulk_{cantidad}']:.0f} ms (x{resultado[f'aceleracion_{cantidad}']:.1f}) - "
+              f"exportar {resultado[f'ms_exportar_{cantidad}']:.1f} ms")
+    print(f"Exportar e importar reproduce el conjunto: {'sí' if resultado['ida_y_vuelta'] else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+# benchmarks/bench_replay.py
+"""
+Benchmark del replay de valuaciones: genera N valuaciones offline como las
+guarda la API (configuración con semilla y fecha, publicaciones analizadas
+y resultado), verifica que el replay las reproduce exactamente y mide un
+"what-if" con un ajuste de cálculo modificado, en un proceso y con el pool
+de workers.
+
+Uso:
+    python -m benchmarks.bench_replay [--valuaciones 2000] [--workers 0] [--json]
+"""
+
+import argparse
+import copy
+import json
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+import benchmarks  # noqa: F401  (agrega backend/ al path)
+from benchmarks.bench_valuacion_offline import CONFIG_EJEMPLO, VEHICULO_EJEMPLO
+from services.motor import FuenteHistorica, PipelineValuacion
+from services.motor.replay import repetir_lote, resumen_resultado
+
+
+# Cambio candidato: más inflación mensual
+REGLAS_WHAT_IF = [
+    {"codigo": "AJUSTE_INFLACION", "tipo": "ajuste_calculo", "orden": 0,
+     "parametros": {"tipo": "inflacion", "porcentaje": 8, "periodo_dias": 30}},
+]
+
+
+def snapshots_sinteticos(valuaciones: int, publicaciones: int = 60, semilla: int = 7) -> list:
+    """Valuaciones offline ejecutadas con el pipeline y guardadas como snapshot"""
+    rnd = random.Random(semilla)
+    inicio = datetime(2026, 1, 1)
+    snapshots = []
+    for v in range(valuaciones):
+        vehiculo = {**VEHICULO_EJEMPLO,
+                    "año": VEHICULO_EJEMPLO["año"] + rnd.randint(-2, 2),
+                    "kilometraje": VEHICULO_EJEMPLO["kilometraje"] + rnd.randint(-20000, 20000)}
+        ahora = inicio + timedelta(hours=v)
+        config = copy.deepcopy(CONFIG_EJEMPLO)
+        config["metadata"] = {"generado_en": ahora.isoformat(), "semilla_muestreo": rnd.getrandbits(32)}
+        registros = [
+            {
+                "fuente": rnd.choice(["kavak.com", "autos.mercadolibre.com.ar"]),
+                "precio": round(rnd.gauss(18_000_000, 2_500_000), -3),
+                "url": f"https://ejemplo.com/auto/{v}-{p}",
+                "año": vehiculo["año"] + rnd.randint(-2, 2),
+                "km": vehiculo["kilometraje"] + rnd.randint(-25000, 25000),
+                "verificado": rnd.random() > 0.1,
+                "fecha_captura": (ahora - timedelta(days=rnd.randint(0, 60))).isoformat(),
+            }
+            for p in range(publicaciones)
+        ]
+        resultado = PipelineValuacion(config, vehiculo, ahora).ejecutar(fuente=FuenteHistorica(registros))
+        snapshots.append({
+            "id": f"bench-{v}",
+            "fecha": ahora.isoformat(),
+            "vehiculo": vehiculo,
+            "configuracion": config,
+            "publicaciones": resultado["publicaciones"],
+            "guardado": resumen_resultado(resultado),
+        })
+    return snapshots
+
+
+def ejecutar(valuaciones: int = 2000, workers: int = 0) -> dict:
+    snapshots = snapshots_sinteticos(valuaciones)
+    workers = workers or os.cpu_count() or 1
+
+    replay = repetir_lote(snapshots, workers=1)
+
+    inicio = time.perf_counter()
+    repetir_lote(snapshots, REGLAS_WHAT_IF, workers=1)
+    ms_un_proceso = (time.perf_counter() - inicio) * 1e3
+
+    inicio = time.perf_counter()
+    what_if = repetir_lote(snapshots, REGLAS_WHAT_IF, workers=workers)
+    ms_pool = (time.perf_counter() - inicio) * 1e3
+
+    return {
+        "benchmark": "replay",
+        "valuaciones": valuaciones,
+        "reproducidas": replay["resumen"]["valuaciones"] - replay["resumen"]["con_cambios"]
+                        - replay["resumen"]["con_error"],
+        "what_if_con_cambios": what_if["resumen"]["con_cambios"],
+        "what_if_diferencia_pct_mediana": what_if["resumen"].get("diferencia_pct_mediana"),
+        "ms_un_proceso": ms_un_proceso,
+        "workers": what_if["resumen"]["workers"],
+        "ms_pool": ms_pool,
+        "ms_por_valuacion": ms_pool / valuaciones,
+        "segundos_10k_estimado": ms_pool / valuaciones * 10,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--valuaciones", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=0, help="Procesos del pool (0 = uno por CPU)")
+    parser.add_argument("--json", action="store_true", help="Imprimir resultados en JSON")
+    args = parser.parse_args()
+
+    resultado = ejecutar(args.valuaciones, args.workers)
+    if args.json:
+        print(json.dumps(resultado, indent=2, ensure_ascii=False))
+        return
+
+    print(f"Valuaciones: {resultado['valuaciones']:,} - reproducidas exactamente: {resultado['reproducidas']:,}")
+    print(f"What-if: {resultado['what_if_con_cambios']:,} con cambios "
+          f"(mediana {resultado['what_if_diferencia_pct_mediana']:+.2f}%)")
+    print(f"Un proceso: {resultado['ms_un_proceso']:.0f} ms")
+    print(f"Pool de {resultado['workers']} workers: {resultado['ms_pool']:.0f} ms "
+          f"({resultado['ms_por_valuacion']:.2f} ms por valuación, "
+          f"~{resultado['segundos_10k_estimado']:.1f} s cada 10k)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+# benchmarks/bench_valuacion_offline.py
+"""
+Benchmark de la valuación offline (comparables almacenados + pipeline de reglas).
+Crea una base SQLite en memoria con valuaciones históricas sintéticas y mide
+la carga de comparables y la ejecución del pipeline. Objetivo: < 50 ms.
+
+Uso:
+    python -m benchmarks.bench_valuacion_offline [--valuaciones 200] [--repeticiones 50] [--json]
+"""
+
+import argparse
+import json
+import random
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+import benchmarks  # noqa: F401  (agrega backend/ al path)
+from models import Usuario, Valuacion, Vehiculo, obtener_session
+from services.motor import FuenteHistorica, PipelineValuacion, cargar_comparables_historicos
+
+
+OBJETIVO_MS = 50.0
+
+# Mismas reglas que la configuración inicial (/setup/inicial)
+CONFIG_EJEMPLO = {
+    "fuentes": [
+        {"codigo": "FUENTE_KAVAK", "parametros": {"url": "kavak.com", "prioridad": 1}},
+        {"codigo": "FUENTE_ML", "parametros": {"url": "autos.mercadolibre.com.ar", "prioridad": 2}},
+    ],
+    "filtros_busqueda": [
+        {"codigo": "FILTRO_AÑO", "parametros": {"campo": "año", "operador": "entre", "valor": [-1, 1], "relativo": True}},
+        {"codigo": "FILTRO_KM", "parametros": {"campo": "km", "operador": "entre", "valor": [-10000, 10000], "relativo": True}},
+    ],
+    "depuracion": [
+        {"codigo": "DEPURAR_BAJOS", "parametros": {"accion": "eliminar", "cantidad": 5, "extremo": "inferior"}},
+        {"codigo": "DEPURAR_ALTOS", "parametros": {"accion": "eliminar", "cantidad": 5, "extremo": "superior"}},
+        {"codigo": "DEPURAR_NO_VERIFICADOS", "parametros": {"accion": "eliminar", "criterio": "usuario_no_verificado"}},
+    ],
+    "muestreo": [
+        {"codigo": "MUESTREO_20", "parametros": {"metodo": "aleatorio", "cantidad": 20}},
+    ],
+    "puntos_control": [
+        {"codigo": "CONTROL_MIN_5", "parametros": {"umbral_minimo": 5, "accion": "ampliar",
+                                                   "nuevos_parametros": {"año": [-2, 2], "km": [-15000, 15000]}}},
+    ],
+    "metodos_valuacion": [
+        {"codigo": "METODO_MEDIANA", "parametros": {"metodo": "mediana"}},
+    ],
+    "ajustes_calculo": [
+        {"codigo": "AJUSTE_INFLACION", "parametros": {"tipo": "inflacion", "porcentaje": 5, "periodo_dias": 30}},
+    ],
+    "metadata": {},
+}
+
+VEHICULO_EJEMPLO = {"marca": "Toyota", "modelo": "Corolla", "año": 2020, "kilometraje": 50000}
+
+
+def crear_base_sintetica(valuaciones: int, publicaciones_por_valuacion: int = 30, semilla: int = 1):
+    """Base en memoria con valuaciones históricas del vehículo de ejemplo"""
+    rnd = random.Random(semilla)
+    db = obtener_session("sqlite:///:memory:")
+    usuario = Usuario(email="bench@empresa.com", nombre="Bench", apellido="Offline")
+    db.add(usuario)
+    db.flush()
+
+    ahora = datetime.utcnow()
+    for v in range(valuaciones):
+        vehiculo = Vehiculo(
+            marca=VEHICULO_EJEMPLO["marca"], modelo=VEHICULO_EJEMPLO["modelo"],
+            año=VEHICULO_EJEMPLO["año"] + rnd.randint(-2, 2),
+            kilometraje=VEHICULO_EJEMPLO["kilometraje"] + rnd.randint(-20000, 20000)
+        )
+        db.add(vehiculo)
+        db.flush()
+        publicaciones = [
+            {
+                "fuente": rnd.choice(["kavak.com", "autos.mercadolibre.com.ar", "autocosmos.com.ar"]),
+                "precio": round(rnd.gauss(18_000_000, 2_500_000), -3),
+                "url": f"https://ejemplo.com/auto/{v}-{p}",
+                "titulo": f"Toyota Corolla {v}-{p}",
+                "verificado": rnd.random() > 0.1,
+                "incluida": True,
+            }
+            for p in range(publicaciones_por_valuacion)
+        ]
+        db.add(Valuacion(
+            vehiculo_id=vehiculo.id, usuario_id=usuario.id,
+            publicaciones_analizadas=publicaciones,
+            fecha=ahora - timedelta(days=rnd.randint(0, 120))
+        ))
+    db.commit()
+    return db
+
+
+def valuar(db) -> dict:
+    fuente = FuenteHistorica(cargar_comparables_historicos(db, VEHICULO_EJEMPLO["marca"], VEHICULO_EJEMPLO["modelo"]))
+    return PipelineValuacion(CONFIG_EJEMPLO, VEHICULO_EJEMPLO).ejecutar(fuente=fuente)
+
+
+def ejecutar(valuaciones: int = 200, repeticiones: int = 50) -> dict:
+    db = crear_base_sintetica(valuaciones)
+    inicio = time.perf_counter()
+    primero = valuar(db)
+    ms_sin_cache = (time.perf_counter() - inicio) * 1e3
+
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        resultado = valuar(db)
+        tiempos.append((time.perf_counter() - inicio) * 1e3)
+
+    tiempos = np.array(tiempos)
+    return {
+        "benchmark": "valuacion_offline",
+        "valuaciones_historicas": valuaciones,
+        "comparables": primero["analisis"]["resultados_iniciales"],
+        "determinista": resultado["precio_sugerido"] == primero["precio_sugerido"],
+        "precio_sugerido": primero["precio_sugerido"],
+        "ms_sin_cache": ms_sin_cache,
+        "ms_p50": float(np.percentile(tiempos, 50)),
+        "ms_p95": float(np.percentile(tiempos, 95)),
+        "objetivo_ms": OBJETIVO_MS,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--valuaciones", type=int, default=200)
+    parser.add_argument("--repeticiones", type=int, default=50)
+    parser.add_argument("--json", action="store_true", help="Imprimir resultados en JSON")
+    args = parser.parse_args()
+
+    resultado = ejecutar(args.valuaciones, args.repeticiones)
+    if args.json:
+        print(json.dumps(resultado, indent=2, ensure_ascii=False))
+        return
+
+    print(f"Valuaciones históricas: {resultado['valuaciones_historicas']} "
+          f"({resultado['comparables']} comparables únicos)")
+    print(f"Precio sugerido: ${resultado['precio_sugerido']:,} - determinista: {resultado['determinista']}")
+    print(f"Primera llamada (sin cache de comparables): {resultado['ms_sin_cache']:.1f} ms")
+    print(f"Tiempo: p50 {resultado['ms_p50']:.1f} ms - p95 {resultado['ms_p95']:.1f} ms "
+          f"(objetivo {resultado['objetivo_ms']:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
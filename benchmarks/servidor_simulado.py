@@ -0,0 +1,337 @@
+# benchmarks/servidor_simulado.py
+"""
+Servidor simulado de los servicios externos, para benchmarks y pruebas de
+carga sin red: habla los protocolos que usa el sistema y responde de forma
+determinista (misma consulta, misma respuesta).
+
+- Ollama:           POST /api/generate, GET /api/tags
+- OpenAI (Groq):    POST /openai/v1/chat/completions
+- Gemini:           POST /v1beta/models/<modelo>:generateContent
+- Google CSE:       GET  /customsearch/v1?q=&num=
+- Búsqueda web:     GET  /buscar?q=&max_results=  (formato duckduckgo-search)
+- Estadísticas:     GET  /_estadisticas
+
+Según el prompt, el LLM responde una valuación (JSON del esquema de
+resultado), una decisión del agente de navegación ("finalizar") o una
+regla interpretada con el intérprete local del frontend.
+
+La latencia de cada respuesta se sortea de una distribución configurable
+(fija, normal, lognormal, exponencial) y una fracción de los pedidos puede
+fallar (HTTP 503/429) o devolver texto no parseable.
+
+Usa solo la biblioteca estándar (ThreadingHTTPServer): se puede levantar
+como proceso o en un hilo desde un benchmark con iniciar_en_hilo().
+
+Uso:
+    python -m benchmarks.servidor_simulado [--puerto 8900] [--latencia fija:0]
+        [--latencia-busqueda fija:0] [--tasa-error 0] [--codigo-error 503]
+        [--tasa-invalida 0] [--semilla 7]
+
+Latencias: fija:MS | normal:MEDIA,DESVIO | lognormal:MEDIANA,SIGMA | exponencial:MEDIA (en ms)
+"""
+
+import argparse
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import benchmarks  # noqa: F401  (agrega frontend/ al path)
+from servicios.interprete_reglas import interpretar_regla
+
+PUERTO_DEFAULT = 8900
+PORTALES = ["kavak.com", "autos.mercadolibre.com.ar", "autocosmos.com.ar", "demotores.com.ar"]
+
+
+class Latencia:
+    """Distribución de latencias en ms, descrita como 'tipo:param[,param]'"""
+
+    TIPOS = ("fija", "normal", "lognormal", "exponencial")
+
+    def __init__(self, descripcion: str = "fija:0"):
+        tipo, _, parametros = descripcion.partition(":")
+        if tipo not in self.TIPOS:
+            raise ValueError(f"Distribución desconocida '{tipo}' (opciones: {', '.join(self.TIPOS)})")
+        self.descripcion = descripcion
+        self.tipo = tipo
+        self.parametros = [float(p) for p in parametros.split(",") if p.strip()] or [0.0]
+
+    def muestrear(self, rnd: random.Random) -> float:
+        """Segundos de espera para una respuesta"""
+        p = self.parametros
+        if self.tipo == "fija":
+            ms = p[0]
+        elif self.tipo == "normal":
+            ms = rnd.gauss(p[0], p[1] if len(p) > 1 else 0.0)
+        elif self.tipo == "lognormal":
+            ms = p[0] * rnd.lognormvariate(0.0, p[1] if len(p) > 1 else 0.5)
+        else:
+            ms = rnd.expovariate(1.0 / p[0]) if p[0] > 0 else 0.0
+        return max(ms, 0.0) / 1000
+
+
+class ConfigSimulador:
+    """Latencias y fallas del servidor simulado"""
+
+    def __init__(self, latencia: str = "fija:0", latencia_busqueda: str = "fija:0",
+                 tasa_error: float = 0.0, codigo_error: int = 503,
+                 tasa_invalida: float = 0.0, semilla: int = 7):
+        self.latencia = Latencia(latencia)
+        self.latencia_busqueda = Latencia(latencia_busqueda)
+        self.tasa_error = tasa_error
+        self.codigo_error = codigo_error
+        self.tasa_invalida = tasa_invalida
+        self.rnd = random.Random(semilla)
+        self.lock = threading.Lock()
+        self.estadisticas = {}
+
+    def sortear(self, latencia: Latencia) -> tuple:
+        """(segundos de espera, falla, respuesta inválida) para un pedido"""
+        with self.lock:
+            return (latencia.muestrear(self.rnd), self.rnd.random() < self.tasa_error,
+                    self.rnd.random() < self.tasa_invalida)
+
+    def contar(self, clave: str):
+        with self.lock:
+            self.estadisticas[clave] = self.estadisticas.get(clave, 0) + 1
+
+
+# ============================================
+# RESPUESTAS DETERMINISTAS
+# ============================================
+
+def _rnd_de(texto: str) -> random.Random:
+    return random.Random(int.from_bytes(hashlib.blake2b(texto.encode("utf-8"), digest_size=8).digest(), "big"))
+
+
+def _dato_prompt(prompt: str, campo: str, default: str) -> str:
+    match = re.search(rf"-\s*{campo}:\s*(.+)", prompt)
+    return match.group(1).strip() if match else default
+
+
+def respuesta_valuacion(prompt: str) -> dict:
+    """Valuación con publicaciones sintéticas coherentes con el vehículo del prompt"""
+    marca = _dato_prompt(prompt, "Marca", "Toyota")
+    modelo = _dato_prompt(prompt, "Modelo", "Corolla")
+    año = int(re.sub(r"\D", "", _dato_prompt(prompt, "Año", "2020")) or 2020)
+    rnd = _rnd_de(f"{marca}|{modelo}|{año}")
+
+    base = 25_000_000 * 0.92 ** max(2026 - año, 0)
+    precios = sorted(round(rnd.gauss(base, base * 0.08), -3) for _ in range(12))
+    publicaciones = [{
+        "fuente": PORTALES[i % len(PORTALES)], "precio": precio,
+        "url": f"https://{PORTALES[i % len(PORTALES)]}/usado/{marca}-{modelo}-{año}-{i}".lower().replace(" ", "-"),
+        "titulo": f"{marca} {modelo} {año + rnd.randint(-1, 1)}", "incluida": True,
+    } for i, precio in enumerate(precios)]
+    mediana = (precios[5] + precios[6]) / 2
+    return {
+        "precio_sugerido": round(mediana, -3),
+        "precio_minimo": round(mediana * 0.95, -3),
+        "precio_maximo": round(mediana * 1.05, -3),
+        "confianza": "MEDIA",
+        "analisis": {
+            "fuentes_consultadas": len(PORTALES),
+            "resultados_iniciales": len(precios),
+            "resultados_tras_filtrado": len(precios),
+            "resultados_tras_depuracion": len(precios),
+            "precio_mercado_min": precios[0],
+            "precio_mercado_max": precios[-1],
+            "precio_mercado_promedio": round(sum(precios) / len(precios), -3),
+            "precio_mercado_mediana": mediana,
+        },
+        "reglas_aplicadas": [{"codigo": "BUSQUEDA_WEB", "resultado": f"Se buscaron precios en {len(PORTALES)} sitios"}],
+        "publicaciones": publicaciones,
+        "alertas": ["Respuesta del servidor simulado"],
+        "reporte_detallado": f"Valuación simulada de {marca} {modelo} {año} con {len(precios)} publicaciones.",
+    }
+
+
+def respuesta_navegacion(prompt: str) -> dict:
+    return {"pensamiento": "Servidor simulado: el objetivo se da por cumplido",
+            "accion": "finalizar", "objetivo_verificado": True}
+
+
+def respuesta_regla(prompt: str) -> dict:
+    match = re.search(r'SOLICITUD ACTUAL:\s*"(.*?)"', prompt, re.DOTALL)
+    resultado = interpretar_regla(match.group(1) if match else prompt[-500:])
+    return {k: resultado[k] for k in ("tipo_detectado", "es_valido", "parametros")}
+
+
+def responder_llm(prompt: str) -> str:
+    if "Agente de Navegación" in prompt:
+        respuesta = respuesta_navegacion(prompt)
+    elif "SOLICITUD ACTUAL:" in prompt:
+        respuesta = respuesta_regla(prompt)
+    else:
+        respuesta = respuesta_valuacion(prompt)
+    return json.dumps(respuesta, ensure_ascii=False)
+
+
+def resultados_busqueda(query: str, cantidad: int) -> list:
+    """Resultados en formato duckduckgo-search (title/href/body)"""
+    rnd = _rnd_de(query)
+    años = re.findall(r"\b(?:19|20)\d{2}\b", query)
+    año = int(años[0]) if años else 2020
+    vehiculo = re.sub(r"site:\S+|\b(?:19|20)\d{2}\b|precio|usado|argentina", "", query, flags=re.I).strip() or "Auto"
+    vehiculo = " ".join(vehiculo.split())
+    resultados = []
+    for i in range(cantidad):
+        portal = PORTALES[i % len(PORTALES)]
+        precio = round(rnd.gauss(18_000_000, 2_500_000), -3)
+        resultados.append({
+            "title": f"{vehiculo} {año} - $ {precio:,.0f} | {portal}".replace(",", "."),
+            "href": f"https://{portal}/usado/{'-'.join(vehiculo.lower().split())}-{año}-{i}",
+            "body": f"{vehiculo} {año} · {rnd.randint(10, 150) * 1000} km · $ {precio:,.0f}".replace(",", "."),
+        })
+    return resultados
+
+
+# ============================================
+# SERVIDOR HTTP
+# ============================================
+
+class ManejadorSimulado(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config: ConfigSimulador = None
+
+    def log_message(self, *args):
+        pass
+
+    def _responder(self, codigo: int, cuerpo: dict):
+        datos = json.dumps(cuerpo, ensure_ascii=False).encode("utf-8")
+        self.send_response(codigo)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def _simular(self, clave: str, latencia: Latencia) -> bool:
+        """Espera la latencia sorteada; False si el pedido debe fallar (ya respondido)"""
+        self.config.contar(clave)
+        espera, falla, self.invalida = self.config.sortear(latencia)
+        time.sleep(espera)
+        if falla:
+            self.config.contar(f"{clave}_error")
+            self._responder(self.config.codigo_error, {"error": {"message": "Falla simulada", "code": self.config.codigo_error}})
+            return False
+        return True
+
+    def _texto_llm(self, prompt: str) -> str:
+        if self.invalida:
+            return "Lo siento, no pude completar la valuación en este momento."
+        return responder_llm(prompt)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {k: v[0] for k, v in parse_qs(url.query).items()}
+        if url.path == "/api/tags":
+            self._responder(200, {"models": [{"name": "llama3.2:latest"}, {"name": "simulado:latest"}]})
+        elif url.path == "/_estadisticas":
+            with self.config.lock:
+                self._responder(200, dict(self.config.estadisticas))
+        elif url.path == "/buscar":
+            if self._simular("busqueda", self.config.latencia_busqueda):
+                self._responder(200, {"results": resultados_busqueda(params.get("q", ""), int(params.get("max_results", 10)))})
+        elif url.path == "/customsearch/v1":
+            if self._simular("google_cse", self.config.latencia_busqueda):
+                items = resultados_busqueda(params.get("q", ""), int(params.get("num", 5)))
+                self._responder(200, {"items": [{"title": r["title"], "link": r["href"], "snippet": r["body"]} for r in items]})
+        else:
+            self._responder(404, {"error": {"message": f"Ruta no simulada: {url.path}"}})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        largo = int(self.headers.get("Content-Length") or 0)
+        try:
+            pedido = json.loads(self.rfile.read(largo) or b"{}")
+        except json.JSONDecodeError:
+            self._responder(400, {"error": {"message": "JSON inválido"}})
+            return
+
+        if url.path == "/api/generate":
+            if self._simular("ollama", self.config.latencia):
+                prompt = pedido.get("prompt", "")
+                texto = self._texto_llm(prompt)
+                self._responder(200, {"model": pedido.get("model"), "response": texto, "done": True,
+                                      "prompt_eval_count": len(prompt) // 4, "eval_count": len(texto) // 4})
+        elif url.path.endswith("/chat/completions"):
+            if self._simular("openai", self.config.latencia):
+                prompt = "\n".join(m.get("content", "") for m in pedido.get("messages", []) if isinstance(m.get("content"), str))
+                texto = self._texto_llm(prompt)
+                self._responder(200, {
+                    "id": "simulado", "object": "chat.completion", "model": pedido.get("model"),
+                    "choices": [{"index": 0, "message": {"role": "assistant", "content": texto}, "finish_reason": "stop"}],
+                    "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(texto) // 4},
+                })
+        elif url.path.endswith(":generateContent"):
+            if self._simular("gemini", self.config.latencia):
+                prompt = "\n".join(p.get("text", "") for c in pedido.get("contents", []) for p in c.get("parts", []))
+                texto = self._texto_llm(prompt)
+                self._responder(200, {
+                    "candidates": [{"content": {"role": "model", "parts": [{"text": texto}]}, "finishReason": "STOP"}],
+                    "usageMetadata": {"promptTokenCount": len(prompt) // 4, "candidatesTokenCount": len(texto) // 4},
+                })
+        else:
+            self._responder(404, {"error": {"message": f"Ruta no simulada: {url.path}"}})
+
+
+def crear_servidor(config: ConfigSimulador, host: str = "127.0.0.1", puerto: int = PUERTO_DEFAULT) -> ThreadingHTTPServer:
+    manejador = type("Manejador", (ManejadorSimulado,), {"config": config})
+    servidor = ThreadingHTTPServer((host, puerto), manejador)
+    servidor.daemon_threads = True
+    return servidor
+
+
+def iniciar_en_hilo(config: ConfigSimulador = None, puerto: int = 0) -> ThreadingHTTPServer:
+    """Levanta el servidor en un hilo (puerto 0 = uno libre); detener con .shutdown()"""
+    servidor = crear_servidor(config or ConfigSimulador(), puerto=puerto)
+    threading.Thread(target=servidor.serve_forever, daemon=True).start()
+    return servidor
+
+
+def variables_entorno(url_base: str) -> dict:
+    """Variables que apuntan el backend (y el frontend) al servidor simulado"""
+    return {
+        "OLLAMA_URL": url_base,
+        "GROQ_URL": f"{url_base}/openai/v1",
+        "GEMINI_URL": f"{url_base}/v1beta",
+        "GOOGLE_SEARCH_URL": f"{url_base}/customsearch/v1",
+        "BUSQUEDA_WEB_URL": f"{url_base}/buscar",
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--puerto", type=int, default=PUERTO_DEFAULT)
+    parser.add_argument("--latencia", default="fija:0", help="Latencia de los LLM (ej: lognormal:1500,0.4)")
+    parser.add_argument("--latencia-busqueda", default="fija:0", help="Latencia de las búsquedas (ej: normal:300,80)")
+    parser.add_argument("--tasa-error", type=float, default=0.0, help="Fracción de pedidos que fallan")
+    parser.add_argument("--codigo-error", type=int, default=503)
+    parser.add_argument("--tasa-invalida", type=float, default=0.0, help="Fracción de respuestas LLM no parseables")
+    parser.add_argument("--semilla", type=int, default=7)
+    args = parser.parse_args()
+
+    config = ConfigSimulador(args.latencia, args.latencia_busqueda, args.tasa_error,
+                             args.codigo_error, args.tasa_invalida, args.semilla)
+    servidor = crear_servidor(config, args.host, args.puerto)
+    url_base = f"http://{args.host}:{servidor.server_address[1]}"
+    print(f"🧪 Servidor simulado en {url_base} (LLM {args.latencia}, búsqueda {args.latencia_busqueda}, "
+          f"errores {args.tasa_error:.0%}, inválidas {args.tasa_invalida:.0%})")
+    print("Para apuntar el backend al simulador:")
+    for variable, valor in variables_entorno(url_base).items():
+        print(f"  export {variable}={valor}")
+    try:
+        servidor.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        servidor.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+# benchmarks/suite.py
+"""
+Corre todos los benchmarks, guarda los resultados en JSON y los compara
+contra una baseline guardada para detectar regresiones.
+
+Cada benchmark se importa y ejecuta por separado: si le falta una
+dependencia se informa como omitido y la suite sigue. Solo se comparan las métricas vigiladas de cada
+benchmark (METRICAS): los tiempos admiten una tolerancia relativa; las de
+calidad (cobertura, éxitos, determinismo) no pueden empeorar.
+
+Sale con código 1 si hubo regresiones o errores.
+
+Uso:
+    python -m benchmarks.suite [--suite rapida|completa] [--solo api arbol ...]
+                               [--salida resultados.json] [--baseline benchmarks/baseline.json]
+                               [--tolerancia 0.25] [--rondas 3] [--guardar-baseline]
+"""
+
+import argparse
+import fnmatch
+import importlib
+import json
+import os
+import platform
+import sys
+import time
+import traceback
+from datetime import datetime
+
+BASELINE_DEFAULT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+TOLERANCIA_DEFAULT = 0.25
+
+# Parámetros de cada benchmark por suite ("rapida" para cada cambio, "completa" antes de un release)
+SUITES = {
+    "rapida": {
+        "configuracion": {"reglas": (10, 100, 1000), "repeticiones": 30},
+        "api": {"filas": (10_000,), "valuaciones": 50},
+        "arbol": {"nodos": 20_000, "repeticiones": 10},
+        "parseo_json": {"repeticiones": 50},
+        "interprete_reglas": {"repeticiones": 20},
+        "clasificador": {"repeticiones": 500},
+        "depuracion": {"publicaciones": 20_000, "repeticiones": 50},
+        "metodos": {"vehiculos": 1000, "remuestras": 100},
+        "ajustes": {"vehiculos": 20_000, "reglas": 60},
+        "valuacion_offline": {"valuaciones": 100, "repeticiones": 20},
+        "replay": {"valuaciones": 200, "workers": 2},
+        "navegacion": {},
+        "importacion": {"repeticiones": 3},
+        "frontend": {"repeticiones": 3},
+        "reglas_bulk": {"reglas": (14, 500)},
+        "auditoria": {"hilos": 4, "cambios": 30},
+    },
+    "completa": {
+        "configuracion": {},
+        "api": {"filas": (10_000, 100_000, 1_000_000)},
+        "arbol": {},
+        "parseo_json": {},
+        "interprete_reglas": {},
+        "clasificador": {},
+        "depuracion": {},
+        "metodos": {},
+        "ajustes": {},
+        "valuacion_offline": {},
+        "replay": {},
+        "navegacion": {},
+        "importacion": {},
+        "frontend": {},
+        "reglas_bulk": {"reglas": (14, 500, 2000)},
+        "auditoria": {"hilos": 8, "cambios": 100},
+    },
+}
+
+# Métricas vigiladas por benchmark (admiten comodines) y en qué sentido es mejor:
+# "menor" (tiempos), "mayor" (calidad) o "igual" (invariantes)
+METRICAS = {
+    "configuracion": {"ms_*_reglas": "menor"},
+    "api": {"ms_crear_valuacion_p50": "menor", "ms_crear_valuacion_p95": "menor",
+            "ms_valuaciones_*": "menor", "ms_auditoria_*": "menor", "ms_reglas_*": "menor",
+            "us_extraer_json_respuesta": "menor", "exito_extraer_json": "mayor"},
+    "arbol": {"us_por_nodo": "menor"},
+    "parseo_json": {"us_por_respuesta_nuevo": "menor", "ms_respuesta_grande_nuevo": "menor", "exito_nuevo": "mayor"},
+    "interprete_reglas": {"us_por_regla": "menor", "cobertura": "mayor", "exactitud_aceptadas": "mayor"},
+    "clasificador": {"us_regex": "menor", "us_regex_texto_largo": "menor", "falsos_positivos_corregidos": "mayor"},
+    "depuracion": {"ms_depuracion_*": "menor", "ms_muestreo_*": "menor"},
+    "metodos": {"ms_sin_bootstrap": "menor", "ms_con_bootstrap": "menor"},
+    "ajustes": {"ms_con_indice": "menor", "iguales": "igual"},
+    "valuacion_offline": {"ms_p50": "menor", "ms_p95": "menor", "determinista": "igual"},
+    "replay": {"ms_por_valuacion": "menor", "reproducidas": "mayor"},
+    "navegacion": {"ms_por_paso": "menor", "publicaciones_coinciden": "igual"},
+    "importacion": {"ms_importacion": "menor", "dentro_del_presupuesto": "igual",
+                    "sin_importaciones_diferidas": "igual"},
+    "frontend": {"ms_primer_dibujado": "menor", "ms_ingreso": "menor", "ms_cambio_pagina": "menor", "ms_rerun": "menor"},
+    "reglas_bulk": {"ms_bulk_*": "menor", "ms_exportar_*": "menor", "ida_y_vuelta": "igual"},
+    "auditoria": {"ms_por_cambio_*_diferida": "menor", "auditoria_completa": "igual"},
+}
+
+
+def metricas_vigiladas(nombre: str, resultado: dict) -> dict:
+    """{métrica: (valor, sentido)} de las métricas escalares vigiladas del resultado"""
+    patrones = METRICAS.get(nombre, {})
+    vigiladas = {}
+    for clave, valor in resultado.items():
+        if not isinstance(valor, (int, float, bool)) or valor is None:
+            continue
+        for patron, sentido in patrones.items():
+            if fnmatch.fnmatchcase(clave, patron):
+                vigiladas[clave] = (valor, sentido)
+                break
+    return vigiladas
+
+
+def ejecutar_benchmark(nombre: str, parametros: dict) -> dict:
+    """Resultado del benchmark, o {"omitido": motivo} / {"error": traceback}"""
+    try:
+        modulo = importlib.import_module(f"benchmarks.bench_{nombre}")
+    except ImportError as e:
+        return {"benchmark": nombre, "omitido": f"dependencia no disponible: {e}"}
+    inicio = time.perf_counter()
+    try:
+        resultado = modulo.ejecutar(**parametros)
+    except Exception:
+        return {"benchmark": nombre, "error": traceback.format_exc()}
+    resultado["segundos_ejecucion"] = time.perf_counter() - inicio
+    return resultado
+
+
+def mejor_de_rondas(nombre: str, rondas: list) -> dict:
+    """Primer resultado con cada tiempo vigilado reemplazado por el mejor de las rondas"""
+    resultado = dict(rondas[0])
+    for clave, (_, sentido) in metricas_vigiladas(nombre, resultado).items():
+        if sentido == "menor":
+            resultado[clave] = min(r[clave] for r in rondas)
+    resultado["rondas"] = len(rondas)
+    return resultado
+
+
+def comparar(nombre: str, resultado: dict, baseline: dict, tolerancia: float) -> list:
+    """Una fila por métrica vigilada: valor actual, baseline y estado"""
+    filas = []
+    anterior = baseline.get(nombre, {})
+    for clave, (valor, sentido) in metricas_vigiladas(nombre, resultado).items():
+        base = anterior.get(clave)
+        if base is None:
+            estado = "sin baseline"
+        elif sentido == "igual":
+            estado = "ok" if valor == base else "regresión"
+        elif sentido == "mayor":
+            estado = "ok" if valor >= base else "regresión"
+        elif valor > base * (1 + tolerancia):
+            estado = "regresión"
+        elif valor < base * (1 - tolerancia):
+            estado = "mejora"
+        else:
+            estado = "ok"
+        filas.append({"metrica": clave, "valor": valor, "baseline": base, "sentido": sentido, "estado": estado})
+    return filas
+
+
+def metadata() -> dict:
+    return {
+        "fecha": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "plataforma": platform.platform(),
+        "cpus": os.cpu_count(),
+    }
+
+
+def cargar_baseline(ruta: str) -> dict:
+    if not os.path.exists(ruta):
+        return {}
+    with open(ruta, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def guardar_baseline(ruta: str, anterior: dict, suite: str, resultados: dict):
+    """Actualiza solo los benchmarks que corrieron; los omitidos conservan su baseline"""
+    por_benchmark = dict(anterior.get("resultados", {})) if anterior.get("suite") == suite else {}
+    for nombre, resultado in resultados.items():
+        if "omitido" in resultado or "error" in resultado:
+            continue
+        por_benchmark[nombre] = {clave: valor for clave, (valor, _) in metricas_vigiladas(nombre, resultado).items()}
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump({"suite": suite, "metadata": metadata(), "resultados": por_benchmark}, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--suite", choices=sorted(SUITES), default="rapida")
+    parser.add_argument("--solo", nargs="+", metavar="BENCHMARK", help="Correr solo estos benchmarks")
+    parser.add_argument("--salida", help="Archivo JSON con resultados completos y comparación")
+    parser.add_argument("--baseline", default=BASELINE_DEFAULT)
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA_DEFAULT,
+                        help="Empeoramiento relativo de tiempos tolerado (0.25 = 25%%)")
+    parser.add_argument("--rondas", type=int, default=3,
+                        help="Ejecuciones por benchmark; de los tiempos se toma el mejor (reduce el ruido)")
+    parser.add_argument("--guardar-baseline", action="store_true", help="Guardar estos resultados como baseline")
+    args = parser.parse_args()
+
+    suite = SUITES[args.suite]
+    nombres = args.solo or list(suite)
+    desconocidos = [n for n in nombres if n not in suite]
+    if desconocidos:
+        parser.error(f"benchmarks desconocidos: {', '.join(desconocidos)}")
+
+    baseline = cargar_baseline(args.baseline)
+    if baseline and baseline.get("suite") != args.suite:
+        print(f"⚠️ La baseline es de la suite '{baseline.get('suite')}': no se compara")
+        baseline_resultados = {}
+    else:
+        baseline_resultados = baseline.get("resultados", {})
+
+    resultados, comparaciones = {}, {}
+    regresiones = errores = 0
+    for nombre in nombres:
+        print(f"⏱️ {nombre}...", flush=True)
+        rondas = []
+        for _ in range(max(args.rondas, 1)):
+            resultado = ejecutar_benchmark(nombre, suite[nombre])
+            if "omitido" in resultado or "error" in resultado:
+                break
+            rondas.append(resultado)
+        if "omitido" in resultado:
+            resultados[nombre] = resultado
+            print(f"   ⏭️ omitido ({resultado['omitido']})")
+            continue
+        if "error" in resultado:
+            resultados[nombre] = resultado
+            errores += 1
+            print(f"   ❌ error:\n{resultado['error']}")
+            continue
+        resultado = resultados[nombre] = mejor_de_rondas(nombre, rondas)
+        comparaciones[nombre] = comparar(nombre, resultado, baseline_resultados, args.tolerancia)
+        for fila in comparaciones[nombre]:
+            regresiones += fila["estado"] == "regresión"
+            icono = {"ok": "✅", "mejora": "🚀", "regresión": "❌"}.get(fila["estado"], "➖")
+            base = "-" if fila["baseline"] is None else f"{fila['baseline']:.4g}"
+            print(f"   {icono} {fila['metrica']}: {fila['valor']:.4g} (baseline {base}) {fila['estado']}")
+
+    if args.salida:
+        with open(args.salida, "w", encoding="utf-8") as f:
+            json.dump({"suite": args.suite, "metadata": metadata(), "tolerancia": args.tolerancia,
+                       "resultados": resultados, "comparacion": comparaciones}, f, indent=2, ensure_ascii=False)
+        print(f"💾 Resultados en {args.salida}")
+
+    if args.guardar_baseline:
+        guardar_baseline(args.baseline, baseline, args.suite, resultados)
+        print(f"💾 Baseline actualizada: {args.baseline}")
+
+    print(f"\n{len(comparaciones)} benchmarks - {regresiones} regresiones - {errores} errores")
+    sys.exit(1 if regresiones or errores else 0)
+
+
+if __name__ == "__main__":
+    main()
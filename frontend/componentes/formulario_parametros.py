@@ -95,11 +95,30 @@ def formulario_depuracion() -> dict:
     params = {"accion": accion}
     
     if accion == "eliminar_outliers_precio":
-        col1, col2 = st.columns(2)
-        with col1:
-            params["cantidad"] = st.number_input("Cantidad a eliminar", min_value=1, max_value=20, value=5)
-        with col2:
-            params["extremo"] = st.selectbox("Extremo", ["inferior", "superior", "ambos"])
+        metodo = st.selectbox(
+            "Criterio de outlier",
+            ["cantidad", "iqr", "mad", "zscore"],
+            format_func=lambda x: {
+                "cantidad": "✂️ Cantidad fija de extremos",
+                "iqr": "📦 Rango intercuartil (IQR)",
+                "mad": "🎯 Desvío absoluto de la mediana (MAD)",
+                "zscore": "📐 Z-score"
+            }.get(x, x)
+        )
+        if metodo == "cantidad":
+            col1, col2 = st.columns(2)
+            with col1:
+                params["cantidad"] = st.number_input("Cantidad a eliminar", min_value=1, max_value=20, value=5)
+            with col2:
+                params["extremo"] = st.selectbox("Extremo", ["inferior", "superior", "ambos"])
+        elif metodo == "iqr":
+            params["metodo"] = "iqr"
+            params["factor"] = st.number_input("Factor IQR", min_value=0.5, max_value=5.0, value=1.5, step=0.5)
+        else:
+            params["metodo"] = metodo
+            params["umbral"] = st.number_input(
+                "Umbral", min_value=1.0, max_value=10.0, value=3.5 if metodo == "mad" else 3.0, step=0.5
+            )
     
     elif accion == "eliminar_antiguos":
         params["dias_maximos"] = st.number_input("Días máximos de antigüedad", min_value=1, max_value=365, value=60)
@@ -118,11 +137,12 @@ def formulario_muestreo() -> dict:
     
     metodo = st.selectbox(
         "Método de selección",
-        ["aleatorio", "primeros_por_precio_asc", "primeros_por_precio_desc", "todos"],
+        ["aleatorio", "primeros_por_precio_asc", "primeros_por_precio_desc", "primeros_por_fecha", "todos"],
         format_func=lambda x: {
             "aleatorio": "🎲 Aleatorio",
             "primeros_por_precio_asc": "📈 Primeros N ordenados por precio (menor a mayor)",
             "primeros_por_precio_desc": "📉 Primeros N ordenados por precio (mayor a menor)",
+            "primeros_por_fecha": "🕒 Primeros N más recientes",
             "todos": "📋 Usar todos los resultados"
         }.get(x, x)
     )
@@ -131,6 +151,17 @@ def formulario_muestreo() -> dict:
     
     if metodo != "todos":
         params["cantidad"] = st.number_input("Cantidad de resultados a tomar", min_value=1, max_value=100, value=20)
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            if st.checkbox("Repartir la muestra por fuente", help="Cada fuente aporta en proporción a sus publicaciones"):
+                params["estratificar_por"] = "fuente"
+            if st.checkbox("Priorizar vendedores verificados"):
+                params["priorizar_verificados"] = True
+        with col2:
+            maximo = st.number_input("Máximo por fuente (0 = sin tope)", min_value=0, max_value=100, value=0)
+            if maximo:
+                params["maximo_por_fuente"] = maximo
     
     return params
 
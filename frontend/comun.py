@@ -0,0 +1,172 @@
+# frontend/comun.py
+"""
+Funciones compartidas por las páginas: acceso al backend (con caché),
+detección del tipo de regla y generación de reglas con IA.
+"""
+
+import json
+
+import requests
+import streamlit as st
+
+from constantes import API_URL, CACHE_TTL_SEGUNDOS, GEMINI_URL, GROQ_URL, OLLAMA_URL, PROMPT_GENERADOR
+from servicios.cliente_api import ClienteAPI, ErrorAPI
+from servicios.clasificador_reglas import coincidencias_por_tipo, tipo_ganador
+
+
+class ConfigIA:
+    """Proveedor de IA elegido en la barra lateral (y modo debug), que reciben las páginas"""
+
+    def __init__(self, proveedor: str, modelo: str, api_key: str, interprete_local: bool, debug: bool):
+        self.proveedor = proveedor
+        self.modelo = modelo
+        self.api_key = api_key
+        self.interprete_local = interprete_local
+        self.debug = debug
+
+
+# ============================================
+# DETECCIÓN HEURÍSTICA DEL TIPO DE REGLA
+# ============================================
+
+def detectar_tipo_por_heuristica(descripcion: str) -> str:
+    puntajes = {tipo: len(frases) for tipo, frases in coincidencias_por_tipo(descripcion).items()}
+    return tipo_ganador(puntajes)
+
+
+def obtener_debug_deteccion(descripcion: str) -> dict:
+    coincidencias = coincidencias_por_tipo(descripcion)
+    puntajes = {k: len(v) for k, v in coincidencias.items()}
+    
+    return {
+        "coincidencias": coincidencias,
+        "puntajes": puntajes,
+        "ganador": tipo_ganador(puntajes)
+    }
+
+
+# ============================================
+# FUNCIONES AUXILIARES
+# ============================================
+
+def generar_con_ia_generico(proveedor, api_key, modelo, descripcion):
+    """Llamada a la IA"""
+    try:
+        prompt_final = PROMPT_GENERADOR.format(descripcion=descripcion)
+        texto_respuesta = ""
+
+        if proveedor == "ollama":
+            url = f"{OLLAMA_URL}/api/generate"
+            payload = {
+                "model": modelo,
+                "prompt": prompt_final,
+                "stream": False,
+                "options": {"temperature": 0.1, "num_predict": 1000}
+            }
+            res = requests.post(url, json=payload, timeout=120)
+            res.raise_for_status()
+            texto_respuesta = res.json().get("response", "")
+        
+        elif proveedor == "groq":
+            headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
+            url = f"{GROQ_URL}/chat/completions"
+            payload = {
+                "model": modelo if modelo else "llama-3.1-8b-instant",
+                "messages": [{"role": "user", "content": prompt_final}],
+                "temperature": 0.1,
+                "max_tokens": 1000
+            }
+            res = requests.post(url, headers=headers, json=payload, timeout=60)
+            res.raise_for_status()
+            texto_respuesta = res.json()["choices"][0]["message"]["content"]
+
+        elif proveedor == "gemini":
+            modelo_uso = modelo if modelo else "gemini-2.0-flash"
+            url = f"{GEMINI_URL}/models/{modelo_uso}:generateContent?key={api_key}"
+            
+            payload = {
+                "contents": [{"parts": [{"text": prompt_final}]}],
+                "generationConfig": {
+                    "temperature": 0.1,
+                    "maxOutputTokens": 1000
+                }
+            }
+            headers = {"Content-Type": "application/json"}
+            
+            res = requests.post(url, headers=headers, json=payload, timeout=60)
+            res.raise_for_status()
+            texto_respuesta = res.json()["candidates"][0]["content"]["parts"][0]["text"]
+            
+        return limpiar_y_parsear_json(texto_respuesta)
+
+    except Exception as e:
+        st.error(f"Error IA ({proveedor}) - Modelo: {modelo}: {e}")
+        return None
+
+
+def limpiar_y_parsear_json(texto: str) -> dict:
+    texto = texto.strip()
+    if "```json" in texto:
+        texto = texto.split("```json")[1]
+    if "```" in texto:
+        texto = texto.split("```")[0]
+    try:
+        return json.loads(texto.strip())
+    except:
+        import re
+        match = re.search(r'\{.*\}', texto, re.DOTALL)
+        if match:
+            try: return json.loads(match.group())
+            except: pass
+        return None
+
+
+
+# Helpers API
+@st.cache_resource
+def obtener_cliente_api() -> ClienteAPI:
+    """Sesión HTTP compartida por todos los reruns y usuarios"""
+    return ClienteAPI(API_URL)
+
+
+@st.cache_data(ttl=CACHE_TTL_SEGUNDOS, show_spinner=False)
+def _get_cacheado(ep):
+    # Los errores se propagan como excepción para que no queden en caché
+    return obtener_cliente_api().get_json(ep)
+
+
+def invalidar_cache_api():
+    """Tras una escritura, los GET siguientes vuelven al backend (revalidando por ETag)"""
+    _get_cacheado.clear()
+
+
+def api_get(ep): 
+    try:
+        return _get_cacheado(ep)
+    except ErrorAPI as e:
+        st.error(f"Error del servidor ({e.status_code}): {e.texto}")
+        return None
+    except Exception as e:
+        st.error(f"Error de conexión con el backend: {e}")
+        return None
+
+def api_post(ep, d, p=None, timeout=10, invalidar=True): 
+    try:
+        response = obtener_cliente_api().post(ep, d, params=p, timeout=timeout)
+        if response.status_code in [200, 201]:
+            if invalidar:
+                invalidar_cache_api()
+            return response.json()
+        st.error(f"Error al guardar ({response.status_code}): {response.text}")
+        return None
+    except Exception as e: st.error(f"Error de red: {e}"); return None
+
+def api_put(ep, d, p=None): 
+    try:
+        response = obtener_cliente_api().put(ep, d, params=p)
+        if response.status_code == 200:
+            invalidar_cache_api()
+            return response.json()
+        st.error(f"Error al actualizar ({response.status_code}): {response.text}")
+        return None
+    except Exception as e: st.error(f"Error de red: {e}"); return None
@@ -0,0 +1,656 @@
+# frontend/constantes.py
+"""
+Constantes de la app Streamlit.
+
+Streamlit vuelve a ejecutar app.py completo en cada interacción; lo que
+está en este módulo (el prompt del generador de reglas, las etiquetas de
+tipos, el menú) se evalúa una sola vez por proceso.
+"""
+
+import os
+
+API_URL = "http://localhost:8000"
+# Proveedores de IA para generar reglas (reemplazables por el servidor simulado de benchmarks/)
+OLLAMA_URL = os.getenv("OLLAMA_URL", "http://localhost:11434").rstrip("/")
+GROQ_URL = os.getenv("GROQ_URL", "https://api.groq.com/openai/v1").rstrip("/")
+GEMINI_URL = os.getenv("GEMINI_URL", "https://generativelanguage.googleapis.com/v1beta").rstrip("/")
+# Segundos que un GET al backend se sirve desde la caché de Streamlit sin revalidar
+CACHE_TTL_SEGUNDOS = 30
+# Segundos que se reutiliza el último sondeo de disponibilidad de Ollama
+TTL_SONDEO_SEGUNDOS = 60
+# Espera máxima por el primer sondeo antes de dibujar la barra lateral
+ESPERA_SONDEO_SEGUNDOS = 0.3
+
+# Orden según README: 1.Fuente, 2.Filtro, 3.Ajuste, 4.Depuración, 5.Muestreo, 6.Control, 7.Método
+TIPO_REGLA_LABELS = {
+    "fuente": "📍 Fuente de Datos",
+    "filtro_busqueda": "🔍 Filtro de Búsqueda",
+    "ajuste_calculo": "💰 Ajuste de Cálculo",
+    "depuracion": "🧹 Depuración",
+    "muestreo": "📊 Muestreo",
+    "punto_control": "⚠️ Punto de Control",
+    "metodo_valuacion": "📈 Método de Valuación"
+}
+
+# Descripciones completas para mostrar al usuario
+TIPO_REGLA_DESCRIPCIONES = {
+    "fuente": "Portales o sitios de internet de consulta sobre datos de autos publicados (Kavak, MercadoLibre, etc.)",
+    "filtro_busqueda": "Parámetros de búsqueda coherentes con el auto a publicar: marca, modelo, km, transmisión, etc.",
+    "ajuste_calculo": "Definir el precio de venta final aplicando puntos de decisión del vendedor (+%, -$, inflación, margen)",
+    "depuracion": "Eliminar publicaciones que generan ruido o desvío en el cálculo del precio de referencia",
+    "muestreo": "Determinar la muestra de publicaciones de los sitios de consulta",
+    "punto_control": "Condiciones para flujos condicionales (ej: si hay menos de 5 publicaciones, ampliar búsqueda)",
+    "metodo_valuacion": "Método para calcular el precio de referencia del mercado (mediana, promedio, etc.)"
+}
+
+CLAVES_TIPOS = list(TIPO_REGLA_LABELS.keys())
+
+# Páginas del menú -> módulo que la dibuja (se importa recién al visitarla)
+PAGINAS = {
+    "🚗 Valuar Vehículo": "paginas.valuar",
+    "📋 Reglas Activas": "paginas.reglas_activas",
+    "🔧 Nueva Regla": "paginas.nueva_regla",
+    "📜 Auditoría": "paginas.auditoria",
+    "📊 Historial Valuaciones": "paginas.historial",
+}
+
+
+# ============================================
+# PROMPT COMPLETO CON DEFINICIONES DE NEGOCIO
+# ============================================
+
+PROMPT_GENERADOR = """Eres un Arquitecto de Datos EXHAUSTIVO experto en Valuación de Vehículos Usados.
+Tu trabajo es traducir descripciones en lenguaje natural a JSON técnico SIN OMITIR NINGÚN DETALLE.
+
+## CONTEXTO DEL SISTEMA
+
+Este sistema ayuda a vendedores de autos usados a determinar el precio de venta óptimo. El proceso es:
+1. Consultar portales de autos usados (Kavak, MercadoLibre, etc.)
+2. Filtrar publicaciones similares al auto que se quiere vender
+3. Depurar resultados que generen ruido o distorsión
+4. Tomar una muestra representativa
+5. Calcular un precio de referencia del mercado
+6. Aplicar ajustes para obtener el precio de venta final
+
+## TIPOS DE REGLAS - DEFINICIONES COMPLETAS DE NEGOCIO
+
+═══════════════════════════════════════════════════════════════════════════════
+### 1. TIPO: "fuente"
+═══════════════════════════════════════════════════════════════════════════════
+**DEFINICIÓN DE NEGOCIO:** Reglas para obtener los PORTALES O SITIOS DE INTERNET de consulta sobre datos relevantes de autos publicados en internet con las características buscadas.
+**PROPÓSITO:** Definir de dónde se extraen los datos de precios del mercado.
+
+**ESCENARIOS CONTEMPLADOS:**
+- Agregar un nuevo portal de consulta (Kavak, MercadoLibre, Autocosmos, etc.)
+- Definir prioridad entre fuentes (cuál consultar primero)
+- Marcar fuentes como verificadas o confiables
+- Fuentes específicas por país o región (Argentina, México, Chile)
+- Fuentes especializadas por tipo de vehículo (autos de lujo, comerciales, etc.)
+- Excluir o deshabilitar una fuente temporalmente
+- Si se desea buscar en todo internet sin restricciones, usar "web" o "general" como url.
+
+**PALABRAS CLAVE:** kavak, mercadolibre, autocosmos, demotores, olx, seminuevos, sitio, portal, web, url, .com, página, fuente, plataforma, consultar, buscar en, agregar fuente, quitar fuente, prioridad, principal, secundaria, confiable, verificado
+
+**ESQUEMA JSON:**
+```json
+{{
+  "url": "kavak.com.ar",
+  "nombre": "Kavak Argentina",
+  "pais": "Argentina",
+  "prioridad": 1,
+  "verificado": true,
+  "tipo_vehiculos": "todos|autos|motos|comerciales",
+  "activo": true,
+  "notas": "información adicional"
+}}
+```
+
+**ESQUEMA JSON PARA MÚLTIPLES FUENTES:**
+```json
+{{
+  "fuentes": [
+    {{"url": "kavak.com.ar", "nombre": "Kavak", "prioridad": 1}},
+    {{"url": "mercadolibre.com.ar", "nombre": "MercadoLibre", "prioridad": 2}}
+  ]
+}}
+```
+
+═══════════════════════════════════════════════════════════════════════════════
+### 2. TIPO: "filtro_busqueda"
+═══════════════════════════════════════════════════════════════════════════════
+**DEFINICIÓN DE NEGOCIO:** Reglas de FILTRADO que usa el vendedor para establecer los PARÁMETROS DE BÚSQUEDA de publicaciones coherentes con el auto que se quiere publicar. Establece EQUIVALENCIAS como Marca, modelo, kilometraje, tipo de transmisión, etc.
+**PROPÓSITO:** Asegurar que solo se comparen autos similares al que se va a vender.
+
+**ESCENARIOS CONTEMPLADOS:**
+- Filtrar por marca exacta o lista de marcas equivalentes
+- Filtrar por modelo exacto o familia de modelos
+- Rango de años (±1, ±2 años del vehículo a valuar)
+- Rango de kilometraje (±10000 km, ±20000 km)
+- Tipo de transmisión (automática, manual, CVT, secuencial)
+- Tipo de combustible (nafta, diesel, GNC, híbrido, eléctrico)
+- Cantidad de puertas (2, 3, 4, 5)
+- Color específico o grupo de colores
+- Versión o equipamiento específico
+- Ubicación geográfica (provincia, ciudad, zona)
+- Estado del vehículo (nuevo, usado, 0km)
+- Tipo de vendedor (particular, concesionaria, agencia)
+- Filtros combinados con múltiples condiciones
+
+**PALABRAS CLAVE:** filtrar, buscar, marca, modelo, año, kilometraje, km, transmisión, automático, manual, combustible, nafta, diesel, gnc, híbrido, eléctrico, puertas, color, versión, ubicación, provincia, ciudad, rango, entre, desde, hasta, mayor, menor, igual, similar, equivalente, ±, más menos
+
+**OPERADORES DISPONIBLES:** igual, diferente, mayor, menor, mayor_igual, menor_igual, entre, contiene, en_lista
+
+**ESQUEMA JSON:**
+```json
+{{
+  "filtros": [
+    {{"campo": "marca", "operador": "igual", "valor": "Toyota"}},
+    {{"campo": "marca", "operador": "en_lista", "valor": ["Toyota", "Honda", "Nissan"]}},
+    {{"campo": "modelo", "operador": "contiene", "valor": "Corolla"}},
+    {{"campo": "año", "operador": "entre", "valor": [-2, 2], "relativo": true}},
+    {{"campo": "año", "operador": "mayor_igual", "valor": 2018}},
+    {{"campo": "kilometraje", "operador": "menor", "valor": 80000}},
+    {{"campo": "kilometraje", "operador": "entre", "valor": [-15000, 15000], "relativo": true}},
+    {{"campo": "transmision", "operador": "igual", "valor": "automatica"}},
+    {{"campo": "combustible", "operador": "en_lista", "valor": ["nafta", "gnc"]}},
+    {{"campo": "ubicacion", "operador": "igual", "valor": "Buenos Aires"}},
+    {{"campo": "tipo_vendedor", "operador": "igual", "valor": "concesionaria"}}
+  ]
+}}
+```
+
+═══════════════════════════════════════════════════════════════════════════════
+### 3. TIPO: "ajuste_calculo"
+═══════════════════════════════════════════════════════════════════════════════
+**DEFINICIÓN DE NEGOCIO:** Reglas que se utilizan para DEFINIR EL PRECIO DE VENTA que aplicará el sitio objetivo de la aplicación, donde el vendedor aplicará una serie de PUNTOS DE DECISIÓN para poder determinar dicho precio. Es el cálculo final sobre el precio de referencia del mercado.
+**PROPÓSITO:** Convertir el precio de mercado en un precio de venta rentable para el vendedor.
+
+**ESCENARIOS CONTEMPLADOS:**
+- Ajuste porcentual general (aumentar/disminuir X% a todos los autos)
+- Ajuste porcentual por marca específica (Renault +15%, Toyota -5%)
+- Ajuste porcentual por modelo específico (Corolla +10%)
+- Ajuste porcentual por año (autos 2020+ tienen +5%)
+- Ajuste porcentual por rango de precio (autos > $5M tienen -3%)
+- Ajuste fijo en pesos (sumar/restar $50000)
+- Ajuste fijo en dólares (sumar/restar USD 500)
+- Ajuste por inflación mensual/anual
+- Ajuste por temporada o mes específico (enero, diciembre, verano)
+- Ajuste por trimestre (Q1, Q2, Q3, Q4)
+- Ajuste por demanda (alta demanda +X%, baja demanda -X%)
+- Ajuste por antigüedad del vehículo
+- Ajuste por kilometraje (bajo km +X%, alto km -X%)
+- Margen de ganancia fijo o porcentual
+- Comisión de venta
+- Ajuste por condición especial (único dueño, service oficial, etc.)
+- Ajuste combinado con múltiples condiciones
+
+**PALABRAS CLAVE:** aumentar, incrementar, subir, sumar, agregar, disminuir, decrementar, bajar, restar, reducir, descontar, ajustar, precio, valor, porcentaje, %, pesos, $, dólares, USD, monto, margen, ganancia, utilidad, inflación, temporada, mes, trimestre, demanda, comisión
+
+**IMPORTANTE - DISTINGUIR ENTRE TIPOS:**
+- "%" o "porcentaje" o "por ciento" → tipo: "ajuste_porcentual" con campo "porcentaje"
+- "$" o "pesos" o "monto" (número sin %) → tipo: "ajuste_fijo" con campo "monto"
+- "dólares" o "USD" o "usd" → tipo: "ajuste_fijo" con moneda: "USD"
+- "inflación" → tipo: "inflacion"
+- "margen" o "ganancia" → tipo: "margen_ganancia"
+
+**ESQUEMA JSON PARA ajuste_porcentual:**
+```json
+{{
+  "tipo": "ajuste_porcentual",
+  "porcentaje": 15,
+  "operacion": "incrementar|decrementar",
+  "base": "promedio_mercado|mediana_mercado|precio_minimo|precio_maximo",
+  "condicion_marca": "Marca (si aplica)",
+  "condicion_modelo": "Modelo (si aplica)",
+  "condicion_año": 2020,
+  "condicion_año_operador": "igual|mayor|menor|mayor_igual|menor_igual",
+  "condicion_km_max": 50000,
+  "condicion_km_min": 0,
+  "condicion_precio_min": 1000000,
+  "condicion_precio_max": 5000000,
+  "periodo_vigencia": {{"tipo": "mes|trimestre|semestre|año|permanente|rango_fechas", "mes": "enero", "año": 2026, "fecha_inicio": "2026-01-01", "fecha_fin": "2026-01-31"}},
+  "motivo": "razón del ajuste"
+}}
+```
+
+**ESQUEMA JSON PARA ajuste_fijo:**
+```json
+{{
+  "tipo": "ajuste_fijo",
+  "monto": 50000,
+  "moneda": "ARS|USD",
+  "operacion": "incrementar|decrementar",
+  "condicion_marca": "Marca (si aplica)",
+  "condicion_modelo": "Modelo (si aplica)",
+  "condicion_año": 2020,
+  "periodo_vigencia": {{"tipo": "mes|trimestre|permanente", "mes": "enero", "año": 2026}},
+  "motivo": "razón del ajuste"
+}}
+```
+
+**ESQUEMA JSON PARA inflacion:**
+```json
+{{
+  "tipo": "inflacion",
+  "porcentaje": 5,
+  "periodo_dias": 30,
+  "aplicar_automatico": true,
+  "fuente_indice": "INDEC|privado",
+  "motivo": "ajuste por inflación mensual"
+}}
+```
+
+**ESQUEMA JSON PARA margen_ganancia:**
+```json
+{{
+  "tipo": "margen_ganancia",
+  "porcentaje": 12,
+  "minimo_pesos": 100000,
+  "maximo_pesos": 500000,
+  "motivo": "margen de ganancia estándar"
+}}
+```
+
+═══════════════════════════════════════════════════════════════════════════════
+### 4. TIPO: "depuracion"
+═══════════════════════════════════════════════════════════════════════════════
+**DEFINICIÓN DE NEGOCIO:** Reglas que utiliza el vendedor para DESECHAR O ELIMINAR PUBLICACIONES de los sitios de búsqueda que pueden provocar RUIDO O DESVÍO en el cálculo del precio de referencia del mercado.
+**PROPÓSITO:** Limpiar datos atípicos que distorsionarían el cálculo del precio justo.
+
+**ESCENARIOS CONTEMPLADOS:**
+- Eliminar N publicaciones más caras (outliers superiores)
+- Eliminar N publicaciones más baratas (outliers inferiores)
+- Eliminar extremos de ambos lados
+- Eliminar por porcentaje (el 10% más caro y más barato)
+- Eliminar publicaciones sin fotos
+- Eliminar publicaciones sin descripción completa
+- Eliminar publicaciones de vendedores no verificados
+- Eliminar publicaciones muy antiguas (más de X días)
+- Eliminar publicaciones duplicadas
+- Eliminar publicaciones con precios sospechosos (muy por debajo/encima del promedio)
+- Eliminar por desviación estándar (más de 2 desviaciones del promedio)
+- Eliminar publicaciones de cierta ubicación
+- Eliminar publicaciones sin precio visible
+- Eliminar publicaciones de vendedores con mala reputación
+
+**PALABRAS CLAVE:** eliminar, borrar, quitar, descartar, excluir, remover, desechar, depurar, limpiar, filtrar fuera, sacar, ruido, outlier, atípico, extremo, más caro, más barato, sospechoso, no verificado, sin verificar, duplicado, repetido, sin fotos, sin descripción, incompleto, antiguo, viejo, desactualizado
+
+**ESQUEMA JSON:**
+```json
+{{
+  "accion": "eliminar_outliers|eliminar_extremos_porcentaje|eliminar_sin_fotos|eliminar_sin_descripcion|eliminar_no_verificados|eliminar_duplicados|eliminar_antiguos|eliminar_por_desviacion|eliminar_por_criterio",
+  "cantidad": 5,
+  "porcentaje": 10,
+  "extremo": "inferior|superior|ambos",
+  "dias_maximos": 60,
+  "desviaciones_estandar": 2,
+  "criterio_campo": "campo a evaluar",
+  "criterio_condicion": "igual|mayor|menor",
+  "criterio_valor": "valor a comparar",
+  "motivo": "razón de la depuración"
+}}
+```
+
+═══════════════════════════════════════════════════════════════════════════════
+### 5. TIPO: "muestreo"
+═══════════════════════════════════════════════════════════════════════════════
+**DEFINICIÓN DE NEGOCIO:** Reglas que establece el vendedor para DETERMINAR LA MUESTRA de publicaciones de los sitios de consulta de precios en internet.
+**PROPÓSITO:** Seleccionar un subconjunto representativo de publicaciones para el cálculo.
+
+**ESCENARIOS CONTEMPLADOS:**
+- Tomar todas las publicaciones disponibles
+- Tomar N publicaciones aleatorias
+- Tomar las N más recientes (por fecha de publicación)
+- Tomar las N más baratas (precio ascendente)
+- Tomar las N más caras (precio descendente)
+- Tomar las N más relevantes (según criterio de la fuente)
+- Tomar las N con más fotos o mejor descripción
+- Tomar las N de vendedores verificados
+- Tomar un porcentaje del total
+- Tomar estratificado por fuente (X de cada portal)
+- Limitar máximo de publicaciones por fuente
+- Muestreo ponderado por antigüedad de publicación
+
+**PALABRAS CLAVE:** muestra, muestreo, tomar, seleccionar, elegir, escoger, cantidad, número, primeros, últimos, aleatorio, random, al azar, más recientes, más baratos, más caros, top, mejores, todos, porcentaje, máximo, límite
+
+**ESQUEMA JSON:**
+```json
+{{
+  "metodo": "todos|aleatorio|primeros_por_precio_asc|primeros_por_precio_desc|primeros_por_fecha|primeros_por_relevancia|estratificado",
+  "cantidad": 20,
+  "porcentaje": 50,
+  "maximo_por_fuente": 10,
+  "criterio_orden": "precio|fecha|relevancia|verificacion",
+  "priorizar_verificados": true,
+  "solo_con_fotos": true
+}}
+```
+
+═══════════════════════════════════════════════════════════════════════════════
+### 6. TIPO: "punto_control"
+═══════════════════════════════════════════════════════════════════════════════
+**DEFINICIÓN DE NEGOCIO:** Reglas que establece el vendedor para determinar CONDICIONES que permitan establecer FLUJOS CONDICIONALES dentro del proceso de cálculo de precio de venta. Por ejemplo: si no se hallan más de 5 publicaciones de autos similares, aumentar el rango de búsqueda de kilometraje.
+**PROPÓSITO:** Manejar casos excepcionales donde no hay suficientes datos o condiciones especiales.
+
+**ESCENARIOS CONTEMPLADOS:**
+- Si hay menos de N publicaciones, ampliar rango de años
+- Si hay menos de N publicaciones, ampliar rango de kilometraje
+- Si hay menos de N publicaciones, agregar marcas similares
+- Si hay menos de N publicaciones, buscar en más fuentes
+- Si hay menos de N publicaciones, alertar al usuario
+- Si hay menos de N publicaciones, abortar valuación
+- Si el precio promedio supera X, aplicar ajuste especial
+- Si la desviación es muy alta, eliminar más outliers
+- Si no hay publicaciones de concesionarias, incluir particulares
+- Si el modelo es muy nuevo, usar solo fuentes verificadas
+- Si el modelo es muy viejo, ampliar búsqueda
+- Validación cruzada entre fuentes
+- Condiciones específicas por marca/modelo
+
+**PALABRAS CLAVE:** si, cuando, en caso de, siempre que, a menos que, condición, umbral, mínimo, máximo, menos de, más de, al menos, como máximo, no se encuentran, no hay suficientes, entonces, ampliar, expandir, extender, reducir, flexibilizar, alertar, abortar, cancelar, usar alternativa, plan b, fallback
+
+**ESQUEMA JSON:**
+```json
+{{
+  "condicion_tipo": "cantidad_minima|cantidad_maxima|precio_promedio|desviacion_alta|sin_resultados",
+  "umbral_minimo": 5,
+  "umbral_maximo": 100,
+  "condicion_marca": "Marca específica (si aplica)",
+  "condicion_modelo": "Modelo específico (si aplica)",
+  "condicion_año": 2020,
+  "accion": "ampliar_busqueda|reducir_busqueda|usar_fuentes_secundarias|agregar_marcas_similares|alertar|abortar|aplicar_ajuste_especial",
+  "nuevos_parametros": {{
+    "año_rango": [-3, 3],
+    "km_rango": [-30000, 30000],
+    "marcas_adicionales": ["Honda", "Nissan"],
+    "incluir_particulares": true
+  }},
+  "mensaje_alerta": "Mensaje personalizado para el usuario",
+  "ajuste_especial": {{"tipo": "porcentual", "valor": -5}}
+}}
+```
+
+═══════════════════════════════════════════════════════════════════════════════
+### 7. TIPO: "metodo_valuacion"
+═══════════════════════════════════════════════════════════════════════════════
+**DEFINICIÓN DE NEGOCIO:** Reglas que DEFINEN EL PRECIO DE VENTA DE REFERENCIA DEL MERCADO. Es el MÉTODO DE VALUACIÓN con respecto a la muestra obtenida de publicaciones. Define cómo se calcula el valor central a partir de los datos.
+**PROPÓSITO:** Calcular un precio de referencia justo basado en la muestra de mercado.
+
+**ESCENARIOS CONTEMPLADOS:**
+- Usar mediana (valor central, resistente a outliers)
+- Usar promedio simple (media aritmética)
+- Usar promedio ponderado (dar más peso a ciertas publicaciones)
+- Usar moda (valor más frecuente)
+- Usar percentil específico (P25, P50, P75, P90)
+- Usar precio mínimo o máximo de la muestra
+- Combinar métodos (70% mediana + 30% promedio)
+- Excluir extremos antes de calcular
+- Ponderar por antigüedad de publicación (más recientes pesan más)
+- Ponderar por verificación del vendedor
+- Ponderar por similitud con el vehículo a valuar
+- Ponderar por cantidad de fotos/descripción
+- Usar rango de precios (mínimo-máximo sugerido)
+
+**PALABRAS CLAVE:** mediana, promedio, media, moda, percentil, valor central, método, calcular, computar, precio de referencia, valor de mercado, valuación, tasación, ponderado, peso, combinar, excluir extremos
+
+**ESQUEMA JSON:**
+```json
+{{
+  "metodo": "mediana|promedio|promedio_ponderado|moda|percentil|minimo|maximo|combinado",
+  "percentil": 50,
+  "excluir_extremos": true,
+  "cantidad_excluir": 2,
+  "combinacion": [
+    {{"metodo": "mediana", "peso": 0.7}},
+    {{"metodo": "promedio", "peso": 0.3}}
+  ],
+  "ponderaciones": {{
+    "antiguedad_publicacion": {{"peso": 1.5, "dias_max": 30}},
+    "verificacion_vendedor": {{"peso": 2.0, "solo_verificados": false}},
+    "similitud_km": {{"peso": 1.2, "tolerancia": 10000}},
+    "cantidad_fotos": {{"peso": 1.1, "minimo": 5}},
+    "tipo_vendedor": {{"concesionaria": 1.3, "particular": 1.0}}
+  }},
+  "calcular_rango": true,
+  "rango_porcentaje": 10
+}}
+```
+
+═══════════════════════════════════════════════════════════════════════════════
+## REGLAS DE EXTRACCIÓN - MUY IMPORTANTE
+═══════════════════════════════════════════════════════════════════════════════
+
+⚠️ DEBES CAPTURAR **ABSOLUTAMENTE TODOS** LOS DETALLES DE LA DESCRIPCIÓN:
+- Marcas de autos mencionadas (Toyota, Renault, Chevrolet, Ford, Volkswagen, Fiat, Honda, etc.)
+- Modelos específicos (Corolla, Clio, Cruze, Focus, Gol, Cronos, Civic, etc.)
+- Versiones o variantes (SE, XLE, Titanium, Highline, etc.)
+- Porcentajes o valores numéricos exactos
+- Montos en pesos ($) o dólares (USD)
+- Fechas, meses, períodos temporales (enero, febrero, Q1, trimestre, primer semestre, etc.)
+- Años específicos (2020, 2021, 2022, etc.)
+- Rangos de kilometraje (±10000 km, menos de 50000 km, etc.)
+- Rangos de años (±2 años, 2018 en adelante, etc.)
+- Condiciones específicas mencionadas (único dueño, service oficial, etc.)
+- Motivos o razones explicadas (por alta demanda, por baja rotación, etc.)
+- Ubicaciones geográficas (Buenos Aires, Córdoba, CABA, etc.)
+- Tipos de vendedor (concesionaria, particular, agencia)
+- Cualquier otro detalle relevante mencionado
+
+NUNCA omitas información. Si el usuario menciona "enero", debe aparecer en el JSON.
+Si menciona "Renault", debe aparecer. Si menciona "15%", debe aparecer exactamente.
+Si menciona "$50000", debe ser ajuste_fijo con monto 50000.
+Si menciona "50000 pesos", debe ser ajuste_fijo con monto 50000.
+
+═══════════════════════════════════════════════════════════════════════════════
+## EJEMPLOS DE EXTRACCIÓN EXHAUSTIVA
+═══════════════════════════════════════════════════════════════════════════════
+
+ENTRADA: "Aumentar el precio de los autos Renault un 15% por el mes de enero"
+```json
+{{
+  "tipo_detectado": "ajuste_calculo",
+  "es_valido": true,
+  "parametros": {{
+    "tipo": "ajuste_porcentual",
+    "porcentaje": 15,
+    "operacion": "incrementar",
+    "base": "promedio_mercado",
+    "condicion_marca": "Renault",
+    "periodo_vigencia": {{
+      "tipo": "mes",
+      "mes": "enero"
+    }}
+  }}
+}}
+```
+
+ENTRADA: "Aumentar en 20000$ el precio de los autos Renault solo por el mes de enero de 2026"
+```json
+{{
+  "tipo_detectado": "ajuste_calculo",
+  "es_valido": true,
+  "parametros": {{
+    "tipo": "ajuste_fijo",
+    "monto": 20000,
+    "moneda": "ARS",
+    "operacion": "incrementar",
+    "condicion_marca": "Renault",
+    "periodo_vigencia": {{
+      "tipo": "mes",
+      "mes": "enero",
+      "año": 2026
+    }}
+  }}
+}}
+```
+
+ENTRADA: "Restar 500 dólares a los Toyota Corolla 2020 importados"
+```json
+{{
+  "tipo_detectado": "ajuste_calculo",
+  "es_valido": true,
+  "parametros": {{
+    "tipo": "ajuste_fijo",
+    "monto": 500,
+    "moneda": "USD",
+    "operacion": "decrementar",
+    "condicion_marca": "Toyota",
+    "condicion_modelo": "Corolla",
+    "condicion_año": 2020,
+    "motivo": "importados"
+  }}
+}}
+```
+
+ENTRADA: "Aplicar margen de ganancia del 12% con mínimo de 100000 pesos"
+```json
+{{
+  "tipo_detectado": "ajuste_calculo",
+  "es_valido": true,
+  "parametros": {{
+    "tipo": "margen_ganancia",
+    "porcentaje": 12,
+    "minimo_pesos": 100000
+  }}
+}}
+```
+
+ENTRADA: "Consultar precios en Kavak, MercadoLibre y Autocosmos priorizando Kavak"
+```json
+{{
+  "tipo_detectado": "fuente",
+  "es_valido": true,
+  "parametros": {{
+    "fuentes": [
+      {{"url": "kavak.com.ar", "nombre": "Kavak", "prioridad": 1}},
+      {{"url": "mercadolibre.com.ar", "nombre": "MercadoLibre", "prioridad": 2}},
+      {{"url": "autocosmos.com.ar", "nombre": "Autocosmos", "prioridad": 3}}
+    ]
+  }}
+}}
+```
+
+ENTRADA: "Eliminar las 5 publicaciones más baratas y las 3 más caras porque distorsionan"
+```json
+{{
+  "tipo_detectado": "depuracion",
+  "es_valido": true,
+  "parametros": {{
+    "accion": "eliminar_outliers",
+    "extremo": "ambos",
+    "cantidad_inferior": 5,
+    "cantidad_superior": 3,
+    "motivo": "distorsionan"
+  }}
+}}
+```
+
+ENTRADA: "Eliminar publicaciones con más de 45 días de antigüedad y sin fotos"
+```json
+{{
+  "tipo_detectado": "depuracion",
+  "es_valido": true,
+  "parametros": {{
+    "accion": "eliminar_por_criterio",
+    "criterios": [
+      {{"tipo": "eliminar_antiguos", "dias_maximos": 45}},
+      {{"tipo": "eliminar_sin_fotos"}}
+    ]
+  }}
+}}
+```
+
+ENTRADA: "Filtrar Toyota y Honda, modelos 2019 a 2023, menos de 80000 km, solo automáticos de concesionarias"
+```json
+{{
+  "tipo_detectado": "filtro_busqueda",
+  "es_valido": true,
+  "parametros": {{
+    "filtros": [
+      {{"campo": "marca", "operador": "en_lista", "valor": ["Toyota", "Honda"]}},
+      {{"campo": "año", "operador": "entre", "valor": [2019, 2023]}},
+      {{"campo": "kilometraje", "operador": "menor", "valor": 80000}},
+      {{"campo": "transmision", "operador": "igual", "valor": "automatica"}},
+      {{"campo": "tipo_vendedor", "operador": "igual", "valor": "concesionaria"}}
+    ]
+  }}
+}}
+```
+
+ENTRADA: "Tomar máximo 30 publicaciones, priorizando las más recientes de vendedores verificados"
+```json
+{{
+  "tipo_detectado": "muestreo",
+  "es_valido": true,
+  "parametros": {{
+    "metodo": "primeros_por_fecha",
+    "cantidad": 30,
+    "priorizar_verificados": true
+  }}
+}}
+```
+
+ENTRADA: "Si hay menos de 8 publicaciones de Ford Focus, ampliar a ±4 años y ±25000 km y agregar Ford Fiesta"
+```json
+{{
+  "tipo_detectado": "punto_control",
+  "es_valido": true,
+  "parametros": {{
+    "condicion_tipo": "cantidad_minima",
+    "umbral_minimo": 8,
+    "condicion_marca": "Ford",
+    "condicion_modelo": "Focus",
+    "accion": "ampliar_busqueda",
+    "nuevos_parametros": {{
+      "año_rango": [-4, 4],
+      "km_rango": [-25000, 25000],
+      "modelos_adicionales": ["Fiesta"]
+    }}
+  }}
+}}
+```
+
+ENTRADA: "Usar 70% mediana y 30% promedio, excluyendo los 2 valores más extremos de cada lado"
+```json
+{{
+  "tipo_detectado": "metodo_valuacion",
+  "es_valido": true,
+  "parametros": {{
+    "metodo": "combinado",
+    "combinacion": [
+      {{"metodo": "mediana", "peso": 0.7}},
+      {{"metodo": "promedio", "peso": 0.3}}
+    ],
+    "excluir_extremos": true,
+    "cantidad_excluir": 2
+  }}
+}}
+```
+
+ENTRADA: "Usar percentil 75 para autos de alta gama y percentil 50 para el resto"
+```json
+{{
+  "tipo_detectado": "metodo_valuacion",
+  "es_valido": true,
+  "parametros": {{
+    "metodo": "percentil",
+    "percentil": 75,
+    "condicion": "alta_gama",
+    "percentil_alternativo": 50,
+    "motivo": "diferenciar alta gama del resto"
+  }}
+}}
+```
+
+---------------------------------------------------------
+SOLICITUD ACTUAL:
+"{descripcion}"
+
+RECUERDA: 
+1. Identifica correctamente el TIPO de regla según las definiciones de negocio
+2. Extrae ABSOLUTAMENTE TODOS los detalles mencionados
+3. No omitas fechas, marcas, modelos, porcentajes, montos, condiciones ni ningún otro elemento
+4. Distingue correctamente entre ajuste_porcentual (%) y ajuste_fijo ($, pesos, monto)
+5. Captura rangos, listas y condiciones múltiples cuando se mencionen
+
+Responde SOLO con el JSON (sin explicaciones):"""
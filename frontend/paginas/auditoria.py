@@ -0,0 +1,21 @@
+# frontend/paginas/auditoria.py
+"""Registro de auditoría de cambios de reglas."""
+
+import pandas as pd
+import streamlit as st
+
+from comun import ConfigIA, api_get
+
+
+def mostrar(ia: ConfigIA):
+    st.title("📜 Registro de Auditoría")
+    
+    aud = api_get("/auditoria")
+    
+    if aud:
+        df = pd.DataFrame(aud)
+        if 'fecha' in df.columns:
+            df['fecha'] = pd.to_datetime(df['fecha']).dt.strftime('%Y-%m-%d %H:%M')
+        st.dataframe(df, use_container_width=True)
+    else:
+        st.info("No hay registros de auditoría")
@@ -0,0 +1,45 @@
+# frontend/paginas/historial.py
+"""Historial de valuaciones realizadas."""
+
+import streamlit as st
+
+from comun import ConfigIA, api_get
+
+
+def mostrar(ia: ConfigIA):
+    st.title("📊 Historial de Valuaciones")
+    
+    valuaciones = api_get("/valuaciones")
+    
+    if valuaciones:
+        st.caption(f"Total: {len(valuaciones)} valuaciones")
+        
+        for val in valuaciones:
+            vehiculo = val.get("vehiculo", {})
+            precio = val.get("precio_sugerido")
+            confianza = val.get("confianza", "N/A")
+            fecha = val.get("fecha", "")
+            
+            titulo = f"{vehiculo.get('marca', '?')} {vehiculo.get('modelo', '?')} {vehiculo.get('año', '?')}"
+            precio_texto = f"${precio:,.0f}" if precio else "Sin precio"
+            
+            with st.expander(f"🚗 {titulo} - {precio_texto} ({confianza})"):
+                col1, col2 = st.columns(2)
+                
+                with col1:
+                    st.markdown(f"**Vehículo:** {titulo}")
+                    st.markdown(f"**Precio Sugerido:** {precio_texto}")
+                    st.markdown(f"**Confianza:** {confianza}")
+                
+                with col2:
+                    st.markdown(f"**Fecha:** {fecha[:16] if fecha else 'N/A'}")
+                    duracion = val.get("duracion_segundos")
+                    st.markdown(f"**Duración:** {duracion:.1f}s" if duracion else "**Duración:** N/A")
+                    st.markdown(f"**ID:** `{val.get('id', '')[:8]}...`")
+                
+                if st.button("Ver detalle completo", key=f"det_{val.get('id')}"):
+                    detalle = api_get(f"/valuaciones/{val.get('id')}")
+                    if detalle:
+                        st.json(detalle)
+    else:
+        st.info("No hay valuaciones registradas. Ve a 'Valuar Vehículo' para crear una.")
@@ -0,0 +1,405 @@
+# frontend/paginas/nueva_regla.py
+"""Nueva regla: descripción en lenguaje natural -> JSON de parámetros (intérprete local o IA) y alta."""
+
+import json
+
+import pandas as pd
+import streamlit as st
+
+from comun import (
+    ConfigIA, api_get, api_post, detectar_tipo_por_heuristica, generar_con_ia_generico, obtener_debug_deteccion
+)
+from constantes import TIPO_REGLA_LABELS, TIPO_REGLA_DESCRIPCIONES, CLAVES_TIPOS
+from servicios.interprete_reglas import UMBRAL_CONFIANZA_LOCAL, interpretar_regla
+
+
+def mostrar(ia: ConfigIA):
+    proveedor_ia, modelo_seleccionado, api_key_ia, interprete_local, debug_mode = ia.proveedor, ia.modelo, ia.api_key, ia.interprete_local, ia.debug
+
+    st.title("🔧 Nueva Regla Inteligente")
+    st.caption("Describe la regla en detalle. El sistema capturará TODOS los elementos mencionados.")
+
+    # 1. INPUTS PRIMARIOS (sin Orden - se define después de generar JSON)
+    col1, col2 = st.columns([3, 1])
+    with col1:
+        codigo = st.text_input("Código *", placeholder="Ej: AJUSTE_RENAULT_ENERO")
+    with col2:
+        pass  # Espacio reservado
+    
+    nombre = st.text_input("Nombre *", placeholder="Ej: Aumento Renault Enero")
+
+    # 2. DESCRIPCIÓN Y BOTÓN GENERAR
+    descripcion = st.text_area(
+        "Descripción (Lenguaje Natural) *", 
+        height=120, 
+        placeholder="Ej: Aumentar el precio de los autos Renault un 15% por el mes de enero debido a alta demanda estacional"
+    )
+    
+    # Tips de uso mejorados
+    with st.expander("💡 Tips y Guía de Tipos de Regla"):
+        st.markdown("""
+        ### Tipos de Regla Disponibles:
+        
+        | Tipo | Descripción | Ejemplo |
+        |------|-------------|---------|
+        | **📍 Fuente** | Portales de consulta de precios | "Agregar Kavak como fuente principal" |
+        | **🔍 Filtro** | Parámetros de búsqueda (marca, modelo, km) | "Filtrar autos Toyota con menos de 50000 km" |
+        | **🧹 Depuración** | Eliminar publicaciones con ruido | "Eliminar las 5 publicaciones más baratas" |
+        | **📊 Muestreo** | Tamaño de muestra a analizar | "Tomar 30 publicaciones aleatorias" |
+        | **⚠️ Punto Control** | Flujos condicionales | "Si hay menos de 5 autos, ampliar rango de años" |
+        | **📈 Método Valuación** | Cálculo del precio de referencia | "Usar mediana como precio de referencia" |
+        | **💰 Ajuste Cálculo** | Precio de venta final | "Aumentar 15% al precio de los Renault en enero" |
+        
+        ### Incluí todos los detalles:
+        - 🚗 **Marca/Modelo**: "autos Toyota Corolla"
+        - 📊 **Porcentajes**: "aumentar 15%", "reducir 10%"
+        - 📅 **Fechas/Períodos**: "por el mes de enero", "durante Q1"
+        - 🎯 **Condiciones**: "si hay menos de 5 publicaciones"
+        - 💬 **Motivos**: "por alta demanda", "debido a inflación"
+        """)
+    
+    col_btn1, col_btn2 = st.columns([1, 5])
+    with col_btn1:
+        generar = st.button("✨ Generar", type="primary", use_container_width=True)
+    with col_btn2:
+        limpiar = st.button("🗑️ Limpiar", use_container_width=True)
+
+    if limpiar:
+        st.session_state.json_generado = None
+        st.session_state.tipo_detectado = "fuente"
+        st.rerun()
+
+    # 3. LÓGICA DE PROCESAMIENTO
+    local = interpretar_regla(descripcion) if generar and descripcion else None
+
+    if local and interprete_local and local["confianza"] >= UMBRAL_CONFIANZA_LOCAL:
+        tipo_final = local["tipo_detectado"]
+        st.success(f"⚡ Regla interpretada localmente (sin IA) | Tipo: **{TIPO_REGLA_LABELS.get(tipo_final, tipo_final)}**")
+        if debug_mode:
+            with st.expander("🔧 Debug del Intérprete Local"):
+                st.write("**Confianza:**", local["confianza"])
+                st.json(local["parametros"])
+        st.session_state.tipo_detectado = tipo_final
+        st.session_state.json_generado = local["parametros"]
+        st.rerun()
+
+    elif generar and descripcion:
+        if proveedor_ia != "ollama" and not api_key_ia:
+            st.error("Falta API Key")
+        else:
+            with st.spinner(f"🧠 Analizando con {modelo_seleccionado}..."):
+                resultado = generar_con_ia_generico(proveedor_ia, api_key_ia, modelo_seleccionado, descripcion)
+                
+                # Debug info (solo para mostrar, no para decidir)
+                debug_info = obtener_debug_deteccion(descripcion) if debug_mode else None
+                
+                if resultado and resultado.get("es_valido", False):
+                    # PRIORIDAD: El tipo lo define la IA
+                    tipo_ia = str(resultado.get("tipo_detectado", "")).lower().strip()
+                    
+                    # Validar que el tipo de la IA sea válido
+                    if tipo_ia in CLAVES_TIPOS:
+                        tipo_final = tipo_ia
+                    else:
+                        # Fallback a heurística solo si la IA devuelve un tipo inválido
+                        tipo_heuristica = detectar_tipo_por_heuristica(descripcion)
+                        tipo_final = tipo_heuristica if tipo_heuristica in CLAVES_TIPOS else "fuente"
+                        st.warning(f"⚠️ Tipo de IA '{tipo_ia}' no reconocido. Usando heurística: {tipo_final}")
+                    
+                    st.success(f"✅ Análisis completo | Tipo detectado por IA: **{TIPO_REGLA_LABELS.get(tipo_final, tipo_final)}**")
+                    
+                    if debug_mode and debug_info:
+                        with st.expander("🔧 Debug de Detección (Solo referencia)"):
+                            st.write("**Tipo definido por IA:**", tipo_ia)
+                            st.write("**Puntajes heurísticos (referencia):**")
+                            st.json(debug_info["puntajes"])
+                            st.write("**Palabras coincidentes:**")
+                            for tipo, palabras in debug_info["coincidencias"].items():
+                                if palabras:
+                                    st.write(f"- **{tipo}**: {', '.join(palabras[:5])}{'...' if len(palabras) > 5 else ''}")
+                    
+                    st.session_state.tipo_detectado = tipo_final
+                    st.session_state.json_generado = resultado.get("parametros", {})
+                    
+                    st.rerun()
+                else:
+                    # Si la IA falla completamente, usar lo que haya resuelto el intérprete local
+                    if local["es_valido"]:
+                        st.warning(f"⚠️ IA sin resultado válido. Usando interpretación local (confianza {local['confianza']:.0%}): "
+                                   f"**{TIPO_REGLA_LABELS.get(local['tipo_detectado'])}** - revisá los parámetros")
+                        st.session_state.tipo_detectado = local["tipo_detectado"]
+                        st.session_state.json_generado = local["parametros"]
+                    else:
+                        tipo_heuristica = detectar_tipo_por_heuristica(descripcion)
+                        st.warning(f"⚠️ IA sin resultado válido. Usando heurística como fallback: **{TIPO_REGLA_LABELS.get(tipo_heuristica)}**")
+                        st.session_state.tipo_detectado = tipo_heuristica
+                        st.session_state.json_generado = {}
+
+    st.markdown("---")
+
+    # 4. OUTPUTS
+    col_out1, col_out2 = st.columns([1, 1])
+    
+    with col_out1:
+        st.info("Tipo de Regla Detectado (Editable)")
+        
+        tipo_actual = st.session_state.tipo_detectado
+        if tipo_actual in CLAVES_TIPOS:
+            indice_tipo = CLAVES_TIPOS.index(tipo_actual)
+        else:
+            indice_tipo = 0
+        
+        tipo = st.selectbox(
+            "Seleccione Tipo", 
+            CLAVES_TIPOS, 
+            index=indice_tipo,
+            format_func=lambda x: TIPO_REGLA_LABELS[x],
+            key="sb_tipo_final",
+            label_visibility="collapsed"
+        )
+        
+        # Mostrar descripción del tipo seleccionado
+        st.caption(f"ℹ️ {TIPO_REGLA_DESCRIPCIONES.get(tipo, '')}")
+        
+        if tipo != st.session_state.tipo_detectado:
+            st.session_state.tipo_detectado = tipo
+
+    with col_out2:
+        st.info("Parámetros JSON Generados (Editable)")
+        json_val = json.dumps(st.session_state.json_generado, indent=2, ensure_ascii=False) if st.session_state.json_generado else "{}"
+        json_editado = st.text_area("", value=json_val, height=300, label_visibility="collapsed")
+        
+        try:
+            json.loads(json_editado)
+            st.caption("✅ JSON válido")
+        except:
+            st.caption("❌ JSON inválido")
+
+    # 5. SELECTOR DE ORDEN VISUAL (solo si hay JSON generado)
+    orden = 10  # valor por defecto
+    
+    if st.session_state.json_generado:
+        st.markdown("---")
+        st.subheader(f"📊 Ordenamiento de Reglas: {TIPO_REGLA_LABELS.get(tipo, tipo)}")
+        
+        # Obtener reglas existentes del mismo tipo
+        todas_reglas = api_get("/reglas") or []
+        reglas_mismo_tipo = [r for r in todas_reglas if r.get('tipo') == tipo]
+        reglas_mismo_tipo = sorted(reglas_mismo_tipo, key=lambda x: x.get('orden', 0))
+        
+        if reglas_mismo_tipo:
+            st.markdown("**Reglas existentes en esta categoría:**")
+            
+            # Crear opciones de posición
+            posiciones = []
+            posiciones.append({"orden": 0, "label": "🔝 Al inicio (antes de todas)", "pos": "inicio"})
+            
+            for i, regla in enumerate(reglas_mismo_tipo):
+                orden_actual = regla.get('orden', 0)
+                posiciones.append({
+                    "orden": orden_actual,
+                    "label": f"📍 Orden {orden_actual}: {regla.get('nombre', 'Sin nombre')}",
+                    "pos": "existente",
+                    "regla": regla
+                })
+                # Opción para insertar después de esta regla
+                orden_siguiente = orden_actual + 1
+                if i < len(reglas_mismo_tipo) - 1:
+                    orden_siguiente = (orden_actual + reglas_mismo_tipo[i+1].get('orden', orden_actual + 2)) // 2
+                posiciones.append({
+                    "orden": orden_siguiente,
+                    "label": f"   ↳ Insertar aquí (orden {orden_siguiente})",
+                    "pos": "insertar",
+                    "orden_sugerido": orden_siguiente
+                })
+            
+            # Mostrar tabla visual
+            st.markdown("---")
+            col_tabla, col_nueva = st.columns([2, 1])
+            
+            with col_tabla:
+                # Tabla de reglas existentes
+                tabla_data = []
+                for regla in reglas_mismo_tipo:
+                    tabla_data.append({
+                        "Orden": regla.get('orden', 0),
+                        "Código": regla.get('codigo', ''),
+                        "Nombre": regla.get('nombre', ''),
+                        "Activo": "✅" if regla.get('activo', True) else "❌"
+                    })
+                
+                if tabla_data:
+                    df_reglas = pd.DataFrame(tabla_data)
+                    st.dataframe(df_reglas, use_container_width=True, hide_index=True)
+            
+            with col_nueva:
+                st.markdown("**🆕 Nueva regla:**")
+                st.markdown(f"**{nombre or 'Sin nombre'}**")
+                st.caption(f"Código: {codigo or 'Sin código'}")
+                
+                # Calcular opciones de orden
+                ordenes_existentes = [r.get('orden', 0) for r in reglas_mismo_tipo]
+                orden_min = min(ordenes_existentes) if ordenes_existentes else 0
+                orden_max = max(ordenes_existentes) if ordenes_existentes else 0
+                
+                opciones_orden = [
+                    (orden_min - 10 if orden_min > 10 else 1, f"🔝 Al inicio (orden {orden_min - 10 if orden_min > 10 else 1})"),
+                ]
+                
+                for i, regla in enumerate(reglas_mismo_tipo):
+                    ord_actual = regla.get('orden', 0)
+                    if i < len(reglas_mismo_tipo) - 1:
+                        ord_siguiente = reglas_mismo_tipo[i+1].get('orden', ord_actual + 10)
+                        orden_medio = (ord_actual + ord_siguiente) // 2
+                        if orden_medio != ord_actual:
+                            opciones_orden.append((orden_medio, f"↳ Después de '{regla.get('nombre', '')}' (orden {orden_medio})"))
+                    else:
+                        opciones_orden.append((ord_actual + 10, f"↳ Después de '{regla.get('nombre', '')}' (orden {ord_actual + 10})"))
+                
+                # Selector de posición
+                opcion_seleccionada = st.radio(
+                    "Posición de la nueva regla:",
+                    options=range(len(opciones_orden)),
+                    format_func=lambda i: opciones_orden[i][1],
+                    key="selector_orden"
+                )
+                
+                orden = opciones_orden[opcion_seleccionada][0]
+                
+                st.success(f"**Orden seleccionado: {orden}**")
+        
+        else:
+            st.info("No hay reglas existentes de este tipo. Esta será la primera.")
+            orden = st.number_input("Orden", value=10, min_value=1, key="orden_primera_regla")
+        
+        # Previsualización del nuevo ordenamiento
+        if reglas_mismo_tipo:
+            st.markdown("---")
+            st.markdown("**📋 Previsualización del nuevo ordenamiento:**")
+            
+            # Crear lista con la nueva regla incluida
+            preview_data = []
+            nueva_insertada = False
+            
+            for regla in reglas_mismo_tipo:
+                ord_regla = regla.get('orden', 0)
+                
+                # Insertar nueva regla en su posición
+                if not nueva_insertada and orden <= ord_regla:
+                    preview_data.append({
+                        "Orden": orden,
+                        "Código": codigo.upper().replace(" ", "_") if codigo else "NUEVO",
+                        "Nombre": f"🆕 {nombre or 'Nueva Regla'}",
+                        "Estado": "🆕 NUEVA"
+                    })
+                    nueva_insertada = True
+                
+                preview_data.append({
+                    "Orden": ord_regla,
+                    "Código": regla.get('codigo', ''),
+                    "Nombre": regla.get('nombre', ''),
+                    "Estado": "✅ Existente"
+                })
+            
+            # Si no se insertó, va al final
+            if not nueva_insertada:
+                preview_data.append({
+                    "Orden": orden,
+                    "Código": codigo.upper().replace(" ", "_") if codigo else "NUEVO",
+                    "Nombre": f"🆕 {nombre or 'Nueva Regla'}",
+                    "Estado": "🆕 NUEVA"
+                })
+            
+            df_preview = pd.DataFrame(preview_data)
+            st.dataframe(df_preview, use_container_width=True, hide_index=True)
+    
+    else:
+        # Si no hay JSON generado, mostrar input simple de orden
+        orden = 10
+
+    # 6. SIMULAR Y GUARDAR
+    puede_guardar = json_editado and json_editado != "{}"
+    
+    # Las fuentes no cambian el cálculo sobre comparables guardados: no se simulan
+    if tipo != "fuente":
+        col_sim, col_muestra = st.columns([3, 1])
+        with col_muestra:
+            muestra_sim = st.number_input("Valuaciones", value=200, min_value=10, max_value=5000, step=50,
+                                          key="muestra_simulacion")
+        with col_sim:
+            simular = st.button("🧪 Simular impacto en valuaciones recientes", use_container_width=True,
+                                disabled=not puede_guardar)
+        if simular:
+            try:
+                borrador = {
+                    "codigo": (codigo or "BORRADOR").upper().replace(" ", "_"),
+                    "nombre": nombre or "Borrador",
+                    "tipo": tipo,
+                    "parametros": json.loads(json_editado),
+                    "orden": orden
+                }
+                with st.spinner("Recalculando valuaciones con comparables guardados..."):
+                    sim = api_post("/reglas/simular", {"regla": borrador, "muestra": int(muestra_sim)}, timeout=120,
+                                   invalidar=False)
+                if sim:
+                    if not sim["valuaciones"]:
+                        st.info("No hay valuaciones guardadas para simular.")
+                    else:
+                        c1, c2, c3, c4 = st.columns(4)
+                        c1.metric("Valuaciones afectadas", f"{sim['afectadas']} / {sim['valuaciones']}")
+                        promedio = sim.get("delta_pct_promedio")
+                        c2.metric("Cambio promedio", f"{promedio:+.2f}%" if promedio is not None else "-")
+                        mediana = sim.get("delta_pct_percentiles", {}).get("p50")
+                        c3.metric("Cambio mediano", f"{mediana:+.2f}%" if mediana is not None else "-")
+                        delta = sim.get("delta_promedio")
+                        c4.metric("Cambio promedio ($)", f"${delta:+,.0f}" if delta is not None else "-")
+
+                        if sim.get("delta_pct_percentiles"):
+                            percentiles = pd.DataFrame({
+                                "Cambio %": sim["delta_pct_percentiles"],
+                                "Precio actual": sim["precio_antes_percentiles"],
+                                "Precio con la regla": sim["precio_despues_percentiles"],
+                            }).T
+                            st.dataframe(percentiles.style.format("{:,.2f}"), use_container_width=True)
+                        if sim["sin_precio_despues"] != sim["sin_precio_antes"]:
+                            st.warning(f"Valuaciones sin precio: {sim['sin_precio_antes']} → {sim['sin_precio_despues']}")
+                        if sim.get("mayores_cambios"):
+                            with st.expander("Mayores cambios"):
+                                st.dataframe(pd.DataFrame([{
+                                    "Vehículo": f"{m['vehiculo']['marca']} {m['vehiculo']['modelo']} {m['vehiculo']['año']}"
+                                    if m.get("vehiculo") else m["valuacion_id"],
+                                    "Precio actual": m["precio_referencia"],
+                                    "Con la regla": m["precio_replay"],
+                                    "Cambio %": round(m["diferencia_pct"], 2)
+                                } for m in sim["mayores_cambios"]]), use_container_width=True, hide_index=True)
+                        st.caption(f"Simulado en {sim['duracion_segundos']:.1f}s sin IA ni red")
+                    for advertencia in sim.get("advertencias", []):
+                        st.warning(f"⚠️ {advertencia}")
+            except json.JSONDecodeError:
+                st.error("El JSON no es válido. Corregilo antes de simular.")
+    
+    if st.button("💾 Guardar Regla", type="primary", use_container_width=True, disabled=not puede_guardar):
+        if not codigo or not nombre:
+            st.error("Código y Nombre son obligatorios")
+        else:
+            try:
+                payload = {
+                    "codigo": codigo.upper().replace(" ", "_"),
+                    "nombre": nombre,
+                    "tipo": tipo,
+                    "parametros": json.loads(json_editado),
+                    "descripcion": descripcion,
+                    "orden": orden
+                }
+                res = api_post("/reglas", payload, {"usuario_id": st.session_state.usuario_id})
+                if res:
+                    st.success("✅ Regla guardada exitosamente")
+                    for advertencia in res.get("advertencias", []):
+                        st.warning(f"⚠️ {advertencia}")
+                    st.session_state.json_generado = None
+                    st.session_state.tipo_detectado = "fuente"
+                    st.balloons()
+            except json.JSONDecodeError:
+                st.error("El JSON no es válido. Corregilo antes de guardar.")
+            except Exception as e:
+                st.error(f"Error: {e}")
@@ -0,0 +1,50 @@
+# frontend/paginas/reglas_activas.py
+"""Listado de reglas activas."""
+
+import streamlit as st
+
+from comun import ConfigIA, api_get, api_put
+from constantes import TIPO_REGLA_LABELS, TIPO_REGLA_DESCRIPCIONES, CLAVES_TIPOS
+
+
+def mostrar(ia: ConfigIA):
+    st.title("📋 Reglas Activas")
+    
+    reglas = api_get("/reglas")
+    
+    if not reglas:
+        st.info("No hay reglas configuradas. Ve a 'Nueva Regla' para crear una.")
+    else:
+        reglas_por_tipo = {}
+        for r in reglas:
+            tipo = r.get('tipo', 'otro')
+            if tipo not in reglas_por_tipo:
+                reglas_por_tipo[tipo] = []
+            reglas_por_tipo[tipo].append(r)
+        
+        # Ordenar por el orden definido en CLAVES_TIPOS (según README)
+        for tipo in CLAVES_TIPOS:
+            if tipo in reglas_por_tipo:
+                lista = reglas_por_tipo[tipo]
+                # Ordenar reglas dentro del tipo por campo 'orden'
+                lista = sorted(lista, key=lambda x: x.get('orden', 0))
+                
+                st.subheader(TIPO_REGLA_LABELS.get(tipo, tipo))
+                st.caption(TIPO_REGLA_DESCRIPCIONES.get(tipo, ''))
+                
+                for r in lista:
+                    orden_num = r.get('orden', 0)
+                    with st.expander(f"{'✅' if r.get('activo', True) else '❌'} [{orden_num}] {r['nombre']} - `{r.get('codigo', '')}`"):
+                        col1, col2 = st.columns([3, 1])
+                        
+                        with col1:
+                            if r.get('descripcion'):
+                                st.caption(f"📝 {r['descripcion']}")
+                            st.json(r['parametros'])
+                        
+                        with col2:
+                            st.caption(f"Orden: {orden_num}")
+                            st.caption(f"Versión: {r.get('version', 1)}")
+                            if st.button("🗑️ Desactivar", key=f"del_{r['id']}"):
+                                api_put(f"/reglas/{r['id']}", {"activo": False}, {"usuario_id": st.session_state.usuario_id})
+                                st.rerun()
@@ -0,0 +1,311 @@
+# frontend/paginas/valuar.py
+"""Valuación de un vehículo: búsqueda de publicaciones y valuación con las reglas configuradas."""
+
+import json
+
+import pandas as pd
+import streamlit as st
+
+from comun import ConfigIA, api_get, api_post, obtener_cliente_api
+from constantes import TIPO_REGLA_LABELS, CLAVES_TIPOS
+
+
+def mostrar(ia: ConfigIA):
+    proveedor_ia, modelo_seleccionado, api_key_ia = ia.proveedor, ia.modelo, ia.api_key
+
+    st.title("🚗 Valuar Vehículo")
+    st.caption("Ingrese los datos del vehículo para obtener una valuación basada en las reglas configuradas.")
+    
+    # Inicializar estado de valuación
+    if "valuacion_resultado" not in st.session_state:
+        st.session_state.valuacion_resultado = None
+    if "valuacion_en_proceso" not in st.session_state:
+        st.session_state.valuacion_en_proceso = False
+    
+    # Formulario de vehículo
+    st.subheader("📝 Datos del Vehículo")
+    
+    col1, col2 = st.columns(2)
+    
+    with col1:
+        marca = st.text_input("Marca *", placeholder="Ej: Toyota, Renault, Chevrolet")
+        año = st.number_input("Año *", min_value=1990, max_value=2026, value=2020)
+        version = st.text_input("Versión", placeholder="Ej: SE, XLE, Titanium (opcional)")
+        combustible = st.selectbox("Combustible", ["", "Nafta", "Diesel", "GNC", "Híbrido", "Eléctrico"])
+    
+    with col2:
+        modelo = st.text_input("Modelo *", placeholder="Ej: Corolla, Clio, Cruze")
+        kilometraje = st.number_input("Kilometraje (km) *", min_value=0, max_value=500000, value=50000, step=1000)
+        transmision = st.selectbox("Transmisión", ["", "Automática", "Manual", "CVT"])
+    
+    st.markdown("---")
+    
+    # Configuración de IA
+    st.subheader("🤖 Configuración de IA (Búsqueda y Valuación)")
+    
+    col_ia1, col_ia2 = st.columns(2)
+    
+    with col_ia1:
+        proveedor_valuacion = st.selectbox(
+            "Motor de Valuación",
+            ["mock", "offline", "ollama", "groq", "gemini"],
+            format_func=lambda x: {
+                "mock": "🧪 Demo (Sin IA real)",
+                "offline": "📦 Offline (Comparables almacenados)",
+                "ollama": "🦙 Ollama (Local)",
+                "groq": "⚡ Groq (Cloud)",
+                "gemini": "🔷 Google Gemini (Cloud)"
+            }.get(x, x)
+        )
+    
+    with col_ia2:
+        if proveedor_valuacion == "ollama":
+            modelo_valuacion = st.text_input("Modelo Ollama", value="llama3.2")
+            api_key_valuacion = None
+        elif proveedor_valuacion == "groq":
+            modelo_valuacion = st.selectbox("Modelo Groq", ["llama-3.3-70b-versatile", "llama-3.1-8b-instant", "mixtral-8x7b-32768"])
+            api_key_valuacion = st.text_input("API Key Groq", type="password")
+        elif proveedor_valuacion == "gemini":
+            modelo_valuacion = st.selectbox(
+                "Modelo Gemini", 
+                [
+                    "gemini-2.0-flash",
+                    "gemini-2.0-flash-exp",
+                    "gemini-1.5-flash",
+                    "gemini-1.5-pro",
+                    "gemini-exp-1206",
+                    "gemini-2.0-flash-thinking-exp",
+                    "gemini-3-flash-preview",
+                    "gemini-3-pro-preview"
+                ]
+            )
+            api_key_valuacion = st.text_input("API Key Gemini", type="password")
+        elif proveedor_valuacion == "offline":
+            modelo_valuacion = None
+            api_key_valuacion = None
+            st.info("Modo offline: aplica las reglas sobre publicaciones de valuaciones anteriores, sin red")
+        else:
+            modelo_valuacion = None
+            api_key_valuacion = None
+            st.info("Modo demo: genera valores de ejemplo sin consultar IA real")
+    
+    st.markdown("---")
+    
+    # Resumen de reglas activas
+    with st.expander("📋 Ver reglas activas que se aplicarán"):
+        reglas = api_get("/reglas") or []
+        if reglas:
+            reglas_por_tipo = {}
+            for r in reglas:
+                tipo = r.get('tipo', 'otro')
+                if tipo not in reglas_por_tipo:
+                    reglas_por_tipo[tipo] = []
+                reglas_por_tipo[tipo].append(r)
+            
+            # Ordenar según CLAVES_TIPOS (orden del README)
+            for tipo in CLAVES_TIPOS:
+                if tipo in reglas_por_tipo:
+                    lista = sorted(reglas_por_tipo[tipo], key=lambda x: x.get('orden', 0))
+                    st.markdown(f"**{TIPO_REGLA_LABELS.get(tipo, tipo)}** ({len(lista)})")
+                    for r in lista:
+                        st.caption(f"  • [{r.get('orden', 0)}] {r.get('nombre', 'Sin nombre')}")
+        else:
+            st.warning("No hay reglas configuradas. La valuación usará valores por defecto.")
+    
+    # Botón de valuación
+    st.markdown("---")
+    
+    col_btn_val1, col_btn_val2 = st.columns(2)
+    
+    with col_btn_val1:
+        if st.button("🔍 1. Buscar Publicaciones", use_container_width=True, disabled=not (marca and modelo)):
+            st.session_state.detener_busqueda = False
+            
+            # Banner informativo de IA activa (usando la selección de la página)
+            ia_label = {"ollama": "🦙 OLLAMA (Local)", "groq": "⚡ GROQ (Cloud)", "gemini": "🔷 GEMINI (Cloud)", "mock": "🧪 MOCK", "offline": "📦 OFFLINE"}.get(proveedor_valuacion, proveedor_valuacion.upper())
+            st.info(f"🤖 **Navegación Inteligente Activa**\n\n**Proveedor:** {ia_label} | **Modelo:** `{modelo_valuacion or 'Default'}`")
+            
+            with st.status("Ejecutando búsqueda inteligente...", expanded=True) as status:
+                # Botón para detener (usando un placeholder para que aparezca arriba)
+                stop_placeholder = st.empty()
+                
+                payload_busqueda = {
+                    "marca": marca,
+                    "modelo": modelo,
+                    "año": año,
+                    "version": version if version else None,
+                    # Si el usuario eligió 'mock'/'offline' para el resultado, la búsqueda (que es agentica) 
+                    # usa la IA configurada en la sidebar o Ollama por defecto.
+                    "proveedor_ia": proveedor_valuacion if proveedor_valuacion not in ("mock", "offline") else proveedor_ia,
+                    "modelo_ia": modelo_valuacion if proveedor_valuacion not in ("mock", "offline") else (modelo_seleccionado or "llama3.2"),
+                    "api_key_ia": api_key_valuacion if proveedor_valuacion not in ("mock", "offline") else api_key_ia
+                }
+                
+                try:
+                    with obtener_cliente_api().post("/buscar_urls", payload_busqueda, stream=True, timeout=None) as r:
+                        for line in r.iter_lines():
+                            # Verificar si el usuario pidió detener
+                            if st.session_state.detener_busqueda:
+                                st.warning("🛑 Búsqueda detenida por el usuario.")
+                                break
+                                
+                            if line:
+                                update = json.loads(line.decode('utf-8'))
+                                step_text = update.get("step", "")
+                                status_type = update.get("status", "info")
+                                
+                                if status_type == "success": st.toast(step_text, icon="✅")
+                                elif status_type == "error": st.error(step_text)
+                                else: st.write(f"⏳ {step_text}")
+                                
+                                if "resultados" in update:
+                                    st.session_state.urls_encontradas = update["resultados"]
+                                    status.update(label="✅ Búsqueda completada", state="complete", expanded=False)
+                
+                except Exception as e:
+                    st.error(f"Error de conexión: {e}")
+
+        if st.session_state.urls_encontradas and not st.session_state.detener_busqueda:
+            if st.button("🛑 Detener Proceso", use_container_width=True):
+                st.session_state.detener_busqueda = True
+                st.rerun()
+
+    # Mostrar URLs halladas si existen
+    if st.session_state.urls_encontradas:
+        st.subheader("🔗 Publicaciones Halladas")
+        df_urls = pd.DataFrame(st.session_state.urls_encontradas)
+        st.dataframe(df_urls, use_container_width=True)
+
+    # El modo offline no requiere búsqueda previa
+    if st.session_state.urls_encontradas or proveedor_valuacion == "offline":
+        with col_btn_val2:
+            puede_valuar = True
+            if proveedor_valuacion in ["groq", "gemini"] and not api_key_valuacion:
+                st.warning(f"⚠️ Falta API Key de {proveedor_valuacion}")
+                puede_valuar = False
+                
+            if st.button("🤖 2. Calcular Precio con IA", type="primary", use_container_width=True, disabled=not puede_valuar):
+                st.session_state.valuacion_en_proceso = True
+                
+                with st.spinner("⏳ La IA está analizando las publicaciones..."):
+                    payload = {
+                        "marca": marca,
+                        "modelo": modelo,
+                        "año": año,
+                        "kilometraje": kilometraje,
+                        "version": version if version else None,
+                        "transmision": transmision if transmision else None,
+                        "combustible": combustible if combustible else None,
+                        "proveedor_ia": proveedor_valuacion,
+                        "modelo_ia": modelo_valuacion,
+                        "api_key_ia": api_key_valuacion,
+                        "urls_previas": st.session_state.urls_encontradas
+                    }
+                    
+                    resultado = api_post("/valuaciones", payload, {"usuario_id": st.session_state.usuario_id})
+                    
+                    if resultado:
+                        st.session_state.valuacion_resultado = resultado
+                        st.session_state.valuacion_en_proceso = False
+                        st.rerun()
+                    else:
+                        st.error("❌ Error al ejecutar la valuación")
+                        st.session_state.valuacion_en_proceso = False
+    
+    # Mostrar resultado
+    if st.session_state.valuacion_resultado:
+        resultado = st.session_state.valuacion_resultado
+        
+        st.markdown("---")
+        st.subheader("📊 Resultado de la Valuación")
+        
+        # Precio principal
+        col_precio1, col_precio2, col_precio3 = st.columns(3)
+        
+        with col_precio1:
+            precio_min = resultado.get("precio_minimo")
+            if precio_min:
+                st.metric("💰 Precio Mínimo", f"${precio_min:,.0f}")
+        
+        with col_precio2:
+            precio_sug = resultado.get("precio_sugerido")
+            if precio_sug:
+                st.metric("⭐ Precio Sugerido", f"${precio_sug:,.0f}")
+            else:
+                st.warning("No se pudo calcular precio")
+        
+        with col_precio3:
+            precio_max = resultado.get("precio_maximo")
+            if precio_max:
+                st.metric("💎 Precio Máximo", f"${precio_max:,.0f}")
+        
+        # Confianza y métricas
+        col_met1, col_met2, col_met3 = st.columns(3)
+        
+        with col_met1:
+            confianza = resultado.get("confianza", "N/A")
+            color = {"ALTA": "🟢", "MEDIA": "🟡", "BAJA": "🔴"}.get(confianza, "⚪")
+            st.metric("Confianza", f"{color} {confianza}")
+        
+        with col_met2:
+            duracion = resultado.get("duracion_segundos")
+            if duracion:
+                st.metric("⏱️ Duración", f"{duracion:.1f}s")
+        
+        with col_met3:
+            analisis = resultado.get("analisis", {})
+            fuentes = analisis.get("fuentes_consultadas", 0)
+            st.metric("🌐 Fuentes", fuentes)
+        
+        # Alertas
+        alertas = resultado.get("alertas", [])
+        if alertas:
+            st.markdown("### ⚠️ Alertas")
+            for alerta in alertas:
+                st.warning(alerta)
+        
+        # Análisis detallado
+        with st.expander("📈 Análisis de Mercado"):
+            analisis = resultado.get("analisis", {})
+            if analisis:
+                col_a1, col_a2 = st.columns(2)
+                with col_a1:
+                    st.metric("Resultados iniciales", analisis.get("resultados_iniciales", 0))
+                    st.metric("Precio mercado mín", f"${analisis.get('precio_mercado_min', 0):,.0f}" if analisis.get('precio_mercado_min') else "N/A")
+                with col_a2:
+                    st.metric("Resultados tras filtrado", analisis.get("resultados_tras_depuracion", analisis.get("resultados_tras_filtrado", 0)))
+                    st.metric("Precio mercado máx", f"${analisis.get('precio_mercado_max', 0):,.0f}" if analisis.get('precio_mercado_max') else "N/A")
+        
+        # Reglas aplicadas
+        with st.expander("📋 Reglas Aplicadas"):
+            reglas_aplicadas = resultado.get("reglas_aplicadas", [])
+            if reglas_aplicadas:
+                for regla in reglas_aplicadas:
+                    st.markdown(f"• **{regla.get('codigo', 'N/A')}**: {regla.get('resultado', '')}")
+            else:
+                st.info("No se registraron reglas aplicadas")
+        
+        # Publicaciones analizadas
+        with st.expander("🔗 Publicaciones Analizadas"):
+            publicaciones = resultado.get("publicaciones", [])
+            if publicaciones:
+                df_pub = pd.DataFrame(publicaciones)
+                if 'precio' in df_pub.columns:
+                    df_pub['precio'] = df_pub['precio'].apply(lambda x: f"${x:,.0f}" if x else "N/A")
+                st.dataframe(df_pub, use_container_width=True)
+            else:
+                st.info("No hay publicaciones registradas")
+        
+        # Reporte completo
+        with st.expander("📄 Reporte Completo"):
+            reporte = resultado.get("reporte", "")
+            if reporte:
+                st.markdown(reporte)
+            else:
+                st.info("No hay reporte disponible")
+        
+        # Botón para nueva valuación
+        if st.button("🔄 Nueva Valuación"):
+            st.session_state.valuacion_resultado = None
+            st.session_state.urls_encontradas = None
+            st.rerun()
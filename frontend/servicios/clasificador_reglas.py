@@ -0,0 +1,223 @@
+# frontend/servicios/clasificador_reglas.py
+"""
+Detección heurística del tipo de regla por palabras clave.
+
+Las frases de todos los tipos se compilan una sola vez (al importar) en
+una regex combinada: una pasada sobre la descripción encuentra todas las
+frases, incluso superpuestas, y se cuentan por tipo.
+"""
+
+import re
+from typing import Dict, List
+
+
+# ============================================
+# VOCABULARIO DE DETECCIÓN POR TIPO DE REGLA
+# ============================================
+
+PALABRAS_FUENTE = [
+    "kavak", "mercadolibre", "mercado libre", "autocosmos", "demotores", "olx",
+    "seminuevos", "soloautos", "autoscout", "carfax", "carvana", "autofact",
+    "url", "sitio", "portal", "página", "pagina", "web", "internet", "online",
+    "enlace", "link", ".com", ".ar", ".mx", "http", "https", "www",
+    "consultar en", "buscar en", "obtener de", "extraer de", "scrapear",
+    "fuente de datos", "origen de datos", "portal de consulta",
+    "sitio de referencia", "página de autos", "plataforma de venta"
+]
+
+PALABRAS_AJUSTE_CALCULO = [
+    "aumentar", "incrementar", "subir", "sumar", "agregar", "añadir",
+    "disminuir", "decrementar", "bajar", "restar", "reducir", "descontar",
+    "ajustar", "modificar", "cambiar", "alterar", "variar",
+    "precio", "valor", "costo", "monto", "importe", "cifra",
+    "precio de venta", "precio final", "valor final", "precio objetivo",
+    "precio publicación", "precio a publicar",
+    "porcentaje", "%", "margen", "ganancia", "utilidad", "beneficio",
+    "markup", "rentabilidad", "comisión", "recargo", "sobreprecio",
+    "inflación", "inflacion", "ipc", "índice", "indice", "indexar",
+    "actualizar precio", "ajuste económico", "corrección monetaria",
+    "punto de decisión", "criterio de precio", "regla de precio",
+    "determinar precio", "establecer precio", "definir precio", "fijar precio",
+    "calcular precio de venta", "precio que aplicará", "precio a aplicar"
+]
+
+PALABRAS_DEPURACION = [
+    "eliminar", "borrar", "quitar", "descartar", "excluir", "remover",
+    "desechar", "filtrar fuera", "sacar", "depurar", "limpiar",
+    "ruido", "desviación", "desvío", "outlier", "atípico", "anómalo",
+    "inconsistente", "incoherente", "sospechoso", "dudoso",
+    "más caro", "más barato", "más alto", "más bajo", "extremo",
+    "máximo", "mínimo", "tope", "piso", "fuera de rango",
+    "no verificado", "sin verificar", "usuario no confiable",
+    "publicación vieja", "desactualizado", "duplicado", "repetido",
+    "sin fotos", "sin descripción", "incompleto", "datos faltantes",
+    "que pueden provocar", "que generan ruido", "que desvían",
+    "publicaciones sospechosas", "eliminar los que", "quitar aquellos"
+]
+
+PALABRAS_FILTRO_BUSQUEDA = [
+    "filtrar", "buscar", "encontrar", "localizar", "seleccionar por",
+    "restringir", "limitar", "acotar", "parametrizar",
+    "marca", "modelo", "versión", "version", "año", "anio", "kilometraje",
+    "kilómetros", "kilometros", "km", "transmisión", "transmision",
+    "automático", "automatico", "manual", "mecánico", "mecanico",
+    "combustible", "gasolina", "diesel", "diésel", "nafta", "gnc", "híbrido", "hibrido", "eléctrico", "electrico",
+    "color", "puertas", "motor", "cilindrada", "potencia", "hp", "cv",
+    "equivalencia", "similar", "parecido", "comparable", "mismo",
+    "rango de", "entre", "desde", "hasta", "mayor a", "menor a",
+    "igual a", "aproximado", "cercano", "±", "mas menos", "más o menos",
+    "coherente", "correspondiente", "acorde", "relacionado",
+    "publicaciones similares", "autos similares", "vehículos similares",
+    "características buscadas", "parámetros de búsqueda", "criterios de búsqueda"
+]
+
+PALABRAS_MUESTREO = [
+    "muestrear", "tomar", "seleccionar", "elegir", "escoger", "extraer",
+    "obtener muestra", "definir muestra", "determinar muestra",
+    "muestra", "subconjunto", "subset", "porción", "parte", "fracción",
+    "cantidad de publicaciones", "número de resultados", "tamaño de muestra",
+    "aleatorio", "random", "al azar", "primeros", "últimos",
+    "ordenar por", "top", "mejores", "peores",
+    "tomar n", "seleccionar n", "los primeros", "las primeras",
+    "cantidad a tomar", "cuántos tomar", "cuantos seleccionar"
+]
+
+PALABRAS_PUNTO_CONTROL = [
+    "si", "cuando", "en caso de", "siempre que", "a menos que",
+    "condición", "condicion", "condicional", "contingencia",
+    "umbral", "límite", "limite", "mínimo", "minimo", "máximo", "maximo",
+    "menos de", "más de", "mayor que", "menor que", "al menos", "como máximo",
+    "no se encuentren", "no se hallen", "no hay suficientes",
+    "entonces", "ampliar", "expandir", "extender", "aumentar rango",
+    "reducir criterios", "flexibilizar", "relajar filtros",
+    "flujo condicional", "punto de decisión", "bifurcación",
+    "camino alternativo", "plan b", "fallback",
+    "si no se encuentran", "si hay menos de", "si no hay suficientes",
+    "en caso de no encontrar", "cuando no haya", "si faltan"
+]
+
+PALABRAS_METODO_VALUACION = [
+    "mediana", "promedio", "media", "moda", "percentil",
+    "media aritmética", "media ponderada", "promedio ponderado",
+    "valor central", "tendencia central",
+    "calcular", "computar", "determinar", "obtener", "derivar",
+    "método de cálculo", "fórmula", "algoritmo",
+    "precio de referencia", "valor de referencia", "precio de mercado",
+    "valor de mercado", "referencia del mercado", "benchmark",
+    "precio base", "valor base", "punto de partida",
+    "valuación", "valuacion", "valoración", "valoracion", "tasación", "tasacion",
+    "método de valuación", "criterio de valuación",
+    "precio de referencia del mercado", "valor según el mercado",
+    "con respecto a la muestra", "basado en las publicaciones"
+]
+
+# Orden de desempate: ante igual puntaje gana el primero
+PALABRAS_POR_TIPO = {
+    "fuente": PALABRAS_FUENTE,
+    "ajuste_calculo": PALABRAS_AJUSTE_CALCULO,
+    "depuracion": PALABRAS_DEPURACION,
+    "filtro_busqueda": PALABRAS_FILTRO_BUSQUEDA,
+    "muestreo": PALABRAS_MUESTREO,
+    "punto_control": PALABRAS_PUNTO_CONTROL,
+    "metodo_valuacion": PALABRAS_METODO_VALUACION,
+}
+
+# Tipo que se devuelve si ninguna frase coincide
+TIPO_POR_DEFECTO = "fuente"
+
+# Las frases de al menos este largo coinciden también con palabras derivadas
+# ("eliminar" en "eliminarlos"); las más cortas solo como palabra completa
+# ("si" no coincide en "sitio" ni "km" en "kms")
+LARGO_MINIMO_PREFIJO = 5
+
+
+def _es_letra(caracter: str) -> bool:
+    return caracter.isalnum() or caracter == "_"
+
+
+def _patron_trie(frases: List[str]) -> str:
+    """Alternativa de regex con los prefijos comunes factorizados (un árbol de caracteres)"""
+    arbol: Dict[str, dict] = {}
+    for frase in frases:
+        nodo = arbol
+        for caracter in frase:
+            nodo = nodo.setdefault(caracter, {})
+        nodo[""] = {}
+
+    def construir(nodo: Dict[str, dict]) -> str:
+        ramas = [re.escape(c) + construir(hijo) for c, hijo in sorted(nodo.items()) if c]
+        if not ramas:
+            return ""
+        cuerpo = ramas[0] if len(ramas) == 1 else "(?:" + "|".join(ramas) + ")"
+        return f"(?:{cuerpo})?" if "" in nodo else cuerpo
+
+    return construir(arbol)
+
+
+class BuscadorFrases:
+    """
+    Busca un conjunto de frases en una sola pasada con una regex compilada.
+
+    Las frases se factorizan en un árbol de caracteres; un lookahead en
+    cada inicio de palabra captura la frase más larga que empieza ahí, y
+    las frases que son prefijo de esa se agregan sin volver a recorrer el
+    texto. Las frases que empiezan con un símbolo (".com", "%") se buscan
+    en cualquier posición.
+    """
+
+    def __init__(self, frases: List[str]):
+        self.frases = frases
+        indice = {frase: i for i, frase in enumerate(frases)}
+        palabras = [f for f in frases if _es_letra(f[0])]
+        simbolos = [f for f in frases if not _es_letra(f[0])]
+        ramas = []
+        if palabras:
+            ramas.append(rf"(?<!\w)(?=(?P<palabra>{_patron_trie(palabras)}))")
+        if simbolos:
+            ramas.append(f"(?=(?P<simbolo>{_patron_trie(simbolos)}))")
+        self._patron = re.compile("|".join(ramas))
+        # Para cada frase, las frases del conjunto que son prefijo suyo (incluida ella)
+        self._prefijos = {f: [indice[g] for g in frases if f.startswith(g)] for f in frases}
+        self._largo = [len(f) for f in frases]
+        self._limite_fin = [_es_letra(f[-1]) and len(f) < LARGO_MINIMO_PREFIJO for f in frases]
+
+    def buscar(self, texto: str) -> set:
+        """Índices de las frases presentes en `texto` respetando los límites de palabra"""
+        encontradas = set()
+        for coincidencia in self._patron.finditer(texto):
+            inicio = coincidencia.start()
+            for i in self._prefijos[coincidencia.group("palabra") or coincidencia.group("simbolo")]:
+                if i in encontradas:
+                    continue
+                fin = inicio + self._largo[i]
+                if self._limite_fin[i] and fin < len(texto) and _es_letra(texto[fin]):
+                    continue
+                encontradas.add(i)
+        return encontradas
+
+
+# Todas las frases en un único buscador; una frase puede pertenecer a varios tipos
+_FRASES = sorted({frase for palabras in PALABRAS_POR_TIPO.values() for frase in palabras})
+_INDICE_FRASE = {frase: i for i, frase in enumerate(_FRASES)}
+_BUSCADOR = BuscadorFrases(_FRASES)
+_UBICACIONES = [[] for _ in _FRASES]
+for _tipo, _palabras in PALABRAS_POR_TIPO.items():
+    for _posicion, _frase in enumerate(_palabras):
+        _UBICACIONES[_INDICE_FRASE[_frase]].append((_tipo, _posicion))
+
+
+def coincidencias_por_tipo(descripcion: str) -> Dict[str, List[str]]:
+    """Frases de cada tipo presentes en la descripción, en el orden de su lista"""
+    posiciones: Dict[str, List[int]] = {tipo: [] for tipo in PALABRAS_POR_TIPO}
+    for indice in _BUSCADOR.buscar(descripcion.lower()):
+        for tipo, posicion in _UBICACIONES[indice]:
+            posiciones[tipo].append(posicion)
+    return {
+        tipo: [PALABRAS_POR_TIPO[tipo][p] for p in sorted(lista)]
+        for tipo, lista in posiciones.items()
+    }
+
+
+def tipo_ganador(puntajes: Dict[str, int]) -> str:
+    ganador = max(puntajes, key=puntajes.get)
+    return ganador if puntajes[ganador] > 0 else TIPO_POR_DEFECTO
@@ -0,0 +1,88 @@
+# frontend/servicios/cliente_api.py
+"""
+Cliente HTTP del backend para la app Streamlit.
+
+Una sola `requests.Session` (conexiones keep-alive reutilizadas entre
+reruns) y GET condicionales: se guarda el último cuerpo y ETag de cada
+URL y se revalida con If-None-Match; si el backend responde 304 se usa
+la copia guardada sin volver a transferir ni parsear el JSON.
+"""
+
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+TIMEOUT_SEGUNDOS = 10
+# Cuerpos con ETag guardados (LRU por URL)
+MAX_ENTRADAS_ETAG = 256
+
+
+class ErrorAPI(Exception):
+    """Respuesta del backend con status distinto al esperado"""
+
+    def __init__(self, status_code: int, texto: str):
+        super().__init__(f"{status_code}: {texto}")
+        self.status_code = status_code
+        self.texto = texto
+
+
+class ClienteAPI:
+    """Sesión compartida con el backend y caché de validación por ETag"""
+
+    def __init__(self, base_url: str, max_entradas: int = MAX_ENTRADAS_ETAG):
+        self.base_url = base_url.rstrip("/")
+        self.sesion = requests.Session()
+        adaptador = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+        self.sesion.mount("http://", adaptador)
+        self.sesion.mount("https://", adaptador)
+        self.max_entradas = max_entradas
+        self._validacion: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.estadisticas = {"get": 0, "no_modificado": 0}
+
+    def _url(self, ep: str) -> str:
+        return f"{self.base_url}{ep}"
+
+    def get_json(self, ep: str, params: Optional[Dict[str, Any]] = None,
+                 timeout: float = TIMEOUT_SEGUNDOS) -> Any:
+        """GET condicional: devuelve el JSON (propio o el guardado si hubo 304); ErrorAPI si falla"""
+        response = self.sesion.get(self._url(ep), params=params, timeout=timeout,
+                                   headers=self._encabezados_validacion(ep, params))
+        clave = self._clave(ep, params)
+        with self._lock:
+            self.estadisticas["get"] += 1
+            if response.status_code == 304 and clave in self._validacion:
+                self.estadisticas["no_modificado"] += 1
+                self._validacion.move_to_end(clave)
+                return self._validacion[clave][1]
+        if response.status_code != 200:
+            raise ErrorAPI(response.status_code, response.text)
+
+        datos = response.json()
+        etag = response.headers.get("ETag")
+        if etag:
+            with self._lock:
+                self._validacion[clave] = (etag, datos)
+                self._validacion.move_to_end(clave)
+                while len(self._validacion) > self.max_entradas:
+                    self._validacion.popitem(last=False)
+        return datos
+
+    def _clave(self, ep: str, params: Optional[Dict[str, Any]]) -> str:
+        return ep if not params else f"{ep}?{sorted(params.items())}"
+
+    def _encabezados_validacion(self, ep: str, params: Optional[Dict[str, Any]]) -> Dict[str, str]:
+        with self._lock:
+            guardado = self._validacion.get(self._clave(ep, params))
+        return {"If-None-Match": guardado[0]} if guardado else {}
+
+    def post(self, ep: str, datos: Any = None, params: Optional[Dict[str, Any]] = None,
+             timeout: float = TIMEOUT_SEGUNDOS, **kwargs) -> requests.Response:
+        return self.sesion.post(self._url(ep), json=datos, params=params, timeout=timeout, **kwargs)
+
+    def put(self, ep: str, datos: Any = None, params: Optional[Dict[str, Any]] = None,
+            timeout: float = TIMEOUT_SEGUNDOS) -> requests.Response:
+        return self.sesion.put(self._url(ep), json=datos, params=params, timeout=timeout)
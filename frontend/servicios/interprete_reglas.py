@@ -0,0 +1,784 @@
+# frontend/servicios/interprete_reglas.py
+"""
+Intérprete local de reglas en lenguaje natural.
+
+Resuelve sin IA las descripciones formulaicas ("Aumentar 15% los Renault",
+"Eliminar las 5 publicaciones más caras", "Tomar 30 publicaciones al azar")
+y devuelve el mismo formato que el generador con IA
+({"tipo_detectado", "es_valido", "parametros"}) más una `confianza` de 0 a 1.
+
+Cada tipo de regla tiene un extractor que marca los tramos del texto que
+explica. Lo que queda sin explicar (números, marcas desconocidas, "excepto",
+"si", "único dueño"...) son condiciones que el intérprete no modela: bajan
+la confianza y, por debajo de UMBRAL_CONFIANZA_LOCAL, la regla va a la IA.
+"""
+
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+from servicios.clasificador_reglas import coincidencias_por_tipo, tipo_ganador
+
+# Confianza mínima para usar el resultado local sin consultar a la IA
+UMBRAL_CONFIANZA_LOCAL = 0.8
+
+# Confianza de un extractor al que le falta un parámetro obligatorio
+CONFIANZA_INCOMPLETA = 0.5
+# Penalización por cada palabra o número que ningún extractor explicó
+PENALIZACION_SOBRANTE = 0.25
+# Factor cuando dos tipos explican la descripción igual de bien
+FACTOR_AMBIGUO = 0.6
+
+# Palabras que no aportan parámetros (artículos, preposiciones, sustantivos genéricos)
+RELLENO = frozenset("""
+    el la los las lo un una unos unas al del de a en con por para y e o u que se sobre
+    todo toda todos todas solo sólo solamente únicamente unicamente su sus cada le les
+    precio precios valor valores auto autos vehículo vehiculo vehículos vehiculos
+    unidad unidades publicación publicacion publicaciones aviso avisos resultado resultados
+    mercado final finales referencia regla venta usado usados usada usadas marca modelo
+    publicado publicados publicada publicadas aplicar aplica aplique hacer realizar como
+""".split())
+
+MESES = ["enero", "febrero", "marzo", "abril", "mayo", "junio", "julio", "agosto",
+         "septiembre", "octubre", "noviembre", "diciembre"]
+
+MARCAS = ["Toyota", "Ford", "Chevrolet", "Volkswagen", "Renault", "Fiat", "Peugeot", "Honda",
+          "Nissan", "Citroën", "Jeep", "Hyundai", "Kia", "BMW", "Audi", "Mercedes-Benz", "RAM",
+          "Dodge", "Mitsubishi", "Suzuki", "Chery", "Volvo", "Subaru", "Porsche", "Land Rover",
+          "Alfa Romeo", "Lexus", "BYD", "Haval", "Geely", "Baic"]
+
+# Otras formas de escribir una marca -> nombre canónico
+ALIAS_MARCAS = {"vw": "Volkswagen", "chevy": "Chevrolet", "citroen": "Citroën",
+                "mercedes": "Mercedes-Benz", "mercedes benz": "Mercedes-Benz"}
+
+MODELOS_POR_MARCA = {
+    "Toyota": ["Corolla Cross", "Corolla", "Hilux", "Etios", "Yaris", "SW4", "RAV4", "Camry"],
+    "Ford": ["Ranger", "Focus", "Fiesta", "Ka", "EcoSport", "Territory", "Maverick", "Bronco", "Mondeo"],
+    "Chevrolet": ["Onix", "Cruze", "Tracker", "S10", "Prisma", "Spin", "Equinox", "Montana", "Corsa",
+                  "Agile", "Classic"],
+    "Volkswagen": ["Gol Trend", "Gol", "Polo", "Amarok", "Vento", "Virtus", "T-Cross", "Taos", "Nivus",
+                   "Suran", "Golf", "Up", "Fox", "Saveiro", "Tiguan"],
+    "Renault": ["Sandero Stepway", "Sandero", "Stepway", "Kwid", "Logan", "Duster", "Kangoo", "Alaskan",
+                "Captur", "Oroch", "Clio", "Fluence", "Koleos"],
+    "Fiat": ["Cronos", "Argo", "Toro", "Strada", "Mobi", "Pulse", "Fastback", "Palio", "Uno", "Siena",
+             "Punto", "Fiorino"],
+    "Peugeot": ["208", "2008", "308", "408", "3008", "5008", "207", "206", "Partner"],
+    "Honda": ["Civic", "Fit", "HR-V", "CR-V", "WR-V", "City"],
+    "Nissan": ["Frontier", "Kicks", "Versa", "Sentra", "March", "Note", "X-Trail"],
+    "Citroën": ["C4 Cactus", "C3 Aircross", "C4 Lounge", "C3", "C4", "Berlingo"],
+    "Jeep": ["Renegade", "Compass", "Commander", "Wrangler", "Grand Cherokee"],
+    "Hyundai": ["Tucson", "Creta", "HB20", "i10", "Santa Fe"],
+    "Kia": ["Sportage", "Cerato", "Rio", "Picanto", "Seltos", "Sorento"],
+}
+
+# Modelos que también son palabras o números comunes: solo cuentan junto a la marca
+MODELOS_CON_MARCA = {"ka", "up", "uno", "fox", "fit", "city", "note", "rio", "march", "spin",
+                     "toro", "punto", "classic", "partner", "208", "2008", "308", "408", "3008",
+                     "5008", "207", "206"}
+
+# Portales conocidos: nombre escrito -> (url, nombre)
+PORTALES = {
+    "kavak": ("kavak.com.ar", "Kavak"),
+    "mercadolibre": ("mercadolibre.com.ar", "MercadoLibre"),
+    "mercado libre": ("mercadolibre.com.ar", "MercadoLibre"),
+    "autocosmos": ("autocosmos.com.ar", "Autocosmos"),
+    "olx": ("olx.com.ar", "OLX"),
+    "demotores": ("demotores.com.ar", "DeMotores"),
+    "deruedas": ("deruedas.com.ar", "DeRuedas"),
+    "autofoco": ("autofoco.com.ar", "Autofoco"),
+}
+
+
+def _alternativas(frases) -> str:
+    """Alternancia regex con las frases más largas primero"""
+    return "|".join(re.escape(f.lower()).replace(r"\ ", r"\s+") for f in sorted(frases, key=len, reverse=True))
+
+
+def a_numero(texto: str):
+    """'50.000' -> 50000, '12,5' -> 12.5, '1,5 millones' -> 1500000, '20k' -> 20000"""
+    texto = texto.strip().lower()
+    factor = 1
+    for sufijo, multiplicador in (("millones", 1e6), ("millón", 1e6), ("millon", 1e6), ("mil", 1e3), ("k", 1e3)):
+        if texto.endswith(sufijo):
+            texto, factor = texto[:-len(sufijo)].strip(), multiplicador
+            break
+    if "," in texto:
+        texto = texto.replace(".", "").replace(",", ".")
+    elif re.fullmatch(r"\d{1,3}(?:\.\d{3})+", texto):
+        texto = texto.replace(".", "")
+    valor = float(texto) * factor
+    return int(valor) if valor.is_integer() else valor
+
+
+# ==========================================
+# Patrones
+# ==========================================
+
+_N = r"\d+(?:[.,]\d+)*(?:\s*(?:millones|mill[oó]n|mil|k)\b)?"
+_AÑO = r"(?<![\d.,])(?:19[5-9]\d|20[0-4]\d)(?![\d.,]*\d)"
+_MES = _alternativas(MESES + ["setiembre"])
+_DURANTE = r"(?:(?:durante|en|para)\s+)?"
+_MAS = r"m[aá]s"
+_MAS_MENOS = r"(?:±|\+/?-)"
+_KM = r"(?:km|kms|kil[oó]metros)\b"
+_OBJETO = r"(?:publicaciones|avisos|resultados|autos|comparables|veh[ií]culos|unidades)"
+
+_TOKEN = re.compile(r"[^\W_]+|[%$±]")
+
+_MARCA = re.compile(
+    r"\b(?P<marca>" + _alternativas(MARCAS + list(ALIAS_MARCAS)) + r")s?"
+    r"(?:\s+(?P<modelo>" + _alternativas(m for ms in MODELOS_POR_MARCA.values() for m in ms) + r"))?(?![\w-])"
+)
+_MODELO = re.compile(
+    r"\b(?P<modelo>" + _alternativas(m for ms in MODELOS_POR_MARCA.values() for m in ms
+                                     if m.lower() not in MODELOS_CON_MARCA) + r")(?![\w-])"
+)
+
+_PORCENTAJE = re.compile(r"(?P<n>" + _N + r")\s*(?:%|por\s*ciento\b)")
+_MONTO = re.compile(
+    r"(?P<pre>u\$s|us\$|usd|\$)\s*(?P<n1>" + _N + r")"
+    r"|(?P<n2>" + _N + r")\s*(?:de\s+)?(?P<post>u\$s|us\$|usd\b|d[oó]lares\b|pesos\b|ars\b|\$)"
+)
+_OPERACION = re.compile(
+    r"\b(?:(?P<suma>aument\w*|increment\w*|sub(?:ir|ir\w*|a|an)|sum(?:ar|ar\w*|e|en)|agreg\w*|añad\w*"
+    r"|recarg\w*|adicion\w*)|(?P<resta>disminu\w*|decrement\w*|baj(?:ar|ar\w*|e|en)|rest(?:ar|ar\w*|e|en)"
+    r"|reduc\w*|descont\w*|descuento|rebaj\w*|quit(?:ar|ar\w*|e|en)))\b"
+)
+_INFLACION = re.compile(r"\b(?:ajust\w+\s+(?:por\s+)?)?inflaci[oó]n\b")
+_PERIODICIDAD = re.compile(
+    r"\b(?:(?P<mensual>mensual|por\s+mes)|(?P<anual>anual|por\s+año)|(?P<trimestral>trimestral)"
+    r"|(?P<semestral>semestral)|(?P<semanal>semanal))\b"
+)
+_DIAS_PERIODICIDAD = {"mensual": 30, "anual": 365, "trimestral": 90, "semestral": 180, "semanal": 7}
+_MARGEN = re.compile(r"\b(?:margen(?:\s+de\s+(?:ganancia|utilidad))?|ganancia|utilidad)\b")
+_LIMITE_PESOS = re.compile(
+    r"\b(?:con\s+(?:un\s+)?)?(?P<limite>m[ií]nimo|m[aá]ximo|tope)\s+(?:de\s+)?(?:\$\s*)?(?P<n>" + _N + r")"
+    r"(?:\s*(?:pesos\b|ars\b|\$))?"
+)
+_BASE = re.compile(
+    r"\bsobre\s+(?:el\s+|la\s+)?(?:(?P<promedio>promedio)|(?P<mediana>mediana)"
+    r"|precio\s+(?P<minimo>m[ií]nimo)|precio\s+(?P<maximo>m[aá]ximo))(?:\s+del?\s+mercado)?\b"
+)
+_BASES = {"promedio": "promedio_mercado", "mediana": "mediana_mercado",
+          "minimo": "precio_minimo", "maximo": "precio_maximo"}
+
+_PERIODO_MES = re.compile(
+    r"\b" + _DURANTE + r"(?:(?:el\s+)?mes\s+de\s+)?(?P<mes>" + _MES + r")(?:\s+(?:de(?:l)?\s+)?(?P<año>" + _AÑO + r"))?\b"
+)
+_PERIODO_TRIMESTRE = re.compile(
+    r"\b" + _DURANTE + r"(?:(?:el\s+)?(?P<q>q[1-4])|(?:el\s+)?(?P<ordinal>primer|segundo|tercer|cuarto)\s+trimestre)"
+    r"(?:\s+(?:de(?:l)?\s+)?(?P<año>" + _AÑO + r"))?\b"
+)
+_PERIODO_SEMESTRE = re.compile(
+    r"\b" + _DURANTE + r"(?:el\s+)?(?P<ordinal>primer|segundo)\s+semestre(?:\s+(?:de(?:l)?\s+)?(?P<año>" + _AÑO + r"))?\b"
+)
+_PERIODO_AÑO = re.compile(r"\b(?:durante|en\s+todo|todo)\s+(?:el\s+)?(?:año\s+)?(?P<año>" + _AÑO + r")")
+_ORDINALES = {"primer": 1, "segundo": 2, "tercer": 3, "cuarto": 4}
+
+_AÑO_CONDICION = re.compile(
+    r"(?:\b(?P<pre>desde|a\s+partir\s+del?|posteriores\s+a|posterior\s+a|anteriores\s+a|anterior\s+a"
+    r"|previos\s+a|hasta)\s+(?:el\s+)?(?:año\s+|modelo\s+)?)?"
+    r"(?P<año>" + _AÑO + r")"
+    r"(?:\s+(?P<post>en\s+adelante|o\s+" + _MAS + r"\s+nuevos?|o\s+posteriores?|o\s+superiores?"
+    r"|o\s+anteriores?|o\s+" + _MAS + r"\s+viejos?))?"
+)
+_OPERADOR_AÑO = {"desde": "mayor_igual", "a partir": "mayor_igual", "posterior": "mayor",
+                 "anterior": "menor", "previos": "menor", "hasta": "menor_igual",
+                 "en adelante": "mayor_igual", "o más nuevo": "mayor_igual", "o mas nuevo": "mayor_igual",
+                 "o posterior": "mayor_igual", "o superior": "mayor_igual", "o anterior": "menor_igual",
+                 "o más viejo": "menor_igual", "o mas viejo": "menor_igual"}
+
+_KM_LIMITE = re.compile(
+    r"\b(?:con\s+)?(?P<op>menos\s+de|hasta|no\s+" + _MAS + r"\s+de|" + _MAS + r"\s+de|arriba\s+de)\s+"
+    r"(?P<n>" + _N + r")\s*" + _KM
+)
+_MOTIVO = re.compile(
+    r"\b(?:debido\s+a|a\s+causa\s+de|porque|por\s+motivo\s+de|por)\s+"
+    r"(?!(?:el|la|los|las|un|una|ciento|mes|año|cada|fuente)\b)(?=[a-záéíóúñ])"
+)
+
+_ELIMINAR = re.compile(r"\b(?:eliminar|descartar|quitar|excluir|sacar|borrar|remover|depurar|ignorar)\b")
+_EXTREMOS = re.compile(
+    r"\b(?:(?:las|los)\s+)?(?P<n>" + _N + r")\s+(?:" + _OBJETO + r"\s+)?"
+    r"(?:" + _MAS + r"\s+(?P<adj>car[oa]s|barat[oa]s|econ[oó]mic[oa]s|alt[oa]s|baj[oa]s)"
+    r"|de\s+(?P<comp>mayor|menor)\s+precio)\b"
+)
+_EXTREMO_UNICO = re.compile(
+    r"\b(?:la|el)\s+(?:publicaci[oó]n\s+|aviso\s+)?" + _MAS + r"\s+(?P<adj>car[oa]|barat[oa])\b"
+)
+_SIN_FOTOS = re.compile(r"\bsin\s+(?:fotos?|im[aá]genes)\b")
+_SIN_DESCRIPCION = re.compile(r"\bsin\s+descripci[oó]n\b")
+_NO_VERIFICADOS = re.compile(r"\b(?:de\s+)?(?:usuarios\s+|vendedores\s+)?no\s+verificad[oa]s?\b")
+_DUPLICADOS = re.compile(r"\b(?:duplicad[oa]s?|repetid[oa]s?)\b")
+_ANTIGUOS = re.compile(
+    r"\b(?:publicad[oa]s\s+hace\s+|con\s+)?(?:" + _MAS + r"\s+de|mayores?\s+a)\s+(?P<n>\d+)\s+d[ií]as\b"
+    r"(?:\s+de\s+(?:antig[uü]edad|publicad[oa]s?))?"
+)
+_PRECIO_LIMITE = re.compile(
+    r"\b(?:con\s+)?precios?\s+(?P<op>menor(?:es)?|inferior(?:es)?|mayor(?:es)?|superior(?:es)?)\s+a\s+"
+    r"(?:\$\s*)?(?P<n>" + _N + r")(?:\s*(?:pesos\b|\$))?"
+)
+_OUTLIERS = re.compile(r"\b(?:outliers?|at[ií]picos?|valores\s+extremos)\b")
+_METODO_OUTLIERS = re.compile(
+    r"\b(?:(?:con|por|usando)\s+(?:el\s+)?)?(?:(?P<iqr>iqr|rango\s+intercuart[ií]lico)|(?P<mad>mad)"
+    r"|(?P<z>" + _N + r")\s+desv[ií]os?(?:\s+est[aá]ndar)?|(?P<z2>" + _N + r")\s+desviaciones(?:\s+est[aá]ndar)?)\b"
+)
+
+_MUESTREO = re.compile(
+    r"\b(?:tomar|seleccionar|elegir|usar|utilizar|quedarse\s+con|analizar|considerar|muestrear)\b"
+)
+_MUESTRA = re.compile(r"\b(?:una\s+)?muestra\b")
+_CANTIDAD_MUESTRA = re.compile(
+    r"\b(?:(?:un\s+)?m[aá]ximo\s+(?:de\s+)?|hasta\s+|solo\s+|las\s+|los\s+)?(?P<n>\d+)\s+" + _OBJETO + r"\b"
+)
+_MUESTRA_DE = re.compile(r"\bde\s+(?P<n>\d+)\b")
+_METODO_MUESTREO = re.compile(
+    r"\b(?:(?P<aleatorio>al\s+azar|aleatori[ao]s?|random)"
+    r"|(?P<fecha>" + _MAS + r"\s+recientes|" + _MAS + r"\s+nuev[ao]s|[uú]ltim[ao]s|por\s+fecha)"
+    r"|(?P<asc>" + _MAS + r"\s+barat[ao]s|" + _MAS + r"\s+econ[oó]mic[ao]s|de\s+menor\s+precio)"
+    r"|(?P<desc>" + _MAS + r"\s+car[ao]s|de\s+mayor\s+precio)"
+    r"|(?P<relevancia>" + _MAS + r"\s+relevantes|por\s+relevancia)"
+    r"|(?P<estratificado>estratificad[ao]s?)"
+    r"|(?P<todos>todas\s+las\s+publicaciones|todos\s+los\s+resultados))\b"
+)
+_METODOS_MUESTREO = {"aleatorio": "aleatorio", "fecha": "primeros_por_fecha", "asc": "primeros_por_precio_asc",
+                     "desc": "primeros_por_precio_desc", "relevancia": "primeros_por_relevancia",
+                     "estratificado": "estratificado", "todos": "todos"}
+_POR_FUENTE = re.compile(r"\b(?:(?:como\s+)?m[aá]ximo\s+)?(?P<n>\d+)\s+por\s+fuente\b")
+_VERIFICADOS = re.compile(
+    r"\b(?:priorizando|prefiriendo)\s+(?:a\s+)?(?:los\s+|las\s+)?(?:usuarios\s+|vendedores\s+)?verificad[oa]s"
+    r"|\bverificad[oa]s\s+primero\b"
+)
+
+_CONDICION_CONTROL = re.compile(
+    r"\bsi\s+(?:hay|se\s+encuentran|quedan|existen|se\s+obtienen|aparecen)\s+(?P<op>menos|" + _MAS + r")\s+de\s+"
+    r"(?P<n>\d+)(?:\s+" + _OBJETO + r")?"
+)
+_SIN_RESULTADOS = re.compile(r"\bsi\s+no\s+(?:hay|se\s+encuentran)\s+" + _OBJETO)
+_AMPLIAR = re.compile(r"\bampli(?:ar|a)\b(?:\s+(?:la|el)\s+(?:b[uú]squeda|rango))?")
+_RANGO_AÑOS = re.compile(
+    r"\b(?:(?:el\s+)?rango\s+de\s+)?a[nñ]os?\s+(?:a\s+|en\s+)?" + _MAS_MENOS + r"?\s*(?P<n>\d+)"
+    r"|" + _MAS_MENOS + r"\s*(?P<n2>\d+)\s+a[nñ]os?\b"
+)
+_RANGO_KM = re.compile(
+    r"\b(?:(?:el\s+)?rango\s+de\s+)?(?:kilometraje|km)\s+(?:a\s+|en\s+)?" + _MAS_MENOS + r"?\s*(?P<n>" + _N + r")"
+    r"(?:\s*" + _KM + r")?|" + _MAS_MENOS + r"\s*(?P<n2>" + _N + r")\s*" + _KM
+)
+_ACCION_CONTROL = re.compile(
+    r"\b(?:(?P<alertar>alertar|avisar|notificar|generar\s+(?:una\s+)?alerta)"
+    r"|(?P<abortar>abortar|cancelar|detener|no\s+valuar)(?:\s+la\s+valuaci[oó]n)?"
+    r"|(?P<secundarias>(?:usar|consultar)\s+(?:las\s+)?fuentes\s+secundarias))\b"
+)
+
+_PORCENTAJE_METODO = re.compile(
+    r"(?P<n>" + _N + r")\s*%\s+(?:de\s+(?:la\s+)?|del\s+)?(?P<metodo>mediana|promedio|media|moda)\b"
+)
+_PERCENTIL = re.compile(r"\bpercentil\s+(?P<n>\d+)\b")
+_METODO = re.compile(r"\b(?P<metodo>promedio\s+ponderado|mediana|promedio|media|moda)\b")
+_METODOS = {"mediana": "mediana", "promedio": "promedio", "media": "promedio", "moda": "moda"}
+_VERBO_METODO = re.compile(
+    r"\b(?:calcular|usar|utilizar|tomar|valuar|m[eé]todo|estimar|definir)\b(?:\s+(?:con|por|como))?"
+)
+_EXCLUIR = re.compile(r"\bexcluyendo\s+(?:los\s+)?(?P<n>\d+)\s+(?:valores\s+)?extremos\b")
+
+_DOMINIO = re.compile(
+    r"\b(?:https?://)?(?:www\.)?(?P<dominio>[a-z0-9-]+(?:\.[a-z0-9-]+)*\.(?:com|net|org)(?:\.ar)?|[a-z0-9-]+\.ar)"
+    r"(?:/[^\s,]*)?"
+)
+_PORTAL = re.compile(r"\b(?P<portal>" + _alternativas(PORTALES) + r")\b")
+_VERBO_FUENTE = re.compile(
+    r"\b(?:consultar|buscar|agregar|usar|utilizar|incluir|relevar|obtener|traer|sumar)\b"
+    r"|\b(?:fuentes?|sitios?|portales?|p[aá]ginas?)\b"
+)
+_PRIORIDAD = re.compile(
+    r"\b(?:priorizando|priorizar|prioridad\s+(?:a|en)|primero)\s+(?:a\s+)?(?P<antes>" + _alternativas(PORTALES) + r")\b"
+    r"|\b(?P<despues>" + _alternativas(PORTALES) + r")\s+(?:como\s+(?:fuente\s+)?principal|primero)\b"
+)
+
+_VERBO_FILTRO = re.compile(r"\b(?:filtrar|buscar|limitar|restringir)\b(?:\s+(?:la\s+)?b[uú]squeda\s+a)?")
+_AÑOS_ENTRE = re.compile(
+    r"\b(?:a[nñ]os?\s+|modelos?\s+)?(?:entre\s+|del?\s+)?(?P<desde>" + _AÑO + r")\s+(?:a|y|al|-|hasta)\s+"
+    r"(?P<hasta>" + _AÑO + r")"
+)
+_AÑO_RELATIVO = re.compile(r"\ba[nñ]os?\s+(?:de\s+)?" + _MAS_MENOS + r"\s*(?P<n>\d+)")
+_KM_RELATIVO = re.compile(
+    r"\b(?:kilometraje|km)\s+(?:de\s+)?" + _MAS_MENOS + r"\s*(?P<n>" + _N + r")(?:\s*" + _KM + r")?"
+)
+_TRANSMISION = re.compile(r"\b(?:(?P<automatica>autom[aá]tic[oa]s?)|(?P<manual>manual(?:es)?|mec[aá]nic[oa]s?))\b")
+_COMBUSTIBLE = re.compile(
+    r"\b(?:(?P<nafta>naft(?:a|eros?))|(?P<diesel>di[eé]sel|gasoleros?)|(?P<gnc>gnc)"
+    r"|(?P<hibrido>h[ií]bridos?)|(?P<electrico>el[eé]ctricos?))\b"
+)
+_VENDEDOR = re.compile(
+    r"\b(?:de\s+)?(?:(?P<concesionaria>concesionarias?|agencias?)|(?P<particular>particulares|due[nñ]o\s+directo))\b"
+)
+
+
+# ==========================================
+# Lectura con tramos explicados
+# ==========================================
+
+class _Lectura:
+    """Descripción en minúsculas con registro de los caracteres ya explicados por un extractor"""
+
+    def __init__(self, descripcion: str):
+        self.original = descripcion
+        self.texto = descripcion.lower()
+        self.usado = bytearray(len(self.texto))
+
+    def _libre(self, m) -> bool:
+        return not any(self.usado[m.start():m.end()])
+
+    def marcar(self, inicio: int, fin: int):
+        self.usado[inicio:fin] = b"\x01" * (fin - inicio)
+
+    def tomar(self, patron) -> Optional[re.Match]:
+        """Primera coincidencia sobre texto todavía no explicado (y la marca)"""
+        posicion = 0
+        while True:
+            m = patron.search(self.texto, posicion)
+            if m is None or self._libre(m):
+                break
+            posicion = m.start() + 1
+        if m:
+            self.marcar(m.start(), m.end())
+        return m
+
+    def tomar_todos(self, patron) -> List[re.Match]:
+        tomados = []
+        while True:
+            m = self.tomar(patron)
+            if m is None:
+                return tomados
+            tomados.append(m)
+
+    def sobrantes(self) -> List[str]:
+        """Palabras y números que ningún extractor explicó (sin contar el relleno)"""
+        return [m.group() for m in _TOKEN.finditer(self.texto)
+                if not any(self.usado[m.start():m.end()]) and m.group() not in RELLENO]
+
+
+def _canonico_marca(texto: str) -> str:
+    texto = re.sub(r"\s+", " ", texto)
+    if texto in ALIAS_MARCAS:
+        return ALIAS_MARCAS[texto]
+    return next(m for m in MARCAS if m.lower() == texto)
+
+
+def _canonico_modelo(texto: str) -> Tuple[str, str]:
+    """'corolla cross' -> ('Corolla Cross', 'Toyota')"""
+    texto = re.sub(r"\s+", " ", texto)
+    for marca, modelos in MODELOS_POR_MARCA.items():
+        for modelo in modelos:
+            if modelo.lower() == texto:
+                return modelo, marca
+    return texto.title(), ""
+
+
+def _uno_o_lista(valores: List[str]):
+    return valores[0] if len(valores) == 1 else valores
+
+
+def _vehiculos(lectura: _Lectura) -> Tuple[List[str], List[str]]:
+    """Marcas y modelos mencionados; un modelo sin marca agrega la suya"""
+    marcas: List[str] = []
+    modelos: List[str] = []
+    for m in lectura.tomar_todos(_MARCA):
+        marcas.append(_canonico_marca(m.group("marca")))
+        if m.group("modelo"):
+            modelos.append(_canonico_modelo(m.group("modelo"))[0])
+    for m in lectura.tomar_todos(_MODELO):
+        modelo, marca = _canonico_modelo(m.group("modelo"))
+        modelos.append(modelo)
+        if marca and marca not in marcas:
+            marcas.append(marca)
+    return list(dict.fromkeys(marcas)), list(dict.fromkeys(modelos))
+
+
+def _periodo(lectura: _Lectura) -> Tuple[Optional[Dict[str, Any]], bool]:
+    """`periodo_vigencia` mencionado y si quedó bien definido (un solo período)"""
+    periodos = []
+    for m in lectura.tomar_todos(_PERIODO_MES):
+        periodos.append({"tipo": "mes", "mes": "septiembre" if m.group("mes") == "setiembre" else m.group("mes")})
+        if m.group("año"):
+            periodos[-1]["año"] = int(m.group("año"))
+    for patron, tipo in ((_PERIODO_TRIMESTRE, "trimestre"), (_PERIODO_SEMESTRE, "semestre")):
+        for m in lectura.tomar_todos(patron):
+            q = m.groupdict().get("q")
+            numero = int(q[1]) if q else _ORDINALES[m.group("ordinal")]
+            periodos.append({"tipo": tipo, "valor": f"{'Q' if tipo == 'trimestre' else 'S'}{numero}"})
+            if m.group("año"):
+                periodos[-1]["año"] = int(m.group("año"))
+    for m in lectura.tomar_todos(_PERIODO_AÑO):
+        periodos.append({"tipo": "año", "año": int(m.group("año"))})
+    if not periodos:
+        return None, True
+    return periodos[0], len(periodos) == 1
+
+
+def _condicion_año(lectura: _Lectura) -> Tuple[Optional[int], str]:
+    m = lectura.tomar(_AÑO_CONDICION)
+    if not m:
+        return None, "igual"
+    modificador = re.sub(r"\s+", " ", m.group("pre") or m.group("post") or "")
+    operador = next((op for clave, op in _OPERADOR_AÑO.items() if modificador.startswith(clave)), "igual")
+    return int(m.group("año")), operador
+
+
+def _motivo(lectura: _Lectura) -> Optional[str]:
+    """Texto después de "por"/"debido a" hasta el siguiente tramo ya explicado"""
+    for m in _MOTIVO.finditer(lectura.texto):
+        if lectura.usado[m.start()]:
+            continue
+        fin = m.end()
+        while fin < len(lectura.texto) and not lectura.usado[fin]:
+            fin += 1
+        palabras = lectura.texto[m.end():fin].split()
+        while palabras and palabras[-1].strip(".,;") in RELLENO:
+            palabras.pop()
+        if palabras:
+            largo = len(" ".join(palabras))
+            inicio = m.end() + lectura.texto[m.end():].index(palabras[0])
+            lectura.marcar(m.start(), inicio + largo)
+            return lectura.original[inicio:inicio + largo].strip(".,;")
+    return None
+
+
+# ==========================================
+# Extractores por tipo
+# ==========================================
+# Cada uno devuelve (parametros, completo) o None si la descripción no es de su tipo.
+
+def _extraer_ajuste(lectura: _Lectura):
+    params: Dict[str, Any] = {}
+    completo = True
+    if lectura.tomar(_INFLACION):
+        params["tipo"] = "inflacion"
+    elif lectura.tomar(_MARGEN):
+        params["tipo"] = "margen_ganancia"
+        for m in lectura.tomar_todos(_LIMITE_PESOS):
+            clave = "minimo_pesos" if m.group("limite").startswith(("mí", "mi")) else "maximo_pesos"
+            params[clave] = a_numero(m.group("n"))
+
+    operacion = lectura.tomar(_OPERACION)
+    porcentaje = lectura.tomar(_PORCENTAJE)
+    monto = None if porcentaje or params else lectura.tomar(_MONTO)
+    if not (params or operacion):
+        return None
+
+    if porcentaje:
+        params.setdefault("tipo", "ajuste_porcentual")
+        params["porcentaje"] = a_numero(porcentaje.group("n"))
+    elif monto:
+        params["tipo"] = "ajuste_fijo"
+        params["monto"] = a_numero(monto.group("n1") or monto.group("n2"))
+        unidad = (monto.group("pre") or monto.group("post") or "").replace("ó", "o")
+        params["moneda"] = "USD" if unidad in ("u$s", "us$", "usd", "dolares") else "ARS"
+    else:
+        completo = False
+
+    if params.get("tipo") in (None, "ajuste_porcentual", "ajuste_fijo"):
+        if operacion:
+            params["operacion"] = "incrementar" if operacion.group("suma") else "decrementar"
+        else:
+            completo = False
+    if params.get("tipo") == "inflacion":
+        m = lectura.tomar(_PERIODICIDAD)
+        if m:
+            params["periodo_dias"] = _DIAS_PERIODICIDAD[m.lastgroup]
+    if params.get("tipo") == "ajuste_porcentual":
+        m = lectura.tomar(_BASE)
+        if m:
+            params["base"] = _BASES[m.lastgroup]
+
+    marcas, modelos = _vehiculos(lectura)
+    if marcas:
+        params["condicion_marca"] = _uno_o_lista(marcas)
+    if modelos:
+        params["condicion_modelo"] = _uno_o_lista(modelos)
+    for m in lectura.tomar_todos(_KM_LIMITE):
+        clave = "condicion_km_max" if m.group("op").startswith(("menos", "hasta", "no")) else "condicion_km_min"
+        params[clave] = a_numero(m.group("n"))
+
+    periodo, unico = _periodo(lectura)
+    if periodo:
+        params["periodo_vigencia"] = periodo
+        completo &= unico
+    año, operador = _condicion_año(lectura)
+    if año:
+        params["condicion_año"] = año
+        if operador != "igual":
+            params["condicion_año_operador"] = operador
+
+    motivo = _motivo(lectura)
+    if motivo:
+        params["motivo"] = motivo
+    return params, completo
+
+
+def _extraer_depuracion(lectura: _Lectura):
+    if not lectura.tomar(_ELIMINAR):
+        return None
+    criterios: List[Dict[str, Any]] = []
+    inferior = superior = 0
+    for m in lectura.tomar_todos(_EXTREMOS):
+        caros = (m.group("adj") or "").startswith(("car", "alt")) or m.group("comp") == "mayor"
+        if caros:
+            superior += a_numero(m.group("n"))
+        else:
+            inferior += a_numero(m.group("n"))
+    for m in lectura.tomar_todos(_EXTREMO_UNICO):
+        if m.group("adj").startswith("car"):
+            superior += 1
+        else:
+            inferior += 1
+    if inferior and superior:
+        extremos = {"tipo": "eliminar_outliers", "extremo": "ambos"}
+        extremos.update({"cantidad": inferior} if inferior == superior
+                        else {"cantidad_inferior": inferior, "cantidad_superior": superior})
+        criterios.append(extremos)
+    elif inferior or superior:
+        criterios.append({"tipo": "eliminar_outliers", "cantidad": inferior or superior,
+                          "extremo": "inferior" if inferior else "superior"})
+
+    if lectura.tomar(_OUTLIERS):
+        m = lectura.tomar(_METODO_OUTLIERS)
+        if m and m.group("iqr"):
+            criterios.append({"tipo": "eliminar_outliers", "metodo": "iqr"})
+        elif m and m.group("mad"):
+            criterios.append({"tipo": "eliminar_outliers", "metodo": "mad"})
+        elif m:
+            criterios.append({"tipo": "eliminar_por_desviacion", "metodo": "zscore",
+                              "umbral": a_numero(m.group("z") or m.group("z2"))})
+
+    for patron, accion in ((_SIN_FOTOS, "eliminar_sin_fotos"), (_SIN_DESCRIPCION, "eliminar_sin_descripcion"),
+                           (_NO_VERIFICADOS, "eliminar_no_verificados"), (_DUPLICADOS, "eliminar_duplicados")):
+        if lectura.tomar(patron):
+            criterios.append({"tipo": accion})
+    m = lectura.tomar(_ANTIGUOS)
+    if m:
+        criterios.append({"tipo": "eliminar_antiguos", "dias_maximos": int(m.group("n"))})
+    for m in lectura.tomar_todos(_KM_LIMITE):
+        menos = m.group("op").startswith(("menos", "hasta", "no"))
+        criterios.append({"tipo": "eliminar_por_criterio", "campo": "kilometraje",
+                          "condicion": "menor" if menos else "mayor", "valor": a_numero(m.group("n"))})
+    for m in lectura.tomar_todos(_PRECIO_LIMITE):
+        menor = m.group("op").startswith(("menor", "inferior"))
+        criterios.append({"tipo": "eliminar_por_criterio", "campo": "precio",
+                          "condicion": "menor" if menor else "mayor", "valor": a_numero(m.group("n"))})
+
+    if not criterios:
+        return {}, False
+    if len(criterios) == 1:
+        params = {"accion": criterios[0].pop("tipo"), **criterios[0]}
+    else:
+        params = {"accion": "eliminar_por_criterio", "criterios": criterios}
+    return params, True
+
+
+def _extraer_muestreo(lectura: _Lectura):
+    verbo = lectura.tomar(_MUESTREO)
+    muestra = lectura.tomar(_MUESTRA)
+    if not (verbo or muestra):
+        return None
+    params: Dict[str, Any] = {}
+    m = lectura.tomar(_CANTIDAD_MUESTRA) or (lectura.tomar(_MUESTRA_DE) if muestra else None)
+    if m:
+        params["cantidad"] = int(m.group("n"))
+    m = lectura.tomar(_METODO_MUESTREO)
+    if m:
+        params["metodo"] = _METODOS_MUESTREO[m.lastgroup]
+    m = lectura.tomar(_POR_FUENTE)
+    if m:
+        params["maximo_por_fuente"] = int(m.group("n"))
+    if lectura.tomar(_VERIFICADOS):
+        params["priorizar_verificados"] = True
+    if not params:
+        return None
+    completo = "metodo" in params and ("cantidad" in params or params["metodo"] == "todos")
+    return params, completo
+
+
+def _extraer_punto_control(lectura: _Lectura):
+    params: Dict[str, Any] = {}
+    m = lectura.tomar(_CONDICION_CONTROL)
+    if m:
+        menos = m.group("op") == "menos"
+        params["condicion_tipo"] = "cantidad_minima" if menos else "cantidad_maxima"
+        params["umbral_minimo" if menos else "umbral_maximo"] = int(m.group("n"))
+    elif lectura.tomar(_SIN_RESULTADOS):
+        params["condicion_tipo"] = "sin_resultados"
+    else:
+        return None
+
+    marcas, modelos = _vehiculos(lectura)
+    if marcas:
+        params["condicion_marca"] = _uno_o_lista(marcas)
+    if modelos:
+        params["condicion_modelo"] = _uno_o_lista(modelos)
+
+    if lectura.tomar(_AMPLIAR):
+        params["accion"] = "ampliar_busqueda"
+        nuevos = {}
+        for patron, clave in ((_RANGO_AÑOS, "año_rango"), (_RANGO_KM, "km_rango")):
+            m = lectura.tomar(patron)
+            if m:
+                n = a_numero(m.group("n") or m.group("n2"))
+                nuevos[clave] = [-n, n]
+        if nuevos:
+            params["nuevos_parametros"] = nuevos
+        return params, bool(nuevos)
+    m = lectura.tomar(_ACCION_CONTROL)
+    if m:
+        params["accion"] = {"secundarias": "usar_fuentes_secundarias"}.get(m.lastgroup, m.lastgroup)
+    return params, "accion" in params
+
+
+def _extraer_metodo(lectura: _Lectura):
+    combinacion = [{"metodo": _METODOS[m.group("metodo")], "peso": a_numero(m.group("n")) / 100}
+                   for m in lectura.tomar_todos(_PORCENTAJE_METODO)]
+    percentil = lectura.tomar(_PERCENTIL)
+    simple = None if combinacion or percentil else lectura.tomar(_METODO)
+    if not (combinacion or percentil or simple):
+        return None
+    lectura.tomar(_VERBO_METODO)
+
+    if len(combinacion) > 1:
+        params = {"metodo": "combinado", "combinacion": combinacion}
+    elif combinacion:
+        params = {"metodo": combinacion[0]["metodo"]}
+    elif percentil:
+        params = {"metodo": "percentil", "percentil": int(percentil.group("n"))}
+    else:
+        texto = re.sub(r"\s+", " ", simple.group("metodo"))
+        params = {"metodo": "promedio_ponderado" if texto == "promedio ponderado" else _METODOS[texto]}
+    m = lectura.tomar(_EXCLUIR)
+    if m:
+        params["cantidad_excluir"] = int(m.group("n"))
+    # Una combinación tiene que repartir el 100% entre dos o más métodos
+    completo = not combinacion or (len(combinacion) > 1 and abs(sum(c["peso"] for c in combinacion) - 1) < 1e-9)
+    return params, completo
+
+
+def _extraer_fuente(lectura: _Lectura):
+    fuentes: Dict[str, Dict[str, Any]] = {}
+    for m in lectura.tomar_todos(_DOMINIO):
+        dominio = m.group("dominio")
+        conocido = next((v for k, v in PORTALES.items() if k.replace(" ", "") in dominio), None)
+        nombre = conocido[1] if conocido else dominio.split(".")[0].title()
+        fuentes.setdefault(nombre, {"url": dominio, "nombre": nombre})
+    prioridad = lectura.tomar(_PRIORIDAD)
+    for m in lectura.tomar_todos(_PORTAL):
+        url, nombre = PORTALES[re.sub(r"\s+", " ", m.group("portal"))]
+        fuentes.setdefault(nombre, {"url": url, "nombre": nombre})
+    if prioridad:
+        url, principal = PORTALES[re.sub(r"\s+", " ", prioridad.group("antes") or prioridad.group("despues"))]
+        fuentes = {principal: fuentes.get(principal, {"url": url, "nombre": principal}), **fuentes}
+    if not fuentes:
+        return None
+    lectura.tomar_todos(_VERBO_FUENTE)
+
+    orden = list(fuentes)
+    return {"fuentes": [{**fuentes[n], "prioridad": i} for i, n in enumerate(orden, 1)]}, True
+
+
+def _extraer_filtro(lectura: _Lectura):
+    if not lectura.tomar(_VERBO_FILTRO):
+        return None
+    filtros: List[Dict[str, Any]] = []
+    marcas, modelos = _vehiculos(lectura)
+    if marcas:
+        filtros.append({"campo": "marca", "operador": "igual" if len(marcas) == 1 else "en_lista",
+                        "valor": _uno_o_lista(marcas)})
+    for modelo in modelos:
+        filtros.append({"campo": "modelo", "operador": "contiene", "valor": modelo})
+
+    m = lectura.tomar(_AÑOS_ENTRE)
+    if m:
+        filtros.append({"campo": "año", "operador": "entre", "valor": [int(m.group("desde")), int(m.group("hasta"))]})
+    m = lectura.tomar(_AÑO_RELATIVO)
+    if m:
+        n = int(m.group("n"))
+        filtros.append({"campo": "año", "operador": "entre", "valor": [-n, n], "relativo": True})
+    año, operador = _condicion_año(lectura)
+    if año:
+        filtros.append({"campo": "año", "operador": operador, "valor": año})
+
+    for m in lectura.tomar_todos(_KM_LIMITE):
+        op = re.sub(r"\s+", " ", m.group("op"))
+        operador = {"menos de": "menor", "hasta": "menor_igual"}.get(op, "menor_igual" if op.startswith("no") else "mayor")
+        filtros.append({"campo": "kilometraje", "operador": operador, "valor": a_numero(m.group("n"))})
+    m = lectura.tomar(_KM_RELATIVO)
+    if m:
+        n = a_numero(m.group("n"))
+        filtros.append({"campo": "kilometraje", "operador": "entre", "valor": [-n, n], "relativo": True})
+
+    m = lectura.tomar(_TRANSMISION)
+    if m:
+        filtros.append({"campo": "transmision", "operador": "igual", "valor": m.lastgroup})
+    combustibles = list(dict.fromkeys(m.lastgroup for m in lectura.tomar_todos(_COMBUSTIBLE)))
+    if combustibles:
+        filtros.append({"campo": "combustible", "operador": "igual" if len(combustibles) == 1 else "en_lista",
+                        "valor": _uno_o_lista(combustibles)})
+    m = lectura.tomar(_VENDEDOR)
+    if m:
+        filtros.append({"campo": "tipo_vendedor", "operador": "igual", "valor": m.lastgroup})
+
+    if not filtros:
+        return {}, False
+    return {"filtros": filtros}, True
+
+
+EXTRACTORES = {
+    "ajuste_calculo": _extraer_ajuste,
+    "depuracion": _extraer_depuracion,
+    "muestreo": _extraer_muestreo,
+    "punto_control": _extraer_punto_control,
+    "metodo_valuacion": _extraer_metodo,
+    "fuente": _extraer_fuente,
+    "filtro_busqueda": _extraer_filtro,
+}
+
+
+# ==========================================
+# Interpretación
+# ==========================================
+
+def interpretar_regla(descripcion: str) -> Dict[str, Any]:
+    """
+    Interpreta la descripción con todos los extractores y se queda con el
+    que mejor la explica. Devuelve el formato del generador con IA más
+    `confianza` (0 a 1) y `sobrantes` (lo que quedó sin explicar).
+    """
+    candidatos = []
+    for tipo, extractor in EXTRACTORES.items():
+        lectura = _Lectura(descripcion)
+        extraido = extractor(lectura)
+        if extraido is None:
+            continue
+        params, completo = extraido
+        sobrantes = lectura.sobrantes()
+        confianza = (1.0 if completo else CONFIANZA_INCOMPLETA) - PENALIZACION_SOBRANTE * len(sobrantes)
+        candidatos.append((max(confianza, 0.0), tipo, params, sobrantes))
+
+    if not candidatos:
+        return {"tipo_detectado": _tipo_heuristico(descripcion), "es_valido": False, "parametros": {},
+                "confianza": 0.0, "sobrantes": _Lectura(descripcion).sobrantes()}
+
+    # Empates: decide la heurística por palabras clave y la confianza baja
+    preferido = _tipo_heuristico(descripcion)
+    candidatos.sort(key=lambda c: (c[0], c[1] == preferido), reverse=True)
+    confianza, tipo, params, sobrantes = candidatos[0]
+    if len(candidatos) > 1 and candidatos[1][0] == confianza:
+        confianza *= FACTOR_AMBIGUO
+
+    return {
+        "tipo_detectado": tipo,
+        "es_valido": bool(params),
+        "parametros": params,
+        "confianza": round(confianza, 2),
+        "sobrantes": sobrantes,
+    }
+
+
+def _tipo_heuristico(descripcion: str) -> str:
+    return tipo_ganador({tipo: len(frases) for tipo, frases in coincidencias_por_tipo(descripcion).items()})
@@ -0,0 +1,55 @@
+# frontend/servicios/sondeo_proveedores.py
+"""
+Disponibilidad de Ollama (y sus modelos) sin bloquear los reruns.
+
+El GET a /api/tags corre en un hilo; mientras tanto se sigue mostrando el
+último resultado (o None si todavía no hubo ninguno). Pasado el TTL, la
+siguiente consulta dispara un sondeo nuevo en segundo plano.
+"""
+
+import threading
+import time
+from typing import List, Optional, Tuple
+
+import requests
+
+TIMEOUT_SEGUNDOS = 1.0
+
+
+class SondeoOllama:
+    def __init__(self, url: str, ttl_segundos: float = 60, timeout: float = TIMEOUT_SEGUNDOS):
+        self.url = url
+        self.ttl = ttl_segundos
+        self.timeout = timeout
+        self._resultado: Optional[Tuple[bool, List[str]]] = None
+        self._vence = 0.0
+        self._en_curso = False
+        self._listo = threading.Event()
+        self._lock = threading.Lock()
+
+    def estado(self, espera: float = 0.0) -> Optional[Tuple[bool, List[str]]]:
+        """
+        (disponible, modelos) del último sondeo; None si el primero todavía
+        no terminó. `espera` da un margen para que el primero llegue a tiempo.
+        """
+        with self._lock:
+            if time.monotonic() >= self._vence and not self._en_curso:
+                self._en_curso = True
+                threading.Thread(target=self._sondear, name="sondeo-ollama", daemon=True).start()
+        if self._resultado is None and espera:
+            self._listo.wait(espera)
+        return self._resultado
+
+    def _sondear(self):
+        resultado = (False, [])
+        try:
+            response = requests.get(f"{self.url}/api/tags", timeout=self.timeout)
+            if response.status_code == 200:
+                resultado = (True, [m["name"] for m in response.json().get("models", [])])
+        except Exception:
+            pass
+        with self._lock:
+            self._resultado = resultado
+            self._vence = time.monotonic() + self.ttl
+            self._en_curso = False
+        self._listo.set()
@@ -0,0 +1,31 @@
+# tests/test_importacion.py
+"""
+Presupuesto de arranque de la API: importar api.main en un intérprete nuevo
+queda dentro de PRESUPUESTO_MS (PRESUPUESTO_IMPORTACION_MS) y no carga las
+dependencias pesadas que solo usan algunos endpoints.
+
+Usa las mismas mediciones que benchmarks/bench_importacion.py.
+"""
+
+import pytest
+
+from benchmarks.bench_importacion import PRESUPUESTO_MS, ejecutar
+
+
+@pytest.fixture(scope="module")
+def medicion() -> dict:
+    return ejecutar("api.main", repeticiones=3)
+
+
+def test_importacion_dentro_del_presupuesto(medicion):
+    assert medicion["ms_importacion"] <= PRESUPUESTO_MS, (
+        f"import api.main tarda {medicion['ms_importacion']:.0f} ms (presupuesto {PRESUPUESTO_MS:.0f} ms); "
+        f"ms por paquete: {medicion['ms_por_paquete']}"
+    )
+
+
+def test_sin_importaciones_diferidas(medicion):
+    assert not medicion["diferidos_importados"], (
+        f"Se importan al arrancar: {', '.join(medicion['diferidos_importados'])}"
+    )
+